@@ -38,13 +38,14 @@ from gns3server.utils.interfaces import is_interface_up
 from ..config import Config
 from ..utils.asyncio import wait_run_in_executor
 from ..utils import force_unix_path
+from ..utils.clone import clone_file
 from .project_manager import ProjectManager
 from .port_manager import PortManager
 
 from .nios.nio_udp import NIOUDP
 from .nios.nio_tap import NIOTAP
 from .nios.nio_ethernet import NIOEthernet
-from ..utils.images import md5sum, remove_checksum, images_directories, default_images_directory, list_images
+from ..utils.images import md5sum, remove_checksum, images_directories, default_images_directory, ImageCatalog
 from .error import NodeError, ImageMissingError
 
 CHUNK_SIZE = 1024 * 8  # 8KB
@@ -541,14 +542,7 @@ class BaseManager:
         :returns: Path or None if not found
         """
 
-        s = os.path.split(searched_file)
-        for root, dirs, files in os.walk(directory):
-            for file in files:
-                if s[1] == file and (s[0] == '' or root == os.path.join(directory, s[0])):
-                    path = os.path.normpath(os.path.join(root, s[1]))
-                    if os.path.exists(path):
-                        return path
-        return None
+        return ImageCatalog.instance(self._NODE_TYPE).find_file(directory, searched_file)
 
     def get_relative_image_path(self, path, extra_dir=None):
         """
@@ -588,7 +582,7 @@ class BaseManager:
         """
 
         try:
-            return list_images(self._NODE_TYPE)
+            return await ImageCatalog.instance(self._NODE_TYPE).list_images()
         except OSError as e:
             raise aiohttp.web.HTTPConflict(text="Can not list images {}".format(e))
 
@@ -601,12 +595,20 @@ class BaseManager:
             return default_images_directory(self._NODE_TYPE)
         raise NotImplementedError
 
-    async def write_image(self, filename, stream):
+    def _image_write_path(self, filename):
+        """
+        :returns: Path where an uploaded image is written
+        """
 
         directory = self.get_images_directory()
         path = os.path.abspath(os.path.join(directory, *os.path.split(filename)))
         if os.path.commonprefix([directory, path]) != directory:
             raise aiohttp.web.HTTPForbidden(text="Could not write image: {}, {} is forbidden".format(filename, path))
+        return path
+
+    async def write_image(self, filename, stream):
+
+        path = self._image_write_path(filename)
         log.info("Writing image file to '{}'".format(path))
         try:
             remove_checksum(path)
@@ -622,6 +624,88 @@ class BaseManager:
             os.chmod(tmp_path, stat.S_IWRITE | stat.S_IREAD | stat.S_IEXEC)
             shutil.move(tmp_path, path)
             await cancellable_wait_run_in_executor(md5sum, path)
+            ImageCatalog.instance(self._NODE_TYPE).refresh()
+        except OSError as e:
+            raise aiohttp.web.HTTPConflict(text="Could not write image: {} because {}".format(filename, e))
+
+    async def image_upload_status(self, filename, checksum):
+        """
+        Check if an image must be uploaded. When an image with the same
+        MD5 is available under another name it is copied instead.
+
+        :param filename: Image filename
+        :param checksum: MD5 of the image
+        :returns: Dictionary with exists (True if the image is already there)
+        and offset (where to resume the upload)
+        """
+
+        path = self._image_write_path(filename)
+        status = {"filename": filename, "md5sum": checksum, "exists": False, "offset": 0}
+        try:
+            if os.path.isfile(path) and await wait_run_in_executor(md5sum, path) == checksum:
+                status["exists"] = True
+                return status
+
+            catalog = ImageCatalog.instance(self._NODE_TYPE)
+            await catalog.refresh()
+            image = catalog.get_image_by_md5(checksum)
+            if image:
+                source = self.get_abs_image_path(image["path"])
+                log.info("Copying image '{}' to '{}' instead of uploading it".format(source, path))
+                remove_checksum(path)
+                await wait_run_in_executor(clone_file, source, path)
+                await wait_run_in_executor(md5sum, path)
+                catalog.refresh()
+                status["exists"] = True
+                return status
+
+            part_path = path + ".part"
+            if os.path.isfile(part_path):
+                status["offset"] = os.path.getsize(part_path)
+        except (OSError, ImageMissingError) as e:
+            raise aiohttp.web.HTTPConflict(text="Could not check image: {} because {}".format(filename, e))
+        return status
+
+    async def write_image_chunk(self, filename, stream, offset, checksum=None):
+        """
+        Write a part of an image, the upload can be resumed from the
+        end of the data already received.
+
+        :param filename: Image filename
+        :param stream: Data of the chunk
+        :param offset: Position of the chunk in the image
+        :param checksum: MD5 of the image, only sent with the last chunk
+        """
+
+        path = self._image_write_path(filename)
+        part_path = path + ".part"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            size = os.path.getsize(part_path) if os.path.isfile(part_path) else 0
+            if offset > size:
+                raise aiohttp.web.HTTPConflict(text="Could not write image: {} because only {} bytes have been received before offset {}".format(filename, size, offset))
+            async with aiofiles.open(part_path, "r+b" if size else "wb") as f:
+                await f.truncate(offset)
+                await f.seek(offset)
+                while True:
+                    chunk = await stream.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    await f.write(chunk)
+            if checksum is None:
+                return
+
+            # the upload is finished, the image is checked before using it
+            remove_checksum(part_path)
+            if await wait_run_in_executor(md5sum, part_path) != checksum:
+                remove_checksum(part_path)
+                os.remove(part_path)
+                raise aiohttp.web.HTTPConflict(text="Could not write image: {} because the MD5 of the uploaded file is not {}".format(filename, checksum))
+            log.info("Writing image file to '{}'".format(path))
+            os.chmod(part_path, stat.S_IWRITE | stat.S_IREAD | stat.S_IEXEC)
+            shutil.move(part_path, path)
+            shutil.move(part_path + ".md5sum", path + ".md5sum")
+            ImageCatalog.instance(self._NODE_TYPE).refresh()
         except OSError as e:
             raise aiohttp.web.HTTPConflict(text="Could not write image: {} because {}".format(filename, e))
 
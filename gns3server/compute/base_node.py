@@ -33,6 +33,7 @@ from ..compute.port_manager import PortManager
 from ..utils.asyncio import wait_run_in_executor, locking
 from ..utils.asyncio.telnet_server import AsyncioTelnetServer
 from ..ubridge.hypervisor import Hypervisor
+from ..ubridge.hypervisor_pool import HypervisorPool
 from ..ubridge.ubridge_error import UbridgeError
 from .nios.nio_udp import NIOUDP
 from .error import NodeError
@@ -71,6 +72,7 @@ class BaseNode:
         self._temporary_directory = None
         self._hw_virtualization = False
         self._ubridge_hypervisor = None
+        self._ubridge_pool = None
         self._closed = False
         self._node_status = "stopped"
         self._command_line = ""
@@ -616,6 +618,16 @@ class BaseNode:
         path = shutil.which(path)
         return path
 
+    @property
+    def ubridge_pool(self):
+        """
+        Returns the pool of shared uBridge hypervisors used by this node.
+
+        :returns: HypervisorPool instance or None if the node has its own uBridge
+        """
+
+        return self._ubridge_pool
+
     async def _ubridge_send(self, command):
         """
         Sends a command to uBridge hypervisor.
@@ -628,10 +640,47 @@ class BaseNode:
         if not self._ubridge_hypervisor or not self._ubridge_hypervisor.is_running():
             raise NodeError("Cannot send command '{}': uBridge is not running".format(command))
         try:
-            await self._ubridge_hypervisor.send(command)
+            if self._ubridge_pool:
+                await self._ubridge_pool.send(self, command)
+            else:
+                await self._ubridge_hypervisor.send(command)
         except UbridgeError as e:
             raise UbridgeError("Error while sending command '{}': {}: {}".format(command, e, self._ubridge_hypervisor.read_stdout()))
 
+    async def _ubridge_send_batch(self, commands, return_exceptions=False):
+        """
+        Sends several commands to uBridge hypervisor in one round trip.
+
+        :param commands: list of commands to send
+        :param return_exceptions: return the UbridgeError of the failed commands
+        in the results instead of raising the first one
+
+        :returns: list of results, one per command
+        """
+
+        if not commands:
+            return []
+        if not self._ubridge_hypervisor or not self._ubridge_hypervisor.is_running():
+            await self._start_ubridge(self._ubridge_require_privileged_access)
+        if not self._ubridge_hypervisor or not self._ubridge_hypervisor.is_running():
+            raise NodeError("Cannot send command '{}': uBridge is not running".format(commands[0]))
+        try:
+            if self._ubridge_pool:
+                results = await self._ubridge_pool.send_batch(self, commands, return_exceptions=True)
+            else:
+                results = await self._ubridge_hypervisor.send_batch(commands, return_exceptions=True)
+        except UbridgeError as e:
+            raise UbridgeError("Error while sending command '{}': {}: {}".format(commands[0], e, self._ubridge_hypervisor.read_stdout()))
+
+        if any(isinstance(result, UbridgeError) for result in results):
+            stdout = self._ubridge_hypervisor.read_stdout()
+            for index, result in enumerate(results):
+                if isinstance(result, UbridgeError):
+                    results[index] = UbridgeError("Error while sending command '{}': {}: {}".format(commands[index], result, stdout))
+                    if not return_exceptions:
+                        raise results[index]
+        return results
+
     @locking
     async def _start_ubridge(self, require_privileged_access=False):
         """
@@ -648,8 +697,20 @@ class BaseNode:
         if require_privileged_access and not self._manager.has_privileged_access(self.ubridge_path):
             raise NodeError("uBridge requires root access or the capability to interact with network adapters")
 
+        # save if privileged are required in case uBridge needs to be restarted in self._ubridge_send()
+        self._ubridge_require_privileged_access = require_privileged_access
         server_config = self._manager.config.get_section_config("Server")
         server_host = server_config.get("host")
+
+        # nodes needing privileged access keep their own hypervisor
+        if server_config.getboolean("shared_ubridge", False) and not require_privileged_access:
+            self._ubridge_pool = HypervisorPool.instance(self._project,
+                                                         self.ubridge_path,
+                                                         server_host,
+                                                         int(server_config.get("shared_ubridge_processes", 1)))
+            self._ubridge_hypervisor = await self._ubridge_pool.attach(self)
+            return
+
         if not self.ubridge:
             self._ubridge_hypervisor = Hypervisor(self._project, self.ubridge_path, self.working_dir, server_host)
         log.info("Starting new uBridge hypervisor {}:{}".format(self._ubridge_hypervisor.host, self._ubridge_hypervisor.port))
@@ -657,15 +718,30 @@ class BaseNode:
         if self._ubridge_hypervisor:
             log.info("Hypervisor {}:{} has successfully started".format(self._ubridge_hypervisor.host, self._ubridge_hypervisor.port))
             await self._ubridge_hypervisor.connect()
-        # save if privileged are required in case uBridge needs to be restarted in self._ubridge_send()
-        self._ubridge_require_privileged_access = require_privileged_access
+
+    def processes(self):
+        """
+        Returns the processes running for this node, used to collect telemetry.
+
+        :returns: dictionary process role => asyncio subprocess
+        """
+
+        processes = {}
+        # a shared hypervisor is not used only by this node
+        if self._ubridge_hypervisor and self._ubridge_hypervisor.process and not self._ubridge_pool:
+            processes["ubridge"] = self._ubridge_hypervisor.process
+        return processes
 
     async def _stop_ubridge(self):
         """
         Stops uBridge.
         """
 
-        if self._ubridge_hypervisor and self._ubridge_hypervisor.is_running():
+        if self._ubridge_pool:
+            log.info("Deleting the bridges of node {} from the shared uBridge hypervisor".format(self.name))
+            await self._ubridge_pool.detach(self)
+            self._ubridge_pool = None
+        elif self._ubridge_hypervisor and self._ubridge_hypervisor.is_running():
             log.info("Stopping uBridge hypervisor {}:{}".format(self._ubridge_hypervisor.host, self._ubridge_hypervisor.port))
             await self._ubridge_hypervisor.stop()
         self._ubridge_hypervisor = None
@@ -679,27 +755,23 @@ class BaseNode:
         :param destination_nio: destination NIO instance
         """
 
-        await self._ubridge_send("bridge create {name}".format(name=bridge_name))
-
         if not isinstance(destination_nio, NIOUDP):
             raise NodeError("Destination NIO is not UDP")
 
-        await self._ubridge_send('bridge add_nio_udp {name} {lport} {rhost} {rport}'.format(name=bridge_name,
-                                                                                                 lport=source_nio.lport,
-                                                                                                 rhost=source_nio.rhost,
-                                                                                                 rport=source_nio.rport))
-
-        await self._ubridge_send('bridge add_nio_udp {name} {lport} {rhost} {rport}'.format(name=bridge_name,
-                                                                                                 lport=destination_nio.lport,
-                                                                                                 rhost=destination_nio.rhost,
-                                                                                                 rport=destination_nio.rport))
+        commands = ["bridge create {name}".format(name=bridge_name)]
+        for nio in (source_nio, destination_nio):
+            commands.append('bridge add_nio_udp {name} {lport} {rhost} {rport}'.format(name=bridge_name,
+                                                                                        lport=nio.lport,
+                                                                                        rhost=nio.rhost,
+                                                                                        rport=nio.rport))
 
         if destination_nio.capturing:
-            await self._ubridge_send('bridge start_capture {name} "{pcap_file}"'.format(name=bridge_name,
-                                                                                             pcap_file=destination_nio.pcap_output_file))
+            commands.append('bridge start_capture {name} "{pcap_file}"'.format(name=bridge_name,
+                                                                               pcap_file=destination_nio.pcap_output_file))
 
-        await self._ubridge_send('bridge start {name}'.format(name=bridge_name))
-        await self._ubridge_apply_filters(bridge_name, destination_nio.filters)
+        commands.append('bridge start {name}'.format(name=bridge_name))
+        commands.extend(self._ubridge_filter_commands(bridge_name, destination_nio.filters))
+        await self._ubridge_send_commands(commands)
 
     async def update_ubridge_udp_connection(self, bridge_name, source_nio, destination_nio):
         if destination_nio:
@@ -721,19 +793,36 @@ class BaseNode:
         :param filters: Array of filter dictionary
         """
 
-        await self._ubridge_send('bridge reset_packet_filters ' + bridge_name)
+        await self._ubridge_send_commands(self._ubridge_filter_commands(bridge_name, filters))
+
+    def _ubridge_filter_commands(self, bridge_name, filters):
+        """
+        :returns: uBridge commands replacing the packet filters of a bridge
+        """
+
+        commands = ['bridge reset_packet_filters ' + bridge_name]
         for packet_filter in self._build_filter_list(filters):
-            cmd = 'bridge add_packet_filter {} {}'.format(bridge_name, packet_filter)
-            try:
-                await self._ubridge_send(cmd)
-            except UbridgeError as e:
-                match = re.search(r"Cannot compile filter '(.*)': syntax error", str(e))
-                if match:
-                    message = "Warning: ignoring BPF packet filter '{}' due to syntax error".format(self.name, match.group(1))
-                    log.warning(message)
-                    self.project.emit("log.warning", {"message": message})
-                else:
-                    raise
+            commands.append('bridge add_packet_filter {} {}'.format(bridge_name, packet_filter))
+        return commands
+
+    async def _ubridge_send_commands(self, commands):
+        """
+        Sends commands to uBridge in one batch, packet filters with
+        a syntax error are ignored with a warning.
+
+        :param commands: list of commands to send
+        """
+
+        for result in await self._ubridge_send_batch(commands, return_exceptions=True):
+            if not isinstance(result, UbridgeError):
+                continue
+            match = re.search(r"Cannot compile filter '(.*)': syntax error", str(result))
+            if match:
+                message = "Warning: ignoring BPF packet filter '{}' due to syntax error".format(match.group(1))
+                log.warning(message)
+                self.project.emit("log.warning", {"message": message})
+            else:
+                raise result
 
     def _build_filter_list(self, filters):
         """
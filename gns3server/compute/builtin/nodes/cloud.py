@@ -287,22 +287,26 @@ class Cloud(BaseNode):
             raise NodeError("Port {port_number} doesn't exist on cloud '{name}'".format(name=self.name,
                                                                                         port_number=port_number))
 
-        bridge_name = "{}-{}".format(self._id, port_number)
-        await self._ubridge_send("bridge create {name}".format(name=bridge_name))
         if not isinstance(nio, NIOUDP):
             raise NodeError("Source NIO is not UDP")
-        await self._ubridge_send('bridge add_nio_udp {name} {lport} {rhost} {rport}'.format(name=bridge_name,
-                                                                                            lport=nio.lport,
-                                                                                            rhost=nio.rhost,
-                                                                                            rport=nio.rport))
 
-        await self._ubridge_apply_filters(bridge_name, nio.filters)
+        bridge_name = "{}-{}".format(self._id, port_number)
+        commands = ["bridge create {name}".format(name=bridge_name),
+                    'bridge add_nio_udp {name} {lport} {rhost} {rport}'.format(name=bridge_name,
+                                                                               lport=nio.lport,
+                                                                               rhost=nio.rhost,
+                                                                               rport=nio.rport)]
+        commands.extend(self._ubridge_filter_commands(bridge_name, nio.filters))
+
         if port_info["type"] in ("ethernet", "tap"):
 
             if not self.manager.has_privileged_access(self.ubridge_path):
                 raise NodeError("uBridge requires root access or the capability to interact with Ethernet and TAP adapters")
 
             if sys.platform.startswith("win"):
+                # the interface is looked up with its own commands
+                await self._ubridge_send_commands(commands)
+                commands = []
                 await self._add_ubridge_ethernet_connection(bridge_name, port_info["interface"])
 
             else:
@@ -312,30 +316,31 @@ class Cloud(BaseNode):
                         raise NodeError("Interface '{}' could not be found on this system, please update '{}'".format(port_info["interface"], self.name))
 
                     if sys.platform.startswith("linux"):
-                        await self._add_linux_ethernet(port_info, bridge_name)
+                        commands.extend(self._linux_ethernet_commands(port_info, bridge_name))
                     elif sys.platform.startswith("darwin"):
-                        await self._add_osx_ethernet(port_info, bridge_name)
+                        commands.extend(await self._osx_ethernet_commands(port_info, bridge_name))
                     else:
-                        await self._add_windows_ethernet(port_info, bridge_name)
+                        commands.extend(self._windows_ethernet_commands(port_info, bridge_name))
 
                 elif port_info["type"] == "tap":
-                    await self._ubridge_send('bridge add_nio_tap {name} "{interface}"'.format(name=bridge_name, interface=port_info["interface"]))
+                    commands.append('bridge add_nio_tap {name} "{interface}"'.format(name=bridge_name, interface=port_info["interface"]))
 
         elif port_info["type"] == "udp":
-            await self._ubridge_send('bridge add_nio_udp {name} {lport} {rhost} {rport}'.format(name=bridge_name,
-                                                                                                     lport=port_info["lport"],
-                                                                                                     rhost=port_info["rhost"],
-                                                                                                     rport=port_info["rport"]))
+            commands.append('bridge add_nio_udp {name} {lport} {rhost} {rport}'.format(name=bridge_name,
+                                                                                       lport=port_info["lport"],
+                                                                                       rhost=port_info["rhost"],
+                                                                                       rport=port_info["rport"]))
 
         if nio.capturing:
-            await self._ubridge_send('bridge start_capture {name} "{pcap_file}"'.format(name=bridge_name,
-                                                                                             pcap_file=nio.pcap_output_file))
+            commands.append('bridge start_capture {name} "{pcap_file}"'.format(name=bridge_name,
+                                                                               pcap_file=nio.pcap_output_file))
 
-        await self._ubridge_send('bridge start {name}'.format(name=bridge_name))
+        commands.append('bridge start {name}'.format(name=bridge_name))
+        await self._ubridge_send_commands(commands)
 
-    async def _add_linux_ethernet(self, port_info, bridge_name):
+    def _linux_ethernet_commands(self, port_info, bridge_name):
         """
-        Connects an Ethernet interface on Linux using raw sockets.
+        Commands connecting an Ethernet interface on Linux using raw sockets.
 
         A TAP is used if the interface is a bridge
         """
@@ -351,14 +356,13 @@ class Cloud(BaseNode):
                     break
                 i += 1
 
-            await self._ubridge_send('bridge add_nio_tap "{name}" "{interface}"'.format(name=bridge_name, interface=tap))
-            await self._ubridge_send('brctl addif "{interface}" "{tap}"'.format(tap=tap, interface=interface))
-        else:
-            await self._ubridge_send('bridge add_nio_linux_raw {name} "{interface}"'.format(name=bridge_name, interface=interface))
+            return ['bridge add_nio_tap "{name}" "{interface}"'.format(name=bridge_name, interface=tap),
+                    'brctl addif "{interface}" "{tap}"'.format(tap=tap, interface=interface)]
+        return ['bridge add_nio_linux_raw {name} "{interface}"'.format(name=bridge_name, interface=interface)]
 
-    async def _add_osx_ethernet(self, port_info, bridge_name):
+    async def _osx_ethernet_commands(self, port_info, bridge_name):
         """
-        Connects an Ethernet interface on OSX using libpcap.
+        Commands connecting an Ethernet interface on OSX using libpcap.
         """
 
         # Wireless adapters are not well supported by the libpcap on OSX
@@ -366,21 +370,19 @@ class Cloud(BaseNode):
             raise NodeError("Connecting to a Wireless adapter is not supported on Mac OS")
         if port_info["interface"].startswith("vmnet"):
             # Use a special NIO to connect to VMware vmnet interfaces on OSX (libpcap doesn't support them)
-            await self._ubridge_send('bridge add_nio_fusion_vmnet {name} "{interface}"'.format(name=bridge_name,
-                                                                                               interface=port_info["interface"]))
-            return
+            return ['bridge add_nio_fusion_vmnet {name} "{interface}"'.format(name=bridge_name, interface=port_info["interface"])]
         if not gns3server.utils.interfaces.has_netmask(port_info["interface"]):
             raise NodeError("Interface {} has no netmask, interface down?".format(port_info["interface"]))
-        await self._ubridge_send('bridge add_nio_ethernet {name} "{interface}"'.format(name=bridge_name, interface=port_info["interface"]))
+        return ['bridge add_nio_ethernet {name} "{interface}"'.format(name=bridge_name, interface=port_info["interface"])]
 
-    async def _add_windows_ethernet(self, port_info, bridge_name):
+    def _windows_ethernet_commands(self, port_info, bridge_name):
         """
-        Connects an Ethernet interface on Windows.
+        Commands connecting an Ethernet interface on Windows.
         """
 
         if not gns3server.utils.interfaces.has_netmask(port_info["interface"]):
             raise NodeError("Interface {} has no netmask, interface down?".format(port_info["interface"]))
-        await self._ubridge_send('bridge add_nio_ethernet {name} "{interface}"'.format(name=bridge_name, interface=port_info["interface"]))
+        return ['bridge add_nio_ethernet {name} "{interface}"'.format(name=bridge_name, interface=port_info["interface"])]
 
     async def add_nio(self, nio, port_number):
         """
@@ -35,6 +35,7 @@ log = logging.getLogger(__name__)
 
 from gns3server.utils.interfaces import interfaces, is_interface_up
 from gns3server.utils.asyncio import wait_run_in_executor
+from gns3server.utils.identifiers import NumberPool
 from gns3server.utils import parse_version
 from uuid import uuid4
 from ..base_manager import BaseManager
@@ -122,6 +123,8 @@ class Dynamips(BaseManager):
         self._ghost_files = set()
         self._dynamips_path = None
         self._dynamips_ids = {}
+        # project ID => NumberPool of the Dynamips IDs
+        self._dynamips_id_pools = {}
 
     @classmethod
     def node_types(cls):
@@ -135,12 +138,13 @@ class Dynamips(BaseManager):
         :param project_id: UUID of the project
         :returns: a free dynamips id
         """
-        self._dynamips_ids.setdefault(project_id, set())
-        for dynamips_id in range(1, 4097):
-            if dynamips_id not in self._dynamips_ids[project_id]:
-                self._dynamips_ids[project_id].add(dynamips_id)
-                return dynamips_id
-        raise DynamipsError("Maximum number of Dynamips instances reached")
+        dynamips_ids = self._dynamips_ids.setdefault(project_id, set())
+        pool = self._dynamips_id_pools.setdefault(project_id, NumberPool(1, 4097))
+        dynamips_id = pool.allocate(lambda dynamips_id: dynamips_id in dynamips_ids)
+        if dynamips_id is None:
+            raise DynamipsError("Maximum number of Dynamips instances reached")
+        dynamips_ids.add(dynamips_id)
+        return dynamips_id
 
     def take_dynamips_id(self, project_id, dynamips_id):
         """
@@ -164,6 +168,8 @@ class Dynamips(BaseManager):
         self._dynamips_ids.setdefault(project_id, set())
         if dynamips_id in self._dynamips_ids[project_id]:
             self._dynamips_ids[project_id].remove(dynamips_id)
+            if project_id in self._dynamips_id_pools:
+                self._dynamips_id_pools[project_id].release(dynamips_id)
 
     async def unload(self):
 
@@ -235,6 +241,7 @@ class Dynamips(BaseManager):
         # later
         if project.id in self._dynamips_ids:
             del self._dynamips_ids[project.id]
+        self._dynamips_id_pools.pop(project.id, None)
 
     @property
     def dynamips_path(self):
@@ -102,6 +102,19 @@ class Device:
         """
         self.project.emit("node.updated", self)
 
+    def processes(self):
+        """
+        Returns the processes running for this device, used to collect telemetry.
+        The Dynamips hypervisor may be shared with other devices and routers.
+
+        :returns: dictionary process role => asyncio subprocess
+        """
+
+        processes = {}
+        if self._hypervisor and self._hypervisor.process:
+            processes["dynamips"] = self._hypervisor.process
+        return processes
+
     def create(self):
         """
         Creates the device.
@@ -172,10 +172,10 @@ class EthernetSwitch(Device):
             self._ports = ports
 
     async def update_port_settings(self):
-        for port_settings in self._ports:
-            port_number = port_settings["port_number"]
-            if port_number in self._nios and self._nios[port_number] is not None:
-                await self.set_port_settings(port_number, port_settings)
+
+        # the settings of all the connected ports are sent in one batch
+        await self._apply_port_settings([(port_settings["port_number"], port_settings) for port_settings in self._ports
+                                         if self._nios.get(port_settings["port_number"]) is not None])
 
     async def create(self):
 
@@ -270,17 +270,15 @@ class EthernetSwitch(Device):
         if port_number in self._nios:
             raise DynamipsError("Port {} isn't free".format(port_number))
 
-        await self._hypervisor.send('ethsw add_nio "{name}" {nio}'.format(name=self._name, nio=nio))
+        # the port settings are applied with the same batch
+        port_settings = [(port_number, settings) for settings in self._ports if settings["port_number"] == port_number][:1]
+        command = 'ethsw add_nio "{name}" {nio}'.format(name=self._name, nio=nio)
+        await self._apply_port_settings(port_settings, nios={port_number: nio}, commands=[command])
 
         log.info('Ethernet switch "{name}" [{id}]: NIO {nio} bound to port {port}'.format(name=self._name,
                                                                                           id=self._id,
                                                                                           nio=nio,
                                                                                           port=port_number))
-        self._nios[port_number] = nio
-        for port_settings in self._ports:
-            if port_settings["port_number"] == port_number:
-                await self.set_port_settings(port_number, port_settings)
-                break
 
     async def remove_nio(self, port_number):
         """
@@ -339,12 +337,99 @@ class EthernetSwitch(Device):
         :param settings: port settings
         """
 
+        await self._apply_port_settings([(port_number, settings)])
+
+    def _port_settings_command(self, nio, settings):
+        """
+        Returns the Dynamips command applying port settings.
+
+        :param nio: NIO of the port
+        :param settings: port settings
+
+        :returns: tuple (command, port mapping) or None for an unknown port type
+        """
+
         if settings["type"] == "access":
-            await self.set_access_port(port_number, settings["vlan"])
+            command = 'ethsw set_access_port "{name}" {nio} {vlan_id}'.format(name=self._name,
+                                                                              nio=nio,
+                                                                              vlan_id=settings["vlan"])
+            return command, ("access", settings["vlan"])
         elif settings["type"] == "dot1q":
-            await self.set_dot1q_port(port_number, settings["vlan"])
+            command = 'ethsw set_dot1q_port "{name}" {nio} {native_vlan}'.format(name=self._name,
+                                                                                 nio=nio,
+                                                                                 native_vlan=settings["vlan"])
+            return command, ("dot1q", settings["vlan"])
         elif settings["type"] == "qinq":
-            await self.set_qinq_port(port_number, settings["vlan"], settings.get("ethertype"))
+            ethertype = settings.get("ethertype")
+            if ethertype != "0x8100" and parse_version(self.hypervisor.version) < parse_version('0.2.16'):
+                raise DynamipsError("Dynamips version required is >= 0.2.16 to change the default QinQ Ethernet type, detected version is {}".format(self.hypervisor.version))
+            command = 'ethsw set_qinq_port "{name}" {nio} {outer_vlan} {ethertype}'.format(name=self._name,
+                                                                                           nio=nio,
+                                                                                           outer_vlan=settings["vlan"],
+                                                                                           ethertype=ethertype if ethertype != "0x8100" else "")
+            return command, ("qinq", settings["vlan"], ethertype)
+        return None
+
+    async def _apply_port_settings(self, port_settings, nios=None, commands=()):
+        """
+        Applies the settings of several ports in one batch of commands.
+
+        :param port_settings: list of tuples (port number, port settings)
+        :param nios: NIOs not yet bound to their port (dict port number => NIO),
+        they are recorded once the commands sent before the port settings succeeded
+        :param commands: commands sent before the port settings in the same batch
+        """
+
+        leading = len(commands)
+        commands = list(commands)
+        mappings = []
+        for port_number, settings in port_settings:
+            if nios and port_number in nios:
+                nio = nios[port_number]
+            elif port_number in self._nios:
+                nio = self._nios[port_number]
+            else:
+                raise DynamipsError("Port {} is not allocated".format(port_number))
+            port_command = self._port_settings_command(nio, settings)
+            if port_command:
+                commands.append(port_command[0])
+                mappings.append((port_number, port_command[1]))
+
+        results = []
+        if commands:
+            results = await self._hypervisor.send_batch(commands, return_exceptions=True)
+        for result in results[:leading]:
+            if isinstance(result, DynamipsError):
+                raise result
+        if nios:
+            # the NIOs are bound even if a port setting fails, they must be known to be removed
+            self._nios.update(nios)
+
+        error = None
+        for (port_number, mapping), result in zip(mappings, results[leading:]):
+            if isinstance(result, DynamipsError):
+                if error is None:
+                    error = result
+                continue
+            if mapping[0] == "access":
+                log.info('Ethernet switch "{name}" [{id}]: port {port} set as an access port in VLAN {vlan_id}'.format(name=self._name,
+                                                                                                                       id=self._id,
+                                                                                                                       port=port_number,
+                                                                                                                       vlan_id=mapping[1]))
+            elif mapping[0] == "dot1q":
+                log.info('Ethernet switch "{name}" [{id}]: port {port} set as a 802.1Q port with native VLAN {vlan_id}'.format(name=self._name,
+                                                                                                                               id=self._id,
+                                                                                                                               port=port_number,
+                                                                                                                               vlan_id=mapping[1]))
+            else:
+                log.info('Ethernet switch "{name}" [{id}]: port {port} set as a QinQ ({ethertype}) port with outer VLAN {vlan_id}'.format(name=self._name,
+                                                                                                                                          id=self._id,
+                                                                                                                                          port=port_number,
+                                                                                                                                          vlan_id=mapping[1],
+                                                                                                                                          ethertype=mapping[2]))
+            self._mappings[port_number] = mapping
+        if error is not None:
+            raise error
 
     async def set_access_port(self, port_number, vlan_id):
         """
@@ -354,19 +439,7 @@ class EthernetSwitch(Device):
         :param vlan_id: VLAN number membership
         """
 
-        if port_number not in self._nios:
-            raise DynamipsError("Port {} is not allocated".format(port_number))
-
-        nio = self._nios[port_number]
-        await self._hypervisor.send('ethsw set_access_port "{name}" {nio} {vlan_id}'.format(name=self._name,
-                                                                                                 nio=nio,
-                                                                                                 vlan_id=vlan_id))
-
-        log.info('Ethernet switch "{name}" [{id}]: port {port} set as an access port in VLAN {vlan_id}'.format(name=self._name,
-                                                                                                               id=self._id,
-                                                                                                               port=port_number,
-                                                                                                               vlan_id=vlan_id))
-        self._mappings[port_number] = ("access", vlan_id)
+        await self.set_port_settings(port_number, {"type": "access", "vlan": vlan_id})
 
     async def set_dot1q_port(self, port_number, native_vlan):
         """
@@ -376,20 +449,7 @@ class EthernetSwitch(Device):
         :param native_vlan: native VLAN for this trunk port
         """
 
-        if port_number not in self._nios:
-            raise DynamipsError("Port {} is not allocated".format(port_number))
-
-        nio = self._nios[port_number]
-        await self._hypervisor.send('ethsw set_dot1q_port "{name}" {nio} {native_vlan}'.format(name=self._name,
-                                                                                                    nio=nio,
-                                                                                                    native_vlan=native_vlan))
-
-        log.info('Ethernet switch "{name}" [{id}]: port {port} set as a 802.1Q port with native VLAN {vlan_id}'.format(name=self._name,
-                                                                                                                       id=self._id,
-                                                                                                                       port=port_number,
-                                                                                                                       vlan_id=native_vlan))
-
-        self._mappings[port_number] = ("dot1q", native_vlan)
+        await self.set_port_settings(port_number, {"type": "dot1q", "vlan": native_vlan})
 
     async def set_qinq_port(self, port_number, outer_vlan, ethertype):
         """
@@ -399,24 +459,7 @@ class EthernetSwitch(Device):
         :param outer_vlan: outer VLAN (transport VLAN) for this QinQ port
         """
 
-        if port_number not in self._nios:
-            raise DynamipsError("Port {} is not allocated".format(port_number))
-
-        nio = self._nios[port_number]
-        if ethertype != "0x8100" and parse_version(self.hypervisor.version) < parse_version('0.2.16'):
-            raise DynamipsError("Dynamips version required is >= 0.2.16 to change the default QinQ Ethernet type, detected version is {}".format(self.hypervisor.version))
-
-        await self._hypervisor.send('ethsw set_qinq_port "{name}" {nio} {outer_vlan} {ethertype}'.format(name=self._name,
-                                                                                                              nio=nio,
-                                                                                                              outer_vlan=outer_vlan,
-                                                                                                              ethertype=ethertype if ethertype != "0x8100" else ""))
-
-        log.info('Ethernet switch "{name}" [{id}]: port {port} set as a QinQ ({ethertype}) port with outer VLAN {vlan_id}'.format(name=self._name,
-                                                                                                                                  id=self._id,
-                                                                                                                                  port=port_number,
-                                                                                                                                  vlan_id=outer_vlan,
-                                                                                                                                  ethertype=ethertype))
-        self._mappings[port_number] = ("qinq", outer_vlan, ethertype)
+        await self.set_port_settings(port_number, {"type": "qinq", "vlan": outer_vlan, "ethertype": ethertype})
 
     async def get_mac_addr_table(self):
         """
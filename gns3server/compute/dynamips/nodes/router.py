@@ -213,26 +213,26 @@ class Router(BaseNode):
             self._hypervisor = await self.manager.start_new_hypervisor(working_dir=self.project.module_working_directory(self.manager.module_name.lower()))
             await self._hypervisor.set_working_dir(self._working_directory)
 
-        await self._hypervisor.send('vm create "{name}" {id} {platform}'.format(name=self._name,
-                                                                                     id=self._dynamips_id,
-                                                                                     platform=self._platform))
+        # the router is created and set up with one batch of commands
+        commands = ['vm create "{name}" {id} {platform}'.format(name=self._name,
+                                                                id=self._dynamips_id,
+                                                                platform=self._platform)]
+        if not self._ghost_flag:
+            if self._console:
+                commands.append('vm set_con_tcp_port "{name}" {console}'.format(name=self._name, console=self._console))
+            if self.aux is not None:
+                commands.append('vm set_aux_tcp_port "{name}" {aux}'.format(name=self._name, aux=self.aux))
+            # get the default base MAC address
+            commands.append('{platform} get_mac_addr "{name}"'.format(platform=self._platform, name=self._name))
+
+        results = await self._hypervisor.send_batch(commands)
 
         if not self._ghost_flag:
 
             log.info('Router {platform} "{name}" [{id}] has been created'.format(name=self._name,
                                                                                  platform=self._platform,
                                                                                  id=self._id))
-
-            if self._console:
-                await self._hypervisor.send('vm set_con_tcp_port "{name}" {console}'.format(name=self._name, console=self._console))
-
-            if self.aux is not None:
-                await self._hypervisor.send('vm set_aux_tcp_port "{name}" {aux}'.format(name=self._name, aux=self.aux))
-
-            # get the default base MAC address
-            mac_addr = await self._hypervisor.send('{platform} get_mac_addr "{name}"'.format(platform=self._platform,
-                                                                                                  name=self._name))
-            self._mac_addr = mac_addr[0]
+            self._mac_addr = results[-1][0]
 
         self._hypervisor.devices.append(self)
 
@@ -435,6 +435,19 @@ class Router(BaseNode):
 
         return self._hypervisor
 
+    def processes(self):
+        """
+        Returns the processes running for this node, used to collect telemetry.
+        The Dynamips hypervisor may be shared with other routers.
+
+        :returns: dictionary process role => asyncio subprocess
+        """
+
+        processes = super().processes()
+        if self._hypervisor and self._hypervisor.process:
+            processes["dynamips"] = self._hypervisor.process
+        return processes
+
     async def list(self):
         """
         Returns all VM instances
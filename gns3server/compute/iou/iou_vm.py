@@ -44,6 +44,7 @@ from gns3server.ubridge.ubridge_error import UbridgeError
 from gns3server.utils.file_watcher import FileWatcher
 from gns3server.utils.asyncio.telnet_server import AsyncioTelnetServer
 from gns3server.utils.asyncio import locking
+from gns3server.utils.probe_cache import ProbeCache
 import gns3server.utils.asyncio
 import gns3server.utils.images
 
@@ -168,13 +169,24 @@ class IOUVM(BaseNode):
         else:
             log.info('IOU "{name}" [{id}]: does not use the default IOU image values'.format(name=self._name, id=self._id))
 
+    async def _iou_help(self, env=None):
+        """
+        Returns the help of the IOU image (iou -h), it is only read again
+        when the image changes.
+
+        :param env: environment used to run the image
+        """
+
+        probe = functools.partial(gns3server.utils.asyncio.subprocess_check_output, self._path, "-h", cwd=self.working_dir, env=env, stderr=True)
+        return await ProbeCache.instance().get(self._path, "-h", probe)
+
     async def update_default_iou_values(self):
         """
         Finds the default RAM and NVRAM values for the IOU image.
         """
 
         try:
-            output = await gns3server.utils.asyncio.subprocess_check_output(self._path, "-h", cwd=self.working_dir, stderr=True)
+            output = await self._iou_help()
             match = re.search(r"-n <n>\s+Size of nvram in Kb \(default ([0-9]+)KB\)", output)
             if match:
                 self.nvram = int(match.group(1))
@@ -379,7 +391,9 @@ class IOUVM(BaseNode):
         """
 
         try:
-            output = await gns3server.utils.asyncio.subprocess_check_output("ldd", self._path)
+            # missing libraries may be installed later, only keep the result when there are none
+            probe = functools.partial(gns3server.utils.asyncio.subprocess_check_output, "ldd", self._path)
+            output = await ProbeCache.instance().get(self._path, "ldd", probe, keep=lambda output: "not found" not in output)
         except (OSError, subprocess.SubprocessError) as e:
             log.warning("Could not determine the shared library dependencies for {}: {}".format(self._path, e))
             return
@@ -438,7 +452,9 @@ class IOUVM(BaseNode):
         # in tests or generating one
         if not hasattr(sys, "_called_from_test"):
             try:
-                hostid = (await gns3server.utils.asyncio.subprocess_check_output("hostid")).strip()
+                probe = functools.partial(gns3server.utils.asyncio.subprocess_check_output, "hostid")
+                # the host ID is read from /etc/hostid or derived from the hostname when it doesn't exist
+                hostid = (await ProbeCache.instance().get(shutil.which("hostid"), hostname, probe, files=["/etc/hostid"])).strip()
             except FileNotFoundError as e:
                 raise IOUError("Could not find hostid: {}".format(e))
             except (OSError, subprocess.SubprocessError) as e:
@@ -712,6 +728,18 @@ class IOUVM(BaseNode):
         await self.stop()
         await self.start()
 
+    def processes(self):
+        """
+        Returns the processes running for this node, used to collect telemetry.
+
+        :returns: dictionary process role => asyncio subprocess
+        """
+
+        processes = super().processes()
+        if self._iou_process:
+            processes["iou"] = self._iou_process
+        return processes
+
     def is_running(self):
         """
         Checks if the IOU process is running
@@ -1048,7 +1076,7 @@ class IOUVM(BaseNode):
         if "IOURC" not in os.environ:
             env["IOURC"] = self.iourc_path
         try:
-            output = await gns3server.utils.asyncio.subprocess_check_output(self._path, "-h", cwd=self.working_dir, env=env, stderr=True)
+            output = await self._iou_help(env)
             if re.search(r"-l\s+Enable Layer 1 keepalive messages", output):
                 command.extend(["-l"])
             else:
@@ -0,0 +1,234 @@
+#!/usr/bin/env python
+#
+# Copyright (C) 2020 GNS3 Technologies Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import time
+import asyncio
+import collections
+import psutil
+
+from ..config import Config
+
+import logging
+log = logging.getLogger(__name__)
+
+
+class NodeTelemetry:
+    """
+    Sample periodically the CPU, memory, I/O and context switches of the
+    processes running for each node (emulator, hypervisor and uBridge).
+
+    The last samples of each node are kept in a fixed size ring buffer.
+    """
+
+    def __init__(self):
+
+        server_config = Config.instance().get_section_config("Server")
+        self._interval = float(server_config.get("telemetry_interval", 5))
+        self._max_samples = int(server_config.get("telemetry_samples", 120))
+        # node ID => (project ID, deque of samples)
+        self._samples = {}
+        # PID => psutil.Process, the same object must be used to compute the CPU usage
+        self._processes = {}
+        self._task = None
+
+    @classmethod
+    def instance(cls):
+        """
+        Singleton to return only one instance of NodeTelemetry.
+
+        :returns: instance of NodeTelemetry
+        """
+
+        if not hasattr(cls, "_instance") or cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    @property
+    def interval(self):
+
+        return self._interval
+
+    def start(self):
+        """
+        Start sampling in background, the telemetry_interval server setting set to 0 disables it.
+        """
+
+        if self._interval > 0 and self._task is None:
+            self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self):
+
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+
+        while True:
+            await asyncio.sleep(self._interval)
+            try:
+                await self.sample()
+            except Exception as e:
+                log.warning("Could not collect the node telemetry: {}".format(e))
+
+    @staticmethod
+    def _nodes():
+
+        # imported here because the modules import the base node
+        from . import MODULES
+
+        for module in MODULES:
+            if hasattr(module, "_instance") and module._instance is not None:
+                yield from module.instance().nodes
+
+    async def sample(self):
+        """
+        Take one sample of the processes of all the nodes.
+        """
+
+        targets = {}
+        for node in self._nodes():
+            pids = {}
+            for role, process in node.processes().items():
+                if process is not None and process.returncode is None:
+                    pids[role] = process.pid
+            targets[node.id] = (node.project.id, pids)
+
+        # psutil reads files in /proc, this is done outside of the event loop
+        loop = asyncio.get_event_loop()
+        samples = await loop.run_in_executor(None, self._sample_processes, targets)
+
+        for node_id, (project_id, _) in targets.items():
+            if node_id not in self._samples:
+                self._samples[node_id] = (project_id, collections.deque(maxlen=self._max_samples))
+            if node_id in samples:
+                self._samples[node_id][1].append(samples[node_id])
+        # forget the deleted nodes
+        for node_id in list(self._samples):
+            if node_id not in targets:
+                del self._samples[node_id]
+
+    def _sample_process(self, pid):
+        """
+        Collect the resource usage of a process.
+
+        :param pid: process identifier
+        :returns: usage dictionary, None if the process is not running
+        """
+
+        try:
+            process = self._processes.get(pid)
+            if process is None:
+                process = self._processes[pid] = psutil.Process(pid)
+            with process.oneshot():
+                usage = {
+                    "pid": pid,
+                    "cpu_percent": process.cpu_percent(interval=None),
+                    "rss": process.memory_info().rss,
+                    "read_bytes": 0,
+                    "write_bytes": 0
+                }
+                try:
+                    io_counters = process.io_counters()
+                    usage["read_bytes"] = io_counters.read_bytes
+                    usage["write_bytes"] = io_counters.write_bytes
+                except (AttributeError, psutil.AccessDenied):
+                    # I/O counters are not available on macOS
+                    pass
+                ctx_switches = process.num_ctx_switches()
+                usage["ctx_switches"] = ctx_switches.voluntary + ctx_switches.involuntary
+        except psutil.Error:
+            self._processes.pop(pid, None)
+            return None
+        return usage
+
+    def _sample_processes(self, targets):
+        """
+        Collect the resource usage of the processes.
+
+        A process used by several nodes (e.g. a Dynamips hypervisor running
+        several routers) is sampled once. It is marked as shared in the
+        samples of these nodes and is not included in their totals.
+
+        :param targets: dictionary node ID => (project ID, dictionary role => PID)
+        :returns: dictionary node ID => sample
+        """
+
+        users = collections.Counter()
+        for _, processes in targets.values():
+            users.update(set(processes.values()))
+
+        # the CPU usage is computed since the previous call, each process must be read once
+        usages = {pid: self._sample_process(pid) for pid in users}
+
+        samples = {}
+        timestamp = time.time()
+        for node_id, (_, processes) in targets.items():
+            if not processes:
+                continue
+            sample = {
+                "timestamp": timestamp,
+                "cpu_percent": 0.0,
+                "rss": 0,
+                "read_bytes": 0,
+                "write_bytes": 0,
+                "ctx_switches": 0,
+                "processes": {}
+            }
+            for role, pid in processes.items():
+                usage = usages[pid]
+                if usage is None:
+                    continue
+                shared = users[pid] > 1
+                sample["processes"][role] = dict(usage, shared=shared)
+                if not shared:
+                    for key in ("cpu_percent", "rss", "read_bytes", "write_bytes", "ctx_switches"):
+                        sample[key] += usage[key]
+            samples[node_id] = sample
+
+        # forget the processes which are not running anymore
+        for pid in list(self._processes):
+            if pid not in users:
+                del self._processes[pid]
+        return samples
+
+    def node_statistics(self, node_id):
+        """
+        :param node_id: Node identifier
+        :returns: samples of a node, the most recent last
+        """
+
+        entry = self._samples.get(node_id)
+        samples = list(entry[1]) if entry else []
+        return {
+            "node_id": node_id,
+            "interval": self._interval,
+            "latest": samples[-1] if samples else None,
+            "samples": samples
+        }
+
+    def project_statistics(self, project_id):
+        """
+        :param project_id: Project identifier
+        :returns: samples of all the nodes of a project
+        """
+
+        return [self.node_statistics(node_id) for node_id, entry in self._samples.items() if entry[0] == project_id]
@@ -17,7 +17,7 @@
 
 
 from contextlib import contextmanager
-from ..notification_queue import NotificationQueue
+from ..notification_queue import NotificationQueue, NotificationMessage
 
 
 class NotificationManager:
@@ -36,7 +36,8 @@ class NotificationManager:
 
         Use it with Python with
         """
-        queue = NotificationQueue()
+        # the controller keeps its state from these notifications, none can be dropped
+        queue = NotificationQueue(max_size=0)
         self._listeners.add(queue)
         yield queue
         self._listeners.remove(queue)
@@ -49,8 +50,23 @@ class NotificationManager:
         :param event: Event to send
         :param kwargs: Add this meta to the notification (project_id for example)
         """
+        message = NotificationMessage(action, event, kwargs)
         for listener in self._listeners:
-            listener.put_nowait((action, event, kwargs))
+            listener.put_message(message)
+
+    def statistics(self):
+        """
+        :returns: statistics of the notification queues
+        """
+
+        queues = [queue.stats() for queue in self._listeners]
+        return {
+            "listeners": len(queues),
+            "pending": sum(queue["depth"] for queue in queues),
+            "coalesced": sum(queue["coalesced"] for queue in queues),
+            "dropped": sum(queue["dropped"] for queue in queues),
+            "queues": queues
+        }
 
     @staticmethod
     def reset():
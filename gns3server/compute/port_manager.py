@@ -30,6 +30,136 @@ BANNED_PORTS = set((1, 7, 9, 11, 13, 15, 17, 19, 20, 21, 22, 23, 25, 37, 42, 43,
                     6668, 6669))
 
 
+class PortAllocator:
+    """
+    Allocate ports in a range.
+
+    Allocated ports and ports found busy are tracked in bitsets, a cursor
+    remembers where the last allocation stopped so allocations don't scan
+    the range from the start. Only the candidate ports are checked with
+    the kernel. Ports found busy are checked again once the range is exhausted.
+
+    :param start_port: first port in the range
+    :param end_port: last port in the range
+    :param socket_type: TCP or UDP
+    """
+
+    def __init__(self, start_port, end_port, socket_type="TCP"):
+
+        if end_port < start_port:
+            raise HTTPConflict(text="Invalid port range {}-{}".format(start_port, end_port))
+        self._start_port = start_port
+        self._end_port = end_port
+        self._socket_type = socket_type
+        self._size = end_port - start_port + 1
+        self._allocated = bytearray((self._size + 7) // 8)
+        self._busy = bytearray((self._size + 7) // 8)
+        self._allocated_count = 0
+        self._busy_count = 0
+        self._cursor = 0
+        self._probes = 0
+
+    def __contains__(self, port):
+
+        return self._start_port <= port <= self._end_port
+
+    @staticmethod
+    def _test(bitset, offset):
+
+        return bitset[offset >> 3] & (1 << (offset & 7))
+
+    def _set(self, bitset, offset, value):
+        """
+        Set or clear a bit, returns True if the bit has changed
+        """
+
+        mask = 1 << (offset & 7)
+        if bool(bitset[offset >> 3] & mask) == value:
+            return False
+        bitset[offset >> 3] ^= mask
+        return True
+
+    def is_allocated(self, port):
+
+        return port in self and bool(self._test(self._allocated, port - self._start_port))
+
+    def mark_allocated(self, port):
+        """
+        Record a port allocated outside of this allocator (e.g. a reserved port)
+        """
+
+        if port in self:
+            offset = port - self._start_port
+            if self._set(self._allocated, offset, True):
+                self._allocated_count += 1
+            if self._set(self._busy, offset, False):
+                self._busy_count -= 1
+
+    def mark_released(self, port):
+
+        if port in self and self._set(self._allocated, port - self._start_port, False):
+            self._allocated_count -= 1
+
+    def allocate(self, count, host, check_port):
+        """
+        Allocate free ports, either all the ports are allocated or none.
+
+        :param count: number of ports
+        :param host: host/address for bind()
+        :param check_port: function raising an OSError if a port is not available
+        :returns: list of ports
+        """
+
+        ports = []
+        for _ in range(2):
+            scanned = 0
+            while len(ports) < count and scanned < self._size:
+                offset = self._cursor
+                self._cursor = (self._cursor + 1) % self._size
+                scanned += 1
+                port = self._start_port + offset
+                if self._test(self._allocated, offset) or self._test(self._busy, offset) or port in BANNED_PORTS:
+                    continue
+                self._probes += 1
+                try:
+                    check_port(host, port, self._socket_type)
+                    if host != "0.0.0.0":
+                        check_port("0.0.0.0", port, self._socket_type)
+                except OSError:
+                    self._set(self._busy, offset, True)
+                    self._busy_count += 1
+                    continue
+                self.mark_allocated(port)
+                ports.append(port)
+            if len(ports) == count or self._busy_count == 0:
+                break
+            # ports found busy may have been freed by the other programs
+            self._busy = bytearray(len(self._busy))
+            self._busy_count = 0
+
+        if len(ports) < count:
+            for port in ports:
+                self.mark_released(port)
+            raise HTTPConflict(text="Could not find {} free port(s) between {} and {} on host {}".format(count,
+                                                                                                    self._start_port,
+                                                                                                    self._end_port,
+                                                                                                    host))
+        return ports
+
+    def stats(self):
+
+        return {
+            "socket_type": self._socket_type,
+            "port_range": [self._start_port, self._end_port],
+            "size": self._size,
+            "allocated": self._allocated_count,
+            "busy": self._busy_count,
+            "free": self._size - self._allocated_count - self._busy_count,
+            "occupancy": round(self._allocated_count * 100 / self._size, 2),
+            "probes": self._probes
+        }
+
+
 class PortManager:
 
     """
@@ -42,6 +172,8 @@ class PortManager:
         self._udp_host = "0.0.0.0"
         self._used_tcp_ports = set()
         self._used_udp_ports = set()
+        # (socket type, first port, last port) => PortAllocator
+        self._allocators = {}
 
         server_config = Config.instance().get_section_config("Server")
 
@@ -72,7 +204,8 @@ class PortManager:
         return {"console_port_range": self._console_port_range,
                 "console_ports": list(self._used_tcp_ports),
                 "udp_port_range": self._udp_port_range,
-                "udp_ports": list(self._used_udp_ports)}
+                "udp_ports": list(self._used_udp_ports),
+                "port_ranges": self.statistics()}
 
     @property
     def console_host(self):
@@ -136,6 +269,41 @@ class PortManager:
 
         return self._used_udp_ports
 
+    def _get_allocator(self, socket_type, start_port, end_port):
+        """
+        Returns the allocator of a port range, it is created
+        on first use with the ports already allocated.
+        """
+
+        key = (socket_type, start_port, end_port)
+        allocator = self._allocators.get(key)
+        if allocator is None:
+            allocator = PortAllocator(start_port, end_port, socket_type=socket_type)
+            for port in (self._used_tcp_ports if socket_type == "TCP" else self._used_udp_ports):
+                allocator.mark_allocated(port)
+            self._allocators[key] = allocator
+        return allocator
+
+    def _mark_ports(self, socket_type, ports, allocated):
+        """
+        Update the allocators of all the ranges containing the ports.
+        """
+
+        for (allocator_socket_type, _, _), allocator in self._allocators.items():
+            if allocator_socket_type == socket_type:
+                for port in ports:
+                    if allocated:
+                        allocator.mark_allocated(port)
+                    else:
+                        allocator.mark_released(port)
+
+    def statistics(self):
+        """
+        :returns: occupancy statistics of the port ranges
+        """
+
+        return [allocator.stats() for allocator in self._allocators.values()]
+
     @staticmethod
     def find_unused_port(start_port, end_port, host="127.0.0.1", socket_type="TCP", ignore_ports=None):
         """
@@ -204,13 +372,10 @@ class PortManager:
             port_range_start = self._console_port_range[0]
             port_range_end = self._console_port_range[1]
 
-        port = self.find_unused_port(port_range_start,
-                                     port_range_end,
-                                     host=self._console_host,
-                                     socket_type="TCP",
-                                     ignore_ports=self._used_tcp_ports)
-
+        allocator = self._get_allocator("TCP", port_range_start, port_range_end)
+        port = allocator.allocate(1, self._console_host, self._check_port)[0]
         self._used_tcp_ports.add(port)
+        self._mark_ports("TCP", [port], True)
         project.record_tcp_port(port)
         log.debug("TCP port {} has been allocated".format(port))
         return port
@@ -254,6 +419,7 @@ class PortManager:
             return port
 
         self._used_tcp_ports.add(port)
+        self._mark_ports("TCP", [port], True)
         project.record_tcp_port(port)
         log.debug("TCP port {} has been reserved".format(port))
         return port
@@ -268,6 +434,7 @@ class PortManager:
 
         if port in self._used_tcp_ports:
             self._used_tcp_ports.remove(port)
+            self._mark_ports("TCP", [port], False)
             project.remove_tcp_port(port)
             log.debug("TCP port {} has been released".format(port))
 
@@ -277,16 +444,26 @@ class PortManager:
 
         :param project: Project instance
         """
-        port = self.find_unused_port(self._udp_port_range[0],
-                                     self._udp_port_range[1],
-                                     host=self._udp_host,
-                                     socket_type="UDP",
-                                     ignore_ports=self._used_udp_ports)
+        return self.get_free_udp_ports(project, 1)[0]
 
-        self._used_udp_ports.add(port)
-        project.record_udp_port(port)
-        log.debug("UDP port {} has been allocated".format(port))
-        return port
+    def get_free_udp_ports(self, project, count):
+        """
+        Get several available UDP ports and reserve them,
+        no port is reserved if there are not enough free ports.
+
+        :param project: Project instance
+        :param count: Number of ports
+        :returns: List of UDP ports
+        """
+
+        allocator = self._get_allocator("UDP", self._udp_port_range[0], self._udp_port_range[1])
+        ports = allocator.allocate(count, self._udp_host, self._check_port)
+        self._used_udp_ports.update(ports)
+        self._mark_ports("UDP", ports, True)
+        for port in ports:
+            project.record_udp_port(port)
+        log.debug("UDP port(s) {} have been allocated".format(", ".join(str(port) for port in ports)))
+        return ports
 
     def reserve_udp_port(self, port, project):
         """
@@ -301,6 +478,7 @@ class PortManager:
         if port < self._udp_port_range[0] or port > self._udp_port_range[1]:
             raise HTTPConflict(text="UDP port {} is outside the range {}-{}".format(port, self._udp_port_range[0], self._udp_port_range[1]))
         self._used_udp_ports.add(port)
+        self._mark_ports("UDP", [port], True)
         project.record_udp_port(port)
         log.debug("UDP port {} has been reserved".format(port))
 
@@ -314,5 +492,17 @@ class PortManager:
 
         if port in self._used_udp_ports:
             self._used_udp_ports.remove(port)
+            self._mark_ports("UDP", [port], False)
             project.remove_udp_port(port)
             log.debug("UDP port {} has been released".format(port))
+
+    def release_udp_ports(self, ports, project):
+        """
+        Release several UDP ports
+
+        :param ports: UDP port numbers
+        :param project: Project instance
+        """
+
+        for port in ports:
+            self.release_udp_port(port, project)
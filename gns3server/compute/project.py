@@ -16,6 +16,7 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 import os
+import json
 import aiohttp
 import shutil
 import asyncio
@@ -27,11 +28,18 @@ from .port_manager import PortManager
 from .notification_manager import NotificationManager
 from ..config import Config
 from ..utils.asyncio import wait_run_in_executor
+from ..utils.clone import clone_files
 from ..utils.path import check_path_allowed, get_default_project_directory
 
 import logging
 log = logging.getLogger(__name__)
 
+# File where the MD5 of the project files are kept between listings
+MANIFEST_FILENAME = ".files_manifest.json"
+HASH_BUFFER_SIZE = 1024 * 1024  # 1MB
+# Maximum number of files hashed at the same time
+HASH_CONCURRENCY = 4
+
 
 class Project:
 
@@ -148,6 +156,14 @@ class Project:
         if port not in self._used_tcp_ports:
             self._used_tcp_ports.add(port)
 
+    @property
+    def udp_ports(self):
+        """
+        :returns: UDP port numbers associated with this project
+        """
+
+        return self._used_udp_ports
+
     def record_udp_port(self, port):
         """
         Associate a reserved UDP port number with this project.
@@ -401,27 +417,104 @@ class Project:
         """
         NotificationManager.instance().emit(action, event, project_id=self.id)
 
-    async def list_files(self):
+    async def list_files(self, checksum=True):
         """
+        :param checksum: Compute the MD5 of the files, otherwise return their size and modification time
         :returns: Array of files in project without temporary files. The files are dictionary {"path": "test.bin", "md5sum": "aaaaa"}
         """
 
         files = []
         for dirpath, dirnames, filenames in os.walk(self.path, followlinks=False):
             for filename in filenames:
-                if not filename.endswith(".ghost"):
+                if not filename.endswith(".ghost") and filename != MANIFEST_FILENAME:
                     path = os.path.relpath(dirpath, self.path)
                     path = os.path.join(path, filename)
                     path = os.path.normpath(path)
-                    file_info = {"path": path}
+                    files.append(path)
+
+        if not checksum:
+            stat_files = []
+            for path in files:
+                try:
+                    st = os.stat(os.path.join(self.path, path))
+                except OSError:
+                    continue
+                stat_files.append({"path": path, "size": st.st_size, "mtime": st.st_mtime})
+            return stat_files
+
+        manifest = self._load_manifest()
+        new_manifest = {}
+        semaphore = asyncio.Semaphore(HASH_CONCURRENCY)
+
+        async def file_info(path):
+            try:
+                st = os.stat(os.path.join(self.path, path))
+                key = [st.st_size, st.st_mtime_ns, st.st_ino]
+                entry = manifest.get(path)
+                # only the files modified since the last listing are hashed
+                if entry is None or entry[:3] != key:
+                    async with semaphore:
+                        entry = key + [await wait_run_in_executor(self._hash_file, os.path.join(self.path, path))]
+            except OSError:
+                return None
+            new_manifest[path] = entry
+            return {"path": path, "md5sum": entry[3]}
+
+        results = await asyncio.gather(*[file_info(path) for path in files])
+        if new_manifest != manifest:
+            self._save_manifest(new_manifest)
+        return [file_info for file_info in results if file_info is not None]
+
+    def _load_manifest(self):
+        """
+        :returns: Dictionary path => [size, mtime, inode, md5] of the files hashed by the last listing
+        """
 
-                    try:
-                        file_info["md5sum"] = await wait_run_in_executor(self._hash_file, os.path.join(dirpath, filename))
-                    except OSError:
-                        continue
-                    files.append(file_info)
+        try:
+            with open(os.path.join(self.path, MANIFEST_FILENAME), encoding="utf-8") as f:
+                manifest = json.load(f)
+            if isinstance(manifest, dict):
+                return manifest
+        except (OSError, ValueError):
+            pass
+        return {}
+
+    def _save_manifest(self, manifest):
+
+        path = os.path.join(self.path, MANIFEST_FILENAME)
+        try:
+            with open(path + ".tmp", "w+", encoding="utf-8") as f:
+                json.dump(manifest, f)
+            os.replace(path + ".tmp", path)
+        except OSError as e:
+            log.warning("Could not save the file manifest of project {}: {}".format(self._id, e))
+
+    async def duplicate(self, destination, node_ids):
+        """
+        Copy the node files to another project on this compute,
+        without the temporary files, captures and logs.
+
+        :param destination: Destination project
+        :param node_ids: Dictionary old node ID => new node ID
+        """
+
+        files = []
+        for dirpath, dirnames, filenames in os.walk(self.path, followlinks=False):
+            relpath = os.path.relpath(dirpath, self.path)
+            parts = [] if relpath == os.curdir else relpath.split(os.path.sep)
+            if len(parts) >= 2 and parts[0] == "project-files" and parts[1] in ("tmp", "captures"):
+                continue
+            # the node directories are renamed with the new node IDs
+            if len(parts) >= 3 and parts[0] == "project-files":
+                parts[2] = node_ids.get(parts[2], parts[2])
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                if filename.endswith(".ghost") or filename.endswith(".log") or filename.endswith("_log.txt") or os.path.islink(path):
+                    continue
+                files.append((path, os.path.join(destination.path, *parts, filename)))
 
-        return files
+        await clone_files(files)
+        log.info("Project {id} duplicated to project {destination} ({count} files)".format(id=self._id, destination=destination.id, count=len(files)))
 
     def _hash_file(self, path):
         """
@@ -433,7 +526,7 @@ class Project:
         m = hashlib.md5()
         with open(path, "rb") as f:
             while True:
-                buf = f.read(128)
+                buf = f.read(HASH_BUFFER_SIZE)
                 if not buf:
                     break
                 m.update(buf)
@@ -25,8 +25,10 @@ import platform
 import sys
 import re
 import subprocess
+import functools
 
 from ...utils.asyncio import subprocess_check_output
+from ...utils.probe_cache import ProbeCache
 from ...utils.get_resource import get_resource
 from ..base_manager import BaseManager
 from ..error import NodeError, ImageMissingError
@@ -48,6 +50,8 @@ class Qemu(BaseManager):
 
         super().__init__()
         self._guest_cid_lock = asyncio.Lock()
+        # disk image checks, path => ((path, inode, size, mtime), future, event loop)
+        self._disk_checks = {}
         self.config_disk = "config.img"
         self._init_config_disk()
 
@@ -73,6 +77,39 @@ class Qemu(BaseManager):
                 node.guest_cid = get_next_guest_cid(self.nodes)
         return node
 
+    async def check_disk_image(self, disk_image, check):
+        """
+        Checks a disk image once while it is unchanged.
+
+        The result is kept while the path, inode, size and modification
+        time of the image are the same. The nodes checking the same image
+        at the same time share the same check.
+
+        :param disk_image: path to the disk image
+        :param check: coroutine function checking the image, returns True
+        if the image is clean and the check doesn't have to run again
+        """
+
+        path = os.path.realpath(disk_image)
+        st = os.stat(path)
+        key = (path, st.st_ino, st.st_size, st.st_mtime_ns)
+        loop = asyncio.get_event_loop()
+        entry = self._disk_checks.get(path)
+        if entry is None or entry[0] != key or entry[2] is not loop:
+            future = asyncio.ensure_future(check())
+            self._disk_checks[path] = entry = (key, future, loop)
+
+            def forget(future):
+                # failed checks and repaired images are checked again
+                if future.cancelled() or future.exception() or not future.result():
+                    if self._disk_checks.get(path) is entry:
+                        del self._disk_checks[path]
+            future.add_done_callback(forget)
+        else:
+            log.debug("Disk image {} has already been checked".format(disk_image))
+        # a node giving up does not cancel the check for the others
+        await asyncio.shield(entry[1])
+
     @staticmethod
     async def get_kvm_archs():
         """
@@ -217,7 +254,7 @@ class Qemu(BaseManager):
             return ""
         else:
             try:
-                output = await subprocess_check_output(qemu_path, "-version", "-nographic")
+                output = await ProbeCache.instance().get(qemu_path, "-version", functools.partial(subprocess_check_output, qemu_path, "-version", "-nographic"))
                 match = re.search("version\s+([0-9a-z\-\.]+)", output)
                 if match:
                     version = match.group(1)
@@ -236,7 +273,7 @@ class Qemu(BaseManager):
         """
 
         try:
-            output = await subprocess_check_output(qemu_img_path, "--version")
+            output = await ProbeCache.instance().get(qemu_img_path, "--version", functools.partial(subprocess_check_output, qemu_img_path, "--version"))
             match = re.search(r"version\s+([0-9a-z\-\.]+)", output)
             if match:
                 version = match.group(1)
@@ -31,21 +31,22 @@ import asyncio
 import socket
 import gns3server
 import subprocess
-import time
 import json
+import functools
 
 from gns3server.utils import parse_version, shlex_quote
 from gns3server.utils.asyncio import subprocess_check_output, cancellable_wait_run_in_executor
 from .qemu_error import QemuError
 from .utils.qcow2 import Qcow2, Qcow2Error
 from .utils.ziputils import pack_zip, unpack_zip
+from .utils.qmp import QMPConnection
 from ..adapters.ethernet_adapter import EthernetAdapter
 from ..error import NodeError, ImageMissingError
 from ..nios.nio_udp import NIOUDP
 from ..nios.nio_tap import NIOTAP
 from ..base_node import BaseNode
 from ...schemas.qemu import QEMU_OBJECT_SCHEMA, QEMU_PLATFORMS
-from ...utils.asyncio import monitor_process
+from ...utils.asyncio import monitor_process, locking
 from ...utils.images import md5sum
 from ...utils import macaddress_to_int, int_to_macaddress
 
@@ -79,6 +80,7 @@ class QemuVM(BaseNode):
         self._process = None
         self._cpulimit_process = None
         self._monitor = None
+        self._qmp = None
         self._stdout_file = ""
         self._qemu_img_stdout_file = ""
         self._execute_lock = asyncio.Lock()
@@ -1083,6 +1085,10 @@ class QemuVM(BaseNode):
             if "-enable-kvm" in command_string or "-enable-hax" in command_string:
                 self._hw_virtualization = True
 
+            if self._monitor:
+                # the QMP connection stays open to receive the status changes
+                await self._open_qmp_connection()
+
             await self._start_ubridge()
             set_link_commands = []
             for adapter_number, adapter in enumerate(self._ethernet_adapters):
@@ -1135,7 +1141,7 @@ class QemuVM(BaseNode):
 
                     if self.on_close == "save_vm_state":
                         await self._control_vm("stop")
-                        await self._control_vm("savevm GNS3_SAVED_STATE")
+                        await self._control_vm("savevm GNS3_SAVED_STATE", timeout=120)
                         wait_for_savevm = 120
                         while wait_for_savevm:
                             await asyncio.sleep(1)
@@ -1160,6 +1166,7 @@ class QemuVM(BaseNode):
                             pass
                         if self._process.returncode is None:
                             log.warning('QEMU VM "{}" PID={} is still running'.format(self._name, self._process.pid))
+            await self._close_qmp_connection()
             self._process = None
             self._stop_cpulimit()
             if self.on_close != "save_vm_state":
@@ -1167,111 +1174,112 @@ class QemuVM(BaseNode):
             await self._export_config()
             await super().stop()
 
-    async def _open_qemu_monitor_connection_vm(self, timeout=10):
+    @locking
+    async def _open_qmp_connection(self):
         """
-        Opens a connection to the QEMU monitor.
+        Opens the QMP connection of this VM, it is kept open while the VM is running.
 
-        :param timeout: timeout to connect to the monitor TCP server
-        :returns: The reader returned is a StreamReader instance; the writer is a StreamWriter instance
+        :returns: QMPConnection instance or None if the connection failed
         """
 
-        begin = time.time()
-        connection_success = False
-        last_exception = None
-        reader = writer = None
-        while time.time() - begin < timeout:
-            await asyncio.sleep(0.01)
-            try:
-                log.debug("Connecting to Qemu monitor on {}:{}".format(self._monitor_host, self._monitor))
-                reader, writer = await asyncio.open_connection(self._monitor_host, self._monitor)
-            except (asyncio.TimeoutError, OSError) as e:
-                last_exception = e
-                continue
-            connection_success = True
-            break
+        if self._qmp is not None and self._qmp.connected:
+            return self._qmp
+        qmp = QMPConnection(self._monitor_host, self._monitor, on_event=self._qmp_event)
+        try:
+            await qmp.connect()
+        except QemuError as e:
+            log.warning('QEMU VM "{}": {}'.format(self._name, e))
+            return None
+        self._qmp = qmp
+        return qmp
 
-        if not connection_success:
-            log.warning("Could not connect to QEMU monitor on {}:{}: {}".format(self._monitor_host, self._monitor,
-                                                                                last_exception))
-        else:
-            log.info("Connected to QEMU monitor on {}:{} after {:.4f} seconds".format(self._monitor_host, self._monitor, time.time() - begin))
-        return reader, writer
+    async def _close_qmp_connection(self):
+        """
+        Closes the QMP connection of this VM.
+        """
+
+        if self._qmp is not None:
+            await self._qmp.close()
+            self._qmp = None
+
+    def _qmp_event(self, event, data):
+        """
+        Called when QEMU sends an event, the status changes are notified.
 
-    async def _control_vm(self, command, expected=None):
+        :param event: event name
+        :param data: event data
+        """
+
+        if event == "STOP":
+            if self.status == "started":
+                log.info('QEMU VM "{}" has been paused'.format(self._name))
+                self.status = "suspended"
+        elif event == "RESUME":
+            if self.status == "suspended":
+                log.info('QEMU VM "{}" has been resumed'.format(self._name))
+                self.status = "started"
+        elif event == "SHUTDOWN":
+            # the VM is stopped when the QEMU process exits
+            log.info('QEMU VM "{}" has been shut down (guest: {})'.format(self._name, data.get("guest")))
+        elif event == "RESET":
+            log.info('QEMU VM "{}" has been reset'.format(self._name))
+
+    async def _qmp_execute(self, command, arguments=None, timeout=30):
+        """
+        Executes a QMP command when this VM is running.
+
+        :param command: QMP command name
+        :param arguments: dictionary of arguments
+        :param timeout: timeout to wait for the result, None to wait forever
+
+        :returns: result of the command or None if it could not be executed
+        """
+
+        if not self.is_running() or not self._monitor:
+            return None
+        qmp = await self._open_qmp_connection()
+        if qmp is None:
+            return None
+        try:
+            return await qmp.execute(command, arguments, timeout=timeout)
+        except QemuError as e:
+            log.warning('QEMU VM "{}": {}'.format(self._name, e))
+            return None
+
+    async def _control_vm(self, command, expected=None, timeout=30):
         """
         Executes a command with QEMU monitor when this VM is running.
 
         :param command: QEMU monitor command (e.g. info status, stop etc.)
         :param expected: An array of expected strings
+        :param timeout: timeout to wait for the end of the command
 
-        :returns: result of the command (matched object or None)
+        :returns: result of the command (matched line or None)
         """
 
-        result = None
-        if self.is_running() and self._monitor:
-            log.info("Execute QEMU monitor command: {}".format(command))
-            reader, writer = await self._open_qemu_monitor_connection_vm()
-            if reader is None and writer is None:
-                return result
-
-            try:
-                cmd_byte = command.encode('ascii')
-                writer.write(cmd_byte + b"\n")
-                if not expected:
-                    while True:
-                        line = await asyncio.wait_for(reader.readline(), timeout=3)  # echo of the command
-                        if not line or cmd_byte in line:
-                            break
-            except asyncio.TimeoutError:
-                log.warning("Missing echo of command '{}'".format(command))
-            except OSError as e:
-                log.warning("Could not write to QEMU monitor: {}".format(e))
-                writer.close()
-                return result
-            if expected:
-                try:
-                    while result is None:
-                        line = await asyncio.wait_for(reader.readline(), timeout=3)
-                        if not line:
-                            break
-                        for expect in expected:
-                            if expect in line:
-                                result = line.decode("utf-8").strip()
-                                break
-                except asyncio.TimeoutError:
-                    log.warning("Timeout while waiting for result of command '{}'".format(command))
-                except (ConnectionError, EOFError) as e:
-                    log.warning("Could not read from QEMU monitor: {}".format(e))
-            writer.close()
-        return result
+        if not self.is_running() or not self._monitor:
+            return None
+        log.info("Execute QEMU monitor command: {}".format(command))
+        output = await self._qmp_execute("human-monitor-command", {"command-line": command}, timeout=timeout)
+        if output is None or not expected:
+            return None
+        for line in output.splitlines():
+            for expect in expected:
+                if expect in line.encode("utf-8"):
+                    return line.strip()
+        return None
 
     async def _control_vm_commands(self, commands):
         """
         Executes commands with QEMU monitor when this VM is running.
 
+        The commands are sent on the QMP connection without waiting
+        for the result of the previous ones.
+
         :param commands: a list of QEMU monitor commands (e.g. info status, stop etc.)
         """
 
-        if self.is_running() and self._monitor:
-
-            reader, writer = await self._open_qemu_monitor_connection_vm()
-            if reader is None and writer is None:
-                return
-
-            for command in commands:
-                log.info("Execute QEMU monitor command: {}".format(command))
-                try:
-                    cmd_byte = command.encode('ascii')
-                    writer.write(cmd_byte + b"\n")
-                    while True:
-                        line = await asyncio.wait_for(reader.readline(), timeout=3)  # echo of the command
-                        if not line or cmd_byte in line:
-                            break
-                except asyncio.TimeoutError:
-                    log.warning("Missing echo of command '{}'".format(command))
-                except OSError as e:
-                    log.warning("Could not write to QEMU monitor: {}".format(e))
-            writer.close()
+        await asyncio.gather(*[self._control_vm(command) for command in commands])
 
     async def close(self):
         """
@@ -1301,21 +1309,16 @@ class QemuVM(BaseNode):
         """
         Returns this VM suspend status.
 
-        Status are extracted from:
-          https://github.com/qemu/qemu/blob/master/qapi-schema.json#L152
+        Status are returned by the QMP query-status command, see RunState in:
+          https://github.com/qemu/qemu/blob/master/qapi/run-state.json
 
         :returns: status (string)
         """
 
-        result = await self._control_vm("info status", [
-            b"debug", b"inmigrate", b"internal-error", b"io-error",
-            b"paused", b"postmigrate", b"prelaunch", b"finish-migrate",
-            b"restore-vm", b"running", b"save-vm", b"shutdown", b"suspended",
-            b"watchdog", b"guest-panicked"
-        ])
+        result = await self._qmp_execute("query-status")
         if result is None:
             return result
-        status = result.rsplit(' ', 1)[1]
+        status = result.get("status")
         if status == "running" or status == "prelaunch":
             self.status = "started"
         elif status == "suspended":
@@ -1539,20 +1542,35 @@ class QemuVM(BaseNode):
                 log.warning("Could not read {}: {}".format(self._stdout_file, e))
         return output
 
-    def read_qemu_img_stdout(self):
+    def read_qemu_img_stdout(self, stdout_file=None):
         """
         Reads the standard output of the QEMU-IMG process.
+
+        :param stdout_file: log file of the process, the last one used by default
         """
 
         output = ""
-        if self._qemu_img_stdout_file:
+        stdout_file = stdout_file or self._qemu_img_stdout_file
+        if stdout_file:
             try:
-                with open(self._qemu_img_stdout_file, "rb") as file:
+                with open(stdout_file, "rb") as file:
                     output = file.read().decode("utf-8", errors="replace")
             except OSError as e:
-                log.warning("Could not read {}: {}".format(self._qemu_img_stdout_file, e))
+                log.warning("Could not read {}: {}".format(stdout_file, e))
         return output
 
+    def processes(self):
+        """
+        Returns the processes running for this node, used to collect telemetry.
+
+        :returns: dictionary process role => asyncio subprocess
+        """
+
+        processes = super().processes()
+        if self._process:
+            processes["qemu"] = self._process
+        return processes
+
     def is_running(self):
         """
         Checks if the QEMU process is running
@@ -1640,7 +1658,7 @@ class QemuVM(BaseNode):
     def _monitor_options(self):
 
         if self._monitor:
-            return ["-monitor", "tcp:{}:{},server,nowait".format(self._monitor_host, self._monitor)]
+            return ["-qmp", "tcp:{}:{},server,nowait".format(self._monitor_host, self._monitor)]
         else:
             return []
 
@@ -1658,13 +1676,23 @@ class QemuVM(BaseNode):
             return qemu_image_path
         raise QemuError("Could not find qemu-img in {}".format(qemu_path_dir))
 
-    async def _qemu_img_exec(self, command):
+    def _qemu_img_log(self, disk_name):
+        """
+        :returns: log file of the qemu-img processes working on a disk,
+        the disks are prepared in parallel
+        """
+
+        return os.path.join(self.working_dir, "qemu-img-{}.log".format(disk_name))
+
+    async def _qemu_img_exec(self, command, stdout_file=None):
 
-        self._qemu_img_stdout_file = os.path.join(self.working_dir, "qemu-img.log")
-        log.info("logging to {}".format(self._qemu_img_stdout_file))
+        if stdout_file is None:
+            stdout_file = os.path.join(self.working_dir, "qemu-img.log")
+        self._qemu_img_stdout_file = stdout_file
+        log.info("logging to {}".format(stdout_file))
         command_string = " ".join(shlex_quote(s) for s in command)
         log.info("Executing qemu-img with: {}".format(command_string))
-        with open(self._qemu_img_stdout_file, "w", encoding="utf-8") as fd:
+        with open(stdout_file, "w", encoding="utf-8") as fd:
             process = await asyncio.create_subprocess_exec(*command, stdout=fd, stderr=subprocess.STDOUT, cwd=self.working_dir)
         retcode = await process.wait()
         log.info("{} returned with {}".format(self._get_qemu_img(), retcode))
@@ -1686,6 +1714,7 @@ class QemuVM(BaseNode):
 
     async def _create_linked_clone(self, disk_name, disk_image, disk):
 
+        stdout_file = self._qemu_img_log(disk_name)
         try:
             qemu_img_path = self._get_qemu_img()
             backing_file_format = await self._find_disk_file_format(disk_image)
@@ -1701,14 +1730,14 @@ class QemuVM(BaseNode):
                 command = [qemu_img_path, "create", "-o", "backing_file={}".format(disk_image),
                            "-F", backing_file_format, "-f", "qcow2", disk]
 
-            retcode = await self._qemu_img_exec(command)
+            retcode = await self._qemu_img_exec(command, stdout_file)
             if retcode:
-                stdout = self.read_qemu_img_stdout()
+                stdout = self.read_qemu_img_stdout(stdout_file)
                 raise QemuError("Could not create '{}' disk image: qemu-img returned with {}\n{}".format(disk_name,
                                                                                                          retcode,
                                                                                                          stdout))
         except (OSError, subprocess.SubprocessError) as e:
-            stdout = self.read_qemu_img_stdout()
+            stdout = self.read_qemu_img_stdout(stdout_file)
             raise QemuError("Could not create '{}' disk image: {}\n{}".format(disk_name, e, stdout))
 
     async def _mcopy(self, image, *args):
@@ -1795,7 +1824,7 @@ class QemuVM(BaseNode):
                 os.remove(zip_file)
         shutil.rmtree(config_dir, ignore_errors=True)
 
-    async def _disk_interface_options(self, disk, disk_index, interface, format=None):
+    async def _disk_interface_options(self, disk, disk_index, interface, format=None, qemu_version=None):
         options = []
         extra_drive_options = ""
         if format:
@@ -1809,7 +1838,8 @@ class QemuVM(BaseNode):
             # special case, sata controller doesn't exist in Qemu
             options.extend(["-device", 'ahci,id=ahci{}'.format(disk_index)])
             options.extend(["-drive", 'file={},if=none,id=drive{},index={},media=disk{}'.format(disk, disk_index, disk_index, extra_drive_options)])
-            qemu_version = await self.manager.get_qemu_version(self.qemu_path)
+            if qemu_version is None:
+                qemu_version = await self.manager.get_qemu_version(self.qemu_path)
             if qemu_version and parse_version(qemu_version) >= parse_version("4.2.0"):
                 # The ‘ide-drive’ device is deprecated since version 4.2.0
                 # https://qemu.readthedocs.io/en/latest/system/deprecated.html#ide-drive-since-4-2
@@ -1830,12 +1860,73 @@ class QemuVM(BaseNode):
             options.extend(["-drive", 'file={},if={},index={},media=disk,id=drive{}{}'.format(disk, interface, disk_index, disk_index, extra_drive_options)])
         return options
 
+    async def _check_disk_image(self, qemu_img_path, disk_image, stdout_file):
+        """
+        Checks a disk image with qemu-img and tries to repair it.
+
+        :returns: True if the image is not damaged
+        """
+
+        retcode = await self._qemu_img_exec([qemu_img_path, "check", disk_image], stdout_file)
+        if retcode == 3:
+            # image has leaked clusters, but is not corrupted, let's try to fix it
+            log.warning("Qemu image {} has leaked clusters".format(disk_image))
+            if await self._qemu_img_exec([qemu_img_path, "check", "-r", "leaks", "{}".format(disk_image)], stdout_file) == 3:
+                self.project.emit("log.warning", {"message": "Qemu image '{}' has leaked clusters and could not be fixed".format(disk_image)})
+            return False
+        elif retcode == 2:
+            # image is corrupted, let's try to fix it
+            log.warning("Qemu image {} is corrupted".format(disk_image))
+            if await self._qemu_img_exec([qemu_img_path, "check", "-r", "all", "{}".format(disk_image)], stdout_file) == 2:
+                self.project.emit("log.warning", {"message": "Qemu image '{}' is corrupted and could not be fixed".format(disk_image)})
+            return False
+        # ignore retcode == 1.  One reason is that the image is encrypted and there is no encrypt.key-secret available
+        return retcode in (0, 1)
+
+    async def _prepare_disk(self, qemu_img_path, disk_name, disk_image):
+        """
+        Checks a disk image and creates or rebases its linked clone.
+
+        :returns: path of the disk used by the VM
+        """
+
+        stdout_file = self._qemu_img_log(disk_name)
+        try:
+            # check for corrupt disk image, the unchanged images are checked once for all the nodes
+            await self.manager.check_disk_image(disk_image, functools.partial(self._check_disk_image, qemu_img_path, disk_image, stdout_file))
+        except (OSError, subprocess.SubprocessError) as e:
+            stdout = self.read_qemu_img_stdout(stdout_file)
+            raise QemuError("Could not check '{}' disk image: {}\n{}".format(disk_name, e, stdout))
+
+        if not self.linked_clone:
+            return disk_image
+
+        disk = os.path.join(self.working_dir, "{}_disk.qcow2".format(disk_name))
+        if not os.path.exists(disk):
+            # create the disk
+            await self._create_linked_clone(disk_name, disk_image, disk)
+        else:
+            backing_file_format = await self._find_disk_file_format(disk_image)
+            if not backing_file_format:
+                raise QemuError("Could not detect format for disk image: {}".format(disk_image))
+            # Rebase the image. This is in case the base image moved to a different directory,
+            # which will be the case if we imported a portable project.  This uses
+            # get_abs_image_path(hdX_disk_image) and ignores the old base path embedded
+            # in the qcow2 file itself.
+            try:
+                qcow2 = Qcow2(disk)
+                await qcow2.rebase(qemu_img_path, disk_image, backing_file_format)
+            except (Qcow2Error, OSError) as e:
+                raise QemuError("Could not use qcow2 disk image '{}' for {}: {}".format(disk_image, disk_name, e))
+        return disk
+
     async def _disk_options(self):
         options = []
         qemu_img_path = self._get_qemu_img()
 
         drives = ["a", "b", "c", "d"]
 
+        disks = []
         for disk_index, drive in enumerate(drives):
             # prioritize config disk over harddisk d
             if drive == 'd' and self._create_config_disk:
@@ -1857,48 +1948,17 @@ class QemuVM(BaseNode):
                     raise QemuError("{} disk image '{}' linked to '{}' is not accessible".format(disk_name, disk_image, os.path.realpath(disk_image)))
                 else:
                     raise QemuError("{} disk image '{}' is not accessible".format(disk_name, disk_image))
-            else:
-                try:
-                    # check for corrupt disk image
-                    retcode = await self._qemu_img_exec([qemu_img_path, "check", disk_image])
-                    if retcode == 3:
-                        # image has leaked clusters, but is not corrupted, let's try to fix it
-                        log.warning("Qemu image {} has leaked clusters".format(disk_image))
-                        if await self._qemu_img_exec([qemu_img_path, "check", "-r", "leaks", "{}".format(disk_image)]) == 3:
-                            self.project.emit("log.warning", {"message": "Qemu image '{}' has leaked clusters and could not be fixed".format(disk_image)})
-                    elif retcode == 2:
-                        # image is corrupted, let's try to fix it
-                        log.warning("Qemu image {} is corrupted".format(disk_image))
-                        if await self._qemu_img_exec([qemu_img_path, "check", "-r", "all", "{}".format(disk_image)]) == 2:
-                            self.project.emit("log.warning", {"message": "Qemu image '{}' is corrupted and could not be fixed".format(disk_image)})
-                    # ignore retcode == 1.  One reason is that the image is encrypted and there is no encrypt.key-secret available
-                except (OSError, subprocess.SubprocessError) as e:
-                    stdout = self.read_qemu_img_stdout()
-                    raise QemuError("Could not check '{}' disk image: {}\n{}".format(disk_name, e, stdout))
-
-            if self.linked_clone:
-                disk = os.path.join(self.working_dir, "{}_disk.qcow2".format(disk_name))
-                if not os.path.exists(disk):
-                    # create the disk
-                    await self._create_linked_clone(disk_name, disk_image, disk)
-                else:
-                    backing_file_format = await self._find_disk_file_format(disk_image)
-                    if not backing_file_format:
-                        raise QemuError("Could not detect format for disk image: {}".format(disk_image))
-                    # Rebase the image. This is in case the base image moved to a different directory,
-                    # which will be the case if we imported a portable project.  This uses
-                    # get_abs_image_path(hdX_disk_image) and ignores the old base path embedded
-                    # in the qcow2 file itself.
-                    try:
-                        qcow2 = Qcow2(disk)
-                        await qcow2.rebase(qemu_img_path, disk_image, backing_file_format)
-                    except (Qcow2Error, OSError) as e:
-                        raise QemuError("Could not use qcow2 disk image '{}' for {}: {}".format(disk_image, disk_name, e))
+            disks.append((disk_index, disk_name, disk_image, interface))
 
-            else:
-                disk = disk_image
+        # the disks are checked and their linked clones created in parallel
+        prepared_disks = await asyncio.gather(*[self._prepare_disk(qemu_img_path, disk_name, disk_image)
+                                                for _, disk_name, disk_image, _ in disks])
 
-            options.extend(await self._disk_interface_options(disk, disk_index, interface))
+        qemu_version = None
+        if any(interface == "sata" for _, _, _, interface in disks):
+            qemu_version = await self.manager.get_qemu_version(self.qemu_path)
+        for (disk_index, _, _, interface), disk in zip(disks, prepared_disks):
+            options.extend(await self._disk_interface_options(disk, disk_index, interface, qemu_version=qemu_version))
 
         # config disk
         disk_image = getattr(self, "config_disk_image")
@@ -0,0 +1,192 @@
+#!/usr/bin/env python
+#
+# Copyright (C) 2020 GNS3 Technologies Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import json
+import time
+import asyncio
+import itertools
+
+from ..qemu_error import QemuError
+
+import logging
+log = logging.getLogger(__name__)
+
+# Maximum size of a QMP message
+QMP_LINE_LIMIT = 1024 * 1024  # 1MB
+
+
+class QMPConnection:
+    """
+    Connection to the QEMU Machine Protocol (QMP) server of a VM.
+
+    Commands are sent without waiting for the responses of the previous
+    ones, each response is matched with its command by an ID. The events
+    sent by QEMU (STOP, RESUME, SHUTDOWN...) are passed to a callback.
+
+    :param host: QMP server host
+    :param port: QMP server port
+    :param on_event: function called with the name and the data of each event
+    """
+
+    def __init__(self, host, port, on_event=None):
+
+        self._host = host
+        self._port = port
+        self._on_event = on_event
+        self._reader = None
+        self._writer = None
+        self._read_task = None
+        self._ids = itertools.count(1)
+        self._pending = {}
+
+    @property
+    def connected(self):
+        """
+        :returns: True if the connection is open
+        """
+
+        return self._read_task is not None and not self._read_task.done()
+
+    async def connect(self, timeout=10):
+        """
+        Connects to the QMP server and enables the commands.
+
+        :param timeout: timeout to connect to the QMP server
+        """
+
+        begin = time.time()
+        while True:
+            try:
+                log.debug("Connecting to QMP on {}:{}".format(self._host, self._port))
+                self._reader, self._writer = await asyncio.open_connection(self._host, self._port, limit=QMP_LINE_LIMIT)
+                break
+            except OSError as e:
+                if time.time() - begin >= timeout:
+                    raise QemuError("Could not connect to QMP on {}:{}: {}".format(self._host, self._port, e))
+            await asyncio.sleep(0.1)
+
+        try:
+            greeting = await asyncio.wait_for(self._read_message(), timeout=timeout)
+        except (asyncio.TimeoutError, OSError, ValueError) as e:
+            greeting = None
+            log.debug("Could not read QMP greeting: {}".format(e))
+        if greeting is None or "QMP" not in greeting:
+            self._writer.close()
+            raise QemuError("No QMP greeting received from {}:{}".format(self._host, self._port))
+
+        self._read_task = asyncio.ensure_future(self._read_messages())
+        try:
+            await self.execute("qmp_capabilities")
+        except (QemuError, asyncio.CancelledError):
+            # QEMU accepts only one QMP client, the connection must not be left open
+            await self.close()
+            raise
+        log.info("Connected to QMP on {}:{} after {:.4f} seconds".format(self._host, self._port, time.time() - begin))
+
+    async def _read_message(self):
+        """
+        :returns: next message, None when the connection is closed
+        """
+
+        while True:
+            line = await self._reader.readline()
+            if not line:
+                return None
+            try:
+                return json.loads(line.decode("utf-8", errors="replace"))
+            except ValueError:
+                log.warning("Invalid QMP message received from {}:{}: {}".format(self._host, self._port, line))
+
+    async def _read_messages(self):
+        """
+        Dispatches the responses and the events until the connection is closed.
+        """
+
+        try:
+            while True:
+                message = await self._read_message()
+                if message is None:
+                    break
+                if "event" in message:
+                    log.debug("QMP event received from {}:{}: {}".format(self._host, self._port, message))
+                    if self._on_event:
+                        try:
+                            self._on_event(message["event"], message.get("data", {}))
+                        except Exception as e:
+                            log.error("Error while handling QMP event {}: {}".format(message["event"], e), exc_info=1)
+                    continue
+                future = self._pending.get(message.get("id"))
+                if future is None or future.done():
+                    continue
+                if "error" in message:
+                    future.set_exception(QemuError("QMP error: {}".format(message["error"].get("desc", message["error"]))))
+                else:
+                    future.set_result(message.get("return"))
+        except (OSError, ValueError) as e:
+            log.warning("Lost QMP connection to {}:{}: {}".format(self._host, self._port, e))
+        finally:
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_exception(QemuError("QMP connection to {}:{} has been closed".format(self._host, self._port)))
+            self._writer.close()
+
+    async def execute(self, command, arguments=None, timeout=30):
+        """
+        Executes a QMP command.
+
+        :param command: QMP command name
+        :param arguments: dictionary of arguments
+        :param timeout: timeout to wait for the response, None to wait forever
+
+        :returns: value returned by the command
+        """
+
+        if not self.connected:
+            raise QemuError("Not connected to QMP on {}:{}".format(self._host, self._port))
+
+        command_id = next(self._ids)
+        message = {"execute": command, "id": command_id}
+        if arguments:
+            message["arguments"] = arguments
+        future = asyncio.get_event_loop().create_future()
+        self._pending[command_id] = future
+        try:
+            log.debug("Execute QMP command: {}".format(message))
+            self._writer.write(json.dumps(message).encode("utf-8") + b"\n")
+            await self._writer.drain()
+            return await asyncio.wait_for(future, timeout=timeout)
+        except OSError as e:
+            raise QemuError("Could not send QMP command '{}': {}".format(command, e))
+        except asyncio.TimeoutError:
+            raise QemuError("Timeout while waiting for the result of QMP command '{}'".format(command))
+        finally:
+            del self._pending[command_id]
+
+    async def close(self):
+        """
+        Closes the connection.
+        """
+
+        if self._read_task is not None:
+            self._read_task.cancel()
+            try:
+                await self._read_task
+            except asyncio.CancelledError:
+                pass
+            self._read_task = None
+        elif self._writer is not None:
+            self._writer.close()
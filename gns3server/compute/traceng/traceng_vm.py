@@ -287,6 +287,18 @@ class TraceNGVM(BaseNode):
         except ProcessLookupError:
             pass
 
+    def processes(self):
+        """
+        Returns the processes running for this node, used to collect telemetry.
+
+        :returns: dictionary process role => asyncio subprocess
+        """
+
+        processes = super().processes()
+        if self._process:
+            processes["traceng"] = self._process
+        return processes
+
     def is_running(self):
         """
         Checks if the TraceNG process is running
@@ -28,10 +28,12 @@ import signal
 import re
 import asyncio
 import shutil
+import functools
 
 from gns3server.utils.asyncio import wait_for_process_termination
 from gns3server.utils.asyncio import monitor_process
 from gns3server.utils.asyncio import subprocess_check_output
+from gns3server.utils.probe_cache import ProbeCache
 from gns3server.utils import parse_version
 
 from .vpcs_error import VPCSError
@@ -200,7 +202,8 @@ class VPCSVM(BaseNode):
         Checks if the VPCS executable version is >= 0.8b or == 0.6.1.
         """
         try:
-            output = await subprocess_check_output(self._vpcs_path(), "-v", cwd=self.working_dir)
+            vpcs_path = self._vpcs_path()
+            output = await ProbeCache.instance().get(vpcs_path, "-v", functools.partial(subprocess_check_output, vpcs_path, "-v", cwd=self.working_dir))
             match = re.search(r"Welcome to Virtual PC Simulator, version ([0-9a-z\.]+)", output)
             if match:
                 version = match.group(1)
@@ -333,6 +336,18 @@ class VPCSVM(BaseNode):
                 log.warning("Could not read {}: {}".format(self._vpcs_stdout_file, e))
         return output
 
+    def processes(self):
+        """
+        Returns the processes running for this node, used to collect telemetry.
+
+        :returns: dictionary process role => asyncio subprocess
+        """
+
+        processes = super().processes()
+        if self._process:
+            processes["vpcs"] = self._process
+        return processes
+
     def is_running(self):
         """
         Checks if the VPCS process is running
@@ -17,6 +17,7 @@
 
 import os
 import sys
+import copy
 import json
 import uuid
 import socket
@@ -34,8 +35,10 @@ from .notification import Notification
 from .symbols import Symbols
 from ..version import __version__
 from .topology import load_topology
+from .project_index import ProjectIndex
 from .gns3vm import GNS3VM
 from ..utils.get_resource import get_resource
+from ..utils.application_id import ApplicationIdAllocator
 from .gns3vm.gns3_vm_error import GNS3VMError
 
 import logging
@@ -50,6 +53,7 @@ class Controller:
     def __init__(self):
         self._computes = {}
         self._projects = {}
+        self._application_ids = ApplicationIdAllocator()
         self._notification = Notification(self)
         self.gns3vm = GNS3VM(self)
         self.symbols = Symbols()
@@ -98,7 +102,8 @@ class Controller:
                                                         user=server_config.get("user", ""),
                                                         password=server_config.get("password", ""),
                                                         force=True,
-                                                        ssl_context=self._ssl_context)
+                                                        ssl_context=self._ssl_context,
+                                                        in_process=server_config.getboolean("local_compute_in_process", True))
         except aiohttp.web.HTTPConflict:
             log.fatal("Cannot access to the local server, make sure something else is not running on the TCP port {}".format(port))
             sys.exit(1)
@@ -148,6 +153,7 @@ class Controller:
         #self.save()
         self._computes = {}
         self._projects = {}
+        self._application_ids = ApplicationIdAllocator()
 
     async def reload(self):
 
@@ -256,6 +262,10 @@ class Controller:
         server_config = Config.instance().get_section_config("Server")
         projects_path = os.path.expanduser(server_config.get("projects_path", "~/GNS3/projects"))
         os.makedirs(projects_path, exist_ok=True)
+
+        # unchanged projects are loaded from the index instead of parsing their .gns3 file
+        index = ProjectIndex(os.path.join(os.path.dirname(self._config_file), "projects_index.json"))
+        index.load()
         try:
             for project_path in os.listdir(projects_path):
                 project_dir = os.path.join(projects_path, project_path)
@@ -263,11 +273,14 @@ class Controller:
                     for file in os.listdir(project_dir):
                         if file.endswith(".gns3"):
                             try:
-                                await self.load_project(os.path.join(project_dir, file), load=False)
+                                await self.load_project(os.path.join(project_dir, file), load=False, index=index)
                             except (aiohttp.web.HTTPConflict, aiohttp.web.HTTPNotFound, NotImplementedError):
                                 pass  # Skip not compatible projects
         except OSError as e:
             log.error(str(e))
+        index.save()
+        stats = index.stats()
+        log.info("{} projects loaded from the index, {} topology files parsed".format(stats["hits"], stats["misses"]))
 
     def load_base_files(self):
         """
@@ -462,20 +475,38 @@ class Controller:
 
         if project.id in self._projects:
             del self._projects[project.id]
+        self._application_ids.remove_project(project.id)
 
-    async def load_project(self, path, load=True):
+    async def load_project(self, path, load=True, index=None):
         """
         Load a project from a .gns3
 
         :param path: Path of the .gns3
         :param load: Load the topology
+        :param index: ProjectIndex instance used to get the project metadata without parsing the .gns3
         """
 
-        topo_data = load_topology(path)
-        topo_data.pop("topology")
-        topo_data.pop("version")
-        topo_data.pop("revision")
-        topo_data.pop("type")
+        topo_data = None
+        if index is not None:
+            entry = index.get(path)
+            if entry is not None:
+                if "error" in entry:
+                    raise aiohttp.web.HTTPConflict(text=entry["error"])
+                topo_data = copy.deepcopy(entry["metadata"])
+
+        if topo_data is None:
+            try:
+                topo_data = load_topology(path)
+            except aiohttp.web.HTTPConflict as e:
+                if index is not None:
+                    index.set(path, error=e.text)
+                raise
+            topo_data.pop("topology")
+            topo_data.pop("version")
+            topo_data.pop("revision")
+            topo_data.pop("type")
+            if index is not None:
+                index.set(path, metadata=copy.deepcopy(topo_data))
 
         if topo_data["project_id"] in self._projects:
             project = self._projects[topo_data["project_id"]]
@@ -523,6 +554,14 @@ class Controller:
 
         return self._projects
 
+    @property
+    def application_ids(self):
+        """
+        :returns: The application IDs used by the IOU nodes of the opened projects
+        """
+
+        return self._application_ids
+
     @property
     def appliance_manager(self):
         """
@@ -24,11 +24,14 @@ import json
 import uuid
 import sys
 import io
+import time
 from operator import itemgetter
 
 from ..utils import parse_version
 from ..utils.asyncio import locking
 from ..controller.controller_error import ControllerError
+from ..config import Config
+from ..web.in_process import InProcessDispatcher, InProcessResponse
 from ..version import __version__, __version_info__
 
 
@@ -58,8 +61,10 @@ class Compute:
     """
 
     def __init__(self, compute_id, controller=None, protocol="http", host="localhost",
-                 port=3080, user=None, password=None, name=None, console_host=None, ssl_context=None):
+                 port=3080, user=None, password=None, name=None, console_host=None, ssl_context=None, in_process=False):
         self._http_session = None
+        # the compute runs in the same process as the controller, JSON queries are dispatched directly to the handlers
+        self._in_process = in_process
         assert controller is not None
         log.info("Create compute %s", compute_id)
 
@@ -92,13 +97,51 @@ class Compute:
         self._interfaces_cache = None
         self._connection_failure = 0
 
+        # Limit the number of requests sent at the same time to the compute
+        self._max_requests = Config.instance().get_section_config("Server").getint("compute_max_requests", 50)
+        self._requests_semaphore = None
+        self._pool_statistics = {
+            "connections_opened": 0,
+            "connections_reused": 0,
+            "requests": 0,
+            "requests_in_flight": 0,
+            "requests_queued": 0,
+            "queue_wait_time": 0.0,
+            "max_queue_wait_time": 0.0
+        }
+
     def _session(self):
         if self._http_session is None or self._http_session.closed is True:
+            # connections to the compute are kept alive and reused unless disabled
+            keepalive = Config.instance().get_section_config("Server").getboolean("compute_keepalive", True)
+            trace_config = aiohttp.TraceConfig()
+            trace_config.on_connection_create_end.append(self._on_connection_create_end)
+            trace_config.on_connection_reuseconn.append(self._on_connection_reuseconn)
             self._http_session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=None,
-                                                                                      force_close=True,
-                                                                                      ssl_context=self._ssl_context))
+                                                                                      force_close=not keepalive,
+                                                                                      ssl_context=self._ssl_context),
+                                                       trace_configs=[trace_config])
         return self._http_session
 
+    async def _on_connection_create_end(self, session, trace_config_ctx, params):
+        self._pool_statistics["connections_opened"] += 1
+
+    async def _on_connection_reuseconn(self, session, trace_config_ctx, params):
+        self._pool_statistics["connections_reused"] += 1
+
+    def pool_statistics(self):
+        """
+        Statistics about the HTTP connections and requests to the compute.
+
+        :returns: dictionary, times are in milliseconds
+        """
+
+        stats = self._pool_statistics.copy()
+        stats["max_requests"] = self._max_requests
+        stats["queue_wait_time"] = round(stats["queue_wait_time"] * 1000, 3)
+        stats["max_queue_wait_time"] = round(stats["max_queue_wait_time"] * 1000, 3)
+        return stats
+
     #def __del__(self):
     #
     #   if self._http_session:
@@ -487,6 +530,35 @@ class Compute:
         return self._getUrl(path)
 
     async def _run_http_query(self, method, path, data=None, timeout=20, raw=False):
+
+        if self._max_requests <= 0:
+            return await self._send_http_query(method, path, data=data, timeout=timeout, raw=raw)
+        if self._requests_semaphore is None:
+            self._requests_semaphore = asyncio.Semaphore(self._max_requests)
+
+        stats = self._pool_statistics
+        begin = time.monotonic()
+        stats["requests_queued"] += 1
+        try:
+            await self._requests_semaphore.acquire()
+        finally:
+            stats["requests_queued"] -= 1
+        wait_time = time.monotonic() - begin
+        stats["queue_wait_time"] += wait_time
+        stats["max_queue_wait_time"] = max(stats["max_queue_wait_time"], wait_time)
+        stats["requests_in_flight"] += 1
+        try:
+            return await self._send_http_query(method, path, data=data, timeout=timeout, raw=raw)
+        finally:
+            stats["requests_in_flight"] -= 1
+            self._requests_semaphore.release()
+
+    async def _send_http_query(self, method, path, data=None, timeout=20, raw=False):
+
+        self._pool_statistics["requests"] += 1
+        if self._in_process and not raw and (data is None or isinstance(data, (dict, list)) or hasattr(data, "__json__")):
+            return await self._send_in_process_query(method, path, data=data, timeout=timeout)
+
         with async_timeout.timeout(timeout):
             url = self._getUrl(path)
             headers = {}
@@ -522,37 +594,7 @@ class Compute:
             body = body.decode()
 
         if response.status >= 300:
-            # Try to decode the GNS3 error
-            if body and not raw:
-                try:
-                    msg = json.loads(body)["message"]
-                except (KeyError, ValueError):
-                    msg = body
-            else:
-                msg = ""
-
-            if response.status == 400:
-                raise aiohttp.web.HTTPBadRequest(text="Bad request {} {}".format(url, body))
-            elif response.status == 401:
-                raise aiohttp.web.HTTPUnauthorized(text="Invalid authentication for compute {}".format(self.id))
-            elif response.status == 403:
-                raise aiohttp.web.HTTPForbidden(text=msg)
-            elif response.status == 404:
-                raise aiohttp.web.HTTPNotFound(text="{} {} not found".format(method, path))
-            elif response.status == 408 or response.status == 504:
-                raise aiohttp.web.HTTPRequestTimeout(text="{} {} request timeout".format(method, path))
-            elif response.status == 409:
-                try:
-                    raise ComputeConflict(json.loads(body))
-                # If the 409 doesn't come from a GNS3 server
-                except ValueError:
-                    raise aiohttp.web.HTTPConflict(text=msg)
-            elif response.status == 500:
-                raise aiohttp.web.HTTPInternalServerError(text="Internal server error {}".format(url))
-            elif response.status == 503:
-                raise aiohttp.web.HTTPServiceUnavailable(text="Service unavailable {} {}".format(url, body))
-            else:
-                raise NotImplementedError("{} status code is not supported for {} '{}'".format(response.status, method, url))
+            self._raise_for_status(method, path, url, response.status, body, raw)
         if body and len(body):
             if raw:
                 response.body = body
@@ -566,6 +608,77 @@ class Compute:
             response.body = b""
         return response
 
+    async def _send_in_process_query(self, method, path, data=None, timeout=20):
+        """
+        Send a query to the compute handlers running in this process,
+        errors are the same as with an HTTP query.
+        """
+
+        url = self._getUrl(path)
+        if hasattr(data, "__json__"):
+            data = data.__json__()
+        if data == {}:
+            data = None
+        if data is not None:
+            # give the handler a copy with only JSON types, like when the data is sent over HTTP
+            data = json.loads(json.dumps(data))
+        headers = {}
+        if self._auth:
+            headers["AUTHORIZATION"] = self._auth.encode()
+
+        log.debug("Attempting in process request to compute: {method} {url}".format(method=method, url=url))
+        try:
+            response = await asyncio.wait_for(InProcessDispatcher.dispatch(method, "/v2/compute{}".format(path), data=data, headers=headers), timeout)
+        except asyncio.TimeoutError:
+            raise ComputeError("Timeout error for {} call to {} after {}s".format(method, url, timeout))
+
+        if response is None:
+            self._raise_for_status(method, path, url, 404, None)
+        answer = response.answer
+        if response.status >= 300:
+            self._raise_for_status(method, path, url, response.status, json.dumps(answer) if answer is not None else None)
+        if answer is not None:
+            # the answer can reference internal objects of the compute
+            answer = json.loads(json.dumps(answer))
+        return InProcessResponse(response.status, answer)
+
+    def _raise_for_status(self, method, path, url, status, body, raw=False):
+        """
+        Raise the HTTP error matching an error status returned by the compute
+        """
+
+        # Try to decode the GNS3 error
+        if body and not raw:
+            try:
+                msg = json.loads(body)["message"]
+            except (KeyError, ValueError):
+                msg = body
+        else:
+            msg = ""
+
+        if status == 400:
+            raise aiohttp.web.HTTPBadRequest(text="Bad request {} {}".format(url, body))
+        elif status == 401:
+            raise aiohttp.web.HTTPUnauthorized(text="Invalid authentication for compute {}".format(self.id))
+        elif status == 403:
+            raise aiohttp.web.HTTPForbidden(text=msg)
+        elif status == 404:
+            raise aiohttp.web.HTTPNotFound(text="{} {} not found".format(method, path))
+        elif status == 408 or status == 504:
+            raise aiohttp.web.HTTPRequestTimeout(text="{} {} request timeout".format(method, path))
+        elif status == 409:
+            try:
+                raise ComputeConflict(json.loads(body))
+            # If the 409 doesn't come from a GNS3 server
+            except ValueError:
+                raise aiohttp.web.HTTPConflict(text=msg)
+        elif status == 500:
+            raise aiohttp.web.HTTPInternalServerError(text="Internal server error {}".format(url))
+        elif status == 503:
+            raise aiohttp.web.HTTPServiceUnavailable(text="Service unavailable {} {}".format(url, body))
+        else:
+            raise NotImplementedError("{} status code is not supported for {} '{}'".format(status, method, url))
+
     async def get(self, path, **kwargs):
         return (await self.http_query("GET", path, **kwargs))
 
@@ -613,11 +726,15 @@ class Compute:
             raise ComputeError("Cannot list images: {}".format(str(e)))
         return images
 
-    async def list_files(self, project):
+    async def list_files(self, project, checksum=True):
         """
         List files in the project on computes
+
+        :param checksum: Get the MD5 of the files, otherwise their size and modification time
         """
         path = "/projects/{}/files".format(project.id)
+        if not checksum:
+            path += "?checksum=no"
         res = await self.http_query("GET", path, timeout=None)
         return res.json
 
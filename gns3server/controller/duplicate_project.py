@@ -0,0 +1,176 @@
+#!/usr/bin/env python
+#
+# Copyright (C) 2020 GNS3 Technologies Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import json
+import uuid
+import asyncio
+import aiohttp
+
+from .compute import ComputeError
+from .export_project import _is_exportable
+from ..utils.clone import clone_files
+
+import logging
+log = logging.getLogger(__name__)
+
+"""
+Duplicate a project by copying its files, without exporting it to a .gns3project
+"""
+
+
+async def duplicate_project(controller, project, project_id, location=None, name=None, reset_mac_addresses=False):
+    """
+    Duplicate a project.
+
+    The local files are copied in parallel (with reflinks when the file
+    system supports it) and each remote compute copies the files of its
+    nodes itself. The node IDs are changed while copying the files.
+
+    You must handle OSError exceptions
+
+    :param controller: GNS3 Controller
+    :param project: Project to duplicate
+    :param project_id: ID of the new project
+    :param location: Directory for the project if None put in the default directory
+    :param name: Wanted project name, use the name of the duplicated project if None
+    :param reset_mac_addresses: Reset MAC addresses of the nodes
+
+    :returns: Project, None if a compute cannot duplicate projects
+    """
+
+    if location and ".gns3" in location:
+        raise aiohttp.web.HTTPConflict(text="The destination path should not contain .gns3")
+
+    # To avoid issue with data not saved we disallow the duplication of a running project
+    if project.is_running():
+        raise aiohttp.web.HTTPConflict(text="Project must be stopped in order to duplicate it")
+
+    project.dump(flush=True)
+    path = project._topology_file()
+    try:
+        with open(path) as f:
+            topology = json.load(f)
+        nodes = topology["topology"]["nodes"]
+    except (OSError, ValueError, KeyError) as e:
+        raise aiohttp.web.HTTPConflict(text="Project file '{}' cannot be read: {}".format(path, e))
+
+    for node in nodes:
+        if node["node_type"] == "virtualbox" and node.get("properties", {}).get("linked_clone"):
+            raise aiohttp.web.HTTPConflict(text="Projects with a linked {} clone node cannot not be duplicated. Please use Qemu instead.".format(node["node_type"]))
+
+    project_name = controller.get_free_project_name(name or topology["name"])
+    if location:
+        path = location
+    else:
+        path = os.path.join(controller.projects_directory(), project_id)
+
+    node_ids = {node["node_id"]: str(uuid.uuid4()) for node in nodes}
+
+    compute_ids = sorted(set(node.get("compute_id", "local") for node in nodes) - {"local"})
+    computes = [controller.get_compute(compute_id) for compute_id in compute_ids]
+    if not await _duplicate_on_computes(computes, project, project_id, project_name, node_ids):
+        return None
+
+    try:
+        os.makedirs(path, exist_ok=True)
+    except UnicodeEncodeError:
+        raise aiohttp.web.HTTPConflict(text="The project name contain non supported or invalid characters")
+
+    files = []
+    for root, dirs, filenames in os.walk(project.path, topdown=True, followlinks=False):
+        parts = _rename_node_directory(os.path.relpath(root, project.path), node_ids)
+        for filename in filenames:
+            source = os.path.join(root, filename)
+            # the .gns3 file is written after
+            if filename.endswith(".gns3") or not _is_exportable(source):
+                continue
+            files.append((source, os.path.join(path, *parts, filename)))
+    await clone_files(files)
+
+    topology["project_id"] = project_id
+    topology["name"] = project_name
+    # To avoid unexpected behavior (project start without manual operations just after duplication)
+    topology["auto_start"] = False
+    topology["auto_open"] = False
+    topology["auto_close"] = True
+
+    for node in nodes:
+        node["node_id"] = node_ids[node["node_id"]]
+        if reset_mac_addresses and node["node_type"] != "docker":
+            for prop in ("mac_addr", "mac_address"):
+                if prop in node.get("properties", {}):
+                    node["properties"][prop] = None
+
+    for link in topology["topology"].get("links", []):
+        link["link_id"] = str(uuid.uuid4())
+        for node in link["nodes"]:
+            node["node_id"] = node_ids[node["node_id"]]
+
+    for drawing in topology["topology"].get("drawings", []):
+        drawing["drawing_id"] = str(uuid.uuid4())
+
+    dot_gns3_path = os.path.join(path, project_name + ".gns3")
+    with open(dot_gns3_path, "w+") as f:
+        json.dump(topology, f, indent=4)
+
+    return await controller.load_project(dot_gns3_path, load=False)
+
+
+def _rename_node_directory(relpath, node_ids):
+    """
+    Replace the node ID in a path relative to the project directory.
+
+    :param relpath: Path relative to the project directory
+    :param node_ids: Dictionary old node ID => new node ID
+    :returns: List of path components
+    """
+
+    parts = [] if relpath == os.curdir else relpath.split(os.path.sep)
+    if len(parts) >= 3 and parts[0] == "project-files":
+        parts[2] = node_ids.get(parts[2], parts[2])
+    return parts
+
+
+async def _duplicate_on_computes(computes, project, project_id, project_name, node_ids):
+    """
+    Ask the remote computes to copy the node files to the new project.
+
+    :returns: False if a compute does not support project duplication
+    """
+
+    async def duplicate(compute):
+        await compute.post("/projects", data={"name": project_name, "project_id": project_id})
+        await compute.post("/projects/{}/duplicate".format(project.id), data={"project_id": project_id, "node_ids": node_ids}, timeout=None)
+
+    results = await asyncio.gather(*[duplicate(compute) for compute in computes], return_exceptions=True)
+    errors = [result for result in results if isinstance(result, Exception)]
+    if not errors:
+        return True
+
+    # delete what has been copied, the new project is not usable
+    for compute in computes:
+        try:
+            await compute.delete("/projects/{}".format(project_id))
+        except (ComputeError, aiohttp.web.HTTPException) as e:
+            log.warning("Cannot delete project {} on compute {}: {}".format(project_id, compute.id, e))
+
+    for error in errors:
+        if not isinstance(error, aiohttp.web.HTTPNotFound):
+            raise error
+    log.info("Compute cannot duplicate project {}, the files will be exported and imported".format(project.id))
+    return False
@@ -23,13 +23,17 @@ import aiofiles
 import aiohttp
 import zipfile
 import tempfile
+import time
 
 from datetime import datetime
 
+from ..utils.asyncio import aiozipstream
+
 import logging
 log = logging.getLogger(__name__)
 
 CHUNK_SIZE = 1024 * 8  # 8KB
+REMOTE_CHUNK_SIZE = 1024 * 256  # 256KB
 
 
 async def export_project(zstream, project, temporary_dir, include_images=False, include_snapshots=False, keep_compute_id=False, allow_all_nodes=False, reset_mac_addresses=False):
@@ -54,7 +58,7 @@ async def export_project(zstream, project, temporary_dir, include_images=False,
         raise aiohttp.web.HTTPConflict(text="Project must be stopped in order to export it")
 
     # Make sure we save the project
-    project.dump()
+    project.dump(flush=True)
 
     if not os.path.exists(project._path):
         raise aiohttp.web.HTTPNotFound(text="Project could not be found at '{}'".format(project._path))
@@ -87,30 +91,91 @@ async def export_project(zstream, project, temporary_dir, include_images=False,
             log.warning("Cannot export local file: {}".format(e))
             continue
 
-    # Export files from remote computes
-    for compute in project.computes:
-        if compute.id != "local":
-            compute_files = await compute.list_files(project)
-            for compute_file in compute_files:
-                if _is_exportable(compute_file["path"], include_snapshots):
-                    log.debug("Downloading file '{}' from compute '{}'".format(compute_file["path"], compute.id))
-                    response = await compute.download_file(project, compute_file["path"])
-                    if response.status != 200:
-                        log.warning("Cannot export file from compute '{}'. Compute returned status code {}.".format(compute.id, response.status))
-                        continue
-                    (fd, temp_path) = tempfile.mkstemp(dir=temporary_dir)
-                    async with aiofiles.open(fd, 'wb') as f:
-                        while True:
-                            try:
-                                data = await response.content.read(CHUNK_SIZE)
-                            except asyncio.TimeoutError:
-                                raise aiohttp.web.HTTPRequestTimeout(text="Timeout when downloading file '{}' from remote compute {}:{}".format(compute_file["path"], compute.host, compute.port))
-                            if not data:
-                                break
-                            await f.write(data)
-                    response.close()
-                    _patch_mtime(temp_path)
-                    zstream.write(temp_path, arcname=compute_file["path"])
+    # Export files from remote computes, the files are streamed from the computes to the
+    # zip stream and downloaded in parallel while the previous entries are written
+    computes = [compute for compute in project.computes if compute.id != "local"]
+    compute_files = await asyncio.gather(*[compute.list_files(project, checksum=False) for compute in computes])
+    for compute, files in zip(computes, compute_files):
+        files = [compute_file for compute_file in files if _is_exportable(compute_file["path"], include_snapshots)]
+        transfer = _ComputeTransfer(project, compute, len(files))
+        for compute_file in files:
+            zstream.write_aiter(compute_file["path"], _download_compute_file(project, compute, compute_file["path"], transfer))
+
+
+class _ComputeTransfer:
+    """
+    Measure the throughput of the files downloaded from a compute and
+    report it when all the files have been downloaded.
+    """
+
+    def __init__(self, project, compute, files):
+
+        self._project = project
+        self._compute = compute
+        self._downloaded = 0
+        self._remaining = files
+        self._size = 0
+        self._begin = None
+
+    def start(self):
+
+        if self._begin is None:
+            self._begin = time.time()
+
+    def add(self, size):
+
+        self._size += size
+
+    def done(self, downloaded):
+
+        if downloaded:
+            self._downloaded += 1
+        self._remaining -= 1
+        if self._remaining > 0:
+            return
+        duration = max(time.time() - self._begin, 0.001)
+        msg = "{} files ({:.1f} MB) downloaded from compute '{}' in {:.1f} seconds ({:.1f} MB/s)".format(self._downloaded,
+                                                                                                      self._size / (1024 * 1024),
+                                                                                                      self._compute.name,
+                                                                                                      duration,
+                                                                                                      self._size / (1024 * 1024) / duration)
+        log.info(msg)
+        self._project.emit_notification("log.info", {"message": msg})
+
+
+async def _download_compute_file(project, compute, path, transfer):
+    """
+    Download a file from a remote compute
+
+    :returns: async generator of the file data
+    """
+
+    log.debug("Downloading file '{}' from compute '{}'".format(path, compute.id))
+    transfer.start()
+    response = await compute.download_file(project, path)
+    downloaded = False
+    try:
+        if response.status != 200:
+            log.warning("Cannot export file from compute '{}'. Compute returned status code {}.".format(compute.id, response.status))
+            raise aiozipstream.SkipEntry()
+        buffer = b''
+        while True:
+            try:
+                data = await response.content.read(REMOTE_CHUNK_SIZE)
+            except asyncio.TimeoutError:
+                raise aiohttp.web.HTTPRequestTimeout(text="Timeout when downloading file '{}' from remote compute {}:{}".format(path, compute.host, compute.port))
+            transfer.add(len(data))
+            buffer += data
+            # small network reads are grouped before compressing them
+            if buffer and (not data or len(buffer) >= REMOTE_CHUNK_SIZE):
+                yield buffer
+                buffer = b''
+            if not data:
+                break
+        downloaded = True
+    finally:
+        response.close()
+        transfer.done(downloaded)
 
 
 def _patch_mtime(path):
@@ -160,7 +225,7 @@ def _is_exportable(path, include_snapshots=False):
 
     # do not export log files and OS noise
     filename = os.path.basename(path)
-    if filename.endswith('_log.txt') or filename.endswith('.log') or filename == '.DS_Store':
+    if filename.endswith('_log.txt') or filename.endswith('.log') or filename in ('.DS_Store', '.files_manifest.json'):
         return False
     return True
 
@@ -0,0 +1,141 @@
+#!/usr/bin/env python
+#
+# Copyright (C) 2020 GNS3 Technologies Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Upload images to the computes.
+
+An image is identified by its MD5: nothing is sent when the compute already
+has it, the concurrent uploads of an image to a compute share the same
+transfer and an interrupted upload resumes where it stopped.
+"""
+
+import os
+import asyncio
+import aiohttp
+
+from .compute import ComputeError, ComputeConflict
+from ..utils.asyncio import wait_run_in_executor
+from ..utils.images import md5sum
+
+import logging
+log = logging.getLogger(__name__)
+
+# Size of the data sent by each request
+UPLOAD_CHUNK_SIZE = 1024 * 1024 * 16  # 16MB
+
+# Number of times an interrupted upload is resumed
+UPLOAD_RETRIES = 3
+
+# Uploads in progress, (compute ID, node type, filename, MD5) => (task, loop)
+_uploads = {}
+
+
+async def upload_image(computes, node_type, path, filename):
+    """
+    Upload an image to computes in parallel.
+
+    :param computes: List of computes
+    :param node_type: Node type (qemu, iou, dynamips)
+    :param path: Path of the image on the controller
+    :param filename: Name of the image on the computes
+    :returns: Number of computes where the image has been uploaded
+    """
+
+    checksum = await wait_run_in_executor(md5sum, path)
+    if checksum is None:
+        raise aiohttp.web.HTTPConflict(text="Can't upload {}: the MD5 cannot be computed".format(path))
+    results = await asyncio.gather(*[_shared_upload(compute, node_type, path, filename, checksum) for compute in computes])
+    return sum(1 for uploaded in results if uploaded)
+
+
+def _shared_upload(compute, node_type, path, filename, checksum):
+    """
+    :returns: Future of the upload, shared by all the callers
+    """
+
+    key = (compute.id, node_type, filename, checksum)
+    loop = asyncio.get_event_loop()
+    task, task_loop = _uploads.get(key, (None, None))
+    if task is None or task.done() or task_loop is not loop:
+        task = asyncio.ensure_future(_upload(compute, node_type, path, filename, checksum))
+        _uploads[key] = (task, loop)
+
+        def forget(future):
+            if _uploads.get(key, (None, None))[0] is future:
+                del _uploads[key]
+        task.add_done_callback(forget)
+    # a caller giving up does not stop the upload for the others
+    return asyncio.shield(task)
+
+
+def _read_chunk(path, offset, size):
+
+    with open(path, "rb") as f:
+        f.seek(offset)
+        return f.read(size)
+
+
+async def _upload(compute, node_type, path, filename, checksum):
+    """
+    :returns: True if the image has been uploaded, False if the compute already has it
+    """
+
+    retries = UPLOAD_RETRIES
+    resume = True
+    while True:
+        offset = 0
+        resumed = False
+        try:
+            size = os.path.getsize(path)
+            try:
+                status = (await compute.post("/{}/image-uploads/{}".format(node_type, filename), data={"md5sum": checksum})).json
+            except aiohttp.web.HTTPNotFound:
+                log.info("Compute {} cannot resume uploads, image {} is sent in one request".format(compute.id, filename))
+                with open(path, "rb") as f:
+                    await compute.post("/{}/images/{}".format(node_type, filename), data=f, timeout=None)
+                return True
+            if status["exists"]:
+                log.info("Image {} is already on compute {}".format(filename, compute.id))
+                return False
+
+            if resume and status["offset"] < size:
+                offset = status["offset"]
+            resumed = offset > 0
+            while True:
+                data = await wait_run_in_executor(_read_chunk, path, offset, UPLOAD_CHUNK_SIZE)
+                url = "/{}/images/{}?offset={}".format(node_type, filename, offset)
+                last = offset + len(data) >= size
+                if last:
+                    url += "&md5sum={}".format(checksum)
+                await compute.post(url, data=data, timeout=None)
+                offset += len(data)
+                if last:
+                    log.info("Image {} uploaded to compute {}".format(filename, compute.id))
+                    return True
+        except ComputeConflict:
+            # the data received before may come from another version of the image
+            if not resumed:
+                raise
+            log.warning("Resumed upload of image {} to compute {} is corrupted, uploading it again".format(filename, compute.id))
+            resume = False
+        except (ComputeError, aiohttp.web.HTTPRequestTimeout) as e:
+            retries -= 1
+            if retries <= 0:
+                raise
+            log.warning("Upload of image {} to compute {} interrupted at {} bytes, resuming: {}".format(filename, compute.id, offset, e))
+        except OSError as e:
+            raise aiohttp.web.HTTPConflict(text="Can't upload {}: {}".format(path, str(e)))
@@ -25,6 +25,7 @@ import os
 from .compute import ComputeConflict, ComputeError
 from .ports.port_factory import PortFactory, StandardPortFactory, DynamipsPortFactory
 from ..utils.images import images_directories
+from .image_upload import upload_image
 from ..config import Config
 from ..utils.qt import qt_font_to_style
 
@@ -447,6 +448,9 @@ class Node:
                     del self._properties[key]
             else:
                 self._properties[key] = value
+        if self._node_type == "iou" and "application_id" in response:
+            # the application ID can be changed by the user, the old one is released
+            self._project.controller.application_ids.add(self._project.id, self._id, self._compute.id, response["application_id"])
         self._list_ports()
         for link in self._links:
             await link.node_updated(self)
@@ -579,11 +583,7 @@ class Node:
             image = os.path.join(directory, img)
             if os.path.exists(image):
                 self.project.emit_notification("log.info", {"message": "Uploading missing image {}".format(img)})
-                try:
-                    with open(image, 'rb') as f:
-                        await self._compute.post("/{}/images/{}".format(self._node_type, os.path.basename(img)), data=f, timeout=None)
-                except OSError as e:
-                    raise aiohttp.web.HTTPConflict(text="Can't upload {}: {}".format(image, str(e)))
+                await upload_image([self._compute], self._node_type, image, os.path.basename(img))
                 self.project.emit_notification("log.info", {"message": "Upload finished for {}".format(img)})
                 return True
         return False
@@ -0,0 +1,192 @@
+#!/usr/bin/env python
+#
+# Copyright (C) 2020 GNS3 Technologies Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import asyncio
+import aiohttp
+
+from .compute import ComputeError
+from ..config import Config
+
+import logging
+log = logging.getLogger(__name__)
+
+
+class ComputeBudget:
+    """
+    Nodes being processed on a compute and memory left for new nodes.
+
+    :param free_memory: Free memory in MB, None if unknown
+    """
+
+    def __init__(self, free_memory=None):
+
+        self.running = 0
+        self.free_memory = free_memory
+        self.condition = asyncio.Condition()
+
+
+class NodeScheduler:
+    """
+    Run an action (start, stop, suspend...) on many nodes with a
+    concurrency budget for each compute.
+
+    Nodes are processed group by group, a group begins when all the nodes
+    of the previous group are done. When resources are checked, a node
+    is admitted on a compute only if its RAM fits in the free memory
+    reported by the compute and the compute CPU is not overloaded,
+    otherwise it waits for the other nodes of this compute. A node is
+    always admitted when nothing else runs on its compute, like
+    BaseNode.check_available_ram() it is not refused for lack of memory.
+
+    :param concurrency: Maximum number of nodes processed at the same time on a compute
+    :param max_cpu_percent: Above this CPU usage, nodes are processed one by one on a compute
+    """
+
+    def __init__(self, concurrency=None, max_cpu_percent=None):
+
+        server_config = Config.instance().get_section_config("Server")
+        if concurrency is None:
+            concurrency = int(server_config.get("compute_start_concurrency", 3))
+        if max_cpu_percent is None:
+            max_cpu_percent = float(server_config.get("start_max_cpu_percent", 90))
+        self._concurrency = max(1, concurrency)
+        self._max_cpu_percent = max_cpu_percent
+        self._budgets = {}
+        self._report = None
+
+    @staticmethod
+    def _node_ram(node):
+        """
+        :returns: RAM required by a node in MB, 0 if unknown or already running
+        """
+
+        if node.status != "stopped":
+            return 0
+        try:
+            return int(node.properties.get("ram") or 0)
+        except (TypeError, ValueError):
+            return 0
+
+    @staticmethod
+    async def _get_free_memory(compute):
+        """
+        :returns: free memory of a compute in MB, None if unknown
+        """
+
+        try:
+            response = await compute.get("/statistics")
+            return response.json["memory_free"] // (1024 * 1024)
+        except (ComputeError, aiohttp.web.HTTPException, KeyError, TypeError) as e:
+            log.warning("Cannot get the free memory of compute {}: {}".format(compute.id, e))
+            return None
+
+    def _compute_overloaded(self, compute):
+
+        cpu_usage_percent = compute.cpu_usage_percent
+        return isinstance(cpu_usage_percent, (int, float)) and cpu_usage_percent >= self._max_cpu_percent
+
+    def _can_run(self, node, ram, check_resources):
+
+        budget = self._budgets[node.compute.id]
+        if budget.running == 0:
+            return True
+        concurrency = self._concurrency
+        if check_resources and self._compute_overloaded(node.compute):
+            concurrency = 1
+        if budget.running >= concurrency:
+            return False
+        if check_resources and ram and budget.free_memory is not None and ram > budget.free_memory:
+            return False
+        return True
+
+    async def _run_node(self, node, action, check_resources, loop, report):
+
+        ram = self._node_ram(node) if check_resources else 0
+        budget = self._budgets[node.compute.id]
+        queued = loop.time()
+        async with budget.condition:
+            await budget.condition.wait_for(lambda: self._can_run(node, ram, check_resources))
+            budget.running += 1
+            if ram and budget.free_memory is not None:
+                if ram > budget.free_memory:
+                    log.warning("Compute {} may not have enough memory to run node {} ({} MB)".format(node.compute.id, node.name, ram))
+                budget.free_memory -= ram
+        begin = loop.time()
+        entry = {
+            "node_id": node.id,
+            "name": node.name,
+            "compute_id": node.compute.id,
+            "queue_time": round(begin - queued, 3)
+        }
+        try:
+            await getattr(node, action)()
+        except Exception as e:
+            # the message of aiohttp HTTP errors is in text
+            entry["error"] = getattr(e, "text", None) or str(e)
+            raise
+        finally:
+            entry["latency"] = round(loop.time() - begin, 3)
+            report.append(entry)
+            async with budget.condition:
+                budget.running -= 1
+                budget.condition.notify_all()
+
+    async def run(self, action, groups, check_resources=False):
+        """
+        Run an action on nodes.
+
+        :param action: Name of the node method to call (e.g. start)
+        :param groups: List of lists of nodes, processed in order
+        :param check_resources: Admit the nodes based on the compute free memory and CPU usage
+        """
+
+        loop = asyncio.get_event_loop()
+        begin = loop.time()
+        computes = {}
+        for group in groups:
+            for node in group:
+                computes[node.compute.id] = node.compute
+        self._budgets = {compute_id: ComputeBudget() for compute_id in computes}
+
+        if check_resources:
+            # the free memory is only needed on computes with nodes requiring RAM
+            computes_with_ram = {node.compute.id: node.compute for group in groups for node in group if self._node_ram(node)}
+            free_memory = await asyncio.gather(*[self._get_free_memory(compute) for compute in computes_with_ram.values()])
+            for compute_id, memory in zip(computes_with_ram, free_memory):
+                self._budgets[compute_id].free_memory = memory
+
+        report = []
+        exceptions = []
+        for group in groups:
+            results = await asyncio.gather(*[self._run_node(node, action, check_resources, loop, report) for node in group], return_exceptions=True)
+            exceptions.extend(result for result in results if isinstance(result, Exception))
+
+        self._report = {
+            "action": action,
+            "duration": round(loop.time() - begin, 3),
+            "groups": len(groups),
+            "nodes": report
+        }
+        if exceptions:
+            raise exceptions[0]
+
+    def report(self):
+        """
+        :returns: queue time and latency of each node of the last run, in seconds
+        """
+
+        return self._report
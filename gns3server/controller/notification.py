@@ -19,7 +19,7 @@ import os
 import aiohttp
 from contextlib import contextmanager
 
-from ..notification_queue import NotificationQueue
+from ..notification_queue import NotificationQueue, NotificationMessage
 
 
 class Notification:
@@ -81,8 +81,9 @@ class Notification:
             except TypeError:  # If we receive a mock as an event it will raise TypeError when using json dump
                 pass
 
+        message = NotificationMessage(action, event)
         for controller_listener in self._controller_listeners:
-            controller_listener.put_nowait((action, event, {}))
+            controller_listener.put_message(message)
 
     def project_has_listeners(self, project_id):
         """
@@ -154,8 +155,9 @@ class Notification:
             project_listeners = self._project_listeners[project_id]
         except KeyError:
             return
+        message = NotificationMessage(action, event)
         for listener in project_listeners:
-            listener.put_nowait((action, event, {}))
+            listener.put_message(message)
 
     def _send_event_to_all_projects(self, action, event):
         """
@@ -165,6 +167,26 @@ class Notification:
         :param action: Action name
         :param event: Event to send
         """
+        message = NotificationMessage(action, event)
         for project_listeners in self._project_listeners.values():
             for listener in project_listeners:
-                listener.put_nowait((action, event, {}))
+                listener.put_message(message)
+
+    def statistics(self):
+        """
+        :returns: statistics of the notification queues
+        """
+
+        queues = []
+        for queue in self._controller_listeners:
+            queues.append(dict(queue.stats(), project_id=None))
+        for project_id, project_listeners in self._project_listeners.items():
+            for queue in project_listeners:
+                queues.append(dict(queue.stats(), project_id=project_id))
+        return {
+            "listeners": len(queues),
+            "pending": sum(queue["depth"] for queue in queues),
+            "coalesced": sum(queue["coalesced"] for queue in queues),
+            "dropped": sum(queue["dropped"] for queue in queues),
+            "queues": queues
+        }
@@ -15,7 +15,6 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
-import re
 import os
 import json
 import uuid
@@ -25,6 +24,7 @@ import time
 import asyncio
 import aiohttp
 import aiofiles
+import jsonschema
 import tempfile
 import zipfile
 
@@ -32,18 +32,24 @@ from uuid import UUID, uuid4
 
 from .node import Node
 from .compute import ComputeError
-from .snapshot import Snapshot
+from .snapshot import Snapshot, SNAPSHOT_EXTENSION
 from .drawing import Drawing
-from .topology import project_to_topology, load_topology
+from .topology import load_topology
+from .topology_writer import TopologyWriter
+from .node_scheduler import NodeScheduler
 from .udp_link import UDPLink
 from ..config import Config
+from ..schemas.node import NODE_CREATE_SCHEMA
+from ..schemas.link import LINK_OBJECT_SCHEMA
+from ..schemas.drawing import DRAWING_OBJECT_SCHEMA
+from ..utils.schema_registry import SchemaRegistry
 from ..utils.path import check_path_allowed, get_default_project_directory
-from ..utils.application_id import get_next_application_id
-from ..utils.asyncio.pool import Pool
+from ..utils.identifiers import NameAllocator
 from ..utils.asyncio import locking
 from ..utils.asyncio import aiozipstream
 from .export_project import export_project
 from .import_project import import_project
+from .duplicate_project import duplicate_project
 
 import logging
 log = logging.getLogger(__name__)
@@ -120,14 +126,19 @@ class Project:
         else:
             self._filename = self.name + ".gns3"
 
+        self._topology_writer = TopologyWriter(self)
         self.reset()
 
         # At project creation we write an empty .gns3 with the meta
         if not os.path.exists(self._topology_file()):
             assert self._status != "closed"
-            self.dump()
+            self.dump(flush=True)
 
         self._iou_id_lock = asyncio.Lock()
+        self._batch_lock = asyncio.Lock()
+        # the snapshot chunks must not be collected while a snapshot is created
+        self._snapshot_lock = asyncio.Lock()
+        self._scheduler_report = None
 
         log.debug('Project "{name}" [{id}] loaded'.format(name=self.name, id=self._id))
 
@@ -139,6 +150,12 @@ class Project:
         :param event: Event to send
         """
 
+        if self._batch_notifications is not None and action in ("node.created", "link.created", "drawing.created"):
+            object_type = action.split(".")[0]
+            # only the objects created by the batch, not by concurrent API calls
+            if event.get(object_type + "_id") in self._batch_objects:
+                self._batch_notifications[object_type + "s"].append(event)
+                return
         self.controller.notification.project_emit(action, event, project_id=self.id)
 
     async def update(self, **kwargs):
@@ -169,23 +186,32 @@ class Project:
         """
         Called when open/close a project. Cleanup internal stuff
         """
-        self._allocated_node_names = set()
+        self._allocated_node_names = NameAllocator()
         self._nodes = {}
         self._links = {}
         self._drawings = {}
         self._snapshots = {}
         self._computes = []
+        self._closed_data = None
 
         # List the available snapshots
         snapshot_dir = os.path.join(self.path, "snapshots")
         if os.path.exists(snapshot_dir):
             for snap in os.listdir(snapshot_dir):
-                if snap.endswith(".gns3project"):
+                if snap.endswith(".gns3project") or snap.endswith(SNAPSHOT_EXTENSION):
                     snapshot = Snapshot(self, filename=snap)
                     self._snapshots[snapshot.id] = snapshot
 
         # Create the project on demand on the compute node
         self._project_created_on_compute = set()
+        self._compute_locks = {}
+        # UDP ports reserved in advance on each compute for the links
+        self._udp_ports = {}
+
+        # creation notifications are grouped while a batch is running
+        self._batch_notifications = None
+        # IDs of the objects created by the running batch
+        self._batch_objects = set()
 
     @property
     def scene_height(self):
@@ -450,8 +476,7 @@ class Project:
         :param name: allocated node name
         """
 
-        if name in self._allocated_node_names:
-            self._allocated_node_names.remove(name)
+        self._allocated_node_names.release(name)
 
     def update_allocated_node_name(self, base_name):
         """
@@ -461,35 +486,7 @@ class Project:
         :param base_name: new node base name
         """
 
-        if base_name is None:
-            return None
-        base_name = re.sub(r"[ ]", "", base_name)
-        if base_name in self._allocated_node_names:
-            base_name = re.sub(r"[0-9]+$", "{0}", base_name)
-
-        if '{0}' in base_name or '{id}' in base_name:
-            # base name is a template, replace {0} or {id} by an unique identifier
-            for number in range(1, 1000000):
-                try:
-                    name = base_name.format(number, id=number, name="Node")
-                except KeyError as e:
-                    raise aiohttp.web.HTTPConflict(text="{" + e.args[0] + "} is not a valid replacement string in the node name")
-                except (ValueError, IndexError) as e:
-                    raise aiohttp.web.HTTPConflict(text="{} is not a valid replacement string in the node name".format(base_name))
-                if name not in self._allocated_node_names:
-                    self._allocated_node_names.add(name)
-                    return name
-        else:
-            if base_name not in self._allocated_node_names:
-                self._allocated_node_names.add(base_name)
-                return base_name
-            # base name is not unique, let's find a unique name by appending a number
-            for number in range(1, 1000000):
-                name = base_name + str(number)
-                if name not in self._allocated_node_names:
-                    self._allocated_node_names.add(name)
-                    return name
-        raise aiohttp.web.HTTPConflict(text="A node name could not be allocated (node limit reached?)")
+        return self._allocated_node_names.allocate(base_name)
 
     def update_node_name(self, node, new_name):
 
@@ -529,24 +526,27 @@ class Project:
 
         node = Node(self, compute, name, node_id=node_id, node_type=node_type, **kwargs)
         if compute not in self._project_created_on_compute:
-            # For a local server we send the project path
-            if compute.id == "local":
-                data = {
-                    "name": self._name,
-                    "project_id": self._id,
-                    "path": self._path
-                }
-            else:
-                data = {
-                    "name": self._name,
-                    "project_id": self._id
-                }
-
-            if self._variables:
-                data["variables"] = self._variables
-
-            await compute.post("/projects", data=data)
-            self._project_created_on_compute.add(compute)
+            # nodes can be created concurrently, make sure the project is created only once on the compute
+            async with self._compute_locks.setdefault(compute, asyncio.Lock()):
+                if compute not in self._project_created_on_compute:
+                    # For a local server we send the project path
+                    if compute.id == "local":
+                        data = {
+                            "name": self._name,
+                            "project_id": self._id,
+                            "path": self._path
+                        }
+                    else:
+                        data = {
+                            "name": self._name,
+                            "project_id": self._id
+                        }
+
+                    if self._variables:
+                        data["variables"] = self._variables
+
+                    await compute.post("/projects", data=data)
+                    self._project_created_on_compute.add(compute)
 
         await node.create()
         self._nodes[node.id] = node
@@ -575,11 +575,12 @@ class Project:
                 # to generate MAC addresses) when creating multiple IOU node at the same time
                 if "properties" in kwargs.keys():
                     # allocate a new application id for nodes loaded from the project
-                    kwargs.get("properties")["application_id"] = get_next_application_id(self._controller.projects, self._computes)
+                    kwargs.get("properties")["application_id"] = self._controller.application_ids.get_next(self._computes)
                 elif "application_id" not in kwargs.keys() and not kwargs.get("properties"):
                     # allocate a new application id for nodes added to the project
-                    kwargs["application_id"] = get_next_application_id(self._controller.projects, self._computes)
+                    kwargs["application_id"] = self._controller.application_ids.get_next(self._computes)
                 node = await self._create_node(compute, name, node_id, node_type, **kwargs)
+                self._controller.application_ids.add(self._id, node.id, compute.id, node.properties.get("application_id"))
         else:
             node = await self._create_node(compute, name, node_id, node_type, **kwargs)
         self.emit_notification("node.created", node.__json__())
@@ -607,6 +608,8 @@ class Project:
         await self.__delete_node_links(node)
         self.remove_allocated_node_name(node.name)
         del self._nodes[node.id]
+        if node.node_type == "iou":
+            self._controller.application_ids.remove(self._id, node.id)
         await node.destroy()
         # refresh the compute IDs list
         self._computes = [n.compute.id for n in self.nodes.values()]
@@ -628,24 +631,33 @@ class Project:
         Get the data for a project from the .gns3 when
         the project is close
 
+        The parsed topology is cached until the .gns3 file changes.
+
         :param section: The section name in the .gns3
         :param id_key: The key for the element unique id
         """
 
         try:
             path = self._topology_file()
-            with open(path, "r") as f:
-                topology = json.load(f)
+            st = os.stat(path)
+            key = (st.st_mtime_ns, st.st_size)
+            if self._closed_data is None or self._closed_data[0] != key:
+                with open(path, "r") as f:
+                    topology = json.load(f)
+                self._closed_data = (key, topology, {})
         except OSError as e:
             raise aiohttp.web.HTTPInternalServerError(text="Could not load topology: {}".format(e))
 
-        try:
-            data = {}
-            for elem in topology["topology"][section]:
-                data[elem[id_key]] = elem
-            return data
-        except KeyError:
-            raise aiohttp.web.HTTPNotFound(text="Section {} not found in the topology".format(section))
+        _, topology, sections = self._closed_data
+        if section not in sections:
+            try:
+                data = {}
+                for elem in topology["topology"][section]:
+                    data[elem[id_key]] = elem
+                sections[section] = data
+            except KeyError:
+                raise aiohttp.web.HTTPNotFound(text="Section {} not found in the topology".format(section))
+        return dict(sections[section])
 
     @property
     def nodes(self):
@@ -728,6 +740,195 @@ class Project:
         self.dump()
         self.emit_notification("link.deleted", link.__json__())
 
+    async def allocate_udp_port(self, compute):
+        """
+        Allocate a UDP port on a compute for a link, the ports
+        reserved with reserve_udp_ports() are used first.
+
+        :param compute: Compute instance
+        :returns: UDP port number
+        """
+
+        ports = self._udp_ports.get(compute.id)
+        if ports:
+            return ports.pop(0)
+        response = await compute.post("/projects/{}/ports/udp".format(self._id))
+        return response.json["udp_port"]
+
+    async def reserve_udp_ports(self, endpoints):
+        """
+        Reserve in advance the UDP ports required by a list of link endpoints,
+        with one request per compute. Errors are only logged because the
+        ports can still be allocated one by one.
+
+        :param endpoints: List of nodes, one entry for each link side
+        """
+
+        counts = {}
+        for node in endpoints:
+            counts.setdefault(node.compute, 0)
+            counts[node.compute] += 1
+
+        async def reserve(compute, count):
+            try:
+                response = await compute.post("/projects/{}/ports/udp/reserve".format(self._id), data={"count": count})
+            except (ComputeError, aiohttp.web.HTTPException) as e:
+                log.warning("Cannot reserve {} UDP ports on compute {}: {}".format(count, compute.id, e))
+                return
+            self._udp_ports.setdefault(compute.id, []).extend(response.json["udp_ports"])
+
+        jobs = []
+        for compute, count in counts.items():
+            count -= len(self._udp_ports.get(compute.id, []))
+            if count > 0:
+                jobs.append(reserve(compute, count))
+        await asyncio.gather(*jobs)
+
+    async def release_udp_ports(self):
+        """
+        Release the UDP ports reserved in advance and not used by a link,
+        for instance when a link creation has failed.
+        """
+
+        async def release(compute_id, ports):
+            try:
+                compute = self.controller.get_compute(compute_id)
+                await compute.post("/projects/{}/ports/udp/release".format(self._id), data={"ports": ports})
+            except (ComputeError, aiohttp.web.HTTPException) as e:
+                log.warning("Cannot release {} UDP ports on compute {}: {}".format(len(ports), compute_id, e))
+
+        udp_ports = self._udp_ports
+        self._udp_ports = {}
+        await asyncio.gather(*[release(compute_id, ports) for compute_id, ports in udp_ports.items() if ports])
+
+    @open_required
+    async def batch(self, operations):
+        """
+        Create nodes, links and drawings in one operation.
+
+        Nodes and drawings are created first then the links, so links can
+        be connected to nodes of the same batch. Operations run concurrently
+        (limited by the batch_concurrency server setting) and an error only
+        fails its own operation. The topology is saved once and the creation
+        notifications are sent as one batch.created notification.
+
+        :param operations: List of dictionaries with a type (node, link or drawing) and data
+        :returns: List of results in the same order as the operations
+        """
+
+        async with self._batch_lock:
+            results = [None] * len(operations)
+            semaphore = asyncio.Semaphore(max(1, int(self._config().get("batch_concurrency", 10))))
+            self._batch_notifications = {"nodes": [], "links": [], "drawings": []}
+            try:
+                jobs = []
+                link_operations = []
+                for position, operation in enumerate(operations):
+                    if operation["type"] == "link":
+                        link_operations.append(position)
+                    else:
+                        jobs.append(self._batch_operation(position, operation, semaphore, results))
+                await asyncio.gather(*jobs)
+
+                # ports are reserved before creating the links concurrently because
+                # a port is only marked as used once the link has been created
+                jobs = []
+                used_ports = set()
+                for position in link_operations:
+                    endpoints = set()
+                    for node_link in operations[position]["data"].get("nodes", []):
+                        endpoints.add((node_link.get("node_id"), node_link.get("adapter_number", 0), node_link.get("port_number", 0)))
+                    if endpoints & used_ports:
+                        results[position] = {"type": "link", "status": 409, "message": "Port is already used"}
+                        continue
+                    used_ports |= endpoints
+                    jobs.append(self._batch_operation(position, operations[position], semaphore, results))
+                await self.reserve_udp_ports([self._nodes[node_id] for node_id, _, _ in used_ports if node_id in self._nodes])
+                await asyncio.gather(*jobs)
+                await self.release_udp_ports()
+            finally:
+                notifications = self._batch_notifications
+                self._batch_notifications = None
+                self._batch_objects = set()
+                self.dump()
+                notifications["project_id"] = self._id
+                self.emit_notification("batch.created", notifications)
+            return results
+
+    async def _batch_operation(self, position, operation, semaphore, results):
+        """
+        Run one operation of a batch and store its result.
+        """
+
+        object_type = operation["type"]
+        data = copy.deepcopy(operation["data"])
+        async with semaphore:
+            try:
+                if object_type == "node":
+                    SchemaRegistry.validate(data, NODE_CREATE_SCHEMA)
+                    compute = self.controller.get_compute(data.pop("compute_id"))
+                    node_id = data.pop("node_id", None) or str(uuid4())
+                    self._batch_objects.add(node_id)
+                    obj = await self.add_node(compute, data.pop("name"), node_id, dump=False, **data)
+                elif object_type == "link":
+                    SchemaRegistry.validate(data, LINK_OBJECT_SCHEMA)
+                    obj = await self._batch_link(data)
+                else:
+                    SchemaRegistry.validate(data, DRAWING_OBJECT_SCHEMA)
+                    data["drawing_id"] = data.get("drawing_id") or str(uuid4())
+                    self._batch_objects.add(data["drawing_id"])
+                    obj = await self.add_drawing(dump=False, **data)
+            except jsonschema.ValidationError as e:
+                results[position] = {"type": object_type, "status": 400, "message": "JSON schema error: {}".format(e.message)}
+            except aiohttp.web.HTTPException as e:
+                results[position] = {"type": object_type, "status": e.status, "message": e.text}
+            except ComputeError as e:
+                results[position] = {"type": object_type, "status": 409, "message": str(e)}
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # an error only fails its own operation
+                log.error("Error in batch {} operation: {}".format(object_type, e), exc_info=1)
+                results[position] = {"type": object_type, "status": 500, "message": str(e)}
+            else:
+                results[position] = {"type": object_type, "status": 201, "result": obj.__json__()}
+
+    async def _batch_link(self, data):
+        """
+        Create a link of a batch, same steps as the link creation API endpoint.
+        """
+
+        if len(data.get("nodes", [])) != 2:
+            raise aiohttp.web.HTTPBadRequest(text="A link must connect 2 nodes")
+        link_id = str(uuid4())
+        self._batch_objects.add(link_id)
+        link = await self.add_link(link_id, dump=False)
+        try:
+            if "filters" in data:
+                await link.update_filters(data["filters"])
+            if "link_style" in data:
+                await link.update_link_style(data["link_style"])
+            if "suspend" in data:
+                await link.update_suspend(data["suspend"])
+            for node in data["nodes"]:
+                await link.add_node(self.get_node(node["node_id"]),
+                                    node.get("adapter_number", 0),
+                                    node.get("port_number", 0),
+                                    label=node.get("label"),
+                                    dump=False)
+        except Exception:
+            if link.created:
+                await self.delete_link(link.id, force_delete=True)
+            else:
+                # link.created has not been sent, the clients don't know this link
+                del self._links[link.id]
+                try:
+                    await link.delete()
+                except Exception as e:
+                    log.warning("Could not delete link {}: {}".format(link.id, e))
+            raise
+        return link
+
     @open_required
     def get_link(self, link_id):
         """
@@ -775,7 +976,8 @@ class Project:
         if name in [snap.name for snap in self._snapshots.values()]:
             raise aiohttp.web.HTTPConflict(text="The snapshot name {} already exists".format(name))
         snapshot = Snapshot(self, name=name)
-        await snapshot.create()
+        async with self._snapshot_lock:
+            await snapshot.create()
         self._snapshots[snapshot.id] = snapshot
         return snapshot
 
@@ -783,7 +985,8 @@ class Project:
     async def delete_snapshot(self, snapshot_id):
         snapshot = self.get_snapshot(snapshot_id)
         del self._snapshots[snapshot.id]
-        os.remove(snapshot.path)
+        async with self._snapshot_lock:
+            await snapshot.delete()
 
     @locking
     async def close(self, ignore_notification=False):
@@ -794,6 +997,9 @@ class Project:
             return
         self._closing = True
         await self.stop_all()
+        if os.path.exists(self.path):
+            # write any pending topology change before closing
+            self._topology_writer.flush(force=False)
         for compute in list(self._project_created_on_compute):
             try:
                 await compute.post("/projects/{}/close".format(self._id), dont_connect=True)
@@ -802,6 +1008,7 @@ class Project:
                 pass
         self._clean_pictures()
         self._status = "closed"
+        self._controller.application_ids.remove_project(self._id)
         if not ignore_notification:
             self.emit_notification("project.closed", self.__json__())
         self.reset()
@@ -850,6 +1057,7 @@ class Project:
                 log.warning("Conflict while deleting project: {}".format(e.text))
         await self.delete_on_computes()
         await self.close()
+        self._topology_writer.cancel()
         try:
             project_directory = get_default_project_directory()
             if not os.path.commonprefix([project_directory, self.path]) == project_directory:
@@ -945,37 +1153,91 @@ class Project:
                 if compute_id not in self._computes:
                     self._computes.append(compute_id)
 
+            progress = {
+                "project_id": self._id,
+                "nodes_created": 0,
+                "nodes_total": len(topology.get("nodes", [])),
+                "links_created": 0,
+                "links_total": 0
+            }
+            concurrency = int(self._config().get("open_project_concurrency", 5))
+            semaphores = {}
+
+            def compute_semaphore(compute):
+                return semaphores.setdefault(compute.id, asyncio.Semaphore(concurrency))
+
+            async def create_node(compute, name, node_id, node_data):
+                async with compute_semaphore(compute):
+                    await self.add_node(compute, name, node_id, dump=False, **node_data)
+                progress["nodes_created"] += 1
+                self.emit_notification("project.loading", dict(progress))
+
+            node_jobs = []
+            nodes_order = []
             for node in topology.get("nodes", []):
                 compute = self.controller.get_compute(node.pop("compute_id"))
                 name = node.pop("name")
                 node_id = node.pop("node_id", str(uuid.uuid4()))
-                await self.add_node(compute, name, node_id, dump=False, **node)
+                nodes_order.append(node_id)
+                node_jobs.append(create_node(compute, name, node_id, node))
+            await self._run_concurrently(node_jobs)
+            # keep the nodes in the same order as in the topology file
+            self._nodes = {node_id: self._nodes[node_id] for node_id in nodes_order if node_id in self._nodes}
+
+            async def create_link(link, endpoints):
+                # acquire the compute semaphores always in the same order to avoid dead locks
+                computes = sorted({node.compute for node, _ in endpoints}, key=lambda c: c.id)
+                for compute in computes:
+                    await compute_semaphore(compute).acquire()
+                try:
+                    for node, node_link in endpoints:
+                        await link.add_node(node, node_link["adapter_number"], node_link["port_number"], label=node_link.get("label"), dump=False)
+                finally:
+                    for compute in computes:
+                        compute_semaphore(compute).release()
+                progress["links_created"] += 1
+                self.emit_notification("project.loading", dict(progress))
+
+            # ports are checked before creating links concurrently because
+            # a port is only marked as used once the link has been created
+            link_jobs = []
+            used_ports = set()
             for link_data in topology.get("links", []):
                 if 'link_id' not in link_data.keys():
                     # skip the link
                     continue
-                link = await self.add_link(link_id=link_data["link_id"])
+                link = await self.add_link(link_id=link_data["link_id"], dump=False)
                 if "filters" in link_data:
                     await link.update_filters(link_data["filters"])
                 if "link_style" in link_data:
                     await link.update_link_style(link_data["link_style"])
+                endpoints = []
                 for node_link in link_data.get("nodes", []):
                     node = self.get_node(node_link["node_id"])
                     port = node.get_port(node_link["adapter_number"], node_link["port_number"])
                     if port is None:
                         log.warning("Port {}/{} for {} not found".format(node_link["adapter_number"], node_link["port_number"], node.name))
                         continue
-                    if port.link is not None:
-                        log.warning("Port {}/{} is already connected to link ID {}".format(node_link["adapter_number"], node_link["port_number"], port.link.id))
+                    port_key = (node.id, node_link["adapter_number"], node_link["port_number"])
+                    if port.link is not None or port_key in used_ports:
+                        log.warning("Port {}/{} is already connected to link ID {}".format(node_link["adapter_number"], node_link["port_number"], port.link.id if port.link else None))
                         continue
-                    await link.add_node(node, node_link["adapter_number"], node_link["port_number"], label=node_link.get("label"), dump=False)
+                    used_ports.add(port_key)
+                    endpoints.append((node, node_link))
+                link_jobs.append(create_link(link, endpoints))
+            progress["links_total"] = len(link_jobs)
+            await self.reserve_udp_ports([self._nodes[node_id] for node_id, _, _ in used_ports])
+            await self._run_concurrently(link_jobs)
+            await self.release_udp_ports()
+
+            for link in list(self._links.values()):
                 if len(link.nodes) != 2:
                     # a link should have 2 attached nodes, this can happen with corrupted projects
                     await self.delete_link(link.id, force_delete=True)
             for drawing_data in topology.get("drawings", []):
                 await self.add_drawing(dump=False, **drawing_data)
 
-            self.dump()
+            self.dump(flush=True)
         # We catch all error to be able to rollback the .gns3 to the previous state
         except Exception as e:
             for compute in list(self._project_created_on_compute):
@@ -989,7 +1251,9 @@ class Project:
                     shutil.copy(path + ".backup", path)
             except OSError:
                 pass
+            self._topology_writer.cancel()
             self._status = "closed"
+            self._controller.application_ids.remove_project(self._id)
             self._loading = False
             if isinstance(e, ComputeError):
                 raise aiohttp.web.HTTPConflict(text=str(e))
@@ -1008,6 +1272,27 @@ class Project:
             # their project and fix it
             asyncio.ensure_future(self.start_all())
 
+    @staticmethod
+    async def _run_concurrently(jobs):
+        """
+        Run coroutines concurrently. If one of them fails, the others
+        are cancelled and the first error is raised.
+
+        :param jobs: List of coroutines
+        """
+
+        tasks = [asyncio.ensure_future(job) for job in jobs]
+        if not tasks:
+            return
+        done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.wait(pending)
+        for task in tasks:
+            if task in done and task.exception():
+                raise task.exception()
+
     async def wait_loaded(self):
         """
         Wait until the project finish loading
@@ -1019,9 +1304,10 @@ class Project:
         """
         Duplicate a project
 
-        It's the save as feature of the 1.X. It's implemented on top of the
-        export / import features. It will generate a gns3p and reimport it.
-        It's a little slower but we have only one implementation to maintain.
+        It's the save as feature of the 1.X. The files are copied directly
+        to the new project, the remote computes copy the files of their
+        nodes. If a compute cannot do it, the project is exported to a
+        gns3p and reimported.
 
         :param name: Name of the new project. A new one will be generated in case of conflicts
         :param location: Parent directory of the new project
@@ -1032,35 +1318,13 @@ class Project:
         if self._status == "closed":
             await self.open()
 
-        self.dump()
+        self.dump(flush=True)
         assert self._status != "closed"
         try:
             begin = time.time()
-
-            # use the parent directory of the project we are duplicating as a
-            # temporary directory to avoid no space left issues when '/tmp'
-            # is location on another partition.
-            if location:
-                working_dir = os.path.abspath(os.path.join(location, os.pardir))
-            else:
-                working_dir = os.path.abspath(os.path.join(self.path, os.pardir))
-
-            with tempfile.TemporaryDirectory(dir=working_dir) as tmpdir:
-                # Do not compress the exported project when duplicating
-                with aiozipstream.ZipFile(compression=zipfile.ZIP_STORED) as zstream:
-                    await export_project(zstream, self, tmpdir, keep_compute_id=True, allow_all_nodes=True, reset_mac_addresses=reset_mac_addresses)
-
-                    # export the project to a temporary location
-                    project_path = os.path.join(tmpdir, "project.gns3p")
-                    log.info("Exporting project to '{}'".format(project_path))
-                    async with aiofiles.open(project_path, 'wb') as f:
-                        async for chunk in zstream:
-                            await f.write(chunk)
-
-                    # import the temporary project
-                    with open(project_path, "rb") as f:
-                        project = await import_project(self._controller, str(uuid.uuid4()), f, location=location, name=name, keep_compute_id=True)
-
+            project = await duplicate_project(self._controller, self, str(uuid.uuid4()), location=location, name=name, reset_mac_addresses=reset_mac_addresses)
+            if project is None:
+                project = await self._duplicate_with_export(name, location, reset_mac_addresses)
             log.info("Project '{}' duplicated in {:.4f} seconds".format(project.name, time.time() - begin))
         except (ValueError, OSError, UnicodeEncodeError) as e:
             raise aiohttp.web.HTTPConflict(text="Cannot duplicate project: {}".format(str(e)))
@@ -1070,6 +1334,35 @@ class Project:
 
         return project
 
+    async def _duplicate_with_export(self, name, location, reset_mac_addresses):
+        """
+        Duplicate a project by exporting it to a gns3p and reimporting it.
+        """
+
+        # use the parent directory of the project we are duplicating as a
+        # temporary directory to avoid no space left issues when '/tmp'
+        # is location on another partition.
+        if location:
+            working_dir = os.path.abspath(os.path.join(location, os.pardir))
+        else:
+            working_dir = os.path.abspath(os.path.join(self.path, os.pardir))
+
+        with tempfile.TemporaryDirectory(dir=working_dir) as tmpdir:
+            # Do not compress the exported project when duplicating
+            with aiozipstream.ZipFile(compression=zipfile.ZIP_STORED) as zstream:
+                await export_project(zstream, self, tmpdir, keep_compute_id=True, allow_all_nodes=True, reset_mac_addresses=reset_mac_addresses)
+
+                # export the project to a temporary location
+                project_path = os.path.join(tmpdir, "project.gns3p")
+                log.info("Exporting project to '{}'".format(project_path))
+                async with aiofiles.open(project_path, 'wb') as f:
+                    async for chunk in zstream:
+                        await f.write(chunk)
+
+                # import the temporary project
+                with open(project_path, "rb") as f:
+                    return await import_project(self._controller, str(uuid.uuid4()), f, location=location, name=name, keep_compute_id=True)
+
     def is_running(self):
         """
         If a node is started or paused return True
@@ -1080,49 +1373,118 @@ class Project:
                 return True
         return False
 
-    def dump(self):
+    def dump(self, flush=False):
         """
         Dump topology to disk
+
+        Successive dumps are coalesced and written in the background
+        after the configured write delay.
+
+        :param flush: write the topology immediately
+        """
+
+        if flush:
+            self._topology_writer.flush()
+        else:
+            self._topology_writer.schedule()
+
+    @open_required
+    async def telemetry(self):
+        """
+        Resources used by the processes of the nodes, collected from all the computes.
+
+        :returns: dictionary with the samples of each node and the totals by compute
         """
+
+        async def compute_telemetry(compute):
+            try:
+                response = await compute.get("/projects/{}/telemetry".format(self._id))
+            except (ComputeError, aiohttp.web.HTTPException) as e:
+                log.warning("Cannot get the telemetry of project {} from compute {}: {}".format(self._id, compute.id, e))
+                return compute, []
+            return compute, response.json
+
+        nodes = []
+        computes = {}
+        for compute, compute_nodes in await asyncio.gather(*[compute_telemetry(compute) for compute in self._project_created_on_compute]):
+            totals = computes.setdefault(compute.id, {"nodes": 0, "cpu_percent": 0.0, "rss": 0})
+            # processes shared by several nodes are counted once
+            shared_processes = {}
+            for node_telemetry in compute_nodes:
+                node = self._nodes.get(node_telemetry["node_id"])
+                if node is None:
+                    continue
+                node_telemetry["name"] = node.name
+                node_telemetry["compute_id"] = compute.id
+                nodes.append(node_telemetry)
+                latest = node_telemetry.get("latest")
+                if latest:
+                    totals["nodes"] += 1
+                    totals["cpu_percent"] += latest["cpu_percent"]
+                    totals["rss"] += latest["rss"]
+                    for usage in latest.get("processes", {}).values():
+                        if usage.get("shared"):
+                            shared_processes[usage["pid"]] = usage
+            for usage in shared_processes.values():
+                totals["cpu_percent"] += usage["cpu_percent"]
+                totals["rss"] += usage["rss"]
+        return {"nodes": nodes, "computes": computes}
+
+    def _node_groups(self, groups=None):
+        """
+        Split the nodes in groups processed one after the other.
+
+        :param groups: List of lists of node IDs, the nodes not listed are in a last group
+        :returns: List of lists of nodes
+        """
+
+        node_groups = []
+        remaining = dict(self._nodes)
+        for group in groups or []:
+            node_group = []
+            for node_id in group:
+                node = self.get_node(node_id)
+                if remaining.pop(node_id, None) is not None:
+                    node_group.append(node)
+            if node_group:
+                node_groups.append(node_group)
+        if remaining:
+            node_groups.append(list(remaining.values()))
+        return node_groups
+
+    async def _run_on_all_nodes(self, action, groups=None, check_resources=False):
+
+        scheduler = NodeScheduler()
         try:
-            topo = project_to_topology(self)
-            path = self._topology_file()
-            log.debug("Write %s", path)
-            with open(path + ".tmp", "w+", encoding="utf-8") as f:
-                json.dump(topo, f, indent=4, sort_keys=True)
-            shutil.move(path + ".tmp", path)
-        except OSError as e:
-            raise aiohttp.web.HTTPInternalServerError(text="Could not write topology: {}".format(e))
+            await scheduler.run(action, self._node_groups(groups), check_resources=check_resources)
+        finally:
+            self._scheduler_report = scheduler.report()
 
     @open_required
-    async def start_all(self):
+    async def start_all(self, groups=None):
         """
         Start all nodes
+
+        :param groups: Boot order, list of lists of node IDs started one group after the other
         """
-        pool = Pool(concurrency=3)
-        for node in self.nodes.values():
-            pool.append(node.start)
-        await pool.join()
+
+        await self._run_on_all_nodes("start", groups, check_resources=True)
 
     @open_required
     async def stop_all(self):
         """
         Stop all nodes
         """
-        pool = Pool(concurrency=3)
-        for node in self.nodes.values():
-            pool.append(node.stop)
-        await pool.join()
+
+        await self._run_on_all_nodes("stop")
 
     @open_required
     async def suspend_all(self):
         """
         Suspend all nodes
         """
-        pool = Pool(concurrency=3)
-        for node in self.nodes.values():
-            pool.append(node.suspend)
-        await pool.join()
+
+        await self._run_on_all_nodes("suspend")
 
     @open_required
     async def duplicate_node(self, node, x, y, z):
@@ -1180,7 +1542,9 @@ class Project:
             "nodes": len(self._nodes),
             "links": len(self._links),
             "drawings": len(self._drawings),
-            "snapshots": len(self._snapshots)
+            "snapshots": len(self._snapshots),
+            "topology_writer": self._topology_writer.stats(),
+            "node_scheduler": self._scheduler_report
         }
 
     def __json__(self):
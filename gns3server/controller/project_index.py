@@ -0,0 +1,148 @@
+#!/usr/bin/env python
+#
+# Copyright (C) 2020 GNS3 Technologies Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import json
+import shutil
+
+from .topology import GNS3_FILE_FORMAT_REVISION
+from ..version import __version__
+
+import logging
+log = logging.getLogger(__name__)
+
+
+class ProjectIndex:
+    """
+    On-disk index of the project metadata found in .gns3 files.
+
+    Entries are keyed by the topology file path and validated with the
+    file modification time and size, only new or modified topologies
+    need to be parsed again when the controller starts.
+
+    :param path: Path of the index file
+    """
+
+    def __init__(self, path):
+
+        self._path = path
+        self._entries = {}
+        self._seen = set()
+        self._hits = 0
+        self._misses = 0
+
+    @property
+    def path(self):
+
+        return self._path
+
+    def load(self):
+        """
+        Load the index from disk, an unreadable or outdated index is ignored.
+        """
+
+        self._entries = {}
+        self._seen = set()
+        if not os.path.exists(self._path):
+            return
+        try:
+            with open(self._path, encoding="utf-8") as f:
+                index = json.load(f)
+            # a new version may accept topologies rejected by the previous one
+            if index.get("revision") != GNS3_FILE_FORMAT_REVISION or index.get("version") != __version__:
+                log.info("Project index '{}' is outdated and will be rebuilt".format(self._path))
+                return
+            self._entries = index.get("projects", {})
+        except (OSError, UnicodeDecodeError, ValueError, AttributeError) as e:
+            log.warning("Could not load project index '{}': {}".format(self._path, e))
+
+    def save(self, prune=True):
+        """
+        Write the index to disk.
+
+        :param prune: remove the entries not looked up since the index was loaded
+        """
+
+        if prune:
+            self._entries = {path: entry for path, entry in self._entries.items() if path in self._seen}
+        index = {
+            "revision": GNS3_FILE_FORMAT_REVISION,
+            "version": __version__,
+            "projects": self._entries
+        }
+        try:
+            os.makedirs(os.path.dirname(self._path), exist_ok=True)
+            with open(self._path + ".tmp", "w+", encoding="utf-8") as f:
+                json.dump(index, f)
+            shutil.move(self._path + ".tmp", self._path)
+        except OSError as e:
+            log.warning("Could not write project index '{}': {}".format(self._path, e))
+
+    @staticmethod
+    def _stat(path):
+
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def get(self, path):
+        """
+        Return the index entry for a topology file if the file hasn't changed.
+
+        :param path: Path of the .gns3 file
+        :returns: Dictionary with either a "metadata" or an "error" key, None if the file must be parsed
+        """
+
+        self._seen.add(path)
+        entry = self._entries.get(path)
+        stat = self._stat(path)
+        if entry is None or stat is None or (entry.get("mtime"), entry.get("size")) != stat:
+            self._misses += 1
+            return None
+        self._hits += 1
+        return entry
+
+    def set(self, path, metadata=None, error=None):
+        """
+        Record the metadata (or the loading error) of a topology file.
+
+        :param path: Path of the .gns3 file
+        :param metadata: Project metadata
+        :param error: Error message if the topology cannot be loaded
+        """
+
+        self._seen.add(path)
+        stat = self._stat(path)
+        if stat is None:
+            self._entries.pop(path, None)
+            return
+        entry = {"mtime": stat[0], "size": stat[1]}
+        if error is not None:
+            entry["error"] = error
+        else:
+            entry["metadata"] = metadata
+        self._entries[path] = entry
+
+    def stats(self):
+
+        return {
+            "entries": len(self._entries),
+            "hits": self._hits,
+            "misses": self._misses
+        }
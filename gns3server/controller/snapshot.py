@@ -17,19 +17,20 @@
 
 
 import os
+import json
 import uuid
 import shutil
+import asyncio
 import tempfile
 import aiofiles
-import zipfile
 import time
 import aiohttp.web
 from datetime import datetime, timezone
 
 from ..utils.asyncio import wait_run_in_executor
-from ..utils.asyncio import aiozipstream
-from .export_project import export_project
-from .import_project import import_project
+from .export_project import _is_exportable
+from .import_project import import_project, _upload_file
+from .snapshot_store import SnapshotStore, CHUNK_SIZE
 
 import logging
 log = logging.getLogger(__name__)
@@ -38,10 +39,22 @@ log = logging.getLogger(__name__)
 # The string use to extract the date from the filename
 FILENAME_TIME_FORMAT = "%d%m%y_%H%M%S"
 
+# Extension of the snapshot manifests, the files are in the snapshot store.
+# Snapshots taken by previous versions are .gns3project files.
+SNAPSHOT_EXTENSION = ".gns3snapshot"
+
+# Directory of the chunks in the snapshot directory
+STORE_DIRECTORY = "chunks"
+
+DOWNLOAD_CHUNK_SIZE = 1024 * 8  # 8KB
+
 
 class Snapshot:
     """
     A snapshot object
+
+    A snapshot is a manifest listing the project files, their content is
+    stored in chunks shared between the snapshots of the project.
     """
 
     def __init__(self, project, name=None, filename=None):
@@ -53,7 +66,7 @@ class Snapshot:
         if name:
             self._name = name
             self._created_at = datetime.now().timestamp()
-            filename = self._name + "_" + datetime.utcfromtimestamp(self._created_at).replace(tzinfo=None).strftime(FILENAME_TIME_FORMAT) + ".gns3project"
+            filename = self._name + "_" + datetime.utcfromtimestamp(self._created_at).replace(tzinfo=None).strftime(FILENAME_TIME_FORMAT) + SNAPSHOT_EXTENSION
         else:
             self._name = filename.split("_")[0]
             datestring = filename.replace(self._name + "_", "").split(".")[0]
@@ -79,6 +92,41 @@ class Snapshot:
     def created_at(self):
         return int(self._created_at)
 
+    @property
+    def is_archive(self):
+        """
+        :returns: True if the snapshot is a .gns3project archive
+        """
+
+        return self._path.endswith(".gns3project")
+
+    def _store(self, chunk_size=CHUNK_SIZE):
+
+        return SnapshotStore(os.path.join(self._project.path, "snapshots", STORE_DIRECTORY), chunk_size)
+
+    @staticmethod
+    def _load_manifest(path):
+
+        try:
+            with open(path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            raise aiohttp.web.HTTPConflict(text="Cannot read snapshot '{}': {}".format(os.path.basename(path), e))
+
+    def _manifests(self):
+        """
+        :returns: Manifests of the other snapshots of the project, the most recent first
+        """
+
+        manifests = []
+        for snapshot in sorted(self._project.snapshots.values(), key=lambda s: s.created_at, reverse=True):
+            if snapshot is not self and not snapshot.is_archive and os.path.exists(snapshot.path):
+                try:
+                    manifests.append(self._load_manifest(snapshot.path))
+                except aiohttp.web.HTTPConflict as e:
+                    log.warning(e.text)
+        return manifests
+
     async def create(self):
         """
         Create the snapshot
@@ -87,6 +135,10 @@ class Snapshot:
         if os.path.exists(self.path):
             raise aiohttp.web.HTTPConflict(text="The snapshot file '{}' already exists".format(self.name))
 
+        # To avoid issue with data not saved we disallow snapshots of a running project
+        if self._project.is_running():
+            raise aiohttp.web.HTTPConflict(text="Project must be stopped in order to take a snapshot")
+
         snapshot_directory = os.path.join(self._project.path, "snapshots")
         try:
             os.makedirs(snapshot_directory, exist_ok=True)
@@ -95,41 +147,223 @@ class Snapshot:
 
         try:
             begin = time.time()
+            store = self._store()
             with tempfile.TemporaryDirectory(dir=snapshot_directory) as tmpdir:
-                # Do not compress the snapshots
-                with aiozipstream.ZipFile(compression=zipfile.ZIP_STORED) as zstream:
-                    await export_project(zstream, self._project, tmpdir, keep_compute_id=True, allow_all_nodes=True)
-                    async with aiofiles.open(self.path, 'wb') as f:
-                        async for chunk in zstream:
-                            await f.write(chunk)
-            log.info("Snapshot '{}' created in {:.4f} seconds".format(self.name, time.time() - begin))
+                manifest = await self._create_manifest(store, tmpdir)
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w+", encoding="utf-8") as f:
+                json.dump(manifest, f)
+            os.replace(tmp_path, self.path)
+            stats = store.stats()
+            log.info("Snapshot '{}' created in {:.4f} seconds ({} files, {} chunks written, {} chunks reused)".format(self.name,
+                                                                                                           time.time() - begin,
+                                                                                                           len(manifest["files"]),
+                                                                                                           stats["written_chunks"],
+                                                                                                           stats["reused_chunks"]))
         except (ValueError, OSError, RuntimeError) as e:
             raise aiohttp.web.HTTPConflict(text="Could not create snapshot file '{}': {}".format(self.path, e))
 
+    async def _create_manifest(self, store, tmpdir):
+        """
+        Store the project files and return the manifest of the snapshot.
+
+        A file not modified since the previous snapshot (same size and
+        modification time, or same MD5 for the files of remote computes)
+        is not read again.
+        """
+
+        project = self._project
+        project.dump(flush=True)
+        with open(project._topology_file(), encoding="utf-8") as f:
+            topology = json.load(f)
+
+        previous = {}
+        for manifest in self._manifests():
+            if manifest.get("chunk_size") == store.chunk_size:
+                previous = manifest["files"]
+                break
+
+        files = {}
+        for root, dirs, filenames in os.walk(project.path, topdown=True, followlinks=False):
+            for filename in filenames:
+                path = os.path.join(root, filename)
+                if filename.endswith(".gns3") or not _is_exportable(path):
+                    continue
+                relpath = os.path.relpath(path, project.path).replace("\\", "/")
+                try:
+                    st = os.stat(path)
+                    entry = previous.get(relpath)
+                    if entry is None or "compute_id" in entry or entry["size"] != st.st_size or entry["mtime_ns"] != st.st_mtime_ns or not store.has_chunks(entry):
+                        entry = await wait_run_in_executor(store.store_file, path)
+                except OSError as e:
+                    msg = "Could not snapshot file {}: {}".format(path, e)
+                    log.warning(msg)
+                    project.emit_notification("log.warning", {"message": msg})
+                    continue
+                files[relpath] = entry
+
+        # files of the remote computes
+        for compute in project.computes:
+            if compute.id == "local":
+                continue
+            for compute_file in await compute.list_files(project):
+                relpath = compute_file["path"].replace("\\", "/")
+                if not _is_exportable(compute_file["path"]):
+                    continue
+                entry = previous.get(relpath)
+                if entry is None or entry.get("compute_id") != compute.id or entry.get("md5") != compute_file["md5sum"] or not store.has_chunks(entry):
+                    temp_path = await self._download_file(compute, relpath, tmpdir)
+                    if temp_path is None:
+                        continue
+                    entry = await wait_run_in_executor(store.store_file, temp_path, md5=True)
+                    entry["compute_id"] = compute.id
+                    os.remove(temp_path)
+                files[relpath] = entry
+
+        return {
+            "chunk_size": store.chunk_size,
+            "topology": topology,
+            "files": files
+        }
+
+    async def _download_file(self, compute, path, tmpdir):
+        """
+        Download a file from a remote compute
+
+        :returns: Path of the downloaded file, None if it cannot be downloaded
+        """
+
+        log.debug("Downloading file '{}' from compute '{}'".format(path, compute.id))
+        response = await compute.download_file(self._project, path)
+        if response.status != 200:
+            log.warning("Cannot snapshot file from compute '{}'. Compute returned status code {}.".format(compute.id, response.status))
+            return None
+        (fd, temp_path) = tempfile.mkstemp(dir=tmpdir)
+        async with aiofiles.open(fd, 'wb') as f:
+            while True:
+                try:
+                    data = await response.content.read(DOWNLOAD_CHUNK_SIZE)
+                except asyncio.TimeoutError:
+                    raise aiohttp.web.HTTPRequestTimeout(text="Timeout when downloading file '{}' from remote compute {}:{}".format(path, compute.host, compute.port))
+                if not data:
+                    break
+                await f.write(data)
+        response.close()
+        return temp_path
+
     async def restore(self):
         """
         Restore the snapshot
         """
 
+        if not self.is_archive:
+            manifest = self._load_manifest(self._path)
+
         await self._project.delete_on_computes()
         # We don't send close notification to clients because the close / open dance is purely internal
         await self._project.close(ignore_notification=True)
 
         try:
-            # delete the current project files
-            project_files_path = os.path.join(self._project.path, "project-files")
-            if os.path.exists(project_files_path):
-                await wait_run_in_executor(shutil.rmtree, project_files_path)
-            with open(self._path, "rb") as f:
-                project = await import_project(self._project.controller, self._project.id, f, location=self._project.path,
-                                               auto_start=self._project.auto_start, auto_open=self._project.auto_open,
-                                               auto_close=self._project.auto_close)
+            if self.is_archive:
+                # delete the current project files
+                project_files_path = os.path.join(self._project.path, "project-files")
+                if os.path.exists(project_files_path):
+                    await wait_run_in_executor(shutil.rmtree, project_files_path)
+                with open(self._path, "rb") as f:
+                    project = await import_project(self._project.controller, self._project.id, f, location=self._project.path,
+                                                   auto_start=self._project.auto_start, auto_open=self._project.auto_open,
+                                                   auto_close=self._project.auto_close)
+            else:
+                project = await self._restore_manifest(manifest)
         except (OSError, PermissionError) as e:
             raise aiohttp.web.HTTPConflict(text=str(e))
         await project.open()
         self._project.emit_notification("snapshot.restored", self.__json__())
         return self._project
 
+    async def _restore_manifest(self, manifest):
+        """
+        Restore the project files listed in a manifest, only the
+        files which differ from the snapshot are written.
+        """
+
+        begin = time.time()
+        project = self._project
+        store = self._store(manifest["chunk_size"])
+        local_files = {path: entry for path, entry in manifest["files"].items() if "compute_id" not in entry}
+        modified = await wait_run_in_executor(self._restore_local_files, store, local_files)
+
+        # the project on the remote computes has been deleted, the files are uploaded again
+        remote_files = {path: entry for path, entry in manifest["files"].items() if "compute_id" in entry}
+        if remote_files:
+            with tempfile.TemporaryDirectory(dir=os.path.join(project.path, "snapshots")) as tmpdir:
+                created = set()
+                for path, entry in remote_files.items():
+                    compute = project.controller.get_compute(entry["compute_id"])
+                    if compute.id not in created:
+                        await compute.post("/projects", data={"name": project.name, "project_id": project.id})
+                        created.add(compute.id)
+                    temp_path = os.path.join(tmpdir, "upload")
+                    with open(temp_path, "wb") as f:
+                        await wait_run_in_executor(store.read_file, entry, f)
+                    await _upload_file(compute, project.id, temp_path, path)
+
+        topology = manifest["topology"]
+        topology["project_id"] = project.id
+        topology["name"] = project.name
+        topology["auto_start"] = project.auto_start
+        topology["auto_open"] = project.auto_open
+        topology["auto_close"] = project.auto_close
+        with open(project._topology_file(), "w+", encoding="utf-8") as f:
+            json.dump(topology, f, indent=4)
+
+        log.info("Snapshot '{}' restored in {:.4f} seconds ({} files modified)".format(self.name, time.time() - begin, modified))
+        return await project.controller.load_project(project._topology_file(), load=False)
+
+    def _restore_local_files(self, store, files):
+        """
+        Restore the local files and delete the project files which are not in the snapshot.
+
+        :returns: Number of modified files
+        """
+
+        root = self._project.path
+        project_files_path = os.path.join(root, "project-files")
+        if os.path.exists(project_files_path):
+            for dirpath, dirnames, filenames in os.walk(project_files_path, topdown=False):
+                for filename in filenames:
+                    path = os.path.join(dirpath, filename)
+                    if os.path.relpath(path, root).replace("\\", "/") not in files:
+                        os.remove(path)
+                for dirname in dirnames:
+                    path = os.path.join(dirpath, dirname)
+                    if os.path.islink(path):
+                        os.remove(path)
+                    elif not os.listdir(path):
+                        os.rmdir(path)
+
+        modified = 0
+        for path, entry in files.items():
+            if store.restore_file(entry, os.path.join(root, path)):
+                modified += 1
+        return modified
+
+    async def delete(self):
+        """
+        Delete the snapshot and the chunks not used by the other snapshots
+        """
+
+        os.remove(self._path)
+        if self.is_archive:
+            return
+
+        entries = []
+        for manifest in self._manifests():
+            entries.extend(manifest["files"].values())
+        store = self._store()
+        deleted = await wait_run_in_executor(store.collect_garbage, entries)
+        log.info("Snapshot '{}' deleted, {} unused chunks deleted".format(self.name, deleted))
+
     def __json__(self):
         return {
             "snapshot_id": self._id,
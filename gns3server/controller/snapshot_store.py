@@ -0,0 +1,190 @@
+#!/usr/bin/env python
+#
+# Copyright (C) 2020 GNS3 Technologies Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import hashlib
+
+import logging
+log = logging.getLogger(__name__)
+
+CHUNK_SIZE = 1024 * 1024 * 4  # 4MB
+
+
+class SnapshotStore:
+    """
+    Content addressed storage of the snapshot files.
+
+    Files are split in chunks of a fixed size, each chunk is stored once
+    in a file named with its SHA-256 and shared by all the snapshots of
+    a project. A file is described by an entry: a dictionary with its size
+    and the list of its chunks.
+
+    The methods are blocking and must be run in an executor.
+
+    :param path: Directory of the chunks
+    :param chunk_size: Size of the chunks in bytes
+    """
+
+    def __init__(self, path, chunk_size=CHUNK_SIZE):
+
+        self._path = path
+        self._chunk_size = chunk_size
+        self._written_chunks = 0
+        self._reused_chunks = 0
+
+    @property
+    def chunk_size(self):
+
+        return self._chunk_size
+
+    def _chunk_path(self, digest):
+
+        return os.path.join(self._path, digest[:2], digest)
+
+    def has_chunks(self, entry):
+        """
+        :returns: True if all the chunks of a file are in the store
+        """
+
+        return all(os.path.exists(self._chunk_path(digest)) for digest in entry["chunks"])
+
+    def _write_chunk(self, digest, data):
+
+        path = self._chunk_path(digest)
+        if os.path.exists(path):
+            self._reused_chunks += 1
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # the chunk is renamed once written, a partial chunk is never used
+        tmp_path = "{}.{}.tmp".format(path, os.getpid())
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        self._written_chunks += 1
+
+    def _read_chunk(self, digest):
+
+        with open(self._chunk_path(digest), "rb") as f:
+            return f.read()
+
+    def store_file(self, path, md5=False):
+        """
+        Split a file in chunks and store the chunks not already in the store.
+
+        :param path: File path
+        :param md5: Compute the MD5 of the file
+        :returns: File entry
+        """
+
+        st = os.stat(path)
+        chunks = []
+        md5sum = hashlib.md5() if md5 else None
+        with open(path, "rb") as f:
+            while True:
+                data = f.read(self._chunk_size)
+                if not data:
+                    break
+                digest = hashlib.sha256(data).hexdigest()
+                self._write_chunk(digest, data)
+                chunks.append(digest)
+                if md5sum:
+                    md5sum.update(data)
+        entry = {
+            "size": st.st_size,
+            "mtime_ns": st.st_mtime_ns,
+            "chunks": chunks
+        }
+        if md5sum:
+            entry["md5"] = md5sum.hexdigest()
+        return entry
+
+    def restore_file(self, entry, path):
+        """
+        Restore a file, only the chunks which differ are written.
+
+        :param entry: File entry
+        :param path: File path
+        :returns: True if the file has been modified
+        """
+
+        exists = os.path.isfile(path)
+        if exists:
+            st = os.stat(path)
+            if st.st_size == entry["size"] and st.st_mtime_ns == entry["mtime_ns"]:
+                return False
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        modified = False
+        with open(path, "r+b" if exists else "wb") as f:
+            for index, digest in enumerate(entry["chunks"]):
+                offset = index * self._chunk_size
+                if exists:
+                    f.seek(offset)
+                    if hashlib.sha256(f.read(self._chunk_size)).hexdigest() == digest:
+                        continue
+                f.seek(offset)
+                f.write(self._read_chunk(digest))
+                modified = True
+            if f.seek(0, os.SEEK_END) != entry["size"]:
+                f.truncate(entry["size"])
+                modified = True
+        os.utime(path, ns=(entry["mtime_ns"], entry["mtime_ns"]))
+        return modified
+
+    def read_file(self, entry, fileobj):
+        """
+        Write the content of a file to a file object.
+
+        :param entry: File entry
+        :param fileobj: Destination file object
+        """
+
+        for digest in entry["chunks"]:
+            fileobj.write(self._read_chunk(digest))
+
+    def collect_garbage(self, entries):
+        """
+        Delete the chunks not used by the files.
+
+        :param entries: File entries still in use
+        :returns: Number of deleted chunks
+        """
+
+        used = set()
+        for entry in entries:
+            used.update(entry["chunks"])
+
+        deleted = 0
+        if not os.path.isdir(self._path):
+            return deleted
+        for dirpath, dirnames, filenames in os.walk(self._path):
+            for filename in filenames:
+                if filename not in used:
+                    try:
+                        os.remove(os.path.join(dirpath, filename))
+                        deleted += 1
+                    except OSError as e:
+                        log.warning("Cannot delete snapshot chunk '{}': {}".format(filename, e))
+        return deleted
+
+    def stats(self):
+
+        return {
+            "written_chunks": self._written_chunks,
+            "reused_chunks": self._reused_chunks
+        }
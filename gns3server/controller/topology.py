@@ -31,6 +31,7 @@ from ..version import __version__
 from ..schemas.topology import TOPOLOGY_SCHEMA
 from ..schemas import dynamips_vm
 from ..utils.qt import qt_font_to_style
+from ..utils.schema_registry import SchemaRegistry
 from ..compute.dynamips import PLATFORMS_DEFAULT_RAM
 
 import logging
@@ -39,25 +40,44 @@ log = logging.getLogger(__name__)
 
 GNS3_FILE_FORMAT_REVISION = 9
 
+# node type => schema used to check the node properties
+_NODE_SCHEMAS = {}
+
+
+def _get_node_schema(node_type):
+    """
+    Returns the schema used to check the properties of a node in a topology, the
+    schemas are derived from the compute schemas once for all.
+
+    :param node_type: Node type
+    :returns: JSON schema or None if the properties are not checked
+    """
+
+    if node_type not in _NODE_SCHEMAS:
+        schema = None
+        if node_type == "dynamips":
+            schema = copy.deepcopy(dynamips_vm.VM_CREATE_SCHEMA)
+
+        if schema:
+            # Properties send to compute but in an other place in topology
+            delete_properties = ["name", "node_id"]
+            for prop in delete_properties:
+                del schema["properties"][prop]
+            schema["required"] = [p for p in schema["required"] if p not in delete_properties]
+            SchemaRegistry.register(schema)
+        _NODE_SCHEMAS[node_type] = schema
+    return _NODE_SCHEMAS[node_type]
+
 
 def _check_topology_schema(topo):
     try:
-        jsonschema.validate(topo, TOPOLOGY_SCHEMA)
+        SchemaRegistry.validate(topo, TOPOLOGY_SCHEMA, name="topology")
 
         # Check the nodes property against compute schemas
         for node in topo["topology"].get("nodes", []):
-            schema = None
-            if node["node_type"] == "dynamips":
-                schema = copy.deepcopy(dynamips_vm.VM_CREATE_SCHEMA)
-
+            schema = _get_node_schema(node["node_type"])
             if schema:
-                # Properties send to compute but in an other place in topology
-                delete_properties = ["name", "node_id"]
-                for prop in delete_properties:
-                    del schema["properties"][prop]
-                schema["required"] = [p for p in schema["required"] if p not in delete_properties]
-
-                jsonschema.validate(node.get("properties", {}), schema)
+                SchemaRegistry.validate(node.get("properties", {}), schema, name="topology {} node".format(node["node_type"]))
 
     except jsonschema.ValidationError as e:
         error = "Invalid data in topology file: {} in schema: {}".format(
@@ -0,0 +1,201 @@
+#!/usr/bin/env python
+#
+# Copyright (C) 2020 GNS3 Technologies Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import json
+import time
+import shutil
+import asyncio
+import aiohttp
+import threading
+
+from .topology import project_to_topology
+from ..config import Config
+
+import logging
+log = logging.getLogger(__name__)
+
+
+class TopologyWriter:
+    """
+    Write-behind persistence of a project topology (.gns3 file).
+
+    Dump requests mark the project as dirty and are coalesced into a single
+    write once the write delay has elapsed. The topology is captured and
+    serialized on the event loop but written to disk in an executor, a failed
+    write is retried after the delay.
+
+    :param project: Project instance
+    :param delay: Coalescing window in seconds (read from the server configuration if None)
+    """
+
+    def __init__(self, project, delay=None):
+
+        self._project = project
+        if delay is None:
+            delay = Config.instance().get_section_config("Server").getfloat("topology_write_delay", 0.5)
+        self._delay = max(0.0, delay)
+        self._dirty = False
+        self._timer = None
+        self._flush_task = None
+
+        # every captured topology gets a generation number, a write
+        # is skipped if a more recent topology has already been written.
+        self._generation = 0
+        self._written_generation = 0
+        self._write_lock = threading.Lock()
+
+        self._requests = 0
+        self._writes = 0
+        self._last_flush_latency = 0.0
+        self._max_flush_latency = 0.0
+
+    @property
+    def delay(self):
+
+        return self._delay
+
+    @property
+    def dirty(self):
+
+        return self._dirty
+
+    def schedule(self):
+        """
+        Request a write of the topology. The write happens after the delay
+        unless another write is already pending, in which case both are merged.
+        """
+
+        self._requests += 1
+        self._dirty = True
+        try:
+            loop = asyncio.get_event_loop()
+        except RuntimeError:
+            loop = None
+        if self._delay == 0 or loop is None or not loop.is_running():
+            self.flush()
+            return
+        if self._timer is None:
+            self._timer = loop.call_later(self._delay, self._start_background_flush)
+
+    def flush(self, force=True):
+        """
+        Write the topology synchronously, cancelling any pending write.
+
+        :param force: write even if the topology has not been marked as dirty
+        """
+
+        self._cancel_timer()
+        if not force and not self._dirty:
+            return
+        if force:
+            self._requests += 1
+        begin = time.time()
+        generation, data = self._capture()
+        try:
+            self._write(generation, data)
+        except aiohttp.web.HTTPException:
+            # the change has not been saved, keep the project dirty
+            self._dirty = True
+            raise
+        self._record_latency(time.time() - begin)
+
+    def cancel(self):
+        """
+        Discard any pending write (e.g. when the project is deleted).
+        """
+
+        self._cancel_timer()
+        self._dirty = False
+
+    def _cancel_timer(self):
+
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    def _start_background_flush(self):
+
+        self._timer = None
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.ensure_future(self._background_flush())
+        else:
+            # a write is already in progress, try again later.
+            self._timer = asyncio.get_event_loop().call_later(self._delay, self._start_background_flush)
+
+    async def _background_flush(self):
+
+        if not self._dirty:
+            return
+        begin = time.time()
+        try:
+            generation, data = self._capture()
+            await asyncio.get_event_loop().run_in_executor(None, self._write, generation, data)
+        except (aiohttp.web.HTTPException, ValueError) as e:
+            log.error("Could not write topology for project '{}': {}".format(self._project.name, e))
+            # the change has not been saved, try again later
+            self._dirty = True
+            if self._timer is None:
+                self._timer = asyncio.get_event_loop().call_later(self._delay, self._start_background_flush)
+            return
+        self._record_latency(time.time() - begin)
+
+    def _capture(self):
+        """
+        Capture and serialize the current topology on the event loop, the
+        data is detached from the live objects before being written. The
+        project is marked dirty again by the caller if it cannot be written.
+
+        :returns: generation number and serialized topology
+        """
+
+        data = json.dumps(project_to_topology(self._project), indent=4, sort_keys=True)
+        self._generation += 1
+        self._dirty = False
+        return self._generation, data
+
+    def _write(self, generation, data):
+
+        path = self._project._topology_file()
+        with self._write_lock:
+            if generation <= self._written_generation:
+                return
+            log.debug("Write %s", path)
+            try:
+                with open(path + ".tmp", "w+", encoding="utf-8") as f:
+                    f.write(data)
+                shutil.move(path + ".tmp", path)
+            except OSError as e:
+                raise aiohttp.web.HTTPInternalServerError(text="Could not write topology: {}".format(e))
+            self._written_generation = generation
+            self._writes += 1
+
+    def _record_latency(self, latency):
+
+        self._last_flush_latency = latency
+        self._max_flush_latency = max(self._max_flush_latency, latency)
+
+    def stats(self):
+
+        return {
+            "write_delay": self._delay,
+            "dump_requests": self._requests,
+            "writes": self._writes,
+            "writes_saved": max(0, self._requests - self._writes),
+            "pending": self._dirty,
+            "last_flush_latency": round(self._last_flush_latency, 6),
+            "max_flush_latency": round(self._max_flush_latency, 6)
+        }
@@ -28,6 +28,8 @@ from gns3server.compute.project_manager import ProjectManager
 from gns3server.schemas.node import (
     NODE_CAPTURE_SCHEMA,
     NODE_LIST_IMAGES_SCHEMA,
+    NODE_IMAGE_UPLOAD_STATUS_INPUT_SCHEMA,
+    NODE_IMAGE_UPLOAD_STATUS_SCHEMA,
 )
 
 from gns3server.schemas.dynamips_vm import (
@@ -471,9 +473,38 @@ class DynamipsVMHandler:
 
         dynamips_manager = Dynamips.instance()
         filename = os.path.normpath(request.match_info["filename"])
-        await dynamips_manager.write_image(filename, request.content)
+        if "offset" in request.query:
+            # resumable upload, the MD5 is sent with the last chunk
+            try:
+                offset = int(request.query["offset"])
+            except ValueError:
+                offset = -1
+            if offset < 0:
+                raise aiohttp.web.HTTPBadRequest(text="Invalid offset: {}".format(request.query["offset"]))
+            await dynamips_manager.write_image_chunk(filename, request.content, offset, request.query.get("md5sum"))
+        else:
+            await dynamips_manager.write_image(filename, request.content)
         response.set_status(204)
 
+    @Route.post(
+        r"/dynamips/image-uploads/{filename:.+}",
+        parameters={
+            "filename": "Image filename"
+        },
+        status_codes={
+            200: "Upload status returned",
+        },
+        description="Check if a Dynamips IOS image must be uploaded and where to resume its upload",
+        input=NODE_IMAGE_UPLOAD_STATUS_INPUT_SCHEMA,
+        output=NODE_IMAGE_UPLOAD_STATUS_SCHEMA)
+    async def image_upload_status(request, response):
+
+        dynamips_manager = Dynamips.instance()
+        filename = os.path.normpath(request.match_info["filename"])
+        status = await dynamips_manager.image_upload_status(filename, request.json["md5sum"])
+        response.set_status(200)
+        response.json(status)
+
     @Route.get(
         r"/dynamips/images/{filename:.+}",
         parameters={
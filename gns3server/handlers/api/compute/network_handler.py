@@ -19,6 +19,7 @@ from gns3server.web.route import Route
 from gns3server.compute.port_manager import PortManager
 from gns3server.compute.project_manager import ProjectManager
 from gns3server.utils.interfaces import interfaces
+from gns3server.schemas.port import UDP_PORTS_RESERVE_SCHEMA, UDP_PORTS_RELEASE_SCHEMA
 
 
 class NetworkHandler:
@@ -42,6 +43,47 @@ class NetworkHandler:
         response.set_status(201)
         response.json({"udp_port": udp_port})
 
+    @Route.post(
+        r"/projects/{project_id}/ports/udp/reserve",
+        parameters={
+            "project_id": "Project UUID",
+        },
+        status_codes={
+            201: "UDP ports allocated",
+            404: "The project doesn't exist",
+            409: "Not enough free UDP ports"
+        },
+        description="Allocate several UDP ports on the server",
+        input=UDP_PORTS_RESERVE_SCHEMA)
+    def allocate_udp_ports(request, response):
+
+        pm = ProjectManager.instance()
+        project = pm.get_project(request.match_info["project_id"])
+        m = PortManager.instance()
+        udp_ports = m.get_free_udp_ports(project, request.json["count"])
+        response.set_status(201)
+        response.json({"udp_ports": udp_ports})
+
+    @Route.post(
+        r"/projects/{project_id}/ports/udp/release",
+        parameters={
+            "project_id": "Project UUID",
+        },
+        status_codes={
+            204: "UDP ports released",
+            404: "The project doesn't exist"
+        },
+        description="Release UDP ports allocated in advance and not used",
+        input=UDP_PORTS_RELEASE_SCHEMA)
+    def release_udp_ports(request, response):
+
+        pm = ProjectManager.instance()
+        project = pm.get_project(request.match_info["project_id"])
+        m = PortManager.instance()
+        # only the ports allocated for this project can be released
+        m.release_udp_ports([port for port in request.json["ports"] if port in project.udp_ports], project)
+        response.set_status(204)
+
     @Route.get(
         r"/network/interfaces",
         description="List all the network interfaces available on the server")
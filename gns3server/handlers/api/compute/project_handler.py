@@ -24,6 +24,7 @@ import psutil
 from gns3server.web.route import Route
 from gns3server.compute.project_manager import ProjectManager
 from gns3server.compute import MODULES
+from gns3server.compute.node_telemetry import NodeTelemetry
 from gns3server.utils.cpu_percent import CpuPercent
 from gns3server.utils.path import is_safe_path
 
@@ -31,6 +32,7 @@ from gns3server.schemas.project import (
     PROJECT_OBJECT_SCHEMA,
     PROJECT_CREATE_SCHEMA,
     PROJECT_UPDATE_SCHEMA,
+    COMPUTE_PROJECT_DUPLICATE_SCHEMA,
     PROJECT_FILE_LIST_SCHEMA,
     PROJECT_LIST_SCHEMA
 )
@@ -118,6 +120,40 @@ class ProjectHandler:
         project = pm.get_project(request.match_info["project_id"])
         response.json(project)
 
+    @Route.get(
+        r"/projects/{project_id}/telemetry",
+        description="Get the resources used by the processes of the project nodes",
+        parameters={
+            "project_id": "Project UUID",
+        },
+        status_codes={
+            200: "Success",
+            404: "The project doesn't exist"
+        })
+    def telemetry(request, response):
+
+        pm = ProjectManager.instance()
+        project = pm.get_project(request.match_info["project_id"])
+        response.json(NodeTelemetry.instance().project_statistics(project.id))
+
+    @Route.get(
+        r"/projects/{project_id}/nodes/{node_id}/telemetry",
+        description="Get the resources used by the processes of a node",
+        parameters={
+            "project_id": "Project UUID",
+            "node_id": "Node UUID"
+        },
+        status_codes={
+            200: "Success",
+            404: "The project or the node doesn't exist"
+        })
+    def node_telemetry(request, response):
+
+        pm = ProjectManager.instance()
+        project = pm.get_project(request.match_info["project_id"])
+        node = project.get_node(request.match_info["node_id"])
+        response.json(NodeTelemetry.instance().node_statistics(node.id))
+
     @Route.post(
         r"/projects/{project_id}/close",
         description="Close a project",
@@ -143,6 +179,30 @@ class ProjectHandler:
             log.warning("Skip project closing, another client is listening for project notifications")
         response.set_status(204)
 
+    @Route.post(
+        r"/projects/{project_id}/duplicate",
+        description="Copy the node files of a project to another project opened on this compute",
+        parameters={
+            "project_id": "Project UUID",
+        },
+        status_codes={
+            201: "Project files duplicated",
+            404: "The project doesn't exist"
+        },
+        input=COMPUTE_PROJECT_DUPLICATE_SCHEMA,
+        output=PROJECT_OBJECT_SCHEMA)
+    async def duplicate(request, response):
+
+        pm = ProjectManager.instance()
+        project = pm.get_project(request.match_info["project_id"])
+        destination = pm.get_project(request.json["project_id"])
+        try:
+            await project.duplicate(destination, request.json["node_ids"])
+        except OSError as e:
+            raise aiohttp.web.HTTPConflict(text="Cannot duplicate project files: {}".format(e))
+        response.set_status(201)
+        response.json(destination)
+
     @Route.delete(
         r"/projects/{project_id}",
         description="Delete a project from disk",
@@ -228,7 +288,8 @@ class ProjectHandler:
 
         pm = ProjectManager.instance()
         project = pm.get_project(request.match_info["project_id"])
-        files = await project.list_files()
+        checksum = request.query.get("checksum", "yes").lower() != "no"
+        files = await project.list_files(checksum=checksum)
         response.json(files)
         response.set_status(200)
 
@@ -22,9 +22,14 @@ from gns3server.web.route import Route
 from gns3server.config import Config
 from gns3server.schemas.version import VERSION_SCHEMA
 from gns3server.schemas.server_statistics import SERVER_STATISTICS_SCHEMA
+from gns3server.compute.notification_manager import NotificationManager
 from gns3server.compute.port_manager import PortManager
+from gns3server.compute.project_manager import ProjectManager
+from gns3server.ubridge.hypervisor_pool import ubridge_statistics
 from gns3server.utils.cpu_percent import CpuPercent
 from gns3server.utils.path import get_default_project_directory
+from gns3server.utils.probe_cache import ProbeCache
+from gns3server.utils.schema_registry import SchemaRegistry
 from gns3server.version import __version__
 from aiohttp.web import HTTPConflict
 
@@ -77,6 +82,47 @@ class ServerHandler:
                        "disk_usage_percent": disk_usage_percent,
                        "load_average_percent": load_average_percent})
 
+    @Route.get(
+        r"/statistics/validation",
+        description="Retrieve the time spent validating requests and responses against their JSON schemas",
+        status_codes={
+            200: "Validation statistics returned"
+        })
+    def validation_statistics(request, response):
+
+        response.json(SchemaRegistry.statistics())
+
+    @Route.get(
+        r"/statistics/notifications",
+        description="Retrieve the depth, coalesced and dropped notifications of the notification queues",
+        status_codes={
+            200: "Notification statistics returned"
+        })
+    def notification_statistics(request, response):
+
+        response.json(NotificationManager.instance().statistics())
+
+    @Route.get(
+        r"/statistics/ubridge",
+        description="Retrieve the uBridge hypervisor processes, the nodes they serve and their memory usage",
+        status_codes={
+            200: "uBridge statistics returned"
+        })
+    def ubridge_statistics(request, response):
+
+        nodes = [node for project in ProjectManager.instance().projects for node in project.nodes]
+        response.json(ubridge_statistics(nodes))
+
+    @Route.get(
+        r"/statistics/probes",
+        description="Retrieve the hits and misses of the cache of the emulator binary probes (versions, supported options...)",
+        status_codes={
+            200: "Probe statistics returned"
+        })
+    def probe_statistics(request, response):
+
+        response.json(ProbeCache.instance().statistics())
+
     @Route.get(
         r"/debug",
         description="Return debug information about the compute",
@@ -26,7 +26,8 @@ from gns3server.schemas.node import (
     NODE_OBJECT_SCHEMA,
     NODE_UPDATE_SCHEMA,
     NODE_CREATE_SCHEMA,
-    NODE_DUPLICATE_SCHEMA
+    NODE_DUPLICATE_SCHEMA,
+    NODE_START_ALL_SCHEMA
 )
 
 
@@ -81,11 +82,12 @@ class NodeHandler:
             404: "Instance doesn't exist"
         },
         description="Start all nodes belonging to the project",
+        input=NODE_START_ALL_SCHEMA,
         output=NODE_OBJECT_SCHEMA)
     async def start_all(request, response):
 
         project = await Controller.instance().get_loaded_project(request.match_info["project_id"])
-        await project.start_all()
+        await project.start_all(groups=request.json.get("groups"))
         response.set_status(204)
 
     @Route.post(
@@ -158,6 +160,24 @@ class NodeHandler:
         response.set_status(200)
         response.json(node)
 
+    @Route.get(
+        r"/projects/{project_id}/nodes/{node_id}/telemetry",
+        parameters={
+            "project_id": "Project UUID",
+            "node_id": "Node UUID"
+        },
+        status_codes={
+            200: "Success",
+            404: "Node doesn't exist"
+        },
+        description="Get the resources used by the processes of a node")
+    async def telemetry(request, response):
+
+        project = Controller.instance().get_project(request.match_info["project_id"])
+        node = project.get_node(request.match_info["node_id"])
+        compute_response = await node.compute.get("/projects/{}/nodes/{}/telemetry".format(project.id, node.id))
+        response.json(dict(compute_response.json, name=node.name, compute_id=node.compute.id))
+
     @Route.put(
         r"/projects/{project_id}/nodes/{node_id}",
         status_codes={
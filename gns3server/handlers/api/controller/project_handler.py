@@ -37,7 +37,9 @@ from gns3server.schemas.project import (
     PROJECT_UPDATE_SCHEMA,
     PROJECT_LOAD_SCHEMA,
     PROJECT_CREATE_SCHEMA,
-    PROJECT_DUPLICATE_SCHEMA
+    PROJECT_DUPLICATE_SCHEMA,
+    PROJECT_BATCH_SCHEMA,
+    PROJECT_BATCH_RESULT_SCHEMA
 )
 
 import logging
@@ -170,6 +172,40 @@ class ProjectHandler:
         await project.close()
         response.set_status(204)
 
+    @Route.get(
+        r"/projects/{project_id}/telemetry",
+        description="Get the resources used by the processes of the project nodes on all the computes",
+        parameters={
+            "project_id": "Project UUID",
+        },
+        status_codes={
+            200: "Success",
+            404: "The project doesn't exist"
+        })
+    async def telemetry(request, response):
+
+        project = await Controller.instance().get_loaded_project(request.match_info["project_id"])
+        response.json(await project.telemetry())
+
+    @Route.post(
+        r"/projects/{project_id}/batch",
+        description="Create nodes, links and drawings in one call",
+        parameters={
+            "project_id": "Project UUID",
+        },
+        status_codes={
+            200: "Operations processed, see the result of each operation",
+            400: "Invalid request",
+            404: "The project doesn't exist"
+        },
+        input=PROJECT_BATCH_SCHEMA,
+        output=PROJECT_BATCH_RESULT_SCHEMA)
+    async def batch(request, response):
+
+        project = await Controller.instance().get_loaded_project(request.match_info["project_id"])
+        results = await project.batch(request.json["operations"])
+        response.json({"results": results})
+
     @Route.post(
         r"/projects/{project_id}/open",
         description="Open a project",
@@ -330,12 +366,19 @@ class ProjectHandler:
         elif compression_query == "lzma":
             compression = zipfile.ZIP_LZMA
 
+        compression_level = request.query.get("compression_level")
+        if compression_level is not None:
+            try:
+                compression_level = int(compression_level)
+            except ValueError:
+                raise aiohttp.web.HTTPBadRequest(text="Invalid compression level '{}'".format(compression_level))
+
         try:
             begin = time.time()
             # use the parent directory as a temporary working dir
             working_dir = os.path.abspath(os.path.join(project.path, os.pardir))
             with tempfile.TemporaryDirectory(dir=working_dir) as tmpdir:
-                with aiozipstream.ZipFile(compression=compression) as zstream:
+                with aiozipstream.ZipFile(compression=compression, compresslevel=compression_level) as zstream:
                     await export_project(zstream, project, tmpdir, include_snapshots=include_snapshots, include_images=include_images, reset_mac_addresses=reset_mac_addresses)
 
                     # We need to do that now because export could failed and raise an HTTP error
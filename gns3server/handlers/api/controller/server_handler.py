@@ -21,6 +21,7 @@ from gns3server.controller import Controller
 from gns3server.schemas.version import VERSION_SCHEMA
 from gns3server.schemas.iou_license import IOU_LICENSE_SETTINGS_SCHEMA
 from gns3server.version import __version__
+from gns3server.utils.schema_registry import SchemaRegistry
 
 from aiohttp.web import HTTPConflict, HTTPForbidden
 
@@ -159,11 +160,34 @@ class ServerHandler:
         for compute in list(Controller.instance().computes.values()):
             try:
                 r = await compute.get("/statistics")
-                compute_statistics.append({"compute_id": compute.id, "compute_name": compute.name, "statistics": r.json})
+                compute_statistics.append({"compute_id": compute.id,
+                                           "compute_name": compute.name,
+                                           "statistics": r.json,
+                                           "connection_pool": compute.pool_statistics()})
             except HTTPConflict as e:
                 log.error("Could not retrieve statistics on compute {}: {}".format(compute.name, e.text))
         response.json(compute_statistics)
 
+    @Route.get(
+        r"/statistics/validation",
+        description="Retrieve the time spent validating requests and responses against their JSON schemas",
+        status_codes={
+            200: "Validation statistics returned"
+        })
+    def validation_statistics(request, response):
+
+        response.json(SchemaRegistry.statistics())
+
+    @Route.get(
+        r"/statistics/notifications",
+        description="Retrieve the depth, coalesced and dropped notifications of the notification queues",
+        status_codes={
+            200: "Notification statistics returned"
+        })
+    def notification_statistics(request, response):
+
+        response.json(Controller.instance().notification.statistics())
+
     @Route.post(
         r"/debug",
         description="Dump debug information to disk (debug directory in config directory). Work only for local server",
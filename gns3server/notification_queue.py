@@ -15,40 +15,184 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
-import asyncio
 import json
+import asyncio
+import collections
 import psutil
 
+from gns3server.config import Config
 from gns3server.utils.cpu_percent import CpuPercent
 
 import logging
 log = logging.getLogger(__name__)
 
 
+# A notification waiting in a queue is replaced by a newer
+# notification with the same action for the same object
+COALESCED_ACTIONS = {
+    "node.updated": "node_id",
+    "link.updated": "link_id",
+    "drawing.updated": "drawing_id"
+}
+
+
+class NotificationMessage(tuple):
+    """
+    Notification shared by all the queues, it is encoded to JSON only
+    once whatever the number of listeners. This is a (action, event, kwargs) tuple.
+
+    :param action: Action name
+    :param event: Event to send (a dictionary or an object with a __json__ method)
+    :param kwargs: Meta added to the notification
+    """
+
+    def __new__(cls, action, event, kwargs=None):
+
+        message = super().__new__(cls, (action, event, kwargs or {}))
+        message._json = None
+        return message
+
+    @property
+    def action(self):
+
+        return self[0]
+
+    @property
+    def event(self):
+
+        return self[1]
+
+    @property
+    def kwargs(self):
+
+        return self[2]
+
+    @property
+    def coalesce_key(self):
+        """
+        :returns: key identifying the object concerned by the notification, None if the notification cannot be coalesced
+        """
+
+        field = COALESCED_ACTIONS.get(self.action)
+        if field is None:
+            return None
+        if isinstance(self.event, dict):
+            object_id = self.event.get(field)
+        else:
+            object_id = getattr(self.event, "id", None)
+        if object_id is None:
+            return None
+        return self.action, object_id
+
+    def json(self):
+        """
+        :returns: the notification encoded to JSON
+        """
+
+        if self._json is None:
+            if hasattr(self.event, "__json__"):
+                msg = {"action": self.action, "event": self.event.__json__()}
+            else:
+                msg = {"action": self.action, "event": self.event}
+            msg.update(self.kwargs)
+            self._json = json.dumps(msg, sort_keys=True)
+        return self._json
+
+
 class NotificationQueue(asyncio.Queue):
     """
     Queue returned by the notification manager.
+
+    The queue is bounded, when a listener is too slow the notifications
+    waiting for the same object are coalesced (only the latest node.updated
+    of a node is kept for instance). If this is not enough, the pending
+    notifications are dropped and replaced by a resync notification telling
+    the client to reload its state.
+
+    :param max_size: maximum number of pending notifications (0 for no limit),
+    the notification_queue_size server setting is used by default
     """
 
-    def __init__(self):
+    def __init__(self, max_size=None):
         super().__init__()
         self._first = True
+        if max_size is None:
+            max_size = int(Config.instance().get_section_config("Server").get("notification_queue_size", 1000))
+        self._max_size = max_size
+        self._max_depth = 0
+        self._dropped = 0
+        self._coalesced = 0
+        self._resyncs = 0
+
+    def put_message(self, message):
+        """
+        Add a notification to the queue
+
+        :param message: NotificationMessage instance
+        """
+
+        self.put_nowait(message)
+        if self._max_size and self.qsize() > self._max_size:
+            self._coalesce()
+            if self.qsize() > self._max_size:
+                self._drop()
+        self._max_depth = max(self._max_depth, self.qsize())
+
+    def _coalesce(self):
+        """
+        Keep only the latest of the pending notifications for the same object
+        """
+
+        latest = {}
+        for message in self._queue:
+            key = message.coalesce_key
+            if key is not None:
+                latest[key] = message
+        queue = collections.deque()
+        for message in self._queue:
+            key = message.coalesce_key
+            if key is None or latest[key] is message:
+                queue.append(message)
+        self._coalesced += len(self._queue) - len(queue)
+        self._queue = queue
+
+    def _drop(self):
+        """
+        Replace the pending notifications, except the last one, by a resync notification
+        """
+
+        last = self._queue.pop()
+        dropped = 0
+        total = 0
+        for message in self._queue:
+            if message.action == "resync":
+                # the previous resync notification hasn't been read yet
+                total += message.event["dropped"]
+            else:
+                dropped += 1
+        total += dropped
+        self._dropped += dropped
+        self._resyncs += 1
+        log.warning("Notification listener is too slow, {} notifications have been dropped".format(dropped))
+        self._queue = collections.deque([NotificationMessage("resync", {"dropped": total}), last])
 
     async def get(self, timeout):
         """
         When timeout is expire we send a ping notification with server information
+
+        :returns: NotificationMessage, a tuple (action, event, kwargs)
         """
 
         # At first get we return a ping so the client immediately receives data
         if self._first:
             self._first = False
-            return ("ping", self._getPing(), {})
+            return NotificationMessage("ping", self._getPing())
 
         try:
-            (action, msg, kwargs) = await asyncio.wait_for(super().get(), timeout)
+            message = await asyncio.wait_for(super().get(), timeout)
         except asyncio.TimeoutError:
-            return ("ping", self._getPing(), {})
-        return (action, msg, kwargs)
+            return NotificationMessage("ping", self._getPing())
+        return message
 
     def _getPing(self):
         """
@@ -68,10 +212,17 @@ class NotificationQueue(asyncio.Queue):
         """
         Get a message as a JSON
         """
-        (action, msg, kwargs) = await self.get(timeout)
-        if hasattr(msg, "__json__"):
-            msg = {"action": action, "event": msg.__json__()}
-        else:
-            msg = {"action": action, "event": msg}
-        msg.update(kwargs)
-        return json.dumps(msg, sort_keys=True)
+
+        message = await self.get(timeout)
+        return message.json()
+
+    def stats(self):
+
+        return {
+            "depth": self.qsize(),
+            "max_depth": self._max_depth,
+            "max_size": self._max_size,
+            "coalesced": self._coalesced,
+            "dropped": self._dropped,
+            "resyncs": self._resyncs
+        }
@@ -76,6 +76,50 @@ NODE_LIST_IMAGES_SCHEMA = {
 }
 
 
+NODE_IMAGE_UPLOAD_STATUS_INPUT_SCHEMA = {
+    "$schema": "http://json-schema.org/draft-04/schema#",
+    "description": "Request to check if an image must be uploaded",
+    "type": "object",
+    "properties": {
+        "md5sum": {
+            "description": "md5sum of the image",
+            "type": "string",
+            "pattern": "^[0-9a-f]{32}$"
+        }
+    },
+    "required": ["md5sum"],
+    "additionalProperties": False
+}
+
+NODE_IMAGE_UPLOAD_STATUS_SCHEMA = {
+    "$schema": "http://json-schema.org/draft-04/schema#",
+    "description": "Status of an image upload",
+    "type": "object",
+    "properties": {
+        "filename": {
+            "description": "Image filename",
+            "type": "string",
+            "minLength": 1
+        },
+        "md5sum": {
+            "description": "md5sum of the image",
+            "type": "string"
+        },
+        "exists": {
+            "description": "True if the image is already on the compute",
+            "type": "boolean"
+        },
+        "offset": {
+            "description": "Number of bytes already received, the upload resumes from there",
+            "type": "integer",
+            "minimum": 0
+        }
+    },
+    "required": ["filename", "md5sum", "exists", "offset"],
+    "additionalProperties": False
+}
+
+
 NODE_CAPTURE_SCHEMA = {
     "$schema": "http://json-schema.org/draft-04/schema#",
     "description": "Request validation to start a packet capture on a port",
@@ -289,3 +333,25 @@ NODE_DUPLICATE_SCHEMA = {
     "additionalProperties": False,
     "required": ["x", "y"]
 }
+
+NODE_START_ALL_SCHEMA = {
+    "$schema": "http://json-schema.org/draft-04/schema#",
+    "description": "Start all the nodes of a project",
+    "type": "object",
+    "properties": {
+        "groups": {
+            "description": "Boot order, each group of node IDs is started after the previous group, the nodes not listed are started last",
+            "type": "array",
+            "items": {
+                "type": "array",
+                "items": {
+                    "type": "string",
+                    "minLength": 36,
+                    "maxLength": 36,
+                    "pattern": "^[a-fA-F0-9]{8}-[a-fA-F0-9]{4}-[a-fA-F0-9]{4}-[a-fA-F0-9]{4}-[a-fA-F0-9]{12}$"
+                }
+            }
+        }
+    },
+    "additionalProperties": False
+}
@@ -113,3 +113,37 @@ PORT_OBJECT_SCHEMA = {
         }
     ]
 }
+
+
+UDP_PORTS_RESERVE_SCHEMA = {
+    "$schema": "http://json-schema.org/draft-04/schema#",
+    "description": "Request validation to reserve UDP ports",
+    "type": "object",
+    "properties": {
+        "count": {
+            "description": "Number of UDP ports to reserve",
+            "type": "integer",
+            "minimum": 1,
+            "maximum": 10000
+        }
+    },
+    "required": ["count"],
+    "additionalProperties": False
+}
+
+UDP_PORTS_RELEASE_SCHEMA = {
+    "$schema": "http://json-schema.org/draft-04/schema#",
+    "description": "Request validation to release UDP ports",
+    "type": "object",
+    "properties": {
+        "ports": {
+            "description": "UDP ports to release",
+            "type": "array",
+            "items": {
+                "type": "integer"
+            }
+        }
+    },
+    "required": ["ports"],
+    "additionalProperties": False
+}
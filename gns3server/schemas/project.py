@@ -137,6 +137,28 @@ PROJECT_DUPLICATE_SCHEMA["properties"].update({"reset_mac_addresses": {"type": "
                                                                        "description": "Reset MAC addresses for this project"
                                                                       }})
 
+COMPUTE_PROJECT_DUPLICATE_SCHEMA = {
+    "$schema": "http://json-schema.org/draft-04/schema#",
+    "description": "Request validation to copy the files of a project to another project on a compute",
+    "type": "object",
+    "properties": {
+        "project_id": {
+            "description": "Destination project UUID",
+            "type": "string",
+            "minLength": 36,
+            "maxLength": 36,
+            "pattern": "^[a-fA-F0-9]{8}-[a-fA-F0-9]{4}-[a-fA-F0-9]{4}-[a-fA-F0-9]{4}-[a-fA-F0-9]{12}$"
+        },
+        "node_ids": {
+            "description": "New node UUID for each node of the project",
+            "type": "object",
+            "additionalProperties": {"type": "string"}
+        }
+    },
+    "additionalProperties": False,
+    "required": ["project_id", "node_ids"]
+}
+
 PROJECT_UPDATE_SCHEMA = {
     "$schema": "http://json-schema.org/draft-04/schema#",
     "description": "Request validation to update a Project instance",
@@ -329,9 +351,81 @@ PROJECT_FILE_LIST_SCHEMA = {
                     "description": "MD5 hash of the file",
                     "type": ["string"]
                 },
-
+                "size": {
+                    "description": "File size in bytes (listing without checksums)",
+                    "type": "integer"
+                },
+                "mtime": {
+                    "description": "File modification time (listing without checksums)",
+                    "type": "number"
+                },
             },
         }
     ],
     "additionalProperties": False,
 }
+
+PROJECT_BATCH_SCHEMA = {
+    "$schema": "http://json-schema.org/draft-04/schema#",
+    "description": "Request validation to create nodes, links and drawings in one call",
+    "type": "object",
+    "properties": {
+        "operations": {
+            "description": "Objects to create, nodes are created before links",
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "type": {
+                        "description": "Type of the object to create",
+                        "enum": ["node", "link", "drawing"]
+                    },
+                    "data": {
+                        "description": "Same data as the node, link or drawing creation endpoints",
+                        "type": "object"
+                    }
+                },
+                "required": ["type", "data"],
+                "additionalProperties": False
+            }
+        }
+    },
+    "required": ["operations"],
+    "additionalProperties": False
+}
+
+PROJECT_BATCH_RESULT_SCHEMA = {
+    "$schema": "http://json-schema.org/draft-04/schema#",
+    "description": "Result of each operation of a batch, in the same order as the operations",
+    "type": "object",
+    "properties": {
+        "results": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "type": {
+                        "description": "Type of the object",
+                        "enum": ["node", "link", "drawing"]
+                    },
+                    "status": {
+                        "description": "HTTP status of the operation",
+                        "type": "integer"
+                    },
+                    "result": {
+                        "description": "Created object",
+                        "type": "object"
+                    },
+                    "message": {
+                        "description": "Error message if the operation failed",
+                        "type": "string"
+                    }
+                },
+                "required": ["type", "status"],
+                "additionalProperties": False
+            }
+        }
+    },
+    "required": ["results"],
+    "additionalProperties": False
+}
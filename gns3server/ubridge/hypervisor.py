@@ -25,11 +25,13 @@ import subprocess
 import asyncio
 import socket
 import re
+import functools
 
 from gns3server.utils import parse_version
 from gns3server.utils.asyncio import wait_for_process_termination
 from gns3server.utils.asyncio import monitor_process
 from gns3server.utils.asyncio import subprocess_check_output
+from gns3server.utils.probe_cache import ProbeCache
 from .ubridge_hypervisor import UBridgeHypervisor
 from .ubridge_error import UbridgeError
 
@@ -135,7 +137,7 @@ class Hypervisor(UBridgeHypervisor):
         Checks if the ubridge executable version
         """
         try:
-            output = await subprocess_check_output(self._path, "-v", cwd=self._working_dir, env=env)
+            output = await ProbeCache.instance().get(self._path, "-v", functools.partial(subprocess_check_output, self._path, "-v", cwd=self._working_dir, env=env))
             match = re.search(r"ubridge version ([0-9a-z\.]+)", output)
             if match:
                 self._version = match.group(1)
@@ -0,0 +1,276 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2020 GNS3 Technologies Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+uBridge hypervisors shared by the nodes of a project.
+"""
+
+import os
+import asyncio
+import psutil
+
+from .hypervisor import Hypervisor
+from .ubridge_error import UbridgeError
+
+import logging
+log = logging.getLogger(__name__)
+
+# Commands taking a bridge name as second argument
+BRIDGE_COMMANDS = ("bridge", "iol_bridge")
+
+
+class HypervisorPool:
+    """
+    uBridge hypervisors shared by the nodes of a project on this compute.
+
+    A node is attached to the hypervisor running the fewest nodes, up to
+    size hypervisors are started. The names of the bridges are prefixed
+    by the node ID and the commands configuring each bridge are recorded:
+    when a hypervisor has crashed it is restarted and the bridges of its
+    nodes are created again.
+
+    :param project: Project instance
+    :param path: path to uBridge executable
+    :param host: host/address for the hypervisors
+    :param size: maximum number of hypervisors
+    """
+
+    _pools = {}
+
+    def __init__(self, project, path, host, size=1):
+
+        self._project = project
+        self._path = path
+        self._host = host
+        self._size = max(1, size)
+        self._hypervisors = []
+        self._nodes = {}
+        self._bridges = {}
+        self._lock = asyncio.Lock()
+
+    @classmethod
+    def instance(cls, project, path, host, size=1):
+        """
+        :returns: Pool of the project
+        """
+
+        pool = cls._pools.get(project.id)
+        if pool is None:
+            pool = cls._pools[project.id] = cls(project, path, host, size)
+        return pool
+
+    @property
+    def hypervisors(self):
+
+        return list(self._hypervisors)
+
+    async def _start_hypervisor(self, hypervisor):
+
+        log.info("Starting shared uBridge hypervisor {}:{} for project {}".format(hypervisor.host, hypervisor.port, self._project.id))
+        await hypervisor.start()
+        await hypervisor.connect()
+
+    async def _restart_hypervisor(self, hypervisor):
+        """
+        Restart a hypervisor which has stopped and create the bridges of its nodes again.
+        """
+
+        log.warning("Shared uBridge hypervisor {}:{} has stopped, restarting it: {}".format(hypervisor.host, hypervisor.port, hypervisor.read_stdout()))
+        await hypervisor.stop()
+        await self._start_hypervisor(hypervisor)
+        commands = []
+        for node_id, node_hypervisor in self._nodes.items():
+            if node_hypervisor is hypervisor:
+                for bridge_commands in self._bridges[node_id].values():
+                    commands.extend(bridge_commands)
+        results = await hypervisor.send_batch(commands, return_exceptions=True)
+        for command, result in zip(commands, results):
+            if isinstance(result, UbridgeError):
+                log.error("Cannot restore bridge with '{}': {}".format(command, result))
+
+    async def attach(self, node):
+        """
+        Attach a node to a hypervisor, the hypervisor is started if needed.
+
+        :param node: Node instance
+        :returns: Hypervisor instance
+        """
+
+        async with self._lock:
+            hypervisor = self._nodes.get(node.id)
+            if hypervisor is not None:
+                if not hypervisor.is_running():
+                    await self._restart_hypervisor(hypervisor)
+                return hypervisor
+
+            if len(self._hypervisors) < self._size:
+                working_dir = os.path.join(self._project.tmp_working_directory(), "ubridge-{}".format(len(self._hypervisors) + 1))
+                os.makedirs(working_dir, exist_ok=True)
+                hypervisor = Hypervisor(self._project, self._path, working_dir, self._host)
+                await self._start_hypervisor(hypervisor)
+                self._hypervisors.append(hypervisor)
+            else:
+                hypervisor = min(self._hypervisors, key=lambda h: sum(1 for n in self._nodes.values() if n is h))
+                if not hypervisor.is_running():
+                    await self._restart_hypervisor(hypervisor)
+            self._nodes[node.id] = hypervisor
+            self._bridges[node.id] = {}
+            return hypervisor
+
+    async def detach(self, node):
+        """
+        Delete the bridges of a node, a hypervisor without nodes is stopped.
+
+        :param node: Node instance
+        """
+
+        async with self._lock:
+            hypervisor = self._nodes.pop(node.id, None)
+            bridges = self._bridges.pop(node.id, {})
+            if hypervisor is None:
+                return
+            if hypervisor.is_running():
+                for command_type, name in reversed(list(bridges)):
+                    try:
+                        await hypervisor.send("{} delete {}".format(command_type, name))
+                    except UbridgeError as e:
+                        log.warning("Cannot delete bridge {} of node {}: {}".format(name, node.id, e))
+            if hypervisor not in self._nodes.values():
+                log.info("Stopping shared uBridge hypervisor {}:{}".format(hypervisor.host, hypervisor.port))
+                await hypervisor.stop()
+                self._hypervisors.remove(hypervisor)
+            if not self._nodes and HypervisorPool._pools.get(self._project.id) is self:
+                del HypervisorPool._pools[self._project.id]
+
+    def _bridge_name(self, node, name):
+
+        if len(name) >= 2 and name[0] == name[-1] == '"':
+            return '"{}-{}"'.format(node.id, name[1:-1])
+        return "{}-{}".format(node.id, name)
+
+    def _translate(self, node, command):
+        """
+        Prefix the bridge name of a command by the node ID.
+
+        :returns: tuple (command, bridge key, action), the key is None
+        for the commands not configuring a bridge
+        """
+
+        parts = command.strip().split(" ", 3)
+        if len(parts) < 3 or parts[0] not in BRIDGE_COMMANDS:
+            return command, None, None
+        if parts[0] == "bridge":
+            # IOL bridges names are already unique on the compute
+            parts[2] = self._bridge_name(node, parts[2])
+        # the bridge name may be quoted or not depending on the command
+        return " ".join(parts), (parts[0], parts[2].strip('"')), parts[1]
+
+    async def send(self, node, command):
+        """
+        Send a command of a node, the bridge name is prefixed by the node ID.
+
+        :param node: Node instance
+        :param command: command to send
+        :returns: data returned by the hypervisor
+        """
+
+        results = await self.send_batch(node, [command])
+        return results[0]
+
+    async def send_batch(self, node, commands, return_exceptions=False):
+        """
+        Send several commands of a node in one round trip.
+
+        :param node: Node instance
+        :param commands: list of commands to send
+        :param return_exceptions: return the UbridgeError of the failed commands
+        in the results instead of raising the first one
+        :returns: list of results, one per command
+        """
+
+        hypervisor = await self.attach(node)
+        translated = [self._translate(node, command) for command in commands]
+        results = await hypervisor.send_batch([command for command, _, _ in translated], return_exceptions=True)
+        for (command, key, action), result in zip(translated, results):
+            if key and not isinstance(result, UbridgeError):
+                self._record(node, key, action, command)
+        if not return_exceptions:
+            for result in results:
+                if isinstance(result, UbridgeError):
+                    raise result
+        return results
+
+    def _record(self, node, key, action, command):
+        """
+        Record the commands to create a bridge again.
+        """
+
+        bridges = self._bridges.get(node.id)
+        if bridges is None:
+            return
+        if action == "create":
+            bridges[key] = [command]
+        elif action == "delete":
+            bridges.pop(key, None)
+        elif key in bridges:
+            commands = bridges[key]
+            if action == "reset_packet_filters":
+                # the previous filters are removed
+                commands[:] = [c for c in commands if c.split(" ", 2)[1] not in ("reset_packet_filters", "add_packet_filter")]
+            commands.append(command)
+
+    def bridges(self, node):
+        """
+        :returns: Names of the bridges of a node in the hypervisor
+        """
+
+        return [name for _, name in self._bridges.get(node.id, {})]
+
+
+def ubridge_statistics(nodes):
+    """
+    Processes and memory used by the uBridge hypervisors.
+
+    :param nodes: Nodes of the compute
+    :returns: dictionary
+    """
+
+    hypervisors = {}
+    for node in nodes:
+        hypervisor = node.ubridge
+        if hypervisor is not None and hypervisor.process:
+            hypervisors.setdefault(id(hypervisor), (hypervisor, []))[1].append(node)
+
+    entries = []
+    for hypervisor, hypervisor_nodes in hypervisors.values():
+        try:
+            memory_rss = psutil.Process(hypervisor.process.pid).memory_info().rss
+        except psutil.Error:
+            memory_rss = None
+        entries.append({
+            "pid": hypervisor.process.pid,
+            "port": hypervisor.port,
+            "project_id": hypervisor_nodes[0].project.id,
+            "shared": hypervisor_nodes[0].ubridge_pool is not None,
+            "nodes": len(hypervisor_nodes),
+            "memory_rss": memory_rss
+        })
+    return {
+        "processes": len(entries),
+        "memory_rss": sum(entry["memory_rss"] or 0 for entry in entries),
+        "hypervisors": entries
+    }
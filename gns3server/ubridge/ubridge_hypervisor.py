@@ -15,12 +15,12 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
-import re
 import time
 import logging
 import asyncio
 
 from ..utils.asyncio import locking
+from ..utils.hypervisor_protocol import send_commands
 from .ubridge_error import UbridgeError
 
 log = logging.getLogger(__name__)
@@ -37,10 +37,6 @@ class UBridgeHypervisor:
     hypervisor (defaults to 30 seconds)
     """
 
-    # Used to parse Ubridge response codes
-    error_re = re.compile(r"""^2[0-9]{2}-""")
-    success_re = re.compile(r"""^1[0-9]{2}\s{1}""")
-
     def __init__(self, host, port, timeout=30.0):
 
         self._host = host
@@ -173,7 +169,6 @@ class UBridgeHypervisor:
 
         self._host = host
 
-    @locking
     async def send(self, command):
         """
         Sends commands to this hypervisor.
@@ -183,92 +178,36 @@ class UBridgeHypervisor:
         :returns: results as a list
         """
 
-        # uBridge responses are of the form:
-        #   1xx yyyyyy\r\n
-        #   1xx yyyyyy\r\n
-        #   ...
-        #   100-yyyy\r\n
-        # or
-        #   2xx-yyyy\r\n
-        #
-        # Where 1xx is a code from 100-199 for a success or 200-299 for an error
-        # The result might be multiple lines and might be less than the buffer size
-        # but still have more data. The only thing we know for sure is the last line
-        # will begin with '100-' or a '2xx-' and end with '\r\n'
+        results = await self.send_batch([command])
+        return results[0]
+
+    @locking
+    async def send_batch(self, commands, return_exceptions=False):
+        """
+        Sends several commands to this hypervisor without waiting
+        for the response of each command.
+
+        The hypervisor runs all the commands, even after an error.
+
+        :param commands: list of uBridge hypervisor commands
+        :param return_exceptions: return the UbridgeError of the failed commands
+        in the results instead of raising the first one
+
+        :returns: list of results, one per command
+        """
 
         if self._writer is None or self._reader is None:
             raise UbridgeError("Not connected")
 
-        try:
-            command = command.strip() + '\n'
-            log.debug("sending {}".format(command))
-            self._writer.write(command.encode())
-            await self._writer.drain()
-        except OSError as e:
-            raise UbridgeError("Lost communication with {host}:{port} when sending command '{command}': {error}, uBridge process running: {run}"
-                               .format(host=self._host, port=self._port, command=command, error=e, run=self.is_running()))
-
-        # Now retrieve the result
-        data = []
-        buf = ''
-        retries = 0
-        max_retries = 10
-        while True:
-            try:
-                try:
-                    chunk = await self._reader.read(1024)
-                except asyncio.CancelledError:
-                    # task has been canceled but continue to read
-                    # any remaining data sent by the hypervisor
-                    continue
-                except ConnectionResetError as e:
-                    # Sometimes WinError 64 (ERROR_NETNAME_DELETED) is returned here on Windows.
-                    # These happen if connection reset is received before IOCP could complete
-                    # a previous operation. Ignore and try again....
-                    log.warning("Connection reset received while reading uBridge response: {}".format(e))
-                    continue
-                if not chunk:
-                    if retries > max_retries:
-                        raise UbridgeError("No data returned from {host}:{port} after sending command '{command}', uBridge process running: {run}"
-                                            .format(host=self._host, port=self._port, command=command, run=self.is_running()))
-                    else:
-                        retries += 1
-                        await asyncio.sleep(0.5)
-                        continue
-                retries = 0
-                buf += chunk.decode("utf-8")
-            except OSError as e:
-                raise UbridgeError("Lost communication with {host}:{port} after sending command '{command}': {error}, uBridge process running: {run}"
-                                   .format(host=self._host, port=self._port, command=command, error=e, run=self.is_running()))
+        return await send_commands(self._reader,
+                                   self._writer,
+                                   commands,
+                                   UbridgeError,
+                                   lambda command, message: UbridgeError(message),
+                                   self._peer,
+                                   return_exceptions=return_exceptions,
+                                   retry_delay=0.5)
 
-            # If the buffer doesn't end in '\n' then we can't be done
-            try:
-                if buf[-1] != '\n':
-                    continue
-            except IndexError:
-                raise UbridgeError("Could not communicate with {host}:{port} after sending command '{command}', uBridge process running: {run}"
-                                   .format(host=self._host, port=self._port, command=command, run=self.is_running()))
-
-            data += buf.split('\r\n')
-            if data[-1] == '':
-                data.pop()
-            buf = ''
-
-            # Does it contain an error code?
-            if self.error_re.search(data[-1]):
-                raise UbridgeError(data[-1][4:])
-
-            # Or does the last line begin with '100-'? Then we are done!
-            if data[-1][:4] == '100-':
-                data[-1] = data[-1][4:]
-                if data[-1] == 'OK':
-                    data.pop()
-                break
-
-        # Remove success responses codes
-        for index in range(len(data)):
-            if self.success_re.search(data[index]):
-                data[index] = data[index][4:]
-
-        log.debug("returned result {}".format(data))
-        return data
+    def _peer(self):
+
+        return "{host}:{port}, uBridge process running: {run}".format(host=self._host, port=self._port, run=self.is_running())
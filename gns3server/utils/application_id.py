@@ -21,27 +21,91 @@ import logging
 log = logging.getLogger(__name__)
 
 
-def get_next_application_id(projects, computes):
+# IOU application IDs are from 1 to 511
+MAX_APPLICATION_ID = 512
+APPLICATION_IDS_MASK = (1 << MAX_APPLICATION_ID) - 2
+
+
+class ApplicationIdAllocator:
     """
-    Calculates free application_id from given nodes
+    Application IDs used by the IOU nodes of the opened projects.
 
-    :param projects: all projects managed by controller
-    :param computes: all computes used by the project
-    :raises HTTPConflict when exceeds number
-    :return: integer first free id
+    A bitmap of the used IDs is kept for each compute, it is updated when
+    the IOU nodes are added or removed.
     """
 
-    nodes = []
+    def __init__(self):
+
+        # project ID => {node ID: (compute ID, application ID)}
+        self._projects = {}
+        # compute ID => {application ID: number of nodes}
+        self._counts = {}
+        # compute ID => bitmap of the used application IDs
+        self._bitmaps = {}
+
+    def add(self, project_id, node_id, compute_id, application_id):
+        """
+        Marks an application ID as used by a node.
+
+        :param project_id: project identifier
+        :param node_id: node identifier
+        :param compute_id: compute running the node
+        :param application_id: application ID of the node
+        """
+
+        if application_id is None:
+            return
+        self.remove(project_id, node_id)
+        self._projects.setdefault(project_id, {})[node_id] = (compute_id, application_id)
+        counts = self._counts.setdefault(compute_id, {})
+        counts[application_id] = counts.get(application_id, 0) + 1
+        self._bitmaps[compute_id] = self._bitmaps.get(compute_id, 0) | (1 << application_id)
+
+    def remove(self, project_id, node_id):
+        """
+        Releases the application ID of a node.
+
+        :param project_id: project identifier
+        :param node_id: node identifier
+        """
+
+        nodes = self._projects.get(project_id, {})
+        if node_id not in nodes:
+            return
+        self._release(*nodes.pop(node_id))
+
+    def remove_project(self, project_id):
+        """
+        Releases the application IDs of all the nodes of a project.
+
+        :param project_id: project identifier
+        """
+
+        for compute_id, application_id in self._projects.pop(project_id, {}).values():
+            self._release(compute_id, application_id)
+
+    def _release(self, compute_id, application_id):
+
+        counts = self._counts[compute_id]
+        counts[application_id] -= 1
+        if counts[application_id] == 0:
+            del counts[application_id]
+            self._bitmaps[compute_id] &= ~(1 << application_id)
+
+    def get_next(self, computes):
+        """
+        Calculates the lowest free application ID on the given computes
 
-    # look for application id for in all nodes across all opened projects that share the same computes
-    for project in projects.values():
-        if project.status == "opened":
-            nodes.extend(list(project.nodes.values()))
+        :param computes: all computes used by the project
+        :raises HTTPConflict when exceeds number
+        :return: integer first free id
+        """
 
-    used = set([n.properties["application_id"] for n in nodes if n.node_type == "iou" and n.compute.id in computes])
-    pool = set(range(1, 512))
-    try:
-        application_id = (pool - used).pop()
-        return application_id
-    except KeyError:
-        raise aiohttp.web.HTTPConflict(text="Cannot create a new IOU node (limit of 512 nodes across all opened projects using the same computes)")
+        used = 0
+        for compute_id in computes:
+            used |= self._bitmaps.get(compute_id, 0)
+        free = ~used & APPLICATION_IDS_MASK
+        if not free:
+            raise aiohttp.web.HTTPConflict(text="Cannot create a new IOU node (limit of 512 nodes across all opened projects using the same computes)")
+        # lowest bit set
+        return (free & -free).bit_length() - 1
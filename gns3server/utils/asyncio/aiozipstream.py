@@ -29,25 +29,60 @@ import struct
 import time
 import zipfile
 import asyncio
-import aiofiles
+import functools
 from concurrent import futures
 
 from zipfile import (structCentralDir, structEndArchive64, structEndArchive, structEndArchive64Locator,
                      stringCentralDir, stringEndArchive64, stringEndArchive, stringEndArchive64Locator)
 
+from ...config import Config
+
 stringDataDescriptor = b'PK\x07\x08'  # magic number for data descriptor
 
+class SkipEntry(Exception):
+    """
+    Raised by the data source of an entry, before producing any data,
+    to leave the entry out of the archive.
+    """
+    pass
+
 
-def _get_compressor(compress_type):
+# Number of compressed chunks waiting to be written for each entry
+ENTRY_QUEUE_SIZE = 4
+
+# Worker threads shared by all the archives
+_executor = None
+
+
+def _get_executor():
+    """
+    Return the thread pool used to read, checksum and compress the files.
+    """
+
+    global _executor
+    if _executor is None:
+        server_config = Config.instance().get_section_config("Server")
+        workers = int(server_config.get("zip_workers", 0))
+        if workers <= 0:
+            workers = min(4, os.cpu_count() or 1)
+        _executor = futures.ThreadPoolExecutor(max_workers=workers, thread_name_prefix="zipstream")
+    return _executor
+
+
+def _get_compressor(compress_type, compresslevel=None):
     """
     Return the compressor.
     """
 
     if compress_type == zipfile.ZIP_DEFLATED:
         from zipfile import zlib
-        return zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, -15)
+        if compresslevel is None:
+            compresslevel = zlib.Z_DEFAULT_COMPRESSION
+        return zlib.compressobj(compresslevel, zlib.DEFLATED, -15)
     elif compress_type == zipfile.ZIP_BZIP2:
         from zipfile import bz2
+        if compresslevel is not None and 1 <= compresslevel <= 9:
+            return bz2.BZ2Compressor(compresslevel)
         return bz2.BZ2Compressor()
     elif compress_type == zipfile.ZIP_LZMA:
         from zipfile import LZMACompressor
@@ -56,6 +91,33 @@ def _get_compressor(compress_type):
         return None
 
 
+def _compress(data, cmpr, crc):
+    """
+    Compute the CRC of data and compress it.
+
+    :returns: Tuple (CRC, compressed data)
+    """
+
+    crc = zipfile.crc32(data, crc) & 0xffffffff
+    if cmpr:
+        data = cmpr.compress(data)
+    return crc, data
+
+
+def _read_and_compress(f, size, cmpr, crc):
+    """
+    Read a chunk of a file, compute its CRC and compress it.
+
+    :returns: Tuple (size of the chunk, CRC, compressed data)
+    """
+
+    data = f.read(size)
+    if not data:
+        return 0, crc, b''
+    crc, buf = _compress(data, cmpr, crc)
+    return len(data), crc, buf
+
+
 class PointerIO(object):
 
     def __init__(self, mode='wb'):
@@ -105,14 +167,14 @@ class ZipInfo(zipfile.ZipInfo):
     def __init__(self, *args, **kwargs):
         zipfile.ZipInfo.__init__(self, *args, **kwargs)
 
-    def DataDescriptor(self):
+    def DataDescriptor(self, zip64=False):
         """
         crc-32                          4 bytes
-        compressed size                 4 bytes
-        uncompressed size               4 bytes
+        compressed size                 4 bytes (8 bytes for zip64)
+        uncompressed size               4 bytes (8 bytes for zip64)
         """
 
-        if self.compress_size > zipfile.ZIP64_LIMIT or self.file_size > zipfile.ZIP64_LIMIT:
+        if zip64 or self.compress_size > zipfile.ZIP64_LIMIT or self.file_size > zipfile.ZIP64_LIMIT:
             fmt = b'<4sLQQ'
         else:
             fmt = b'<4sLLL'
@@ -121,8 +183,13 @@ class ZipInfo(zipfile.ZipInfo):
 
 class ZipFile(zipfile.ZipFile):
 
-    def __init__(self, fileobj=None, mode='w', compression=zipfile.ZIP_STORED, allowZip64=True, chunksize=32768):
-        """Open the ZIP file with mode write "w"."""
+    def __init__(self, fileobj=None, mode='w', compression=zipfile.ZIP_STORED, allowZip64=True, chunksize=None, compresslevel=None):
+        """
+        Open the ZIP file with mode write "w".
+
+        The chunk size and the compression level default to the zip_chunk_size
+        and zip_compression_level server settings.
+        """
 
         if mode not in ('w', ):
             raise RuntimeError('aiozipstream.ZipFile() requires mode "w"')
@@ -131,7 +198,13 @@ class ZipFile(zipfile.ZipFile):
 
         self._comment = b''
         zipfile.ZipFile.__init__(self, fileobj, mode=mode, compression=compression, allowZip64=allowZip64)
+        server_config = Config.instance().get_section_config("Server")
+        if chunksize is None:
+            chunksize = int(server_config.get("zip_chunk_size", 1024 * 1024))
+        if compresslevel is None and server_config.get("zip_compression_level") is not None:
+            compresslevel = int(server_config.get("zip_compression_level"))
         self._chunksize = chunksize
+        self._compresslevel = compresslevel
         self.paths_to_write = []
 
     def __aiter__(self):
@@ -161,29 +234,35 @@ class ZipFile(zipfile.ZipFile):
         self._comment = comment
         self._didModify = True
 
-    async def data_generator(self, path):
-
-        async with aiofiles.open(path, "rb") as f:
-            while True:
-                part = await f.read(self._chunksize)
-                if not part:
-                    break
-                yield part
-        return
-
     async def _run_in_executor(self, task, *args, **kwargs):
         """
-        Run synchronous task in separate thread and await for result.
+        Run synchronous task in the shared thread pool and await for result.
         """
 
         loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(futures.ThreadPoolExecutor(max_workers=1), task, *args, **kwargs)
+        return await loop.run_in_executor(_get_executor(), functools.partial(task, *args, **kwargs))
 
     async def _stream(self):
+        """
+        Generate the archive.
+
+        The entries are compressed in parallel, as many as there are worker
+        threads, and their data is written in the order they have been added.
+        """
 
-        for kwargs in self.paths_to_write:
-            async for chunk in self._write(**kwargs):
-                yield chunk
+        entries = []
+        workers = _get_executor()._max_workers
+        try:
+            for index, kwargs in enumerate(self.paths_to_write):
+                # start the compression of the next entries
+                while len(entries) < min(index + workers, len(self.paths_to_write)):
+                    entries.append(self._start_entry(**self.paths_to_write[len(entries)]))
+                async for chunk in self._write(*entries[index]):
+                    yield chunk
+        finally:
+            for entry in entries:
+                if entry[2] is not None and not entry[2].done():
+                    entry[2].cancel()
         for chunk in self._close():
             yield chunk
 
@@ -203,6 +282,17 @@ class ZipFile(zipfile.ZipFile):
         kwargs = {'arcname': arcname, 'iterable': iterable, 'compress_type': compress_type}
         self.paths_to_write.append(kwargs)
 
+    def write_aiter(self, arcname, aiterable, compress_type=None):
+        """
+        Write the bytes async iterable `aiterable` to the archive under the name `arcname`.
+
+        The size of the data is unknown, the entry is written in zip64 format.
+        The iterable may raise SkipEntry before producing data to leave the entry out.
+        """
+
+        kwargs = {'arcname': arcname, 'aiterable': aiterable, 'compress_type': compress_type}
+        self.paths_to_write.append(kwargs)
+
     def writestr(self, arcname, data, compress_type=None):
         """
         Writes a str into ZipFile by wrapping data as a generator
@@ -212,16 +302,18 @@ class ZipFile(zipfile.ZipFile):
             yield data
         return self.write_iter(arcname, _iterable(), compress_type=compress_type)
 
-    async def _write(self, filename=None, iterable=None, arcname=None, compress_type=None):
+    def _start_entry(self, filename=None, iterable=None, aiterable=None, arcname=None, compress_type=None):
         """
-        Put the bytes from filename into the archive under the name `arcname`.
+        Create the ZipInfo of an entry and start compressing its data in background.
+
+        :returns: Tuple (ZipInfo, queue of compressed data, task)
         """
 
         if not self.fp:
             raise RuntimeError(
                   "Attempt to write to ZIP archive that was already closed")
-        if (filename is None and iterable is None) or (filename is not None and iterable is not None):
-            raise ValueError("either (exclusively) filename or iterable shall be not None")
+        if [filename, iterable, aiterable].count(None) != 2:
+            raise ValueError("either (exclusively) filename, iterable or aiterable shall be not None")
 
         if filename:
             st = os.stat(filename)
@@ -250,11 +342,13 @@ class ZipFile(zipfile.ZipFile):
 
         if st:
             zinfo.file_size = st[6]
+        elif aiterable is not None:
+            # the size is unknown, use zip64 if it is allowed
+            zinfo.file_size = zipfile.ZIP64_LIMIT if self._allowZip64 else 0
         else:
             zinfo.file_size = 0
         zinfo.flag_bits = 0x00
         zinfo.flag_bits |= 0x08                 # ZIP flag bits, bit 3 indicates presence of data descriptor
-        zinfo.header_offset = self.fp.tell()    # Start of header bytes
         if zinfo.compress_type == zipfile.ZIP_LZMA:
             # Compressed data includes an end-of-stream (EOS) marker
             zinfo.flag_bits |= 0x02
@@ -263,6 +357,69 @@ class ZipFile(zipfile.ZipFile):
         self._didModify = True
 
         if isdir:
+            return zinfo, None, None
+
+        # the queue is bounded to limit the memory used by the entries compressed in advance
+        queue = asyncio.Queue(maxsize=ENTRY_QUEUE_SIZE)
+        task = asyncio.ensure_future(self._compress_entry(zinfo, queue, filename, iterable, aiterable))
+        return zinfo, queue, task
+
+    async def _compress_entry(self, zinfo, queue, filename, iterable, aiterable):
+        """
+        Read, checksum and compress the data of an entry outside of the event loop.
+
+        The compressed data is put in the queue, followed by a
+        tuple (CRC, file size, compressed size) or by an exception.
+        """
+
+        try:
+            cmpr = _get_compressor(zinfo.compress_type, self._compresslevel)
+            crc = file_size = compress_size = 0
+            if filename:
+                f = await self._run_in_executor(open, filename, "rb")
+                try:
+                    while True:
+                        size, crc, buf = await self._run_in_executor(_read_and_compress, f, self._chunksize, cmpr, crc)
+                        if not size:
+                            break
+                        file_size += size
+                        compress_size += len(buf)
+                        if buf:
+                            await queue.put(buf)
+                finally:
+                    f.close()
+            elif iterable is not None:
+                for data in iterable:
+                    file_size += len(data)
+                    crc, buf = await self._run_in_executor(_compress, data, cmpr, crc)
+                    compress_size += len(buf)
+                    if buf:
+                        await queue.put(buf)
+            else:  # we have an async iterable
+                async for data in aiterable:
+                    file_size += len(data)
+                    crc, buf = await self._run_in_executor(_compress, data, cmpr, crc)
+                    compress_size += len(buf)
+                    if buf:
+                        await queue.put(buf)
+            if cmpr:
+                buf = await self._run_in_executor(cmpr.flush)
+                compress_size += len(buf)
+                await queue.put(buf)
+            await queue.put((crc, file_size, compress_size))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            await queue.put(e)
+
+    async def _write(self, zinfo, queue, task):
+        """
+        Put the data of an entry into the archive.
+        """
+
+        if queue is None:
+            # directory
+            zinfo.header_offset = self.fp.tell()
             zinfo.file_size = 0
             zinfo.compress_size = 0
             zinfo.CRC = 0
@@ -271,40 +428,29 @@ class ZipFile(zipfile.ZipFile):
             yield self.fp.write(zinfo.FileHeader(False))
             return
 
-        cmpr = _get_compressor(zinfo.compress_type)
+        # the header is written with the first data, the entry can still be skipped before
+        buf = await queue.get()
+        if isinstance(buf, SkipEntry):
+            return
 
+        zinfo.header_offset = self.fp.tell()    # Start of header bytes
         # Must overwrite CRC and sizes with correct data later
-        zinfo.CRC = CRC = 0
-        zinfo.compress_size = compress_size = 0
+        zinfo.CRC = 0
+        zinfo.compress_size = 0
         # Compressed size can be larger than uncompressed size
         zip64 = self._allowZip64 and zinfo.file_size * 1.05 > zipfile.ZIP64_LIMIT
         yield self.fp.write(zinfo.FileHeader(zip64))
 
-        file_size = 0
-        if filename:
-            async for buf in self.data_generator(filename):
-                file_size = file_size + len(buf)
-                CRC = zipfile.crc32(buf, CRC) & 0xffffffff
-                if cmpr:
-                    buf = await self._run_in_executor(cmpr.compress, buf)
-                    compress_size = compress_size + len(buf)
-                yield self.fp.write(buf)
-        else: # we have an iterable
-            for buf in iterable:
-                file_size = file_size + len(buf)
-                CRC = zipfile.crc32(buf, CRC) & 0xffffffff
-                if cmpr:
-                    buf = await self._run_in_executor(cmpr.compress, buf)
-                    compress_size = compress_size + len(buf)
-                yield self.fp.write(buf)
-
-        if cmpr:
-            buf = cmpr.flush()
-            compress_size = compress_size + len(buf)
+        while True:
+            if isinstance(buf, Exception):
+                raise buf
+            if isinstance(buf, tuple):
+                break
             yield self.fp.write(buf)
-            zinfo.compress_size = compress_size
-        else:
-            zinfo.compress_size = file_size
+            buf = await queue.get()
+
+        CRC, file_size, compress_size = buf
+        zinfo.compress_size = compress_size
         zinfo.CRC = CRC
         zinfo.file_size = file_size
         if not zip64 and self._allowZip64:
@@ -313,7 +459,7 @@ class ZipFile(zipfile.ZipFile):
             if compress_size > zipfile.ZIP64_LIMIT:
                 raise RuntimeError('Compressed size larger than uncompressed size')
 
-        yield self.fp.write(zinfo.DataDescriptor())
+        yield self.fp.write(zinfo.DataDescriptor(zip64))
         self.filelist.append(zinfo)
         self.NameToInfo[zinfo.filename] = zinfo
 
@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+#
+# Copyright (C) 2020 GNS3 Technologies Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Copy project files, sharing the data blocks with the source file when the
+file system supports it (reflink on Btrfs, XFS...).
+"""
+
+import os
+import sys
+import shutil
+import asyncio
+
+from .asyncio import wait_run_in_executor
+
+import logging
+log = logging.getLogger(__name__)
+
+# ioctl to clone a file on Linux, from linux/fs.h
+FICLONE = 0x40049409
+
+# Maximum number of files copied at the same time
+CLONE_CONCURRENCY = 4
+
+
+def clone_file(source, destination):
+    """
+    Copy a file with a reflink if possible, otherwise with a regular copy.
+
+    The destination is never a hard link to the source, so the copies can
+    be modified without changing the source (e.g. disk images).
+
+    :param source: Source file path
+    :param destination: Destination file path
+    :returns: True if the file has been cloned with a reflink
+    """
+
+    os.makedirs(os.path.dirname(destination), exist_ok=True)
+    cloned = False
+    if sys.platform.startswith("linux"):
+        import fcntl
+        with open(source, "rb") as src, open(destination, "wb") as dst:
+            try:
+                fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+                cloned = True
+            except OSError:
+                # not supported by the file system or on different file systems
+                pass
+    if not cloned:
+        shutil.copyfile(source, destination)
+    shutil.copystat(source, destination)
+    return cloned
+
+
+async def clone_files(files):
+    """
+    Copy files in parallel.
+
+    :param files: List of (source, destination) paths
+    :returns: Number of files cloned with a reflink
+    """
+
+    semaphore = asyncio.Semaphore(CLONE_CONCURRENCY)
+
+    async def clone(source, destination):
+        async with semaphore:
+            return await wait_run_in_executor(clone_file, source, destination)
+
+    results = await asyncio.gather(*[clone(source, destination) for source, destination in files])
+    cloned = sum(1 for result in results if result)
+    log.debug("{} files copied, {} with a reflink".format(len(files), cloned))
+    return cloned
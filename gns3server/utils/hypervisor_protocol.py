@@ -0,0 +1,166 @@
+#!/usr/bin/env python
+#
+# Copyright (C) 2020 GNS3 Technologies Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Text protocol of the uBridge and Dynamips hypervisors.
+
+Responses are of the form:
+  1xx yyyyyy\r\n
+  1xx yyyyyy\r\n
+  ...
+  100-yyyy\r\n
+or
+  2xx-yyyy\r\n
+
+Where 1xx is a code from 100-199 for a success or 200-299 for an error.
+The hypervisors read the commands line by line and answer them in order,
+several commands can be sent without waiting for the previous responses.
+"""
+
+import re
+import codecs
+import asyncio
+
+import logging
+log = logging.getLogger(__name__)
+
+# Used to parse the response codes
+ERROR_RE = re.compile(r"""^2[0-9]{2}-""")
+SUCCESS_RE = re.compile(r"""^1[0-9]{2}\s{1}""")
+
+# Number of empty reads before giving up
+MAX_RETRIES = 10
+
+
+class ResponseParser:
+    """
+    Split the data received from a hypervisor in responses, the data may
+    be cut anywhere.
+    """
+
+    def __init__(self):
+
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="ignore")
+        self._buffer = ""
+        self._lines = []
+
+    def feed(self, data):
+        """
+        :param data: bytes received from the hypervisor
+        :returns: list of the completed responses, a response is a tuple
+        (lines, error message) where the error message is None on success
+        """
+
+        self._buffer += self._decoder.decode(data)
+        lines = self._buffer.split("\r\n")
+        self._buffer = lines.pop()
+
+        responses = []
+        for line in lines:
+            if ERROR_RE.search(line):
+                responses.append((self._lines, line[4:]))
+                self._lines = []
+            elif line[:4] == "100-":
+                line = line[4:]
+                if line != "OK":
+                    self._lines.append(line)
+                responses.append((self._lines, None))
+                self._lines = []
+            else:
+                if SUCCESS_RE.search(line):
+                    line = line[4:]
+                self._lines.append(line)
+        return responses
+
+
+async def send_commands(reader, writer, commands, error_class, command_error, peer, return_exceptions=False, retry_delay=0.1):
+    """
+    Send commands to a hypervisor in one write and read the responses as a stream.
+
+    All the commands are executed by the hypervisor even if one of them fails:
+    the responses are always read until the last one to keep the connection
+    usable. The caller must prevent concurrent use of the connection.
+
+    :param reader: StreamReader of the connection
+    :param writer: StreamWriter of the connection
+    :param commands: list of commands
+    :param error_class: exception raised when the communication fails
+    :param command_error: function (command, message) returning the exception of a failed command
+    :param peer: function returning a description of the hypervisor for the error messages
+    :param return_exceptions: return the exceptions of the failed commands in
+    the results instead of raising the first one
+    :param retry_delay: delay between two reads returning no data
+
+    :returns: list with the result lines of each command
+    """
+
+    commands = [command.strip() for command in commands]
+    if not commands:
+        return []
+    try:
+        log.debug("sending {}".format(commands))
+        writer.write("".join(command + "\n" for command in commands).encode())
+        await writer.drain()
+    except OSError as e:
+        raise error_class("Lost communication with {peer} when sending command '{command}': {error}"
+                          .format(peer=peer(), command=commands[0], error=e))
+
+    parser = ResponseParser()
+    results = []
+    retries = 0
+    while len(results) < len(commands):
+        command = commands[len(results)]
+        try:
+            try:
+                chunk = await reader.read(1024)  # match to the hypervisors buffer size
+            except asyncio.CancelledError:
+                # task has been canceled but continue to read
+                # any remaining data sent by the hypervisor
+                continue
+            except ConnectionResetError as e:
+                # Sometimes WinError 64 (ERROR_NETNAME_DELETED) is returned here on Windows.
+                # These happen if connection reset is received before IOCP could complete
+                # a previous operation. Ignore and try again....
+                log.warning("Connection reset received while reading hypervisor response: {}".format(e))
+                continue
+        except OSError as e:
+            raise error_class("Lost communication with {peer} after sending command '{command}': {error}"
+                              .format(peer=peer(), command=command, error=e))
+        if not chunk:
+            if retries > MAX_RETRIES:
+                raise error_class("No data returned from {peer} after sending command '{command}'"
+                                  .format(peer=peer(), command=command))
+            retries += 1
+            await asyncio.sleep(retry_delay)
+            continue
+        retries = 0
+
+        for lines, message in parser.feed(chunk):
+            if len(results) == len(commands):
+                log.warning("Unexpected response received from {}: {}".format(peer(), lines or message))
+                continue
+            if message is None:
+                results.append(lines)
+            else:
+                results.append(command_error(commands[len(results)], message))
+
+    log.debug("returned results {}".format(results))
+    if not return_exceptions:
+        for result in results:
+            if isinstance(result, Exception):
+                raise result
+    return results
@@ -0,0 +1,171 @@
+#!/usr/bin/env python
+#
+# Copyright (C) 2020 GNS3 Technologies Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import re
+import heapq
+import aiohttp
+
+import logging
+log = logging.getLogger(__name__)
+
+# Template ending by the number, for instance "R{0}" or "PC{id}"
+SUFFIX_TEMPLATE_RE = re.compile(r"^([^{}]*)\{(?:0|id)\}$")
+# Name ending by a number, for instance "R12"
+NUMBERED_NAME_RE = re.compile(r"^(.*?)([0-9]+)$")
+
+# Node names are numbered from 1 to 999999
+MAX_NAME_NUMBER = 1000000
+
+
+class NumberPool:
+    """
+    Finds the lowest free number of a range.
+
+    The pool keeps the number following the highest one allocated and a
+    heap of the numbers released below it, an allocation is O(log n)
+    amortized instead of a scan of the whole range. The numbers are
+    marked as used by the caller, they may also be used without being
+    allocated by the pool.
+
+    :param start: first number of the range
+    :param end: number following the last one of the range
+    """
+
+    def __init__(self, start, end):
+
+        self._start = start
+        self._end = end
+        self._next = start
+        self._released = []
+
+    def allocate(self, is_used):
+        """
+        :param is_used: function returning True if a number is already used
+        :returns: lowest free number, None if all the numbers are used
+        """
+
+        while self._released:
+            number = heapq.heappop(self._released)
+            if not is_used(number):
+                return number
+        while self._next < self._end:
+            number = self._next
+            self._next += 1
+            if not is_used(number):
+                return number
+        return None
+
+    def release(self, number):
+        """
+        Makes a number available again.
+
+        :param number: number no longer used
+        """
+
+        if self._start <= number < self._next:
+            heapq.heappush(self._released, number)
+
+
+class NameAllocator:
+    """
+    Unique node names of a project.
+
+    The numbers of the names generated from a template ending by the
+    number ("R{0}", "PC{id}") or by appending a number to a name are
+    allocated from a pool per prefix. Other templates ("{0}-R", "R{0:03d}")
+    have their own pool, which is reset when a name is released because
+    any name may have been generated by them.
+    """
+
+    def __init__(self):
+
+        self._names = set()
+        # prefix => NumberPool
+        self._prefixes = {}
+        # template => NumberPool
+        self._templates = {}
+
+    def __contains__(self, name):
+
+        return name in self._names
+
+    def __len__(self):
+
+        return len(self._names)
+
+    def _allocate_number(self, pools, key, generate):
+
+        pool = pools.get(key)
+        if pool is None:
+            pool = pools[key] = NumberPool(1, MAX_NAME_NUMBER)
+        number = pool.allocate(lambda number: generate(number) in self._names)
+        if number is None:
+            raise aiohttp.web.HTTPConflict(text="A node name could not be allocated (node limit reached?)")
+        name = generate(number)
+        self._names.add(name)
+        return name
+
+    def allocate(self, base_name):
+        """
+        Allocates a name or generates a new one if it is already used.
+
+        :param base_name: node name or template ({0} or {id} is replaced by a number)
+        :returns: allocated name
+        """
+
+        if base_name is None:
+            return None
+        base_name = re.sub(r"[ ]", "", base_name)
+        if base_name in self._names:
+            base_name = re.sub(r"[0-9]+$", "{0}", base_name)
+
+        if '{0}' in base_name or '{id}' in base_name:
+            # base name is a template, replace {0} or {id} by an unique identifier
+            match = SUFFIX_TEMPLATE_RE.match(base_name)
+            if match and not match.group(1)[-1:].isdigit():
+                prefix = match.group(1)
+                return self._allocate_number(self._prefixes, prefix, lambda number: prefix + str(number))
+            try:
+                base_name.format(1, id=1, name="Node")
+            except KeyError as e:
+                raise aiohttp.web.HTTPConflict(text="{" + e.args[0] + "} is not a valid replacement string in the node name")
+            except (ValueError, IndexError) as e:
+                raise aiohttp.web.HTTPConflict(text="{} is not a valid replacement string in the node name".format(base_name))
+            return self._allocate_number(self._templates, base_name, lambda number: base_name.format(number, id=number, name="Node"))
+
+        if base_name not in self._names:
+            self._names.add(base_name)
+            return base_name
+        # base name is not unique, let's find a unique name by appending a number
+        return self._allocate_number(self._prefixes, base_name, lambda number: base_name + str(number))
+
+    def release(self, name):
+        """
+        Releases an allocated name.
+
+        :param name: allocated name
+        """
+
+        if name not in self._names:
+            return
+        self._names.remove(name)
+        match = NUMBERED_NAME_RE.match(name)
+        if match and not match.group(2).startswith("0"):
+            pool = self._prefixes.get(match.group(1))
+            if pool is not None:
+                pool.release(int(match.group(2)))
+        self._templates.clear()
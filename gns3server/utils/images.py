@@ -16,24 +16,32 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 import os
+import asyncio
 import hashlib
 
 from ..config import Config
 from . import force_unix_path
+from .asyncio import wait_run_in_executor
 
 
 import logging
 log = logging.getLogger(__name__)
 
+# Size of the blocks read when computing the MD5 of an image
+HASH_BUFFER_SIZE = 1024 * 1024
+# Maximum number of images hashed at the same time
+HASH_CONCURRENCY = 4
 
-def list_images(type):
+
+def _image_candidates(type):
     """
-    Scan directories for available image for a type
+    Scan directories for the files which may be images for a type
 
     :param type: emulator type (dynamips, qemu, iou)
+    :returns: List of (path, path shown to the user, filename)
     """
     files = set()
-    images = []
+    candidates = []
 
     server_config = Config.instance().get_section_config("Server")
     general_images_directory = os.path.expanduser(server_config.get("images_path", "~/GNS3/images"))
@@ -53,7 +61,6 @@ def list_images(type):
         directory = os.path.normpath(directory)
         for root, _, filenames in _os_walk(directory, recurse=recurse):
             for filename in filenames:
-                path = os.path.join(root, filename)
                 if filename not in files:
                     if filename.endswith(".md5sum") or filename.startswith("."):
                         continue
@@ -67,23 +74,44 @@ def list_images(type):
                             path = os.path.join(root, filename)
                         else:
                             path = os.path.relpath(os.path.join(root, filename), default_directory)
+                        candidates.append((os.path.join(root, filename), force_unix_path(path), filename))
+    return candidates
+
+
+def _is_valid_image(path, type):
+    """
+    :returns: False if the file cannot be an image of this type
+    """
+
+    if type in ["dynamips", "iou"]:
+        with open(path, "rb") as f:
+            # read the first 7 bytes of the file.
+            elf_header_start = f.read(7)
+        # valid IOS images must start with the ELF magic number, be 32-bit, big endian and have an ELF version of 1
+        if not elf_header_start == b'\x7fELF\x01\x02\x01' and not elf_header_start == b'\x7fELF\x01\x01\x01':
+            return False
+    return True
 
-                        try:
-                            if type in ["dynamips", "iou"]:
-                                with open(os.path.join(root, filename), "rb") as f:
-                                    # read the first 7 bytes of the file.
-                                    elf_header_start = f.read(7)
-                                # valid IOS images must start with the ELF magic number, be 32-bit, big endian and have an ELF version of 1
-                                if not elf_header_start == b'\x7fELF\x01\x02\x01' and not elf_header_start == b'\x7fELF\x01\x01\x01':
-                                    continue
-
-                            images.append({
-                                "filename": filename,
-                                "path": force_unix_path(path),
-                                "md5sum": md5sum(os.path.join(root, filename)),
-                                "filesize": os.stat(os.path.join(root, filename)).st_size})
-                        except OSError as e:
-                            log.warning("Can't add image {}: {}".format(path, str(e)))
+
+def list_images(type):
+    """
+    Scan directories for available image for a type
+
+    :param type: emulator type (dynamips, qemu, iou)
+    """
+
+    images = []
+    for path, image_path, filename in _image_candidates(type):
+        try:
+            if not _is_valid_image(path, type):
+                continue
+            images.append({
+                "filename": filename,
+                "path": image_path,
+                "md5sum": md5sum(path),
+                "filesize": os.stat(path).st_size})
+        except OSError as e:
+            log.warning("Can't add image {}: {}".format(image_path, str(e)))
     return images
 
 
@@ -157,10 +185,12 @@ def md5sum(path, stopped_event=None):
         return None
 
     try:
-        with open(path + '.md5sum') as f:
-            md5 = f.read().strip()
-            if len(md5) == 32:
-                return md5
+        # the digest is outdated if the image has been modified after it
+        if os.stat(path + '.md5sum').st_mtime_ns >= os.stat(path).st_mtime_ns:
+            with open(path + '.md5sum') as f:
+                md5 = f.read().strip()
+                if len(md5) == 32:
+                    return md5
     # Unicode error is when user rename an image to .md5sum ....
     except (OSError, UnicodeDecodeError):
         pass
@@ -172,7 +202,7 @@ def md5sum(path, stopped_event=None):
                 if stopped_event is not None and stopped_event.is_set():
                     log.error("MD5 sum calculation of `{}` has stopped due to cancellation".format(path))
                     return
-                buf = f.read(128)
+                buf = f.read(HASH_BUFFER_SIZE)
                 if not buf:
                     break
                 m.update(buf)
@@ -198,3 +228,231 @@ def remove_checksum(path):
     path = '{}.md5sum'.format(path)
     if os.path.exists(path):
         os.remove(path)
+
+
+class _DirectoryIndex:
+    """
+    Files of a directory and of its subdirectories.
+
+    :param directory: Directory path
+    """
+
+    def __init__(self, directory):
+
+        self._directory = directory
+        self._by_filename = {}
+        self._by_relpath = {}
+        self._mtimes = {}
+        self.scan()
+
+    def scan(self):
+
+        by_filename = {}
+        by_relpath = {}
+        mtimes = {}
+        for root, _, filenames in os.walk(self._directory):
+            try:
+                mtimes[root] = os.stat(root).st_mtime_ns
+            except OSError:
+                continue
+            for filename in filenames:
+                path = os.path.normpath(os.path.join(root, filename))
+                # the first file found by os.walk has the priority
+                by_filename.setdefault(filename, path)
+                by_relpath[os.path.relpath(path, self._directory)] = path
+        self._by_filename = by_filename
+        self._by_relpath = by_relpath
+        self._mtimes = mtimes
+
+    def changed(self):
+        """
+        :returns: True if a file has been added or removed since the last scan
+        """
+
+        if not self._mtimes:
+            return os.path.isdir(self._directory)
+        for root, mtime in self._mtimes.items():
+            try:
+                if os.stat(root).st_mtime_ns != mtime:
+                    return True
+            except OSError:
+                return True
+        return False
+
+    def find(self, searched_file):
+
+        s = os.path.split(searched_file)
+        if s[0] == '':
+            return self._by_filename.get(s[1])
+        return self._by_relpath.get(os.path.normpath(searched_file))
+
+
+class ImageCatalog:
+    """
+    Images available for a node type, kept in memory.
+
+    The directories are scanned in the background and only the new or
+    modified images (different size or modification time) are hashed,
+    so images can be found by filename, path or MD5 without reading
+    the disk.
+
+    :param type: emulator type (dynamips, qemu, iou)
+    """
+
+    _instances = {}
+
+    def __init__(self, type):
+
+        self._type = type
+        self._entries = {}
+        self._images = []
+        self._by_path = {}
+        self._by_filename = {}
+        self._by_md5 = {}
+        self._indexes = {}
+        self._refresh_task = None
+        self._refresh_loop = None
+
+    @classmethod
+    def instance(cls, type):
+        """
+        Singleton to return only one catalog per node type.
+
+        :returns: instance of ImageCatalog
+        """
+
+        if type not in cls._instances:
+            cls._instances[type] = cls(type)
+        return cls._instances[type]
+
+    def refresh(self):
+        """
+        Update the catalog in the background, the calls made during
+        an update wait for it instead of scanning again.
+
+        :returns: Task updating the catalog
+        """
+
+        loop = asyncio.get_event_loop()
+        task = self._refresh_task
+        if task is None or task.done() or self._refresh_loop is not loop:
+            self._refresh_task = loop.create_task(self._refresh())
+            self._refresh_loop = loop
+        return self._refresh_task
+
+    def _scan(self):
+        """
+        :returns: List of (path, path shown to the user, filename, size, modification time)
+        """
+
+        files = []
+        for path, image_path, filename in _image_candidates(self._type):
+            try:
+                st = os.stat(path)
+            except OSError as e:
+                log.warning("Can't add image {}: {}".format(image_path, str(e)))
+                continue
+            files.append((path, image_path, filename, st.st_size, st.st_mtime_ns))
+        return files
+
+    def _hash(self, path):
+        """
+        :returns: MD5 of the image, False if the file is not an image of this type
+        """
+
+        if not _is_valid_image(path, self._type):
+            return False
+        return md5sum(path)
+
+    async def _refresh(self):
+
+        files = await wait_run_in_executor(self._scan)
+        semaphore = asyncio.Semaphore(HASH_CONCURRENCY)
+
+        async def add(path, image_path, filename, size, mtime_ns):
+            entry = self._entries.get(path)
+            if entry is None or entry["size"] != size or entry["mtime_ns"] != mtime_ns:
+                async with semaphore:
+                    try:
+                        md5 = await wait_run_in_executor(self._hash, path)
+                    except OSError as e:
+                        log.warning("Can't add image {}: {}".format(image_path, str(e)))
+                        return None
+                entry = {"size": size, "mtime_ns": mtime_ns, "md5sum": md5}
+            if entry["md5sum"] is False:
+                image = None
+            else:
+                image = {"filename": filename, "path": image_path, "md5sum": entry["md5sum"], "filesize": size}
+            return path, entry, image
+
+        results = await asyncio.gather(*[add(*file) for file in files])
+        entries = {}
+        images = []
+        by_md5 = {}
+        for result in results:
+            if result is None:
+                continue
+            path, entry, image = result
+            entries[path] = entry
+            if image:
+                images.append(image)
+                if image["md5sum"]:
+                    by_md5.setdefault(image["md5sum"], image)
+        self._entries = entries
+        self._images = images
+        self._by_path = {image["path"]: image for image in images}
+        self._by_filename = {}
+        for image in images:
+            self._by_filename.setdefault(image["filename"], image)
+        self._by_md5 = by_md5
+        log.debug("{} {} images in the catalog".format(len(images), self._type))
+
+    async def list_images(self):
+        """
+        :returns: Up to date list of the images
+        """
+
+        await asyncio.shield(self.refresh())
+        return [dict(image) for image in self._images]
+
+    def get_image(self, path):
+        """
+        Find an image by path (as returned by list_images) or filename.
+
+        :returns: Image or None if not in the catalog
+        """
+
+        image = self._by_path.get(force_unix_path(path))
+        if image is None:
+            image = self._by_filename.get(os.path.basename(path))
+        return image
+
+    def get_image_by_md5(self, md5):
+        """
+        :returns: Image with this MD5 or None if not in the catalog
+        """
+
+        return self._by_md5.get(md5)
+
+    def find_file(self, directory, searched_file):
+        """
+        Search for a file in directory and is subdirectories, the
+        directory is scanned again only when files have been added or removed.
+
+        :param directory: Directory path
+        :param searched_file: Filename or path relative to the directory
+        :returns: Path or None if not found
+        """
+
+        index = self._indexes.get(directory)
+        if index is None:
+            index = self._indexes[directory] = _DirectoryIndex(directory)
+        path = index.find(searched_file)
+        if path and os.path.exists(path):
+            return path
+        if path or index.changed():
+            index.scan()
+            path = index.find(searched_file)
+            if path and os.path.exists(path):
+                return path
+        return None
@@ -0,0 +1,121 @@
+#!/usr/bin/env python
+#
+# Copyright (C) 2020 GNS3 Technologies Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import asyncio
+
+import logging
+log = logging.getLogger(__name__)
+
+
+class ProbeCache:
+    """
+    Results of the commands run to learn facts about a binary (version,
+    supported options, shared libraries...).
+
+    A result is kept while the size and modification time of the binary
+    (and of the files read by the command) are the same. The nodes probing the same binary at the same time share
+    the same command.
+    """
+
+    def __init__(self):
+
+        # (path, key) => (identity of the binary and files, future, event loop)
+        self._entries = {}
+        self._hits = 0
+        self._misses = 0
+
+    @classmethod
+    def instance(cls):
+        """
+        Singleton to return only one instance of ProbeCache.
+
+        :returns: instance of ProbeCache
+        """
+
+        if not hasattr(cls, "_instance") or cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    @staticmethod
+    def _identity(path):
+
+        try:
+            st = os.stat(path)
+        except (OSError, TypeError, ValueError):
+            return None
+        return st.st_size, st.st_mtime_ns
+
+    @staticmethod
+    def _usable(entry, identity, keep):
+
+        future = entry[1]
+        if entry[0] != identity or entry[2] is not asyncio.get_event_loop():
+            return False
+        if not future.done():
+            return True
+        if future.cancelled() or future.exception() is not None:
+            return False
+        return keep is None or keep(future.result())
+
+    async def get(self, path, key, probe, keep=None, files=()):
+        """
+        Returns the result of a probe of a binary.
+
+        :param path: path of the binary, the result is forgotten when it changes
+        :param key: what is probed, for instance the command arguments
+        :param probe: coroutine function running the command
+        :param keep: function returning False if a result must not be kept
+        (the probe runs again next time), exceptions are never kept
+        :param files: other files read by the command, the result is forgotten
+        when they change, are created or are deleted
+
+        :returns: result of the probe
+        """
+
+        identity = self._identity(path)
+        if identity is None:
+            # the binary cannot be found, the probe reports the error
+            self._misses += 1
+            return await probe()
+        identity = (identity,) + tuple(self._identity(file) for file in files)
+
+        entry_key = (os.path.realpath(path), key)
+        entry = self._entries.get(entry_key)
+        if entry is not None and self._usable(entry, identity, keep):
+            self._hits += 1
+        else:
+            self._misses += 1
+            entry = (identity, asyncio.ensure_future(probe()), asyncio.get_event_loop())
+            self._entries[entry_key] = entry
+        # a node giving up does not cancel the probe for the others
+        return await asyncio.shield(entry[1])
+
+    def clear(self):
+        """
+        Forgets all the results.
+        """
+
+        self._entries = {}
+
+    def statistics(self):
+
+        return {
+            "entries": len(self._entries),
+            "hits": self._hits,
+            "misses": self._misses
+        }
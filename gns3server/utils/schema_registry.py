@@ -0,0 +1,130 @@
+#!/usr/bin/env python
+#
+# Copyright (C) 2020 GNS3 Technologies Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Registry of compiled JSON schema validators.
+
+jsonschema.validate() checks the schema and builds a new validator
+each time it is called, the registry does this once per schema.
+"""
+
+import time
+import random
+import jsonschema
+import jsonschema.exceptions
+import jsonschema.validators
+
+from ..config import Config
+
+
+class SchemaRegistry:
+
+    # id of the schema => (schema, validator), the schema is kept to make sure its id is not reused
+    _validators = {}
+    _statistics = {}
+
+    @classmethod
+    def get_validator(cls, schema):
+        """
+        Returns the compiled validator for a schema.
+
+        :param schema: JSON schema
+        :returns: jsonschema validator instance
+        """
+
+        entry = cls._validators.get(id(schema))
+        if entry is None or entry[0] is not schema:
+            validator_class = jsonschema.validators.validator_for(schema)
+            validator_class.check_schema(schema)
+            entry = (schema, validator_class(schema))
+            cls._validators[id(schema)] = entry
+        return entry[1]
+
+    @classmethod
+    def register(cls, schema):
+        """
+        Compile a schema in advance (e.g. when a route is registered).
+
+        :param schema: JSON schema
+        """
+
+        if schema:
+            cls.get_validator(schema)
+
+    @classmethod
+    def validate(cls, instance, schema, name=None):
+        """
+        Validate an instance against a schema, same behavior as jsonschema.validate()
+
+        :param instance: Object to validate
+        :param schema: JSON schema
+        :param name: Name used to record the validation time (e.g. a route)
+        :raises jsonschema.ValidationError: if the instance is invalid
+        """
+
+        begin = time.perf_counter()
+        try:
+            error = jsonschema.exceptions.best_match(cls.get_validator(schema).iter_errors(instance))
+        finally:
+            if name is not None:
+                stats = cls._statistics.setdefault(name, {"count": 0, "total_time": 0.0, "max_time": 0.0})
+                elapsed = time.perf_counter() - begin
+                stats["count"] += 1
+                stats["total_time"] += elapsed
+                stats["max_time"] = max(stats["max_time"], elapsed)
+        if error is not None:
+            raise error
+
+    @staticmethod
+    def output_validation_enabled():
+        """
+        Whether a response should be validated against its output schema.
+
+        The output_validation_rate server setting is the fraction of the
+        responses that are validated (1 validates all of them, 0 disables validation).
+        """
+
+        try:
+            rate = float(Config.instance().get_section_config("Server").get("output_validation_rate", 1.0))
+        except ValueError:
+            rate = 1.0
+        if rate >= 1:
+            return True
+        if rate <= 0:
+            return False
+        return random.random() < rate
+
+    @classmethod
+    def statistics(cls):
+        """
+        :returns: validation time statistics by name, times are in milliseconds
+        """
+
+        statistics = {}
+        for name, stats in cls._statistics.items():
+            statistics[name] = {
+                "count": stats["count"],
+                "total_time": round(stats["total_time"] * 1000, 3),
+                "average_time": round(stats["total_time"] * 1000 / stats["count"], 3) if stats["count"] else 0,
+                "max_time": round(stats["max_time"] * 1000, 3)
+            }
+        return statistics
+
+    @classmethod
+    def clear_statistics(cls):
+
+        cls._statistics = {}
@@ -0,0 +1,163 @@
+#!/usr/bin/env python
+#
+# Copyright (C) 2020 GNS3 Technologies Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Dispatch API calls to the compute handlers without going through HTTP.
+
+This is used by the controller to talk to the local compute when both
+run in the same process. Requests go through the same route wrapper
+(authentication, schema validation, node locks and error handling)
+as HTTP requests but the data is passed as Python objects.
+"""
+
+import re
+import urllib.parse
+
+
+class InProcessRequest:
+    """
+    Request given to a handler when called in process.
+
+    :param method: HTTP method
+    :param path: Path of the request (may include a query string)
+    :param match_info: Variables extracted from the path
+    :param data: Decoded JSON data
+    :param headers: Request headers
+    """
+
+    in_process = True
+
+    def __init__(self, method, path, match_info, data=None, headers=None):
+
+        self.method = method
+        self.path, _, self.query_string = path.partition("?")
+        self.path_qs = path
+        self.match_info = match_info
+        self.json = data if data is not None else {}
+        self.headers = headers or {}
+        self.host = "local"
+        self.app = None
+        # like aiohttp requests, the request is a mapping to store data
+        self._state = {}
+
+    def __getitem__(self, key):
+
+        return self._state[key]
+
+    def __setitem__(self, key, value):
+
+        self._state[key] = value
+
+    def __contains__(self, key):
+
+        return key in self._state
+
+    def get(self, key, default=None):
+
+        return self._state.get(key, default)
+
+    @property
+    def query(self):
+
+        return {k: v[0] for k, v in urllib.parse.parse_qs(self.query_string).items()}
+
+    async def read(self):
+
+        return b""
+
+
+class InProcessResponse:
+    """
+    Result of an in process call, it has the same attributes as
+    the responses returned by Compute.http_query().
+    """
+
+    def __init__(self, status, json=None):
+
+        self.status = status
+        self.json = json if json is not None else {}
+        self.body = b""
+        self.headers = {}
+
+
+class InProcessDispatcher:
+
+    # method => list of (compiled route, handler)
+    _routes = None
+
+    @staticmethod
+    def _compile_route(route):
+        """
+        Convert an aiohttp route (e.g. /projects/{project_id}/files/{path:.+}) to a regular expression
+        """
+
+        pattern = ""
+        position = 0
+        for match in re.finditer(r"\{(\w+)(?::(.+?))?\}", route):
+            pattern += re.escape(route[position:match.start()])
+            pattern += "(?P<{}>{})".format(match.group(1), match.group(2) or "[^{}/]+")
+            position = match.end()
+        pattern += re.escape(route[position:])
+        return re.compile("^{}$".format(pattern))
+
+    @classmethod
+    def _load_routes(cls):
+
+        # imported here because the routes import the controller
+        from .route import Route
+
+        cls._routes = {}
+        for method, route, handler in Route.get_routes():
+            if route.startswith("/v2/compute/"):
+                cls._routes.setdefault(method, []).append((cls._compile_route(route), handler))
+
+    @classmethod
+    def resolve(cls, method, path):
+        """
+        Find the handler for a request.
+
+        :param method: HTTP method
+        :param path: Path of the request (without query string)
+        :returns: Tuple (handler, match_info) or None if no route match
+        """
+
+        if cls._routes is None:
+            cls._load_routes()
+        for regex, handler in cls._routes.get(method, []):
+            match = regex.match(path)
+            if match:
+                return handler, match.groupdict()
+        return None
+
+    @classmethod
+    async def dispatch(cls, method, path, data=None, headers=None):
+        """
+        Call the compute handler for a request.
+
+        :param method: HTTP method
+        :param path: Full path of the request (e.g. /v2/compute/capabilities)
+        :param data: JSON data as Python objects
+        :param headers: Request headers
+        :returns: Response instance or None if no route match
+        """
+
+        route = cls.resolve(method, path.partition("?")[0])
+        if route is None:
+            return None
+        handler, match_info = route
+        request = InProcessRequest(method, path, match_info, data=data, headers=headers)
+        return await handler(request)
@@ -28,6 +28,8 @@ import os
 
 from ..utils.get_resource import get_resource
 from ..version import __version__
+from ..config import Config
+from ..utils.schema_registry import SchemaRegistry
 
 log = logging.getLogger(__name__)
 renderer = jinja2.Environment(loader=jinja2.FileSystemLoader(get_resource('templates')))
@@ -37,15 +39,31 @@ CHUNK_SIZE = 1024 * 8  # 8KB
 
 class Response(aiohttp.web.Response):
 
-    def __init__(self, request=None, route=None, output_schema=None, headers={}, **kwargs):
+    def __init__(self, request=None, route=None, output_schema=None, validation_name=None, headers=None, **kwargs):
+        headers = dict(headers) if headers else {}
         self._route = route
         self._output_schema = output_schema
+        self._validation_name = validation_name
+        self.answer = None
         self._request = request
-        headers['Connection'] = "close"  # Disable keep alive because create trouble with old Qt (5.2, 5.3 and 5.4)
+        if not self._keepalive_allowed(route):
+            headers['Connection'] = "close"  # Disable keep alive because create trouble with old Qt (5.2, 5.3 and 5.4)
         headers['X-Route'] = self._route
         headers['Server'] = "Python/{0[0]}.{0[1]} GNS3/{1}".format(sys.version_info, __version__)
         super().__init__(headers=headers, **kwargs)
 
+    @staticmethod
+    def _keepalive_allowed(route):
+        """
+        Keep alive is disabled for clients unless the keepalive server setting is enabled,
+        the compute API (only used by controllers) allows it unless compute_keepalive is disabled.
+        """
+
+        server_config = Config.instance().get_section_config("Server")
+        if route and route.startswith("/v2/compute"):
+            return server_config.getboolean("compute_keepalive", True)
+        return server_config.getboolean("keepalive", False)
+
     def enable_chunked_encoding(self):
         # Very important: do not send a content length otherwise QT closes the connection (curl can consume the feed)
         if self.content_length:
@@ -106,13 +124,17 @@ class Response(aiohttp.web.Response):
                     elem = elem.__json__()
                 newanswer.append(elem)
             answer = newanswer
-        if self._output_schema is not None:
+        if self._output_schema is not None and SchemaRegistry.output_validation_enabled():
             try:
-                jsonschema.validate(answer, self._output_schema)
+                SchemaRegistry.validate(answer, self._output_schema, name=self._validation_name)
             except jsonschema.ValidationError as e:
                 log.error("Invalid output query. JSON schema error: {}".format(e.message))
                 raise aiohttp.web.HTTPBadRequest(text="{}".format(e))
-        self.body = json.dumps(answer, indent=4, sort_keys=True).encode('utf-8')
+        if getattr(self._request, "in_process", False):
+            # the caller is in the same process, no need to serialize the answer
+            self.answer = answer
+        else:
+            self.body = json.dumps(answer, indent=4, sort_keys=True).encode('utf-8')
 
     async def stream_file(self, path, status=200, set_content_type=None, set_content_length=True):
         """
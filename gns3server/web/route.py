@@ -22,7 +22,6 @@ import asyncio
 import aiohttp
 import traceback
 import jsonschema
-import jsonschema.exceptions
 
 from ..compute.error import NodeError, ImageMissingError
 from ..controller.controller_error import ControllerError
@@ -31,24 +30,27 @@ from ..controller.gns3vm.gns3_vm_error import GNS3VMError
 from .response import Response
 from ..crash_report import CrashReport
 from ..config import Config
+from ..utils.schema_registry import SchemaRegistry
 
 
 import logging
 log = logging.getLogger(__name__)
 
 
-async def parse_request(request, input_schema, raw):
+async def parse_request(request, input_schema, raw, name=None):
     """Parse body of request and raise HTTP errors in case of problems"""
 
-    request.json = {}
-    if not raw:
-        body = await request.read()
-        if body:
-            try:
-                request.json = json.loads(body.decode('utf-8'))
-            except ValueError as e:
-                request.json = {"malformed_json": body.decode('utf-8')}
-                raise aiohttp.web.HTTPBadRequest(text="Invalid JSON {}".format(e))
+    # the data of in process requests is already decoded
+    if not getattr(request, "in_process", False):
+        request.json = {}
+        if not raw:
+            body = await request.read()
+            if body:
+                try:
+                    request.json = json.loads(body.decode('utf-8'))
+                except ValueError as e:
+                    request.json = {"malformed_json": body.decode('utf-8')}
+                    raise aiohttp.web.HTTPBadRequest(text="Invalid JSON {}".format(e))
 
     # Parse the query string
     if len(request.query_string) > 0:
@@ -57,7 +59,7 @@ async def parse_request(request, input_schema, raw):
 
     if input_schema:
         try:
-            jsonschema.validate(request.json, input_schema)
+            SchemaRegistry.validate(request.json, input_schema, name=name)
         except jsonschema.ValidationError as e:
             message = "JSON schema error with API request '{}' and JSON data '{}': {}".format(request.path_qs,
                                                                                               request.json,
@@ -164,6 +166,10 @@ class Route(object):
                     "description": kw.get("description", ""),
                 })
 
+            # compile the schemas once for all
+            SchemaRegistry.register(input_schema)
+            SchemaRegistry.register(output_schema)
+
             func = asyncio.coroutine(func)
 
             async def control_schema(request):
@@ -185,7 +191,7 @@ class Route(object):
                         return response
 
                     # API call
-                    request = await parse_request(request, input_schema, raw)
+                    request = await parse_request(request, input_schema, raw, name="{} {} input".format(method, route))
                     record_file = server_config.get("record")
                     if record_file:
                         try:
@@ -194,7 +200,7 @@ class Route(object):
                                 f.write("\n")
                         except OSError as e:
                             log.warning("Could not write to the record file {}: {}".format(record_file, e))
-                    response = Response(request=request, route=route, output_schema=output_schema)
+                    response = Response(request=request, route=route, output_schema=output_schema, validation_name="{} {} output".format(method, route))
                     await func(request, response)
                 except aiohttp.web.HTTPBadRequest as e:
                     response = Response(request=request, route=route)
@@ -38,8 +38,9 @@ from .route import Route
 from ..config import Config
 from ..compute import MODULES
 from ..compute.port_manager import PortManager
-from ..compute.qemu import Qemu
+from ..compute.node_telemetry import NodeTelemetry
 from ..controller import Controller
+from ..utils.images import ImageCatalog
 
 # do not delete this import
 import gns3server.handlers
@@ -125,6 +126,7 @@ class WebServer:
             await self._app.cleanup()
 
         await Controller.instance().stop()
+        await NodeTelemetry.instance().stop()
 
         for module in MODULES:
             log.debug("Unloading module {}".format(module.__name__))
@@ -239,7 +241,9 @@ class WebServer:
         # Because with a large image collection
         # without md5sum already computed we start the
         # computing with server start
-        asyncio.ensure_future(Qemu.instance().list_images())
+        for node_type in ("qemu", "iou", "dynamips"):
+            ImageCatalog.instance(node_type).refresh()
+        NodeTelemetry.instance().start()
 
     def run(self):
         """
@@ -17,7 +17,7 @@
 
 import uuid
 import pytest
-from unittest.mock import MagicMock, patch, call
+from unittest.mock import MagicMock, patch
 
 from gns3server.compute.builtin.nodes.cloud import Cloud
 from gns3server.compute.nios.nio_udp import NIOUDP
@@ -167,17 +167,17 @@ async def test_linux_ethernet_raw_add_nio(loop, linux_platform, compute_project,
 
     with patch("shutil.which", return_value="/bin/ubridge"):
         with patch("gns3server.compute.base_manager.BaseManager.has_privileged_access", return_value=True):
-            with asyncio_patch("gns3server.compute.builtin.nodes.cloud.Cloud._ubridge_send") as ubridge_mock:
+            with asyncio_patch("gns3server.compute.builtin.nodes.cloud.Cloud._ubridge_send_batch", return_value=[]) as ubridge_mock:
                 with patch("gns3server.compute.builtin.nodes.cloud.Cloud._interfaces", return_value=[{"name": "eth0"}]):
                     await cloud.add_nio(nio, 0)
 
-    ubridge_mock.assert_has_calls([
-        call("bridge create {}-0".format(cloud._id)),
-        call("bridge add_nio_udp {}-0 4242 127.0.0.1 4343".format(cloud._id)),
-        call('bridge reset_packet_filters {}-0'.format(cloud._id)),
-        call("bridge add_nio_linux_raw {}-0 \"eth0\"".format(cloud._id)),
-        call("bridge start {}-0".format(cloud._id)),
-    ])
+    ubridge_mock.assert_called_once_with([
+        "bridge create {}-0".format(cloud._id),
+        "bridge add_nio_udp {}-0 4242 127.0.0.1 4343".format(cloud._id),
+        'bridge reset_packet_filters {}-0'.format(cloud._id),
+        "bridge add_nio_linux_raw {}-0 \"eth0\"".format(cloud._id),
+        "bridge start {}-0".format(cloud._id),
+    ], return_exceptions=True)
 
 
 async def test_linux_ethernet_raw_add_nio_bridge(loop, linux_platform, compute_project, nio):
@@ -197,17 +197,17 @@ async def test_linux_ethernet_raw_add_nio_bridge(loop, linux_platform, compute_p
 
     with patch("shutil.which", return_value="/bin/ubridge"):
         with patch("gns3server.compute.base_manager.BaseManager.has_privileged_access", return_value=True):
-            with asyncio_patch("gns3server.compute.builtin.nodes.cloud.Cloud._ubridge_send") as ubridge_mock:
+            with asyncio_patch("gns3server.compute.builtin.nodes.cloud.Cloud._ubridge_send_batch", return_value=[]) as ubridge_mock:
                 with patch("gns3server.compute.builtin.nodes.cloud.Cloud._interfaces", return_value=[{"name": "bridge0"}]):
                     with patch("gns3server.utils.interfaces.is_interface_bridge", return_value=True):
                         await cloud.add_nio(nio, 0)
 
     tap = "gns3tap0-0"
-    ubridge_mock.assert_has_calls([
-        call("bridge create {}-0".format(cloud._id)),
-        call("bridge add_nio_udp {}-0 4242 127.0.0.1 4343".format(cloud._id)),
-        call('bridge reset_packet_filters {}-0'.format(cloud._id)),
-        call("bridge add_nio_tap \"{}-0\" \"{}\"".format(cloud._id, tap)),
-        call("brctl addif \"bridge0\" \"{}\"".format(tap)),
-        call("bridge start {}-0".format(cloud._id)),
-    ])
+    ubridge_mock.assert_called_once_with([
+        "bridge create {}-0".format(cloud._id),
+        "bridge add_nio_udp {}-0 4242 127.0.0.1 4343".format(cloud._id),
+        'bridge reset_packet_filters {}-0'.format(cloud._id),
+        "bridge add_nio_tap \"{}-0\" \"{}\"".format(cloud._id, tap),
+        "brctl addif \"bridge0\" \"{}\"".format(tap),
+        "bridge start {}-0".format(cloud._id),
+    ], return_exceptions=True)
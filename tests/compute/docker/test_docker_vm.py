@@ -1148,6 +1148,7 @@ async def test_add_ubridge_connection(vm):
     nio = vm.manager.create_nio(nio)
     nio.start_packet_capture("/tmp/capture.pcap")
     vm._ubridge_hypervisor = MagicMock()
+    vm._ubridge_hypervisor.send_batch = AsyncioMagicMock(return_value=[[]])
     vm._namespace = 42
     await vm._add_ubridge_connection(nio, 0)
 
@@ -1156,6 +1157,7 @@ async def test_add_ubridge_connection(vm):
         call.send("bridge add_nio_tap bridge0 tap-gns3-e0"),
         call.send('docker move_to_ns tap-gns3-e0 42 eth0'),
         call.send('bridge add_nio_udp bridge0 4242 127.0.0.1 4343'),
+        call.send_batch(['bridge reset_packet_filters bridge0'], return_exceptions=True),
         call.send('bridge start_capture bridge0 "/tmp/capture.pcap"'),
         call.send('bridge start bridge0')
     ]
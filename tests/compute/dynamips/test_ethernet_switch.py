@@ -15,8 +15,15 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import uuid
+import pytest
+from unittest.mock import MagicMock
+
 from tests.utils import AsyncioMagicMock
+from gns3server.compute.dynamips import Dynamips
+from gns3server.compute.dynamips.nodes.ethernet_switch import EthernetSwitch
 from gns3server.compute.nios.nio_udp import NIOUDP
+from gns3server.compute.dynamips.dynamips_error import DynamipsError
 
 
 def test_mac_command():
@@ -35,3 +42,56 @@ def test_mac_command():
     #    "Ethernet0  00:50:79:66:68:01  1\n" \
     #    "Ethernet1  00:50:79:66:68:02  1\n"
     #node._hypervisor.send.assert_called_with("ethsw show_mac_addr_table Test")
+
+
+async def test_add_nio_with_port_settings(compute_project, port_manager):
+
+    manager = Dynamips.instance()
+    manager.port_manager = port_manager
+    hypervisor = MagicMock()
+    hypervisor.send_batch = AsyncioMagicMock(return_value=[[], []])
+    ports = [{"port_number": 0, "name": "Ethernet0", "type": "dot1q", "vlan": 10}]
+    switch = EthernetSwitch("SW1", str(uuid.uuid4()), compute_project, manager, ports=ports, hypervisor=hypervisor)
+    nio = NIOUDP(55, "127.0.0.1", 56)
+
+    # the NIO is bound and the port configured with one batch
+    await switch.add_nio(nio, 0)
+    hypervisor.send_batch.assert_called_once_with(['ethsw add_nio "SW1" {}'.format(nio),
+                                                   'ethsw set_dot1q_port "SW1" {} 10'.format(nio)],
+                                                  return_exceptions=True)
+    assert switch.get_nio(0) == nio
+    assert switch._mappings[0] == ("dot1q", 10)
+
+
+async def test_add_nio_port_settings_error(compute_project, port_manager):
+
+    manager = Dynamips.instance()
+    manager.port_manager = port_manager
+    hypervisor = MagicMock()
+    hypervisor.send_batch = AsyncioMagicMock(return_value=[[], DynamipsError("VLAN error")])
+    hypervisor.send = AsyncioMagicMock()
+    ports = [{"port_number": 0, "name": "Ethernet0", "type": "dot1q", "vlan": 10}]
+    switch = EthernetSwitch("SW1", str(uuid.uuid4()), compute_project, manager, ports=ports, hypervisor=hypervisor)
+    nio = NIOUDP(55, "127.0.0.1", 56)
+
+    # the NIO is bound by Dynamips, it can be removed despite the error
+    with pytest.raises(DynamipsError):
+        await switch.add_nio(nio, 0)
+    assert switch.get_nio(0) == nio
+    assert 0 not in switch._mappings
+    assert await switch.remove_nio(0) == nio
+    hypervisor.send.assert_called_with('ethsw remove_nio "SW1" {}'.format(nio))
+
+
+async def test_add_nio_error(compute_project, port_manager):
+
+    manager = Dynamips.instance()
+    manager.port_manager = port_manager
+    hypervisor = MagicMock()
+    hypervisor.send_batch = AsyncioMagicMock(return_value=[DynamipsError("NIO error"), DynamipsError("NIO error")])
+    ports = [{"port_number": 0, "name": "Ethernet0", "type": "dot1q", "vlan": 10}]
+    switch = EthernetSwitch("SW1", str(uuid.uuid4()), compute_project, manager, ports=ports, hypervisor=hypervisor)
+
+    with pytest.raises(DynamipsError):
+        await switch.add_nio(NIOUDP(55, "127.0.0.1", 56), 0)
+    assert 0 not in switch._nios
@@ -34,6 +34,7 @@ if not sys.platform.startswith("win"):
     from gns3server.compute.iou.iou_vm import IOUVM
     from gns3server.compute.iou.iou_error import IOUError
     from gns3server.compute.iou import IOU
+    from gns3server.utils.probe_cache import ProbeCache
 
 
 @pytest.fixture
@@ -321,6 +322,8 @@ async def test_library_check(vm):
     with asyncio_patch("gns3server.utils.asyncio.subprocess_check_output", return_value=""):
         await vm._library_check()
 
+    # the result is kept while the image is unchanged
+    ProbeCache.instance().clear()
     with asyncio_patch("gns3server.utils.asyncio.subprocess_check_output", return_value="libssl => not found"):
         with pytest.raises(IOUError):
             await vm._library_check()
@@ -333,6 +336,7 @@ async def test_enable_l1_keepalives(vm):
         await vm._enable_l1_keepalives(command)
         assert command == ["test", "-l"]
 
+    ProbeCache.instance().clear()
     with asyncio_patch("gns3server.utils.asyncio.subprocess_check_output", return_value="***************************************************************\n\n-u <n>		UDP port base for distributed networks\n"):
 
         command = ["test"]
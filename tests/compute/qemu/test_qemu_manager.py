@@ -19,6 +19,7 @@ import os
 import stat
 import sys
 import pytest
+import asyncio
 import platform
 
 from gns3server.compute.qemu import Qemu
@@ -213,3 +214,49 @@ async def test_get_kvm_archs_kvm_ok():
     with patch("os.path.exists", return_value=False):
         archs = await Qemu.get_kvm_archs()
         assert archs == []
+
+
+async def test_check_disk_image(tmpdir):
+
+    image = str(tmpdir / "base.qcow2")
+    with open(image, "w+") as f:
+        f.write("1")
+
+    checks = []
+
+    async def check():
+        checks.append(image)
+        await asyncio.sleep(0.01)
+        return True
+
+    # concurrent checks of an image share the same check
+    manager = Qemu.instance()
+    await asyncio.gather(*[manager.check_disk_image(image, check) for _ in range(5)])
+    assert len(checks) == 1
+
+    # the result is kept while the image is unchanged
+    await manager.check_disk_image(image, check)
+    assert len(checks) == 1
+
+    with open(image, "a") as f:
+        f.write("2")
+    await manager.check_disk_image(image, check)
+    assert len(checks) == 2
+
+
+async def test_check_disk_image_not_clean(tmpdir):
+
+    image = str(tmpdir / "base.qcow2")
+    open(image, "w+").close()
+    checks = []
+
+    async def check():
+        checks.append(image)
+        await asyncio.sleep(0)
+        return False
+
+    # the images which had to be repaired are checked again
+    manager = Qemu.instance()
+    await manager.check_disk_image(image, check)
+    await manager.check_disk_image(image, check)
+    assert len(checks) == 2
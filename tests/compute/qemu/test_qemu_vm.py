@@ -75,7 +75,10 @@ async def vm(compute_project, manager, fake_qemu_binary, fake_qemu_img_binary):
     vm._start_ubridge = AsyncioMagicMock()
     vm._ubridge_hypervisor = MagicMock()
     vm._ubridge_hypervisor.is_running.return_value = True
+    vm._ubridge_hypervisor.send_batch = AsyncioMagicMock(return_value=[])
     vm.manager.config.set("Qemu", "enable_hardware_acceleration", False)
+    # no QMP server to connect to
+    vm.manager.config.set("Qemu", "monitor", False)
     return vm
 
 
@@ -424,6 +427,32 @@ async def test_disk_options_multiple_disk(vm, tmpdir, fake_qemu_img_binary):
     ]
 
 
+async def test_disk_options_multiple_sata_disk(vm, tmpdir, fake_qemu_img_binary):
+
+    vm.manager.get_qemu_version = AsyncioMagicMock(return_value="3.1.0")
+    vm._hda_disk_image = str(tmpdir / "test0.qcow2")
+    vm._hdb_disk_image = str(tmpdir / "test1.qcow2")
+    vm._hda_disk_interface = "sata"
+    vm._hdb_disk_interface = "sata"
+    open(vm._hda_disk_image, "w+").close()
+    open(vm._hdb_disk_image, "w+").close()
+
+    with asyncio_patch("gns3server.compute.qemu.qemu_vm.QemuVM._find_disk_file_format", return_value="qcow2"):
+        with asyncio_patch("asyncio.create_subprocess_exec", return_value=MagicMock()):
+            options = await vm._disk_options()
+
+    # the QEMU version is only looked up once for all the disks
+    assert vm.manager.get_qemu_version.call_count == 1
+    assert options == [
+        '-device', 'ahci,id=ahci0',
+        '-drive', 'file=' + os.path.join(vm.working_dir, "hda_disk.qcow2") + ',if=none,id=drive0,index=0,media=disk',
+        '-device', 'ide-drive,drive=drive0,bus=ahci0.0,id=drive0',
+        '-device', 'ahci,id=ahci1',
+        '-drive', 'file=' + os.path.join(vm.working_dir, "hdb_disk.qcow2") + ',if=none,id=drive1,index=1,media=disk',
+        '-device', 'ide-drive,drive=drive1,bus=ahci1.0,id=drive1'
+    ]
+
+
 @pytest.mark.skipif(sys.platform.startswith("win"), reason="Not supported on Windows")
 async def test_set_process_priority(vm, fake_qemu_img_binary):
 
@@ -454,33 +483,45 @@ def test_json(vm, compute_project):
     assert json["project_id"] == compute_project.id
 
 
-async def test_control_vm(vm):
+async def test_control_vm(vm, running_subprocess_mock):
 
-    vm._process = MagicMock()
-    reader = MagicMock()
-    writer = MagicMock()
-    with asyncio_patch("asyncio.open_connection", return_value=(reader, writer)):
+    vm._process = running_subprocess_mock
+    vm._monitor = 4242
+    with asyncio_patch("gns3server.compute.qemu.QemuVM._qmp_execute", return_value="") as mock:
         res = await vm._control_vm("test")
-        assert writer.write.called_with("test")
+        mock.assert_called_with("human-monitor-command", {"command-line": "test"}, timeout=30)
     assert res is None
 
 
 async def test_control_vm_expect_text(vm, running_subprocess_mock):
 
     vm._process = running_subprocess_mock
-    reader = MagicMock()
-    writer = MagicMock()
-    with asyncio_patch("asyncio.open_connection", return_value=(reader, writer)):
+    vm._monitor = 4242
+    with asyncio_patch("gns3server.compute.qemu.QemuVM._qmp_execute", return_value="boring\r\nepic product\r\n"):
+        res = await vm._control_vm("test", [b"epic"])
+    assert res == "epic product"
 
-        future = asyncio.Future()
-        future.set_result(b"epic product")
-        reader.readline.return_value = future
 
-        vm._monitor = 4242
-        res = await vm._control_vm("test", [b"epic"])
-        assert writer.write.called_with("test")
+async def test_get_vm_status(vm, running_subprocess_mock):
 
-    assert res == "epic product"
+    vm._process = running_subprocess_mock
+    vm._monitor = 4242
+    with asyncio_patch("gns3server.compute.qemu.QemuVM._qmp_execute", return_value={"status": "paused", "running": False}) as mock:
+        assert await vm._get_vm_status() == "paused"
+        mock.assert_called_with("query-status")
+
+
+def test_qmp_event(vm):
+
+    vm._node_status = "started"
+    with patch.object(vm.project, "emit") as emit:
+        vm._qmp_event("STOP", {})
+        assert vm.status == "suspended"
+        emit.assert_called_with("node.updated", vm)
+        vm._qmp_event("RESUME", {})
+        assert vm.status == "started"
+        vm._qmp_event("RESET", {})
+        assert emit.call_count == 2
 
 
 async def test_build_command(vm, fake_qemu_binary):
@@ -0,0 +1,141 @@
+#!/usr/bin/env python
+#
+# Copyright (C) 2020 GNS3 Technologies Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import json
+import pytest
+import asyncio
+
+from gns3server.compute.qemu.qemu_error import QemuError
+from gns3server.compute.qemu.utils.qmp import QMPConnection
+
+
+class FakeQMPServer:
+    """
+    Answers the QMP commands like QEMU, the responses are sent in the reverse order.
+    """
+
+    def __init__(self):
+
+        self.commands = []
+        self.writer = None
+        self.capabilities_error = False
+        self.disconnected = False
+
+    async def start(self):
+
+        self._server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        return self._server.sockets[0].getsockname()[1]
+
+    def _send(self, message):
+
+        self.writer.write(json.dumps(message).encode() + b"\r\n")
+
+    async def _handle(self, reader, writer):
+
+        self.writer = writer
+        self._send({"QMP": {"version": {}, "capabilities": []}})
+        received = []
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            command = json.loads(line.decode())
+            self.commands.append(command["execute"])
+            if command["execute"] == "qmp_capabilities":
+                if self.capabilities_error:
+                    self._send({"error": {"class": "GenericError", "desc": "Capabilities negotiation is already complete"}, "id": command["id"]})
+                else:
+                    self._send({"return": {}, "id": command["id"]})
+                continue
+            received.append(command)
+            if len(received) == 2:
+                for command in reversed(received):
+                    if command["execute"] == "stop":
+                        self._send({"event": "STOP", "data": {}, "timestamp": {}})
+                    if command["execute"] == "unknown":
+                        self._send({"error": {"class": "CommandNotFound", "desc": "The command unknown has not been found"}, "id": command["id"]})
+                    else:
+                        self._send({"return": command["execute"], "id": command["id"]})
+                received = []
+        self.disconnected = True
+
+    async def stop(self):
+
+        if self.writer:
+            self.writer.close()
+        self._server.close()
+        await self._server.wait_closed()
+
+
+@pytest.fixture
+async def qmp_server(loop):
+
+    server = FakeQMPServer()
+    yield server
+    await server.stop()
+
+
+async def test_execute(qmp_server):
+
+    events = []
+    port = await qmp_server.start()
+    qmp = QMPConnection("127.0.0.1", port, on_event=lambda event, data: events.append(event))
+    await qmp.connect()
+    assert qmp.connected
+
+    # the responses are matched with their command
+    results = await asyncio.gather(qmp.execute("stop"), qmp.execute("query-status"))
+    assert results == ["stop", "query-status"]
+    assert events == ["STOP"]
+
+    with pytest.raises(QemuError):
+        await asyncio.gather(qmp.execute("unknown"), qmp.execute("cont"))
+    assert qmp_server.commands == ["qmp_capabilities", "stop", "query-status", "unknown", "cont"]
+    await qmp.close()
+    assert not qmp.connected
+
+
+async def test_connection_closed(qmp_server):
+
+    port = await qmp_server.start()
+    qmp = QMPConnection("127.0.0.1", port)
+    await qmp.connect()
+
+    # a single command never gets a response from the fake server
+    command = asyncio.ensure_future(qmp.execute("cont"))
+    await asyncio.sleep(0.1)
+    qmp_server.writer.close()
+    with pytest.raises(QemuError):
+        await command
+    await asyncio.sleep(0)
+    assert not qmp.connected
+    with pytest.raises(QemuError):
+        await qmp.execute("cont")
+
+
+async def test_capabilities_error(qmp_server):
+
+    port = await qmp_server.start()
+    qmp_server.capabilities_error = True
+    qmp = QMPConnection("127.0.0.1", port)
+    with pytest.raises(QemuError):
+        await qmp.connect()
+
+    # the connection is closed for the next QMP client
+    await asyncio.sleep(0.1)
+    assert not qmp.connected
+    assert qmp_server.disconnected
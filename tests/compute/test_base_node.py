@@ -20,6 +20,7 @@ from collections import OrderedDict
 import pytest
 import asyncio
 
+from unittest.mock import MagicMock, PropertyMock, patch
 from tests.utils import asyncio_patch, AsyncioMagicMock
 
 from gns3server.compute.vpcs.vpcs_vm import VPCSVM
@@ -27,6 +28,8 @@ from gns3server.compute.docker.docker_vm import DockerVM
 from gns3server.compute.error import NodeError
 from gns3server.compute.vpcs import VPCS
 from gns3server.compute.nios.nio_udp import NIOUDP
+from gns3server.ubridge.hypervisor_pool import HypervisorPool, ubridge_statistics
+from gns3server.ubridge.ubridge_error import UbridgeError
 
 
 @pytest.fixture(scope="function")
@@ -151,10 +154,14 @@ async def test_ubridge_apply_filters(node):
         ('latency', [10]),
         ('bpf', ["icmp[icmptype] == 8\ntcp src port 53"])
     ))
-    node._ubridge_send = AsyncioMagicMock()
+    node._ubridge_send_batch = AsyncioMagicMock(return_value=[[], [], [], []])
     await node._ubridge_apply_filters("VPCS-10", filters)
-    node._ubridge_send.assert_any_call("bridge reset_packet_filters VPCS-10")
-    node._ubridge_send.assert_any_call("bridge add_packet_filter VPCS-10 filter0 latency 10")
+    node._ubridge_send_batch.assert_called_with([
+        "bridge reset_packet_filters VPCS-10",
+        "bridge add_packet_filter VPCS-10 filter0 latency 10",
+        "bridge add_packet_filter VPCS-10 filter1 bpf \"icmp[icmptype] == 8\"",
+        "bridge add_packet_filter VPCS-10 filter2 bpf \"tcp src port 53\""
+    ], return_exceptions=True)
 
 
 async def test_ubridge_apply_bpf_filters(node):
@@ -162,8 +169,189 @@ async def test_ubridge_apply_bpf_filters(node):
     filters = {
         "bpf": ["icmp[icmptype] == 8\ntcp src port 53"]
     }
-    node._ubridge_send = AsyncioMagicMock()
+    node._ubridge_send_batch = AsyncioMagicMock(return_value=[[], [], []])
     await node._ubridge_apply_filters("VPCS-10", filters)
-    node._ubridge_send.assert_any_call("bridge reset_packet_filters VPCS-10")
-    node._ubridge_send.assert_any_call("bridge add_packet_filter VPCS-10 filter0 bpf \"icmp[icmptype] == 8\"")
-    node._ubridge_send.assert_any_call("bridge add_packet_filter VPCS-10 filter1 bpf \"tcp src port 53\"")
+    node._ubridge_send_batch.assert_called_with([
+        "bridge reset_packet_filters VPCS-10",
+        "bridge add_packet_filter VPCS-10 filter0 bpf \"icmp[icmptype] == 8\"",
+        "bridge add_packet_filter VPCS-10 filter1 bpf \"tcp src port 53\""
+    ], return_exceptions=True)
+
+
+async def test_ubridge_apply_filters_syntax_error(node):
+
+    filters = {
+        "bpf": ["icmp[icmptype] == 8\ntcp src port"]
+    }
+    error = UbridgeError("Cannot compile filter 'tcp src port': syntax error")
+    node._ubridge_send_batch = AsyncioMagicMock(return_value=[[], [], error])
+    with patch.object(node.project, "emit") as emit:
+        await node._ubridge_apply_filters("VPCS-10", filters)
+    emit.assert_called_with("log.warning", {"message": "Warning: ignoring BPF packet filter 'tcp src port' due to syntax error"})
+
+    node._ubridge_send_batch = AsyncioMagicMock(return_value=[UbridgeError("unknown bridge"), [], []])
+    with pytest.raises(UbridgeError):
+        await node._ubridge_apply_filters("VPCS-10", filters)
+
+
+async def test_add_ubridge_udp_connection(node):
+
+    source_nio = NIOUDP(4242, "127.0.0.1", 4243)
+    destination_nio = NIOUDP(4244, "127.0.0.1", 4245)
+    destination_nio.filters = {"latency": [10]}
+    node._ubridge_send_batch = AsyncioMagicMock(return_value=[[]] * 6)
+    await node.add_ubridge_udp_connection("VPCS-10", source_nio, destination_nio)
+    node._ubridge_send_batch.assert_called_once_with([
+        "bridge create VPCS-10",
+        "bridge add_nio_udp VPCS-10 4242 127.0.0.1 4243",
+        "bridge add_nio_udp VPCS-10 4244 127.0.0.1 4245",
+        "bridge start VPCS-10",
+        "bridge reset_packet_filters VPCS-10",
+        "bridge add_packet_filter VPCS-10 filter0 latency 10"
+    ], return_exceptions=True)
+
+
+class FakeHypervisor:
+
+    def __init__(self, project, path, working_dir, host, port=None):
+
+        self.host = host
+        self.port = 4242
+        self.process = None
+        self.commands = []
+        self.starts = 0
+
+    async def start(self):
+        self.starts += 1
+        self.process = MagicMock(pid=4242 + self.starts)
+
+    async def connect(self):
+        pass
+
+    async def stop(self):
+        self.process = None
+
+    async def send(self, command):
+        self.commands.append(command)
+        return []
+
+    async def send_batch(self, commands, return_exceptions=False):
+        self.commands.extend(commands)
+        return [[] for _ in commands]
+
+    def is_running(self):
+        return self.process is not None
+
+    def read_stdout(self):
+        return ""
+
+
+@pytest.fixture
+def shared_ubridge(config):
+
+    config.set_section_config("Server", {"shared_ubridge": True, "shared_ubridge_processes": 1})
+    with patch("gns3server.ubridge.hypervisor_pool.Hypervisor", FakeHypervisor), \
+            patch("gns3server.compute.base_node.BaseNode.ubridge_path", new_callable=PropertyMock, return_value="/bin/ubridge"):
+        yield
+
+
+async def test_shared_ubridge(compute_project, manager, shared_ubridge):
+
+    node1 = VPCSVM("test1", "00010203-0405-0607-0809-0a0b0c0d0e01", compute_project, manager)
+    node2 = VPCSVM("test2", "00010203-0405-0607-0809-0a0b0c0d0e02", compute_project, manager)
+    await node1._ubridge_send("bridge create VPCS-1")
+    await node2._ubridge_send("bridge create VPCS-2")
+    await node2._ubridge_send("bridge start VPCS-2")
+
+    hypervisor = node1.ubridge
+    assert node2.ubridge is hypervisor
+    assert node1.processes() == {}
+    assert hypervisor.commands == [
+        "bridge create {}-VPCS-1".format(node1.id),
+        "bridge create {}-VPCS-2".format(node2.id),
+        "bridge start {}-VPCS-2".format(node2.id)
+    ]
+
+    # the bridges of a node are deleted when it stops using uBridge
+    await node1._stop_ubridge()
+    assert hypervisor.commands[-1] == "bridge delete {}-VPCS-1".format(node1.id)
+    assert hypervisor.is_running()
+    await node2._stop_ubridge()
+    assert not hypervisor.is_running()
+    assert node2.ubridge is None
+
+
+async def test_shared_ubridge_batch(compute_project, manager, shared_ubridge):
+
+    node = VPCSVM("test1", "00010203-0405-0607-0809-0a0b0c0d0e01", compute_project, manager)
+    await node._ubridge_send_batch(["bridge create CLOUD-1", 'bridge add_nio_tap "CLOUD-1" "tap0"', "bridge start CLOUD-1"])
+    assert node.ubridge.commands == [
+        "bridge create {}-CLOUD-1".format(node.id),
+        'bridge add_nio_tap "{}-CLOUD-1" "tap0"'.format(node.id),
+        "bridge start {}-CLOUD-1".format(node.id)
+    ]
+    assert node.ubridge_pool.bridges(node) == ["{}-CLOUD-1".format(node.id)]
+
+    # the bridge is created again with its quoted commands
+    hypervisor = node.ubridge
+    hypervisor.process = None
+    hypervisor.commands = []
+    await node._ubridge_send("bridge stop CLOUD-1")
+    assert hypervisor.commands == [
+        "bridge create {}-CLOUD-1".format(node.id),
+        'bridge add_nio_tap "{}-CLOUD-1" "tap0"'.format(node.id),
+        "bridge start {}-CLOUD-1".format(node.id),
+        "bridge stop {}-CLOUD-1".format(node.id)
+    ]
+    await node._stop_ubridge()
+
+
+async def test_shared_ubridge_restart(compute_project, manager, shared_ubridge):
+
+    node = VPCSVM("test1", "00010203-0405-0607-0809-0a0b0c0d0e01", compute_project, manager)
+    await node._ubridge_send("bridge create VPCS-1")
+    await node._ubridge_send("bridge reset_packet_filters VPCS-1")
+    await node._ubridge_send("bridge add_packet_filter VPCS-1 filter0 latency 10")
+    await node._ubridge_send("bridge reset_packet_filters VPCS-1")
+    await node._ubridge_send("bridge start VPCS-1")
+    await node._ubridge_send("bridge create VPCS-2")
+    await node._ubridge_send("bridge delete VPCS-2")
+    hypervisor = node.ubridge
+
+    # the hypervisor has crashed, its bridges are created again
+    hypervisor.process = None
+    hypervisor.commands = []
+    await node._ubridge_send("bridge stop VPCS-1")
+    assert hypervisor.starts == 2
+    assert hypervisor.commands == [
+        "bridge create {}-VPCS-1".format(node.id),
+        "bridge reset_packet_filters {}-VPCS-1".format(node.id),
+        "bridge start {}-VPCS-1".format(node.id),
+        "bridge stop {}-VPCS-1".format(node.id)
+    ]
+    await node._stop_ubridge()
+
+
+async def test_shared_ubridge_processes(compute_project, manager, shared_ubridge, config):
+
+    config.set_section_config("Server", {"shared_ubridge": True, "shared_ubridge_processes": 2})
+    nodes = [VPCSVM("test{}".format(i), "00010203-0405-0607-0809-0a0b0c0d0e0{}".format(i), compute_project, manager) for i in range(4)]
+    for node in nodes:
+        await node._start_ubridge()
+    assert len(nodes[0].ubridge_pool.hypervisors) == 2
+    assert nodes[0].ubridge is nodes[2].ubridge
+    assert nodes[1].ubridge is nodes[3].ubridge
+    assert nodes[0].ubridge is not nodes[1].ubridge
+
+    with patch("psutil.Process") as mock:
+        mock.return_value.memory_info.return_value.rss = 1024
+        stats = ubridge_statistics(nodes)
+    assert stats["processes"] == 2
+    assert stats["memory_rss"] == 2048
+    assert stats["hypervisors"][0]["nodes"] == 2
+    assert stats["hypervisors"][0]["shared"] is True
+    assert stats["hypervisors"][0]["project_id"] == compute_project.id
+
+    for node in nodes:
+        await node._stop_ubridge()
+    assert HypervisorPool._pools.get(compute_project.id) is None
@@ -18,6 +18,7 @@
 import uuid
 import os
 import pytest
+import aiohttp
 from unittest.mock import patch, MagicMock
 from tests.utils import asyncio_patch
 
@@ -283,6 +284,61 @@ async def test_list_images_directory_not_exist(qemu):
         assert await qemu.list_images() == []
 
 
+class FakeStream:
+
+    def __init__(self, data):
+        self._data = data
+
+    async def read(self, size):
+        data, self._data = self._data[:size], self._data[size:]
+        return data
+
+
+async def test_write_image_chunk(qemu, tmpdir):
+
+    with patch("gns3server.compute.Qemu.get_images_directory", return_value=str(tmpdir)):
+        await qemu.write_image_chunk("linux.img", FakeStream(b"0123"), 0)
+        assert (await qemu.image_upload_status("linux.img", "781e5e245d69b566979b86e28d23f2c7"))["offset"] == 4
+        # a chunk sent again overwrites the end of the data
+        await qemu.write_image_chunk("linux.img", FakeStream(b"3456"), 3)
+        assert not os.path.exists(str(tmpdir / "linux.img"))
+        await qemu.write_image_chunk("linux.img", FakeStream(b"789"), 7, "781e5e245d69b566979b86e28d23f2c7")
+
+    assert (tmpdir / "linux.img").read() == "0123456789"
+    assert (tmpdir / "linux.img.md5sum").read() == "781e5e245d69b566979b86e28d23f2c7"
+    assert not os.path.exists(str(tmpdir / "linux.img.part"))
+
+
+async def test_write_image_chunk_invalid(qemu, tmpdir):
+
+    with patch("gns3server.compute.Qemu.get_images_directory", return_value=str(tmpdir)):
+        await qemu.write_image_chunk("linux.img", FakeStream(b"0123"), 0)
+        with pytest.raises(aiohttp.web.HTTPConflict):
+            await qemu.write_image_chunk("linux.img", FakeStream(b"6789"), 6)
+        with pytest.raises(aiohttp.web.HTTPConflict):
+            await qemu.write_image_chunk("linux.img", FakeStream(b"4567"), 4, "781e5e245d69b566979b86e28d23f2c7")
+
+    assert not os.path.exists(str(tmpdir / "linux.img"))
+    assert not os.path.exists(str(tmpdir / "linux.img.part"))
+
+
+async def test_image_upload_status(qemu, tmpdir, config):
+
+    config.set_section_config("Server", {"images_path": str(tmpdir)})
+    (tmpdir / "QEMU" / "linux.img").write("0123456789", ensure=True)
+
+    status = await qemu.image_upload_status("linux.img", "781e5e245d69b566979b86e28d23f2c7")
+    assert status == {"filename": "linux.img", "md5sum": "781e5e245d69b566979b86e28d23f2c7", "exists": True, "offset": 0}
+
+    # the image is copied from an image with the same MD5
+    status = await qemu.image_upload_status("linux2.img", "781e5e245d69b566979b86e28d23f2c7")
+    assert status["exists"] is True
+    assert (tmpdir / "QEMU" / "linux2.img").read() == "0123456789"
+
+    status = await qemu.image_upload_status("linux3.img", "d41d8cd98f00b204e9800998ecf8427e")
+    assert status["exists"] is False
+
+
 async def test_delete_node(vpcs, compute_project):
 
     compute_project._nodes = set()
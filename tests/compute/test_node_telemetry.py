@@ -0,0 +1,109 @@
+#!/usr/bin/env python
+#
+# Copyright (C) 2020 GNS3 Technologies Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import uuid
+from unittest.mock import MagicMock, patch
+
+from gns3server.compute.node_telemetry import NodeTelemetry
+from gns3server.compute.dynamips import Dynamips
+from gns3server.compute.dynamips.nodes.ethernet_switch import EthernetSwitch
+from gns3server.compute.dynamips.nodes.ethernet_hub import EthernetHub
+
+
+def fake_node(node_id, project_id, pid):
+
+    node = MagicMock()
+    node.id = node_id
+    node.project.id = project_id
+    process = MagicMock()
+    process.pid = pid
+    process.returncode = None
+    node.processes.return_value = {"qemu": process}
+    return node
+
+
+async def test_sample(config):
+
+    config.set_section_config("Server", {"telemetry_samples": 2})
+    telemetry = NodeTelemetry()
+    node1 = fake_node("node1", "project1", os.getpid())
+    node2 = fake_node("node2", "project2", os.getppid())
+    with patch("gns3server.compute.node_telemetry.NodeTelemetry._nodes", return_value=[node1, node2]):
+        for _ in range(3):
+            await telemetry.sample()
+
+    stats = telemetry.node_statistics("node1")
+    assert len(stats["samples"]) == 2
+    latest = stats["latest"]
+    assert latest["rss"] > 0
+    assert latest["ctx_switches"] > 0
+    assert latest["processes"]["qemu"]["pid"] == os.getpid()
+    assert [s["node_id"] for s in telemetry.project_statistics("project2")] == ["node2"]
+
+
+async def test_sample_process_not_running(config):
+
+    telemetry = NodeTelemetry()
+    node = fake_node("node1", "project1", os.getpid())
+    node.processes.return_value["qemu"].returncode = 0
+    with patch("gns3server.compute.node_telemetry.NodeTelemetry._nodes", return_value=[node]):
+        await telemetry.sample()
+    assert telemetry.node_statistics("node1")["latest"] is None
+
+    # deleted nodes are forgotten
+    with patch("gns3server.compute.node_telemetry.NodeTelemetry._nodes", return_value=[]):
+        await telemetry.sample()
+    assert telemetry.project_statistics("project1") == []
+
+
+async def test_sample_shared_process(config):
+
+    telemetry = NodeTelemetry()
+    node1 = fake_node("node1", "project1", os.getpid())
+    node2 = fake_node("node2", "project1", os.getpid())
+    with patch("gns3server.compute.node_telemetry.NodeTelemetry._nodes", return_value=[node1, node2]):
+        with patch("psutil.Process.cpu_percent", return_value=10.0) as mock:
+            await telemetry.sample()
+
+    # the process is read once and not counted in the totals of the nodes
+    assert mock.call_count == 1
+    for node_id in ("node1", "node2"):
+        latest = telemetry.node_statistics(node_id)["latest"]
+        assert latest["processes"]["qemu"]["shared"] is True
+        assert latest["processes"]["qemu"]["cpu_percent"] == 10.0
+        assert latest["cpu_percent"] == 0.0
+        assert latest["rss"] == 0
+
+
+async def test_sample_dynamips_devices(config, compute_project):
+
+    telemetry = NodeTelemetry()
+    hypervisor = MagicMock()
+    hypervisor.process.pid = os.getpid()
+    hypervisor.process.returncode = None
+    manager = Dynamips.instance()
+    switch = EthernetSwitch("SW1", str(uuid.uuid4()), compute_project, manager, hypervisor=hypervisor)
+    hub = EthernetHub("Hub1", str(uuid.uuid4()), compute_project, manager)
+    node = fake_node("node1", compute_project.id, os.getppid())
+    with patch("gns3server.compute.node_telemetry.NodeTelemetry._nodes", return_value=[switch, hub, node]):
+        await telemetry.sample()
+
+    # the switches and hubs don't prevent the other nodes from being sampled
+    assert telemetry.node_statistics(switch.id)["latest"]["processes"]["dynamips"]["pid"] == os.getpid()
+    assert telemetry.node_statistics(hub.id)["latest"] is None
+    assert telemetry.node_statistics("node1")["latest"]["rss"] > 0
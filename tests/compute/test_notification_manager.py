@@ -90,3 +90,43 @@ async def test_queue_ping():
         assert res[0] == "ping"
         assert res[1]["cpu_usage_percent"] is not None
     assert len(notifications._listeners) == 0
+
+
+async def test_queue_coalesce_node_updated():
+
+    class FakeNode:
+
+        id = "node1"
+
+        def __init__(self):
+            self.name = "PC1"
+
+        def __json__(self):
+            return {"node_id": self.id, "name": self.name}
+
+    NotificationManager.reset()
+    notifications = NotificationManager.instance()
+    node = FakeNode()
+    with notifications.queue() as queue:
+        queue._max_size = 1
+        await queue.get(5)  # ping
+        notifications.emit("node.updated", node)
+        node.name = "PC2"
+        notifications.emit("node.updated", node)
+        res = await queue.get_json(5)
+        assert res == '{"action": "node.updated", "event": {"name": "PC2", "node_id": "node1"}}'
+        assert notifications.statistics()["coalesced"] == 1
+        assert notifications.statistics()["pending"] == 0
+
+
+async def test_queue_not_bounded(config):
+
+    config.set_section_config("Server", {"notification_queue_size": 2})
+    NotificationManager.reset()
+    notifications = NotificationManager.instance()
+    with notifications.queue() as queue:
+        await queue.get(5)  # ping
+        for node_id in range(5):
+            notifications.emit("node.updated", {"node_id": str(node_id)})
+        assert queue.qsize() == 5
+        assert notifications.statistics()["dropped"] == 0
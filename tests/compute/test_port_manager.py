@@ -18,9 +18,9 @@
 import aiohttp
 import pytest
 import uuid
-from unittest.mock import patch
+from unittest.mock import patch, MagicMock
 
-from gns3server.compute.port_manager import PortManager
+from gns3server.compute.port_manager import PortManager, PortAllocator
 from gns3server.compute.project import Project
 
 
@@ -115,6 +115,91 @@ def test_release_udp_port():
     pm.reserve_udp_port(20000, project)
 
 
+def test_get_free_udp_ports():
+
+    pm = PortManager()
+    project = Project(project_id=str(uuid.uuid4()))
+    pm.reserve_udp_port(20001, project)
+    with patch("gns3server.compute.port_manager.PortManager._check_port"):
+        ports = pm.get_free_udp_ports(project, 3)
+    assert ports == [20000, 20002, 20003]
+    assert pm.udp_ports == {20000, 20001, 20002, 20003}
+
+
+def test_get_free_udp_ports_not_enough_ports():
+
+    pm = PortManager()
+    pm.udp_port_range = (20000, 20002)
+    project = Project(project_id=str(uuid.uuid4()))
+    with patch("gns3server.compute.port_manager.PortManager._check_port"):
+        with pytest.raises(aiohttp.web.HTTPConflict):
+            pm.get_free_udp_ports(project, 4)
+    # the allocated ports are released
+    assert pm.udp_ports == set()
+    pm.reserve_udp_port(20000, project)
+
+
+def test_port_allocator_cursor():
+
+    allocator = PortAllocator(20000, 20009, socket_type="UDP")
+    check_port = MagicMock()
+    assert allocator.allocate(2, "0.0.0.0", check_port) == [20000, 20001]
+    allocator.mark_released(20000)
+    # the scan continues after the last allocated port
+    assert allocator.allocate(1, "0.0.0.0", check_port) == [20002]
+    assert check_port.call_count == 3
+
+
+def test_port_allocator_busy_ports():
+
+    allocator = PortAllocator(20000, 20003, socket_type="UDP")
+
+    def check_port(host, port, socket_type):
+        if port == 20001:
+            raise OSError("Port is already used")
+
+    assert allocator.allocate(3, "0.0.0.0", check_port) == [20000, 20002, 20003]
+    assert allocator.stats()["busy"] == 1
+    with pytest.raises(aiohttp.web.HTTPConflict):
+        allocator.allocate(1, "0.0.0.0", check_port)
+    # the busy port is checked again once the range is exhausted
+    assert allocator.allocate(1, "0.0.0.0", MagicMock()) == [20001]
+    assert allocator.stats()["busy"] == 0
+
+
+def test_port_allocator_batch_is_atomic():
+
+    allocator = PortAllocator(20000, 20003, socket_type="UDP")
+    allocator.mark_allocated(20002)
+    with pytest.raises(aiohttp.web.HTTPConflict):
+        allocator.allocate(4, "0.0.0.0", MagicMock())
+    assert not allocator.is_allocated(20000)
+    assert allocator.stats() == {
+        "socket_type": "UDP",
+        "port_range": [20000, 20003],
+        "size": 4,
+        "allocated": 1,
+        "busy": 0,
+        "free": 3,
+        "occupancy": 25.0,
+        "probes": 3
+    }
+
+
+def test_port_manager_statistics():
+
+    pm = PortManager()
+    project = Project(project_id=str(uuid.uuid4()))
+    pm.reserve_udp_port(20000, project)
+    with patch("gns3server.compute.port_manager.PortManager._check_port"):
+        pm.get_free_udp_ports(project, 2)
+    pm.release_udp_ports([20001], project)
+    stats = pm.__json__()["port_ranges"]
+    assert len(stats) == 1
+    assert stats[0]["port_range"] == [20000, 30000]
+    assert stats[0]["allocated"] == 2
+
+
 def test_find_unused_port():
 
     p = PortManager().find_unused_port(1000, 10000)
@@ -178,6 +178,65 @@ async def test_project_close(node, compute_project):
     assert node.id not in node.manager._nodes
 
 
+async def test_list_files_manifest(tmpdir):
+
+    with patch("gns3server.config.Config.get_section_config", return_value={"projects_path": str(tmpdir)}):
+        project = Project(project_id=str(uuid4()))
+    for name in ("a.txt", "b.txt"):
+        with open(os.path.join(project.path, name), "w+") as f:
+            f.write(name)
+
+    files = await project.list_files()
+    assert os.path.exists(os.path.join(project.path, ".files_manifest.json"))
+
+    # unchanged files are not hashed again
+    with patch("gns3server.compute.project.Project._hash_file", return_value="modified") as mock:
+        assert await project.list_files() == files
+        assert not mock.called
+
+        with open(os.path.join(project.path, "b.txt"), "w+") as f:
+            f.write("hello world")
+        files = await project.list_files()
+        mock.assert_called_once_with(os.path.join(project.path, "b.txt"))
+        assert {"path": "b.txt", "md5sum": "modified"} in files
+
+
+async def test_list_files_without_checksum(tmpdir):
+
+    with patch("gns3server.config.Config.get_section_config", return_value={"projects_path": str(tmpdir)}):
+        project = Project(project_id=str(uuid4()))
+    with open(os.path.join(project.path, "test.txt"), "w+") as f:
+        f.write("test")
+
+    with patch("gns3server.compute.project.Project._hash_file") as mock:
+        files = await project.list_files(checksum=False)
+        assert not mock.called
+    assert files == [{"path": "test.txt", "size": 4, "mtime": os.stat(os.path.join(project.path, "test.txt")).st_mtime}]
+
+
+async def test_duplicate(tmpdir):
+
+    with patch("gns3server.config.Config.get_section_config", return_value={"projects_path": str(tmpdir)}):
+        project = Project(project_id=str(uuid4()))
+        destination = Project(project_id=str(uuid4()))
+    node_id = str(uuid4())
+    new_node_id = str(uuid4())
+    node_dir = os.path.join(project.path, "project-files", "vpcs", node_id)
+    os.makedirs(node_dir)
+    with open(os.path.join(node_dir, "startup.vpc"), "w+") as f:
+        f.write("ip 192.168.1.1")
+    open(os.path.join(node_dir, "vpcs.log"), "w+").close()
+    os.makedirs(os.path.join(project.path, "project-files", "captures"))
+    open(os.path.join(project.path, "project-files", "captures", "test.pcap"), "w+").close()
+
+    await project.duplicate(destination, {node_id: new_node_id})
+    with open(os.path.join(destination.path, "project-files", "vpcs", new_node_id, "startup.vpc")) as f:
+        assert f.read() == "ip 192.168.1.1"
+    assert not os.path.exists(os.path.join(destination.path, "project-files", "vpcs", new_node_id, "vpcs.log"))
+    assert not os.path.exists(os.path.join(destination.path, "project-files", "captures"))
+    assert not os.path.exists(os.path.join(destination.path, "project-files", "vpcs", node_id))
+
+
 async def test_list_files(tmpdir):
 
     with patch("gns3server.config.Config.get_section_config", return_value={"projects_path": str(tmpdir)}):
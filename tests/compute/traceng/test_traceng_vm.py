@@ -42,6 +42,7 @@ async def vm(compute_project, manager, ubridge_path):
     vm._start_ubridge = AsyncioMagicMock()
     vm._ubridge_hypervisor = MagicMock()
     vm._ubridge_hypervisor.is_running.return_value = True
+    vm._ubridge_hypervisor.send_batch = AsyncioMagicMock(return_value=[])
     return vm
 
 
@@ -114,6 +115,7 @@ async def test_stop(vm):
                     await vm.port_add_nio_binding(0, nio)
 
                     vm._ubridge_send = AsyncioMagicMock()
+                    vm._ubridge_send_batch = AsyncioMagicMock(return_value=[])
                     await vm.start("192.168.1.2")
                     assert vm.is_running()
 
@@ -148,6 +150,7 @@ async def test_reload(vm):
                 await vm.port_add_nio_binding(0, nio)
 
                 vm._ubridge_send = AsyncioMagicMock()
+                vm._ubridge_send_batch = AsyncioMagicMock(return_value=[])
                 await vm.start("192.168.1.2")
                 assert vm.is_running()
 
@@ -46,6 +46,7 @@ async def vm(loop, compute_project, manager, tmpdir, ubridge_path):
     vm._start_ubridge = AsyncioMagicMock()
     vm._ubridge_hypervisor = MagicMock()
     vm._ubridge_hypervisor.is_running.return_value = True
+    vm._ubridge_hypervisor.send_batch = AsyncioMagicMock(return_value=[])
     return vm
 
 
@@ -211,6 +212,7 @@ async def test_reload(vm):
                 assert vm.is_running()
 
                 vm._ubridge_send = AsyncioMagicMock()
+                vm._ubridge_send_batch = AsyncioMagicMock(return_value=[])
                 with asyncio_patch("gns3server.utils.asyncio.wait_for_process_termination"):
                     await vm.reload()
                 assert vm.is_running() is True
@@ -14,6 +14,7 @@ from gns3server.config import Config
 from gns3server.compute import MODULES
 from gns3server.compute.port_manager import PortManager
 from gns3server.compute.project_manager import ProjectManager
+from gns3server.utils.probe_cache import ProbeCache
 # this import will register all handlers
 from gns3server.handlers import *
 
@@ -246,6 +247,7 @@ def run_around_tests(monkeypatch, config, port_manager):#port_manager, controlle
 
     for module in MODULES:
         module._instance = None
+    ProbeCache._instance = None
 
     os.makedirs(os.path.join(tmppath, 'projects'))
     config.set("Server", "projects_path", os.path.join(tmppath, 'projects'))
@@ -16,12 +16,14 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 import json
+import asyncio
 import pytest
 import aiohttp
 from unittest.mock import patch, MagicMock
 
 from gns3server.controller.project import Project
 from gns3server.controller.compute import Compute, ComputeConflict
+from gns3server.version import __version__
 from tests.utils import asyncio_patch, AsyncioMagicMock
 
 
@@ -405,6 +407,18 @@ async def test_list_files(project, compute):
         await compute.close()
 
 
+async def test_list_files_without_checksum(project, compute):
+
+    res = [{"path": "test", "size": 4, "mtime": 1}]
+    response = AsyncioMagicMock()
+    response.read = AsyncioMagicMock(return_value=json.dumps(res).encode())
+    response.status = 200
+    with asyncio_patch("aiohttp.ClientSession.request", return_value=response) as mock:
+        assert await compute.list_files(project, checksum=False) == res
+        mock.assert_any_call("GET", "https://example.com:84/v2/compute/projects/{}/files?checksum=no".format(project.id), auth=None, chunked=None, data=None, headers={'content-type': 'application/json'}, timeout=None)
+        await compute.close()
+
+
 async def test_interfaces(compute):
 
     res = [
@@ -515,3 +529,78 @@ async def test_get_ip_on_same_subnet(controller):
         },
     ]
     assert await compute1.get_ip_on_same_subnet(compute2) == ('192.168.2.1', '192.168.1.2')
+
+
+async def test_compute_max_requests(compute):
+
+    compute._max_requests = 2
+    running = 0
+    max_running = 0
+
+    async def request(*args, **kwargs):
+        nonlocal running, max_running
+        running += 1
+        max_running = max(max_running, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        response = MagicMock()
+        response.status = 200
+        response.read = AsyncioMagicMock(return_value=b"")
+        return response
+
+    with patch("aiohttp.ClientSession.request", new=request):
+        await asyncio.gather(*[compute.post("/projects", {"a": "b"}) for _ in range(6)])
+        await compute.close()
+    assert max_running == 2
+    stats = compute.pool_statistics()
+    assert stats["requests"] == 6
+    assert stats["requests_in_flight"] == 0
+    assert stats["requests_queued"] == 0
+    assert stats["max_queue_wait_time"] > 0
+
+
+async def test_compute_in_process_query(controller):
+
+    compute = Compute("local", protocol="http", host="localhost", port=84, controller=controller, in_process=True)
+    compute._connected = True
+    with asyncio_patch("aiohttp.ClientSession.request") as mock:
+        response = await compute.get("/capabilities")
+        assert not mock.called
+    assert response.status == 200
+    assert response.json["version"] == __version__
+
+    response = await compute.post("/projects", {"name": "test", "project_id": "a1e920ca-338a-4e9f-b363-aa607b09dd80"})
+    assert response.status == 201
+    assert response.json["project_id"] == "a1e920ca-338a-4e9f-b363-aa607b09dd80"
+    response = await compute.post("/projects/a1e920ca-338a-4e9f-b363-aa607b09dd80/close")
+    assert response.status == 204
+    assert response.json == {}
+
+
+async def test_compute_in_process_start_traceng(controller):
+
+    compute = Compute("local", protocol="http", host="localhost", port=84, controller=controller, in_process=True)
+    compute._connected = True
+    project_id = "a1e920ca-338a-4e9f-b363-aa607b09dd80"
+    await compute.post("/projects", {"name": "test", "project_id": project_id})
+    response = await compute.post("/projects/{}/traceng/nodes".format(project_id), {"name": "TraceNG1"})
+    assert response.status == 201
+    node_id = response.json["node_id"]
+    with asyncio_patch("gns3server.compute.traceng.traceng_vm.TraceNGVM.start") as mock:
+        response = await compute.post("/projects/{}/traceng/nodes/{}/start".format(project_id, node_id), {"destination": "192.168.1.2"})
+    assert response.status == 200
+    # the handler reads the destination like a request of aiohttp
+    mock.assert_called_with(None)
+    await compute.post("/projects/{}/close".format(project_id))
+
+
+async def test_compute_in_process_query_errors(controller):
+
+    compute = Compute("local", protocol="http", host="localhost", port=84, controller=controller, in_process=True)
+    compute._connected = True
+    with pytest.raises(aiohttp.web.HTTPNotFound):
+        await compute.get("/projects/a1e920ca-338a-4e9f-b363-aa607b09dd81")
+    with pytest.raises(aiohttp.web.HTTPNotFound):
+        await compute.get("/unknown")
+    with pytest.raises(aiohttp.web.HTTPBadRequest):
+        await compute.post("/projects", {"name": 42})
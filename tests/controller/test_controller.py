@@ -21,11 +21,12 @@ import json
 import pytest
 import socket
 import aiohttp
-from unittest.mock import MagicMock, patch
+from unittest.mock import MagicMock, patch, ANY
 from tests.utils import AsyncioMagicMock, asyncio_patch
 
 from gns3server.controller.compute import Compute
 from gns3server.version import __version__
+from gns3server.controller.topology import load_topology
 
 
 def test_save(controller, controller_config_path):
@@ -118,7 +119,42 @@ async def test_load_projects(controller, projects_dir):
         f.write("")
     with asyncio_patch("gns3server.controller.Controller.load_project") as mock_load_project:
         await controller.load_projects()
-    mock_load_project.assert_called_with(os.path.join(projects_dir, "project1", "project1.gns3"), load=False)
+    mock_load_project.assert_called_with(os.path.join(projects_dir, "project1", "project1.gns3"), load=False, index=ANY)
+
+
+async def test_load_projects_from_index(controller, projects_dir):
+
+    controller.save()
+    project = await controller.add_project(name="project1", path=os.path.join(projects_dir, "project1"))
+    controller.remove_project(project)
+    with patch("gns3server.controller.load_topology", wraps=load_topology) as mock_load_topology:
+        await controller.load_projects()
+        assert mock_load_topology.call_count == 1
+        assert controller.projects[project.id].name == "project1"
+        assert controller.projects[project.id].status == "closed"
+        controller.remove_project(project)
+
+        # the project hasn't changed, the metadata are read from the index
+        await controller.load_projects()
+        assert mock_load_topology.call_count == 1
+        assert controller.projects[project.id].name == "project1"
+        controller.remove_project(project)
+
+        # the project has changed and must be parsed again
+        with open(os.path.join(projects_dir, "project1", "project1.gns3")) as f:
+            topology = json.load(f)
+        topology["name"] = "project2"
+        with open(os.path.join(projects_dir, "project1", "project1.gns3"), "w+") as f:
+            json.dump(topology, f, indent=4)
+        await controller.load_projects()
+        assert mock_load_topology.call_count == 2
+        assert controller.projects[project.id].name == "project2"
+        controller.remove_project(project)
+
+        # the index is rebuilt by another server version
+        with patch("gns3server.controller.project_index.__version__", "0.0.0"):
+            await controller.load_projects()
+        assert mock_load_topology.call_count == 3
 
 
 async def test_add_compute(controller):
@@ -16,6 +16,7 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 
+import io
 import os
 import json
 import pytest
@@ -426,6 +427,64 @@ async def test_export_images_from_vm(tmpdir, project):
             assert content == b"IMAGE"
 
 
+async def test_export_files_from_computes(tmpdir, project):
+    """
+    Files of the remote computes are streamed to the archive without temporary files
+    """
+
+    def download_file(content, status=200):
+
+        async def download(project, path):
+            data = io.BytesIO(content[path])
+
+            async def read(size):
+                return data.read(size)
+
+            response = MagicMock()
+            response.content.read = read
+            response.status = status
+            return response
+        return download
+
+    computes = []
+    for compute_id, status in (("vm1", 200), ("vm2", 200), ("vm3", 500)):
+        compute = MagicMock()
+        compute.id = compute_id
+        compute.name = compute_id
+        content = {"project-files/vpcs/{}/file{}".format(compute_id, i): os.urandom(1000 * i) for i in range(5)}
+        compute.list_files = AsyncioMagicMock(return_value=[{"path": path, "md5sum": None} for path in content])
+        compute.download_file = download_file(content, status)
+        compute.content = content
+        project._project_created_on_compute.add(compute)
+        computes.append(compute)
+
+    with open(os.path.join(project.path, "test.gns3"), 'w+') as f:
+        f.write(json.dumps({"topology": {"nodes": []}}))
+
+    temporary_dir = str(tmpdir / "tmp")
+    os.makedirs(temporary_dir)
+    project.emit_notification = MagicMock()
+    with aiozipstream.ZipFile() as z:
+        await export_project(z, project, temporary_dir)
+        await write_file(str(tmpdir / 'zipfile.zip'), z)
+    assert os.listdir(temporary_dir) == []
+
+    with zipfile.ZipFile(str(tmpdir / 'zipfile.zip')) as myzip:
+        for compute in computes[:2]:
+            for path, content in compute.content.items():
+                assert myzip.read(path) == content
+        # the files which cannot be downloaded are ignored
+        for path in computes[2].content:
+            with pytest.raises(KeyError):
+                myzip.getinfo(path)
+
+    messages = sorted(call[0][1]["message"] for call in project.emit_notification.call_args_list if call[0][0] == "log.info")
+    assert len(messages) == 3
+    assert messages[0].startswith("0 files (0.0 MB) downloaded from compute 'vm3'")
+    assert messages[1].startswith("5 files (0.0 MB) downloaded from compute 'vm1'")
+    assert messages[2].startswith("5 files (0.0 MB) downloaded from compute 'vm2'")
+
+
 async def test_export_with_ignoring_snapshots(tmpdir, project):
 
     with open(os.path.join(project.path, "test.gns3"), 'w+') as f:
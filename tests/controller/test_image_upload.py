@@ -0,0 +1,162 @@
+#!/usr/bin/env python
+#
+# Copyright (C) 2020 GNS3 Technologies Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import asyncio
+import aiohttp
+import pytest
+
+from unittest.mock import MagicMock, patch, call
+
+from gns3server.controller.compute import ComputeError, ComputeConflict
+from gns3server.controller.image_upload import upload_image
+
+# md5 of "0123456789"
+MD5 = "781e5e245d69b566979b86e28d23f2c7"
+
+
+@pytest.fixture
+def image(tmpdir):
+
+    path = str(tmpdir / "linux.img")
+    with open(path, "wb") as f:
+        f.write(b"0123456789")
+    return path
+
+
+def fake_compute(compute_id, offset=0, exists=False):
+    """
+    Compute answering to the upload status requests
+    """
+
+    compute = MagicMock()
+    compute.id = compute_id
+    compute.uploaded = []
+
+    async def post(path, data=None, **kwargs):
+        response = MagicMock()
+        if "/image-uploads/" in path:
+            response.json = {"filename": "linux.img", "md5sum": data["md5sum"], "exists": exists, "offset": offset}
+        else:
+            compute.uploaded.append((path, data))
+        return response
+
+    compute.post = MagicMock(side_effect=post)
+    return compute
+
+
+async def test_upload_image(image):
+
+    compute = fake_compute("example.com")
+    with patch("gns3server.controller.image_upload.UPLOAD_CHUNK_SIZE", 4):
+        assert await upload_image([compute], "qemu", image, "linux.img") == 1
+    assert compute.uploaded == [
+        ("/qemu/images/linux.img?offset=0", b"0123"),
+        ("/qemu/images/linux.img?offset=4", b"4567"),
+        ("/qemu/images/linux.img?offset=8&md5sum={}".format(MD5), b"89")
+    ]
+
+
+async def test_upload_image_exists(image):
+
+    compute = fake_compute("example.com", exists=True)
+    assert await upload_image([compute], "qemu", image, "linux.img") == 0
+    compute.post.assert_called_once_with("/qemu/image-uploads/linux.img", data={"md5sum": MD5})
+    assert compute.uploaded == []
+
+
+async def test_upload_image_resume(image):
+
+    compute = fake_compute("example.com", offset=6)
+    with patch("gns3server.controller.image_upload.UPLOAD_CHUNK_SIZE", 4):
+        await upload_image([compute], "qemu", image, "linux.img")
+    assert compute.uploaded == [("/qemu/images/linux.img?offset=6&md5sum={}".format(MD5), b"6789")]
+
+
+async def test_upload_image_interrupted(image):
+
+    compute = fake_compute("example.com")
+    post = compute.post.side_effect
+    failures = [ComputeError("Connection lost")]
+
+    async def unreliable_post(path, data=None, **kwargs):
+        if "offset=4" in path and failures:
+            raise failures.pop()
+        return await post(path, data=data, **kwargs)
+
+    compute.post.side_effect = unreliable_post
+    with patch("gns3server.controller.image_upload.UPLOAD_CHUNK_SIZE", 4):
+        await upload_image([compute], "qemu", image, "linux.img")
+    # the compute reported the offset 0, so the upload started again
+    assert [path for path, _ in compute.uploaded] == [
+        "/qemu/images/linux.img?offset=0",
+        "/qemu/images/linux.img?offset=0",
+        "/qemu/images/linux.img?offset=4",
+        "/qemu/images/linux.img?offset=8&md5sum={}".format(MD5)
+    ]
+
+
+async def test_upload_image_resume_corrupted(image):
+
+    compute = fake_compute("example.com", offset=6)
+    post = compute.post.side_effect
+    failures = [ComputeConflict({"message": "Bad MD5"})]
+
+    async def post_checked(path, data=None, **kwargs):
+        if "md5sum=" in path and failures:
+            raise failures.pop()
+        return await post(path, data=data, **kwargs)
+
+    compute.post.side_effect = post_checked
+    await upload_image([compute], "qemu", image, "linux.img")
+    assert compute.uploaded == [("/qemu/images/linux.img?offset=0&md5sum={}".format(MD5), b"0123456789")]
+
+
+async def test_upload_image_old_compute(image):
+
+    compute = fake_compute("example.com")
+    post = compute.post.side_effect
+
+    async def old_post(path, data=None, **kwargs):
+        if "/image-uploads/" in path:
+            raise aiohttp.web.HTTPNotFound()
+        return await post(path, data=data, **kwargs)
+
+    compute.post.side_effect = old_post
+    assert await upload_image([compute], "qemu", image, "linux.img") == 1
+    assert len(compute.uploaded) == 1
+    assert compute.uploaded[0][0] == "/qemu/images/linux.img"
+
+
+async def test_upload_image_shared(image):
+
+    compute = fake_compute("example.com")
+    await asyncio.gather(*[upload_image([compute], "qemu", image, "linux.img") for _ in range(10)])
+    assert compute.post.call_args_list.count(call("/qemu/image-uploads/linux.img", data={"md5sum": MD5})) == 1
+    assert len(compute.uploaded) == 1
+
+    # once finished a new request checks the compute again
+    await upload_image([compute], "qemu", image, "linux.img")
+    assert len(compute.uploaded) == 2
+
+
+async def test_upload_image_several_computes(image):
+
+    computes = [fake_compute("compute1"), fake_compute("compute2", exists=True), fake_compute("compute3")]
+    assert await upload_image(computes, "qemu", image, "linux.img") == 2
+    assert len(computes[0].uploaded) == 1
+    assert len(computes[1].uploaded) == 0
+    assert len(computes[2].uploaded) == 1
@@ -20,7 +20,7 @@ import pytest
 import uuid
 import os
 
-from unittest.mock import MagicMock, ANY
+from unittest.mock import MagicMock
 from tests.utils import AsyncioMagicMock
 
 from gns3server.controller.node import Node
@@ -500,8 +500,11 @@ async def test_upload_missing_image(compute, controller, images_dir):
                 node_type="qemu",
                 properties={"hda_disk_image": "linux.img"})
     open(os.path.join(images_dir, "linux.img"), 'w+').close()
+    response = MagicMock()
+    response.json = {"filename": "linux.img", "md5sum": "d41d8cd98f00b204e9800998ecf8427e", "exists": False, "offset": 0}
+    compute.post = AsyncioMagicMock(return_value=response)
     assert await node._upload_missing_image("qemu", "linux.img") is True
-    compute.post.assert_called_with("/qemu/images/linux.img", data=ANY, timeout=None)
+    compute.post.assert_called_with("/qemu/images/linux.img?offset=0&md5sum=d41d8cd98f00b204e9800998ecf8427e", data=b"", timeout=None)
 
 
 def test_update_label(node):
@@ -0,0 +1,113 @@
+#!/usr/bin/env python
+#
+# Copyright (C) 2020 GNS3 Technologies Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import uuid
+import asyncio
+import aiohttp
+import pytest
+from unittest.mock import MagicMock
+
+from tests.utils import AsyncioMagicMock
+from gns3server.controller.node_scheduler import NodeScheduler
+
+
+class FakeCompute:
+
+    def __init__(self, compute_id, memory_free=None, cpu_usage_percent=None):
+
+        self.id = compute_id
+        self.cpu_usage_percent = cpu_usage_percent
+        self.running = 0
+        self.max_running = 0
+        response = MagicMock()
+        response.json = {"memory_free": memory_free * 1024 * 1024 if memory_free else None}
+        self.get = AsyncioMagicMock(return_value=response)
+
+
+class FakeNode:
+
+    def __init__(self, compute, ram=None, started=None, fail=False):
+
+        self.id = str(uuid.uuid4())
+        self.name = self.id
+        self.compute = compute
+        self.status = "stopped"
+        self.properties = {"ram": ram} if ram else {}
+        self._started = started
+        self._fail = fail
+
+    async def start(self):
+
+        self.compute.running += 1
+        self.compute.max_running = max(self.compute.max_running, self.compute.running)
+        await asyncio.sleep(0.01)
+        self.compute.running -= 1
+        if self._started is not None:
+            self._started.append(self)
+        if self._fail:
+            raise aiohttp.web.HTTPConflict(text="Cannot start")
+
+
+async def test_concurrency_by_compute(config):
+
+    compute1 = FakeCompute("compute1")
+    compute2 = FakeCompute("compute2")
+    nodes = [FakeNode(compute1) for _ in range(6)] + [FakeNode(compute2) for _ in range(6)]
+    scheduler = NodeScheduler(concurrency=2)
+    await scheduler.run("start", [nodes])
+    assert compute1.max_running == 2
+    assert compute2.max_running == 2
+    report = scheduler.report()
+    assert report["action"] == "start"
+    assert len(report["nodes"]) == 12
+    assert all(node["latency"] >= 0.01 for node in report["nodes"])
+    assert max(node["queue_time"] for node in report["nodes"]) > 0
+
+
+async def test_memory_admission(config):
+
+    compute = FakeCompute("compute1", memory_free=1000)
+    nodes = [FakeNode(compute, ram=600) for _ in range(3)]
+    scheduler = NodeScheduler(concurrency=3)
+    await scheduler.run("start", [nodes], check_resources=True)
+    compute.get.assert_called_with("/statistics")
+    # only one node fits in the free memory at the same time
+    assert compute.max_running == 1
+
+
+async def test_cpu_overloaded(config):
+
+    compute = FakeCompute("compute1", cpu_usage_percent=95)
+    nodes = [FakeNode(compute) for _ in range(3)]
+    await NodeScheduler(concurrency=3, max_cpu_percent=90).run("start", [nodes], check_resources=True)
+    assert compute.max_running == 1
+    assert not compute.get.called
+
+
+async def test_groups(config):
+
+    compute = FakeCompute("compute1")
+    started = []
+    group1 = [FakeNode(compute, started=started, fail=True)]
+    group2 = [FakeNode(compute, started=started) for _ in range(2)]
+    scheduler = NodeScheduler(concurrency=3)
+    with pytest.raises(aiohttp.web.HTTPConflict):
+        await scheduler.run("start", [group1, group2])
+    # the nodes of the next group are started even if a node has failed
+    assert started == group1 + group2 or started == group1 + group2[::-1]
+    assert compute.max_running == 2
+    assert scheduler.report()["nodes"][0]["error"] == "Cannot start"
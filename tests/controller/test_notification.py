@@ -121,3 +121,52 @@ def test_various_notification(controller, node):
     notif.project_emit("log.warning", {"message": "Warning ASA 8 is not officially supported by GNS3"})
     notif.project_emit("log.error", {"message": "Permission denied on /tmp"})
     notif.project_emit("node.updated", node.__json__())
+
+
+async def test_event_encoded_once(controller, project):
+
+    notif = controller.notification
+    with notif.project_queue(project.id) as queue1:
+        with notif.project_queue(project.id) as queue2:
+            await queue1.get(0.1)  # ping
+            await queue2.get(0.1)  # ping
+            notif.project_emit("test", {"project_id": project.id})
+            msg1 = await queue1.get_json(5)
+            msg2 = await queue2.get_json(5)
+            assert msg1 == '{"action": "test", "event": {"project_id": "' + project.id + '"}}'
+            assert msg1 is msg2
+
+
+async def test_coalesce_node_updated(controller, project):
+
+    notif = controller.notification
+    with notif.project_queue(project.id) as queue:
+        # notifications are coalesced only when the queue is full
+        queue._max_size = 2
+        await queue.get(0.1)  # ping
+        notif.project_emit("node.updated", {"project_id": project.id, "node_id": "node1", "name": "PC1"})
+        notif.project_emit("node.updated", {"project_id": project.id, "node_id": "node2", "name": "PC2"})
+        notif.project_emit("node.updated", {"project_id": project.id, "node_id": "node1", "name": "PC3"})
+        assert (await queue.get(5))[1]["name"] == "PC2"
+        assert (await queue.get(5))[1]["name"] == "PC3"
+        assert (await queue.get(0.1))[0] == "ping"
+        assert notif.statistics()["coalesced"] == 1
+
+
+async def test_slow_listener_resync(controller, project):
+
+    notif = controller.notification
+    with notif.project_queue(project.id) as queue:
+        queue._max_size = 3
+        await queue.get(0.1)  # ping
+        for i in range(5):
+            notif.project_emit("test", {"project_id": project.id, "id": i})
+        # 3 notifications are replaced by a resync, then 1 notification is added
+        assert await queue.get(5) == ("resync", {"dropped": 3}, {})
+        assert (await queue.get(5))[1]["id"] == 3
+        assert (await queue.get(5))[1]["id"] == 4
+        stats = notif.statistics()
+        assert stats["dropped"] == 3
+        assert stats["pending"] == 0
+        assert stats["queues"][0]["project_id"] == project.id
+        assert stats["queues"][0]["resyncs"] == 1
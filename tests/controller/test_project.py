@@ -17,6 +17,7 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 import os
+import json
 import sys
 import uuid
 import pytest
@@ -309,6 +310,37 @@ async def test_add_node_iou_with_multiple_projects_different_computes(controller
     assert node6.properties["application_id"] == 4
 
 
+async def test_update_node_iou_application_id(controller):
+    """
+    Test if the application ID changed by the user is not allocated again
+    """
+
+    compute = MagicMock()
+    compute.id = "local"
+    project = await controller.add_project(project_id=str(uuid.uuid4()), name="test")
+    project.emit_notification = MagicMock()
+    response = MagicMock()
+    response.json = {"console": 2048}
+    compute.post = AsyncioMagicMock(return_value=response)
+
+    node1 = await project.add_node(compute, "test1", None, node_type="iou")
+    node2 = await project.add_node(compute, "test2", None, node_type="iou")
+    assert node1.properties["application_id"] == 1
+    assert node2.properties["application_id"] == 2
+
+    response = MagicMock()
+    response.json = {"application_id": 3}
+    compute.put = AsyncioMagicMock(return_value=response)
+    await node1.update(properties={"application_id": 3})
+    assert node1.properties["application_id"] == 3
+
+    # the ID 1 is free and the ID 3 is used
+    node3 = await project.add_node(compute, "test3", None, node_type="iou")
+    node4 = await project.add_node(compute, "test4", None, node_type="iou")
+    assert node3.properties["application_id"] == 1
+    assert node4.properties["application_id"] == 4
+
+
 async def test_add_node_iou_no_id_available(controller):
     """
     Test if an application ID is allocated for IOU nodes
@@ -325,6 +357,7 @@ async def test_add_node_iou_no_id_available(controller):
         for i in range(1, 513):
             prop = {"properties": {"application_id": i}}
             project._nodes[i] = Node(project, compute, "Node{}".format(i), node_id=i, node_type="iou", **prop)
+            controller.application_ids.add(project.id, i, compute.id, i)
         await project.add_node(compute, "test1", None, node_type="iou")
 
 
@@ -656,6 +689,23 @@ async def test_dump(projects_dir):
             assert "00010203-0405-0607-0809-0a0b0c0d0e0f" in content
 
 
+async def test_closed_data_cache(controller):
+
+    project = Project(controller=controller, name="Test")
+    await project.close()
+    with patch("json.load", wraps=json.load) as mock_json_load:
+        assert project.nodes == {}
+        assert project.links == {}
+        assert mock_json_load.call_count == 1
+
+    with open(os.path.join(project.path, "Test.gns3")) as f:
+        topology = json.load(f)
+    topology["topology"]["drawings"] = [{"drawing_id": "test", "svg": "<svg></svg>"}]
+    with open(os.path.join(project.path, "Test.gns3"), "w+") as f:
+        json.dump(topology, f, indent=4)
+    assert list(project.drawings.keys()) == ["test"]
+
+
 async def test_open_close(controller):
 
     project = Project(controller=controller, name="Test")
@@ -721,6 +771,78 @@ async def test_duplicate(project, controller):
     assert list(new_project.nodes.values())[1].compute.id == "remote"
 
 
+async def test_duplicate_files(project, controller):
+
+    compute = MagicMock()
+    compute.id = "remote"
+    controller._computes["remote"] = compute
+    response = MagicMock()
+    response.json = {"console": 2048}
+    compute.post = AsyncioMagicMock(return_value=response)
+
+    local_compute = MagicMock()
+    local_compute.id = "local"
+    local_compute.post = AsyncioMagicMock(return_value=response)
+    controller._computes["local"] = local_compute
+
+    local = await project.add_node(local_compute, "local", None, node_type="vpcs", properties={"mac_address": "00:11:22:33:44:55"})
+    remote = await project.add_node(compute, "remote", None, node_type="vpcs")
+    node_dir = os.path.join(project.path, "project-files", "vpcs", local.id)
+    os.makedirs(node_dir)
+    with open(os.path.join(node_dir, "startup.vpc"), "w+") as f:
+        f.write("ip 192.168.1.1")
+    os.makedirs(os.path.join(project.path, "snapshots"))
+    open(os.path.join(project.path, "snapshots", "test.gns3project"), "w+").close()
+
+    new_project = await project.duplicate(name="Hello")
+    assert new_project.name == "Hello"
+    node_ids = {}
+    for args, kwargs in compute.post.call_args_list:
+        if args[0] == "/projects/{}/duplicate".format(project.id):
+            assert kwargs["data"]["project_id"] == new_project.id
+            node_ids = kwargs["data"]["node_ids"]
+    assert set(node_ids) == {local.id, remote.id}
+
+    with open(os.path.join(new_project.path, "project-files", "vpcs", node_ids[local.id], "startup.vpc")) as f:
+        assert f.read() == "ip 192.168.1.1"
+    assert not os.path.exists(os.path.join(new_project.path, "snapshots"))
+
+    with open(new_project._topology_file()) as f:
+        topology = json.load(f)
+    assert topology["project_id"] == new_project.id
+    nodes = {node["name"]: node for node in topology["topology"]["nodes"]}
+    assert nodes["local"]["node_id"] == node_ids[local.id]
+    assert nodes["local"]["properties"]["mac_address"] is None
+    assert nodes["remote"]["compute_id"] == "remote"
+
+
+async def test_duplicate_compute_fallback(project, controller):
+    """
+    A compute without the duplicate API receives the files from the controller
+    """
+
+    compute = MagicMock()
+    compute.id = "remote"
+    compute.list_files = AsyncioMagicMock(return_value=[])
+    compute.delete = AsyncioMagicMock()
+    controller._computes["remote"] = compute
+    response = MagicMock()
+    response.json = {"console": 2048}
+
+    async def post(path, *args, **kwargs):
+        if path.endswith("/duplicate"):
+            raise aiohttp.web.HTTPNotFound()
+        return response
+
+    compute.post = AsyncioMagicMock(side_effect=post)
+    await project.add_node(compute, "remote", None, node_type="vpcs")
+
+    with asyncio_patch("gns3server.controller.project.import_project", return_value=project) as mock:
+        await project.duplicate(name="Hello")
+        assert mock.called
+    assert compute.delete.called
+
+
 def test_snapshots(project):
     """
     List the snapshots
@@ -797,6 +919,27 @@ async def test_start_all(project):
     assert len(compute.post.call_args_list) == 10
 
 
+async def test_start_all_groups(project):
+
+    compute = MagicMock()
+    compute.id = "local"
+    response = MagicMock()
+    response.json = {"console": 2048}
+    compute.post = AsyncioMagicMock(return_value=response)
+
+    node1 = await project.add_node(compute, "node1", None, node_type="vpcs")
+    node2 = await project.add_node(compute, "node2", None, node_type="vpcs")
+    node3 = await project.add_node(compute, "node3", None, node_type="vpcs")
+
+    compute.post = AsyncioMagicMock()
+    await project.start_all(groups=[[node3.id], [node2.id]])
+    started = [call[0][0] for call in compute.post.call_args_list]
+    assert started == ["/projects/{}/vpcs/nodes/{}/start".format(project.id, node.id) for node in (node3, node2, node1)]
+    report = project.stats()["node_scheduler"]
+    assert report["groups"] == 3
+    assert [node["node_id"] for node in report["nodes"]] == [node3.id, node2.id, node1.id]
+
+
 async def test_stop_all(project):
 
     compute = MagicMock()
@@ -854,6 +997,20 @@ async def test_node_name(project):
     assert node.name == "R3"
 
 
+def test_emit_notification_during_batch(project, controller):
+
+    controller.notification.project_emit = MagicMock()
+    project._batch_notifications = {"nodes": [], "links": [], "drawings": []}
+    project._batch_objects = {"node1"}
+
+    # a node created by a concurrent API call is notified immediately
+    project.emit_notification("node.created", {"node_id": "node2"})
+    controller.notification.project_emit.assert_called_once_with("node.created", {"node_id": "node2"}, project_id=project.id)
+    project.emit_notification("node.created", {"node_id": "node1"})
+    assert controller.notification.project_emit.call_count == 1
+    assert project._batch_notifications["nodes"] == [{"node_id": "node1"}]
+
+
 async def test_duplicate_node(project):
 
     compute = MagicMock()
@@ -872,3 +1029,49 @@ async def test_duplicate_node(project):
         })
     new_node = await project.duplicate_node(original, 42, 10, 11)
     assert new_node.x == 42
+
+
+async def test_telemetry(project):
+
+    compute = MagicMock()
+    compute.id = "local"
+    response = MagicMock()
+    response.json = {"console": 2048}
+    compute.post = AsyncioMagicMock(return_value=response)
+    node = await project.add_node(compute, "PC1", None, node_type="vpcs")
+
+    response = MagicMock()
+    response.json = [
+        {"node_id": node.id, "interval": 5, "latest": {"cpu_percent": 12.5, "rss": 1024}, "samples": []},
+        {"node_id": str(uuid.uuid4()), "interval": 5, "latest": None, "samples": []}
+    ]
+    compute.get = AsyncioMagicMock(return_value=response)
+    telemetry = await project.telemetry()
+    compute.get.assert_called_with("/projects/{}/telemetry".format(project.id))
+    assert len(telemetry["nodes"]) == 1
+    assert telemetry["nodes"][0]["name"] == "PC1"
+    assert telemetry["nodes"][0]["compute_id"] == "local"
+    assert telemetry["computes"]["local"] == {"nodes": 1, "cpu_percent": 12.5, "rss": 1024}
+
+
+async def test_telemetry_shared_process(project):
+
+    compute = MagicMock()
+    compute.id = "local"
+    response = MagicMock()
+    response.json = {"console": 2048}
+    compute.post = AsyncioMagicMock(return_value=response)
+    node1 = await project.add_node(compute, "R1", None, node_type="vpcs")
+    node2 = await project.add_node(compute, "R2", None, node_type="vpcs")
+
+    # both routers run on the same hypervisor, it is counted once
+    hypervisor = {"pid": 42, "cpu_percent": 20.0, "rss": 2048, "shared": True}
+    latest = {"cpu_percent": 0.0, "rss": 0, "processes": {"hypervisor": hypervisor}}
+    response = MagicMock()
+    response.json = [
+        {"node_id": node1.id, "interval": 5, "latest": latest, "samples": []},
+        {"node_id": node2.id, "interval": 5, "latest": latest, "samples": []}
+    ]
+    compute.get = AsyncioMagicMock(return_value=response)
+    telemetry = await project.telemetry()
+    assert telemetry["computes"]["local"] == {"nodes": 2, "cpu_percent": 20.0, "rss": 2048}
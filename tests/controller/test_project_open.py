@@ -18,12 +18,15 @@
 
 import json
 import pytest
+import asyncio
 import aiohttp
 
-from tests.utils import asyncio_patch
+from unittest.mock import MagicMock, patch
+from tests.utils import asyncio_patch, AsyncioMagicMock
 
 from gns3server.controller.compute import Compute
 from gns3server.controller.project import Project
+from gns3server.controller.ports.ethernet_port import EthernetPort
 
 
 @pytest.fixture
@@ -225,3 +228,92 @@ async def test_open(controller, tmpdir):
 #     with open(str(tmpdir / "demo.gns3"), "r") as f:
 #         topo = json.load(f)
 #         assert len(topo["topology"]["nodes"]) == 2
+
+
+async def test_open_concurrent_creation(controller, tmpdir):
+
+    nodes = []
+    for i in range(6):
+        nodes.append({
+            "compute_id": "local",
+            "node_id": "64ba8408-afbf-4b66-9cdd-1fd85442747{}".format(i),
+            "name": "PC{}".format(i),
+            "node_type": "vpcs",
+            "properties": {},
+            "x": 0,
+            "y": 0
+        })
+    links = []
+    for i in range(3):
+        links.append({
+            "link_id": "5a3e3a64-e853-4055-9503-4a14e01290f{}".format(i),
+            "nodes": [
+                {"node_id": nodes[i * 2]["node_id"], "adapter_number": 0, "port_number": 0},
+                {"node_id": nodes[i * 2 + 1]["node_id"], "adapter_number": 0, "port_number": 0}
+            ]
+        })
+    topology = {
+        "name": "demo",
+        "project_id": "3c1be6f9-b4ba-4737-b209-63c47c23359f",
+        "revision": 9,
+        "topology": {
+            "computes": [],
+            "drawings": [],
+            "links": links,
+            "nodes": nodes
+        },
+        "type": "topology",
+        "version": "2.2.0"
+    }
+
+    with open(str(tmpdir / "demo.gns3"), "w+") as f:
+        json.dump(topology, f)
+
+    compute = MagicMock()
+    compute.id = "local"
+    response = MagicMock()
+    response.json = {"udp_ports": list(range(10000, 10006))}
+    compute.post = AsyncioMagicMock(return_value=response)
+    controller._computes = {"local": compute}
+
+    running = 0
+    max_running = 0
+
+    async def create(self, *args, **kwargs):
+        nonlocal running, max_running
+        running += 1
+        max_running = max(max_running, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        self._ports = [EthernetPort("Ethernet0", 0, 0, 0)]
+
+    project = Project(name="demo",
+                      project_id="3c1be6f9-b4ba-4737-b209-63c47c23359f",
+                      path=str(tmpdir),
+                      controller=controller,
+                      filename="demo.gns3",
+                      status="closed")
+    project.emit_notification = MagicMock()
+
+    with patch("gns3server.config.Config.get_section_config", return_value={"open_project_concurrency": 4}):
+        with patch("gns3server.controller.node.Node.create", new=create):
+            with asyncio_patch("gns3server.controller.udp_link.UDPLink.create"):
+                await project.open()
+
+    assert max_running == 4
+    assert list(project.nodes.keys()) == [node["node_id"] for node in nodes]
+    assert len(project.links) == 3
+    assert all(link.created for link in project.links.values())
+    # the project is created only once on the compute and
+    # the UDP ports for the links are reserved in one request
+    assert compute.post.call_count == 3
+    compute.post.assert_any_call("/projects/{}/ports/udp/reserve".format(project.id), data={"count": 6})
+    # the link creation is mocked, the reserved ports are not used
+    compute.post.assert_any_call("/projects/{}/ports/udp/release".format(project.id), data={"ports": list(range(10000, 10006))})
+    project.emit_notification.assert_any_call("project.loading", {
+        "project_id": project.id,
+        "nodes_created": 6,
+        "nodes_total": 6,
+        "links_created": 3,
+        "links_total": 3
+    })
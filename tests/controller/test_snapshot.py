@@ -16,11 +16,15 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 import os
+import json
 import pytest
+import zipfile
 from unittest.mock import patch, MagicMock
 
 from gns3server.controller.project import Project
 from gns3server.controller.snapshot import Snapshot
+from gns3server.controller.export_project import export_project
+from gns3server.utils.asyncio import aiozipstream
 
 from tests.utils import AsyncioMagicMock
 
@@ -41,7 +45,7 @@ def test_snapshot_name(project):
     assert snapshot.name == "test1"
     assert snapshot._created_at > 0
     assert snapshot.path.startswith(os.path.join(project.path, "snapshots", "test1_"))
-    assert snapshot.path.endswith(".gns3project")
+    assert snapshot.path.endswith(".gns3snapshot")
 
     # Check if UTC conversion doesn't corrupt the path
     snap2 = Snapshot(project, filename=os.path.basename(snapshot.path))
@@ -104,3 +108,106 @@ async def test_restore(project, controller):
     project = controller.get_project(project.id)
     assert not os.path.exists(test_file)
     assert len(project.nodes) == 1
+
+
+def _write(path, content):
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w+") as f:
+        f.write(content)
+
+
+def _read(path):
+
+    with open(path) as f:
+        return f.read()
+
+
+def _chunks(project):
+
+    chunks = set()
+    for dirpath, dirnames, filenames in os.walk(os.path.join(project.path, "snapshots", "chunks")):
+        chunks.update(filenames)
+    return chunks
+
+
+async def test_create_incremental(project):
+
+    _write(os.path.join(project.path, "project-files", "vpcs", "node1", "startup.vpc"), "ip 192.168.1.1")
+    await project.snapshot(name="test1")
+    assert len(_chunks(project)) == 1
+
+    # unchanged files are not read again
+    with patch("gns3server.controller.snapshot_store.SnapshotStore.store_file") as mock:
+        snapshot = await project.snapshot(name="test2")
+        assert not mock.called
+    with open(snapshot.path) as f:
+        manifest = json.load(f)
+    assert "project-files/vpcs/node1/startup.vpc" in manifest["files"]
+    assert manifest["topology"]["project_id"] == project.id
+
+
+async def test_restore_modified_files(project, controller):
+
+    controller._notification = MagicMock()
+    modified = os.path.join(project.path, "project-files", "vpcs", "node1", "startup.vpc")
+    unmodified = os.path.join(project.path, "project-files", "vpcs", "node2", "startup.vpc")
+    _write(modified, "ip 192.168.1.1")
+    _write(unmodified, "ip 192.168.1.2")
+    snapshot = await project.snapshot(name="test")
+
+    _write(modified, "ip 10.0.0.1")
+    st = os.stat(unmodified)
+    await snapshot.restore()
+    assert _read(modified) == "ip 192.168.1.1"
+    assert _read(unmodified) == "ip 192.168.1.2"
+    # unmodified files are not written
+    assert os.stat(unmodified).st_mtime_ns == st.st_mtime_ns
+    assert os.stat(unmodified).st_ino == st.st_ino
+
+
+async def test_delete_collect_garbage(project):
+
+    path = os.path.join(project.path, "project-files", "vpcs", "node1", "startup.vpc")
+    _write(path, "ip 192.168.1.1")
+    snapshot1 = await project.snapshot(name="test1")
+    chunks1 = _chunks(project)
+    _write(path, "ip 10.0.0.1")
+    snapshot2 = await project.snapshot(name="test2")
+    chunks2 = _chunks(project) - chunks1
+    assert len(chunks2) == 1
+
+    await project.delete_snapshot(snapshot1.id)
+    assert not os.path.exists(snapshot1.path)
+    assert _chunks(project) == chunks2
+
+    await project.delete_snapshot(snapshot2.id)
+    assert _chunks(project) == set()
+
+
+async def test_restore_archive(project, controller):
+    """
+    Snapshots taken by previous versions are .gns3project archives
+    """
+
+    controller._notification = MagicMock()
+    path = os.path.join(project.path, "project-files", "vpcs", "node1", "startup.vpc")
+    _write(path, "ip 192.168.1.1")
+    os.makedirs(os.path.join(project.path, "snapshots"))
+    archive = os.path.join(project.path, "snapshots", "test_260716_100439.gns3project")
+    with aiozipstream.ZipFile(compression=zipfile.ZIP_STORED) as zstream:
+        await export_project(zstream, project, str(project.path), keep_compute_id=True, allow_all_nodes=True)
+        with open(archive, "wb") as f:
+            async for chunk in zstream:
+                f.write(chunk)
+    project.reset()
+    snapshot = list(project.snapshots.values())[0]
+    assert snapshot.is_archive
+
+    os.remove(path)
+    await snapshot.restore()
+    assert _read(path) == "ip 192.168.1.1"
+    # the snapshot IDs change when the project is reopened
+    snapshot = list(project.snapshots.values())[0]
+    await project.delete_snapshot(snapshot.id)
+    assert not os.path.exists(archive)
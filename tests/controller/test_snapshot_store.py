@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+#
+# Copyright (C) 2020 GNS3 Technologies Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import io
+import hashlib
+import os
+
+from gns3server.controller.snapshot_store import SnapshotStore
+
+
+def _write(path, content):
+
+    with open(path, "wb") as f:
+        f.write(content)
+
+
+def test_store_file(tmpdir):
+
+    store = SnapshotStore(str(tmpdir / "chunks"), chunk_size=4)
+    path = str(tmpdir / "disk")
+    _write(path, b"aaaabbbbaaaacc")
+
+    entry = store.store_file(path, md5=True)
+    assert entry["size"] == 14
+    assert entry["md5"] == hashlib.md5(b"aaaabbbbaaaacc").hexdigest()
+    assert len(entry["chunks"]) == 4
+    # the same chunk is stored once
+    assert entry["chunks"][0] == entry["chunks"][2]
+    assert store.stats() == {"written_chunks": 3, "reused_chunks": 1}
+    assert store.has_chunks(entry)
+
+    f = io.BytesIO()
+    store.read_file(entry, f)
+    assert f.getvalue() == b"aaaabbbbaaaacc"
+
+
+def test_restore_file(tmpdir):
+
+    store = SnapshotStore(str(tmpdir / "chunks"), chunk_size=4)
+    path = str(tmpdir / "disk")
+    _write(path, b"aaaabbbbcccc")
+    entry = store.store_file(path)
+
+    # unmodified file
+    assert store.restore_file(entry, path) is False
+
+    _write(path, b"aaaaXXXXccccdddd")
+    assert store.restore_file(entry, path) is True
+    with open(path, "rb") as f:
+        assert f.read() == b"aaaabbbbcccc"
+    assert os.stat(path).st_mtime_ns == entry["mtime_ns"]
+
+    os.remove(path)
+    assert store.restore_file(entry, path) is True
+    with open(path, "rb") as f:
+        assert f.read() == b"aaaabbbbcccc"
+
+
+def test_collect_garbage(tmpdir):
+
+    store = SnapshotStore(str(tmpdir / "chunks"), chunk_size=4)
+    path = str(tmpdir / "disk")
+    _write(path, b"aaaabbbb")
+    entry1 = store.store_file(path)
+    _write(path, b"aaaacccc")
+    entry2 = store.store_file(path)
+
+    assert store.collect_garbage([entry2]) == 1
+    assert store.has_chunks(entry2)
+    assert not store.has_chunks(entry1)
+    assert store.collect_garbage([]) == 2
@@ -0,0 +1,113 @@
+#!/usr/bin/env python
+#
+# Copyright (C) 2020 GNS3 Technologies Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import json
+import pytest
+import asyncio
+import aiohttp
+
+from unittest.mock import patch
+
+from gns3server.controller.project import Project
+from gns3server.controller.topology_writer import TopologyWriter
+
+
+def read_topology(project):
+
+    with open(os.path.join(project.path, project._filename)) as f:
+        return json.load(f)
+
+
+async def test_dump_is_coalesced(controller):
+
+    project = Project(controller=controller, name="Test")
+    project._topology_writer = TopologyWriter(project, delay=0.05)
+    for zoom in range(10, 20):
+        project.zoom = zoom
+        project.dump()
+    assert project._topology_writer.dirty
+    assert read_topology(project)["zoom"] == 100
+
+    await asyncio.sleep(0.2)
+    assert read_topology(project)["zoom"] == 19
+    stats = project.stats()["topology_writer"]
+    assert stats["dump_requests"] == 10
+    assert stats["writes"] == 1
+    assert stats["writes_saved"] == 9
+    assert stats["pending"] is False
+
+
+async def test_dump_without_delay(controller):
+
+    project = Project(controller=controller, name="Test")
+    project._topology_writer = TopologyWriter(project, delay=0)
+    project.zoom = 42
+    project.dump()
+    assert read_topology(project)["zoom"] == 42
+
+
+async def test_dump_flush(controller):
+
+    project = Project(controller=controller, name="Test")
+    project._topology_writer = TopologyWriter(project, delay=10)
+    project.zoom = 42
+    project.dump()
+    project.dump(flush=True)
+    assert read_topology(project)["zoom"] == 42
+    assert not project._topology_writer.dirty
+
+
+async def test_close_flush_pending_dump(controller):
+
+    project = Project(controller=controller, name="Test")
+    project._topology_writer = TopologyWriter(project, delay=10)
+    project.zoom = 42
+    project.dump()
+    await project.close()
+    assert read_topology(project)["zoom"] == 42
+
+
+async def test_failed_write_is_retried(controller):
+
+    project = Project(controller=controller, name="Test")
+    project._topology_writer = TopologyWriter(project, delay=0.05)
+    project.zoom = 42
+    project.dump()
+    with patch("shutil.move", side_effect=OSError("No space left on device")):
+        await asyncio.sleep(0.2)
+        assert read_topology(project)["zoom"] == 100
+
+    # the change is written once the error is gone, without waiting for the project to be closed
+    await asyncio.sleep(0.2)
+    assert read_topology(project)["zoom"] == 42
+    assert not project._topology_writer.dirty
+
+
+async def test_failed_flush_keeps_project_dirty(controller):
+
+    project = Project(controller=controller, name="Test")
+    project._topology_writer = TopologyWriter(project, delay=10)
+    project.zoom = 42
+    project.dump()
+    with patch("shutil.move", side_effect=OSError("No space left on device")):
+        with pytest.raises(aiohttp.web.HTTPInternalServerError):
+            project._topology_writer.flush(force=False)
+    assert project._topology_writer.dirty
+
+    project._topology_writer.flush(force=False)
+    assert read_topology(project)["zoom"] == 42
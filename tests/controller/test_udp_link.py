@@ -428,3 +428,91 @@ async def test_update_suspend(project):
         "filters": {},
         "suspend": True
     }, timeout=120)
+
+
+async def test_create_with_reserved_ports(project):
+
+    compute1 = MagicMock()
+    compute1.id = "compute1"
+    compute2 = MagicMock()
+    compute2.id = "compute2"
+
+    node1 = Node(project, compute1, "node1", node_type="vpcs")
+    node1._ports = [EthernetPort("E0", 0, 0, 4)]
+    node2 = Node(project, compute2, "node2", node_type="vpcs")
+    node2._ports = [EthernetPort("E0", 0, 3, 1)]
+
+    async def subnet_callback(compute2):
+        return ("192.168.1.1", "192.168.1.2")
+
+    compute1.get_ip_on_same_subnet.side_effect = subnet_callback
+
+    async def reserve_callback(path, data={}, **kwargs):
+        response = MagicMock()
+        response.json = {"udp_ports": [1024] if path.endswith("/reserve") else {}}
+        return response
+
+    compute1.post = AsyncioMagicMock(side_effect=reserve_callback)
+    compute2.post = AsyncioMagicMock(side_effect=reserve_callback)
+    await project.reserve_udp_ports([node1])
+
+    async def compute2_callback(path, data={}, **kwargs):
+        if "/ports/udp" in path:
+            response = MagicMock()
+            response.json = {"udp_port": 2048}
+            return response
+
+    compute2.post = AsyncioMagicMock(side_effect=compute2_callback)
+
+    link = UDPLink(project)
+    await link.add_node(node1, 0, 4)
+    await link.add_node(node2, 3, 1)
+
+    # the port reserved in advance is used instead of asking one to the compute
+    for call in compute1.post.call_args_list:
+        assert not call[0][0].endswith("/ports/udp")
+    assert link.debug_link_data[0]["lport"] == 1024
+    assert link.debug_link_data[1]["lport"] == 2048
+    assert link.debug_link_data[1]["rport"] == 1024
+
+
+async def test_create_first_side_failure(project):
+
+    compute1 = MagicMock()
+    compute2 = MagicMock()
+
+    node1 = Node(project, compute1, "node1", node_type="vpcs")
+    node1._ports = [EthernetPort("E0", 0, 0, 4)]
+    node2 = Node(project, compute2, "node2", node_type="vpcs")
+    node2._ports = [EthernetPort("E0", 0, 3, 1)]
+
+    async def subnet_callback(compute2):
+        return ("192.168.1.1", "192.168.1.2")
+
+    compute1.get_ip_on_same_subnet.side_effect = subnet_callback
+
+    async def compute1_callback(path, data={}, **kwargs):
+        if "/ports/udp" in path:
+            response = MagicMock()
+            response.json = {"udp_port": 1024}
+            return response
+        elif "/adapters" in path:
+            raise aiohttp.web.HTTPConflict(text="Error when creating the NIO")
+
+    async def compute2_callback(path, data={}, **kwargs):
+        if "/ports/udp" in path:
+            response = MagicMock()
+            response.json = {"udp_port": 2048}
+            return response
+
+    compute1.post.side_effect = compute1_callback
+    compute2.post.side_effect = compute2_callback
+
+    link = UDPLink(project)
+    await link.add_node(node1, 0, 4)
+    with pytest.raises(aiohttp.web.HTTPConflict):
+        await link.add_node(node2, 3, 1)
+
+    # both NIO are created at the same time, the second one is removed
+    compute2.delete.assert_any_call("/projects/{}/vpcs/nodes/{}/adapters/3/ports/1/nio".format(project.id, node2.id), timeout=120)
+    assert not compute1.delete.called
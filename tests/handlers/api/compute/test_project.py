@@ -147,6 +147,38 @@ async def test_close_project_invalid_uuid(compute_api):
     assert response.status == 404
 
 
+async def test_duplicate(compute_api, compute_project):
+
+    destination = ProjectManager.instance().create_project(project_id=str(uuid.uuid4()))
+    node_ids = {str(uuid.uuid4()): str(uuid.uuid4())}
+    with asyncio_patch("gns3server.compute.project.Project.duplicate") as mock:
+        response = await compute_api.post("/projects/{project_id}/duplicate".format(project_id=compute_project.id), {"project_id": destination.id, "node_ids": node_ids})
+        assert response.status == 201
+        assert response.json["project_id"] == destination.id
+        mock.assert_called_with(destination, node_ids)
+
+    response = await compute_api.post("/projects/{project_id}/duplicate".format(project_id=compute_project.id), {"project_id": str(uuid.uuid4()), "node_ids": {}})
+    assert response.status == 404
+
+
+async def test_list_files(compute_api, tmpdir):
+
+    with patch("gns3server.config.Config.get_section_config", return_value={"projects_path": str(tmpdir)}):
+        project = ProjectManager.instance().create_project(project_id="01010203-0405-0607-0809-0a0b0c0d0e0c")
+
+    with open(os.path.join(project.path, "hello"), "w+") as f:
+        f.write("world")
+
+    response = await compute_api.get("/projects/{project_id}/files".format(project_id=project.id))
+    assert response.status == 200
+    assert response.json == [{"path": "hello", "md5sum": "7d793037a0760186574b0282f2f435e7"}]
+
+    response = await compute_api.get("/projects/{project_id}/files?checksum=no".format(project_id=project.id))
+    assert response.status == 200
+    assert response.json[0]["path"] == "hello"
+    assert response.json[0]["size"] == 5
+
+
 async def test_get_file(compute_api, tmpdir):
 
     with patch("gns3server.config.Config.get_section_config", return_value={"projects_path": str(tmpdir)}):
@@ -198,3 +230,10 @@ async def test_stream_file(compute_api, tmpdir):
 
     response = await compute_api.get("/projects/{project_id}/files/../hello".format(project_id=project.id), raw=True)
     assert response.status == 404
+
+
+async def test_telemetry(compute_api, compute_project):
+
+    response = await compute_api.get("/projects/{project_id}/telemetry".format(project_id=compute_project.id))
+    assert response.status == 200
+    assert response.json == []
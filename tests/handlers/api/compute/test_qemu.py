@@ -309,6 +309,30 @@ async def test_upload_image_ova(compute_api, tmpdir):
         assert checksum == "033bd94b1168d7e4f0d644c3c95e35bf"
 
 
+async def test_upload_image_chunks(compute_api, tmpdir):
+
+    with patch("gns3server.compute.Qemu.get_images_directory", return_value=str(tmpdir)):
+        response = await compute_api.post("/qemu/image-uploads/test2", {"md5sum": "033bd94b1168d7e4f0d644c3c95e35bf"})
+        assert response.status == 200
+        assert response.json == {"filename": "test2", "md5sum": "033bd94b1168d7e4f0d644c3c95e35bf", "exists": False, "offset": 0}
+
+        response = await compute_api.post("/qemu/images/test2?offset=0", body="TE", raw=True)
+        assert response.status == 204
+        response = await compute_api.post("/qemu/image-uploads/test2", {"md5sum": "033bd94b1168d7e4f0d644c3c95e35bf"})
+        assert response.json["offset"] == 2
+
+        response = await compute_api.post("/qemu/images/test2?offset=2&md5sum=033bd94b1168d7e4f0d644c3c95e35bf", body="ST", raw=True)
+        assert response.status == 204
+        response = await compute_api.post("/qemu/image-uploads/test2", {"md5sum": "033bd94b1168d7e4f0d644c3c95e35bf"})
+        assert response.json["exists"] is True
+
+        response = await compute_api.post("/qemu/images/test2?offset=bad", body="TEST", raw=True)
+        assert response.status == 400
+
+    with open(str(tmpdir / "test2")) as f:
+        assert f.read() == "TEST"
+
+
 async def test_upload_image_forbiden_location(compute_api, tmpdir):
 
     with patch("gns3server.compute.Qemu.get_images_directory", return_value=str(tmpdir)):
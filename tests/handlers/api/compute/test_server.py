@@ -37,3 +37,17 @@ async def test_statistics_output(compute_api):
 
     response = await compute_api.get('/statistics')
     assert response.status == 200
+
+
+async def test_ubridge_statistics(compute_api):
+
+    response = await compute_api.get('/statistics/ubridge')
+    assert response.status == 200
+    assert response.json == {"processes": 0, "memory_rss": 0, "hypervisors": []}
+
+
+async def test_probe_statistics(compute_api):
+
+    response = await compute_api.get('/statistics/probes')
+    assert response.status == 200
+    assert response.json == {"entries": 0, "hits": 0, "misses": 0}
@@ -254,6 +254,24 @@ async def test_export_with_images(controller_api, tmpdir, project):
         myzip.getinfo("images/IOS/test.image")
 
 
+async def test_export_compression_level(controller_api, tmpdir, project):
+
+    project.dump = MagicMock()
+    os.makedirs(project.path, exist_ok=True)
+    with open(os.path.join(project.path, 'a'), 'w+') as f:
+        f.write('hello' * 1000)
+
+    response = await controller_api.get("/projects/{project_id}/export?compression=zip&compression_level=9".format(project_id=project.id))
+    assert response.status == 200
+    with open(str(tmpdir / 'project.zip'), 'wb+') as f:
+        f.write(response.body)
+    with zipfile.ZipFile(str(tmpdir / 'project.zip')) as myzip:
+        assert myzip.read("a") == b"hello" * 1000
+
+    response = await controller_api.get("/projects/{project_id}/export?compression_level=high".format(project_id=project.id))
+    assert response.status == 400
+
+
 async def test_export_without_images(controller_api, tmpdir, project):
 
     project.dump = MagicMock()
@@ -359,3 +377,90 @@ async def test_duplicate(controller_api, project):
     response = await controller_api.post("/projects/{project_id}/duplicate".format(project_id=project.id), {"name": "hello"})
     assert response.status == 201
     assert response.json["name"] == "hello"
+
+
+async def test_batch(controller_api, controller, compute, project):
+
+    from gns3server.controller.ports.ethernet_port import EthernetPort
+    from tests.utils import AsyncioMagicMock
+
+    response = MagicMock()
+    response.json = {"console": 2048, "udp_ports": [10000, 10001]}
+    compute.post = AsyncioMagicMock(return_value=response)
+    node1 = await project.add_node(compute, "node1", None, node_type="qemu")
+    node1._ports = [EthernetPort("E0", 0, 0, 3)]
+    node2 = await project.add_node(compute, "node2", None, node_type="qemu")
+    node2._ports = [EthernetPort("E0", 0, 2, 4)]
+
+    link_nodes = [
+        {"node_id": node1.id, "adapter_number": 0, "port_number": 3},
+        {"node_id": node2.id, "adapter_number": 2, "port_number": 4}
+    ]
+    operations = [
+        {"type": "link", "data": {"nodes": link_nodes}},
+        {"type": "node", "data": {"compute_id": "example.com", "name": "node3", "node_type": "vpcs"}},
+        {"type": "node", "data": {"compute_id": "example.com", "node_type": "vpcs"}},
+        {"type": "drawing", "data": {"svg": "<svg></svg>", "x": 10, "y": 20}},
+        {"type": "link", "data": {"nodes": link_nodes}},
+        {"type": "node", "data": {"compute_id": "unknown", "name": "node4", "node_type": "vpcs"}}
+    ]
+
+    controller.notification.project_emit = MagicMock()
+    with asyncio_patch("gns3server.controller.udp_link.UDPLink.create") as mock_create:
+        with patch("gns3server.controller.project.Project.dump") as mock_dump:
+            response = await controller_api.post("/projects/{}/batch".format(project.id), {"operations": operations})
+
+    assert response.status == 200
+    results = response.json["results"]
+    assert [result["status"] for result in results] == [201, 201, 400, 201, 409, 404]
+    assert [result["type"] for result in results] == ["link", "node", "node", "drawing", "link", "node"]
+    assert results[1]["result"]["name"] == "node3"
+    assert mock_create.call_count == 1
+    assert mock_dump.call_count == 1
+    compute.post.assert_any_call("/projects/{}/ports/udp/reserve".format(project.id), data={"count": 2})
+    # the link creation is mocked, the reserved ports are released
+    compute.post.assert_any_call("/projects/{}/ports/udp/release".format(project.id), data={"ports": [10000, 10001]})
+    assert project._udp_ports == {}
+    assert len(project.nodes) == 3
+    assert len(project.links) == 1
+    assert len(project.drawings) == 1
+
+    actions = [call[0][0] for call in controller.notification.project_emit.call_args_list]
+    assert "node.created" not in actions
+    assert "link.created" not in actions
+    event = controller.notification.project_emit.call_args_list[actions.index("batch.created")][0][1]
+    assert len(event["nodes"]) == 1
+    assert len(event["links"]) == 1
+    assert len(event["drawings"]) == 1
+
+
+async def test_batch_unexpected_error(controller_api, controller, compute, project):
+
+    from gns3server.controller.ports.ethernet_port import EthernetPort
+    from tests.utils import AsyncioMagicMock
+
+    response = MagicMock()
+    response.json = {"console": 2048, "udp_ports": [10000, 10001]}
+    compute.post = AsyncioMagicMock(return_value=response)
+    node1 = await project.add_node(compute, "node1", None, node_type="qemu")
+    node1._ports = [EthernetPort("E0", 0, 0, 3)]
+    node2 = await project.add_node(compute, "node2", None, node_type="qemu")
+    node2._ports = [EthernetPort("E0", 0, 2, 4)]
+
+    operations = [
+        {"type": "link", "data": {"nodes": [{"node_id": node1.id, "adapter_number": 0, "port_number": 3},
+                                            {"node_id": node2.id, "adapter_number": 2, "port_number": 4}]}},
+        {"type": "drawing", "data": {"svg": "<svg></svg>", "x": 10, "y": 20}}
+    ]
+    with asyncio_patch("gns3server.controller.udp_link.UDPLink.create", side_effect=KeyError("adapter")):
+        with patch.object(controller.notification, "project_emit") as project_emit:
+            response = await controller_api.post("/projects/{}/batch".format(project.id), {"operations": operations})
+
+    # the error only fails its own operation and the half-built link is deleted
+    assert response.status == 200
+    assert [result["status"] for result in response.json["results"]] == [500, 201]
+    assert len(project.links) == 0
+    assert len(project.drawings) == 1
+    assert node1.get_port(0, 3).link is None
+    # the clients have not been told about the link
+    assert "link.deleted" not in [call[0][0] for call in project_emit.call_args_list]
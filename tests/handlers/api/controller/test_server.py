@@ -74,3 +74,20 @@ async def test_statistics_output(controller_api):
 
     response = await controller_api.get('/statistics')
     assert response.status == 200
+
+
+async def test_validation_statistics(controller_api):
+
+    await controller_api.post('/computes', {"compute_id": "my_compute_id", "protocol": "http", "host": "localhost", "port": 84})
+    response = await controller_api.get('/statistics/validation')
+    assert response.status == 200
+    assert response.json["POST /v2/computes input"]["count"] >= 1
+
+
+async def test_notification_statistics(controller_api, controller):
+
+    with controller.notification.controller_queue():
+        response = await controller_api.get('/statistics/notifications')
+    assert response.status == 200
+    assert response.json["listeners"] == 1
+    assert response.json["queues"][0]["depth"] == 0
@@ -0,0 +1,112 @@
+#!/usr/bin/env python
+#
+# Copyright (C) 2020 GNS3 Technologies Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import io
+import os
+import pytest
+import zipfile
+
+from gns3server.utils.asyncio import aiozipstream
+
+
+async def _generate(zstream):
+
+    data = b''
+    async for chunk in zstream:
+        data += chunk
+    return data
+
+
+@pytest.mark.parametrize("compression", [zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED, zipfile.ZIP_BZIP2, zipfile.ZIP_LZMA])
+async def test_write(tmpdir, compression):
+
+    files = {}
+    with aiozipstream.ZipFile(compression=compression, chunksize=1000) as zstream:
+        for i in range(10):
+            path = str(tmpdir / "file{}".format(i))
+            files["file{}".format(i)] = os.urandom(i * 700) + b"a" * 3000
+            with open(path, "wb") as f:
+                f.write(files["file{}".format(i)])
+            zstream.write(path, "file{}".format(i))
+        zstream.writestr("project.gns3", b"{}")
+        os.makedirs(str(tmpdir / "directory"))
+        zstream.write(str(tmpdir / "directory"), "directory")
+        data = await _generate(zstream)
+
+    with zipfile.ZipFile(io.BytesIO(data)) as zip_file:
+        assert zip_file.testzip() is None
+        # the entries are in the order they have been added
+        assert zip_file.namelist() == ["file{}".format(i) for i in range(10)] + ["project.gns3", "directory/"]
+        for name, content in files.items():
+            assert zip_file.read(name) == content
+        assert zip_file.read("project.gns3") == b"{}"
+
+
+async def test_compression_level(tmpdir):
+
+    path = str(tmpdir / "file")
+    with open(path, "wb") as f:
+        f.write(b"hello world " * 10000)
+
+    sizes = []
+    for level in (0, 9):
+        with aiozipstream.ZipFile(compression=zipfile.ZIP_DEFLATED, compresslevel=level) as zstream:
+            zstream.write(path, "file")
+            sizes.append(len(await _generate(zstream)))
+    assert sizes[0] > sizes[1]
+
+
+async def test_settings(tmpdir):
+
+    with aiozipstream.ZipFile() as zstream:
+        assert zstream._chunksize == 1024 * 1024
+        assert zstream._compresslevel is None
+
+
+async def test_missing_file(tmpdir):
+
+    path = str(tmpdir / "file")
+    open(path, "w+").close()
+    with aiozipstream.ZipFile(compression=zipfile.ZIP_DEFLATED) as zstream:
+        zstream.write(path, "file")
+        zstream.writestr("project.gns3", b"{}")
+        os.remove(path)
+        with pytest.raises(FileNotFoundError):
+            await _generate(zstream)
+
+
+async def test_write_aiter(tmpdir):
+
+    async def data(parts):
+        for part in parts:
+            yield part
+
+    async def skipped():
+        raise aiozipstream.SkipEntry()
+        yield b''
+
+    with aiozipstream.ZipFile(compression=zipfile.ZIP_DEFLATED) as zstream:
+        zstream.write_aiter("file1", data([b"hello", b" ", b"world"]))
+        zstream.write_aiter("skipped", skipped())
+        zstream.write_aiter("file2", data([b"a" * 100000]))
+        result = await _generate(zstream)
+
+    with zipfile.ZipFile(io.BytesIO(result)) as zip_file:
+        assert zip_file.testzip() is None
+        assert zip_file.namelist() == ["file1", "file2"]
+        assert zip_file.read("file1") == b"hello world"
+        assert zip_file.read("file2") == b"a" * 100000
@@ -0,0 +1,55 @@
+#!/usr/bin/env python
+#
+# Copyright (C) 2020 GNS3 Technologies Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+
+from gns3server.utils.clone import clone_file, clone_files
+
+
+def test_clone_file(tmpdir):
+
+    source = str(tmpdir / "source")
+    destination = str(tmpdir / "a" / "b" / "destination")
+    with open(source, "w+") as f:
+        f.write("hello")
+    os.utime(source, (0, 42))
+
+    clone_file(source, destination)
+    with open(destination) as f:
+        assert f.read() == "hello"
+    assert os.stat(destination).st_mtime == 42
+
+    # the copy must not be a link to the source
+    with open(destination, "w+") as f:
+        f.write("world")
+    with open(source) as f:
+        assert f.read() == "hello"
+
+
+async def test_clone_files(tmpdir):
+
+    files = []
+    for i in range(10):
+        source = str(tmpdir / "source{}".format(i))
+        with open(source, "w+") as f:
+            f.write(str(i))
+        files.append((source, str(tmpdir / "copy" / str(i))))
+
+    await clone_files(files)
+    for i in range(10):
+        with open(str(tmpdir / "copy" / str(i))) as f:
+            assert f.read() == str(i)
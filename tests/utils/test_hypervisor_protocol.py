@@ -0,0 +1,133 @@
+#!/usr/bin/env python
+#
+# Copyright (C) 2020 GNS3 Technologies Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import pytest
+from unittest.mock import MagicMock
+
+from tests.utils import AsyncioMagicMock
+from gns3server.utils.hypervisor_protocol import ResponseParser, send_commands
+from gns3server.ubridge.ubridge_hypervisor import UBridgeHypervisor
+from gns3server.ubridge.ubridge_error import UbridgeError
+from gns3server.compute.dynamips.dynamips_hypervisor import DynamipsHypervisor
+from gns3server.compute.dynamips.dynamips_error import DynamipsError
+
+
+class FakeReader:
+    """
+    Returns the responses in chunks of a fixed size.
+    """
+
+    def __init__(self, data, chunk_size=7):
+
+        self._data = data
+        self._chunk_size = chunk_size
+
+    async def read(self, size):
+
+        chunk = self._data[:self._chunk_size]
+        self._data = self._data[self._chunk_size:]
+        return chunk
+
+
+def writer():
+
+    writer = MagicMock()
+    writer.drain = AsyncioMagicMock()
+    return writer
+
+
+def test_response_parser():
+
+    parser = ResponseParser()
+    assert parser.feed(b"101 line1\r\n101 li") == []
+    assert parser.feed(b"ne2\r\n100-OK\r\n209-unknown bridge\r\n100-0.9.18\r") == [
+        (["line1", "line2"], None),
+        ([], "unknown bridge")
+    ]
+    assert parser.feed(b"\n") == [(["0.9.18"], None)]
+
+
+def test_response_parser_split_utf8():
+
+    parser = ResponseParser()
+    data = "100-café\r\n".encode()
+    assert parser.feed(data[:8]) == []
+    assert parser.feed(data[8:]) == [(["café"], None)]
+
+
+async def test_send_commands():
+
+    w = writer()
+    reader = FakeReader(b"100-OK\r\n209-unknown bridge\r\n101 a\r\n100-b\r\n")
+    results = await send_commands(reader, w, ["bridge create br0", "bridge start br1", "bridge show"],
+                                  UbridgeError, lambda command, message: UbridgeError("{}: {}".format(command, message)),
+                                  lambda: "localhost", return_exceptions=True)
+
+    # all the commands are written at once
+    w.write.assert_called_once_with(b"bridge create br0\nbridge start br1\nbridge show\n")
+    assert results[0] == []
+    assert isinstance(results[1], UbridgeError)
+    assert str(results[1]) == "bridge start br1: unknown bridge"
+    assert results[2] == ["a", "b"]
+
+
+async def test_send_commands_raise_first_error():
+
+    # the responses of the following commands are read before raising
+    reader = FakeReader(b"209-error1\r\n209-error2\r\n100-OK\r\n")
+    with pytest.raises(UbridgeError) as e:
+        await send_commands(reader, writer(), ["cmd1", "cmd2", "cmd3"],
+                            UbridgeError, lambda command, message: UbridgeError(message),
+                            lambda: "localhost")
+    assert str(e.value) == "error1"
+    assert reader._data == b""
+
+
+async def test_send_commands_no_data():
+
+    with pytest.raises(UbridgeError):
+        await send_commands(FakeReader(b"100-OK\r\n"), writer(), ["cmd1", "cmd2"],
+                            UbridgeError, lambda command, message: UbridgeError(message),
+                            lambda: "localhost", retry_delay=0)
+
+
+async def test_ubridge_send_batch():
+
+    hypervisor = UBridgeHypervisor("127.0.0.1", 4242)
+    hypervisor.is_running = MagicMock(return_value=True)
+    hypervisor._reader = FakeReader(b"100-OK\r\n209-unknown bridge\r\n100-OK\r\n")
+    hypervisor._writer = writer()
+    with pytest.raises(UbridgeError) as e:
+        await hypervisor.send_batch(["bridge create br0", "bridge start br1", "bridge start br0"])
+    assert str(e.value) == "unknown bridge"
+
+    hypervisor._reader = FakeReader(b"101 0.9.18\r\n100-OK\r\n")
+    assert await hypervisor.send("hypervisor version") == ["0.9.18"]
+
+
+async def test_dynamips_send_batch():
+
+    hypervisor = DynamipsHypervisor("/tmp", "127.0.0.1", 7200)
+    hypervisor._reader = FakeReader(b"100-VM 'R1' created\r\n100-OK\r\n100-c200.0000.0000\r\n")
+    hypervisor._writer = writer()
+    results = await hypervisor.send_batch(['vm create "R1" 1 c7200', 'vm set_con_tcp_port "R1" 5000', 'c7200 get_mac_addr "R1"'])
+    assert results == [["VM 'R1' created"], [], ["c200.0000.0000"]]
+
+    hypervisor._reader = FakeReader(b"206-unknown VM\r\n")
+    with pytest.raises(DynamipsError) as e:
+        await hypervisor.send('vm start "R2"')
+    assert str(e.value) == "Dynamips error when running command 'vm start \"R2\"': unknown VM"
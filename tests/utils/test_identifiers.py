@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+#
+# Copyright (C) 2020 GNS3 Technologies Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import pytest
+import aiohttp
+
+from gns3server.utils.identifiers import NumberPool, NameAllocator
+from gns3server.utils.application_id import ApplicationIdAllocator
+
+
+def test_number_pool():
+
+    used = set()
+    pool = NumberPool(1, 5)
+    for _ in range(3):
+        used.add(pool.allocate(lambda number: number in used))
+    assert used == {1, 2, 3}
+
+    # the lowest released number is allocated first
+    for number in (3, 1):
+        used.remove(number)
+        pool.release(number)
+    used.add(4)
+    assert pool.allocate(lambda number: number in used) == 1
+    used.add(1)
+    assert pool.allocate(lambda number: number in used) == 3
+    used.add(3)
+    assert pool.allocate(lambda number: number in used) is None
+
+
+def test_name_allocator():
+
+    names = NameAllocator()
+    assert [names.allocate("R{0}") for _ in range(3)] == ["R1", "R2", "R3"]
+    assert names.allocate("R 2") == "R4"
+    assert names.allocate("R") == "R"
+    assert names.allocate("R") == "R5"
+
+    # the released numbers are reused
+    names.release("R2")
+    names.release("R1")
+    assert names.allocate("R{0}") == "R1"
+    assert names.allocate("R{id}") == "R2"
+    assert names.allocate("R{0}") == "R6"
+    assert "R6" in names
+
+
+def test_name_allocator_name_allocated_directly():
+
+    names = NameAllocator()
+    assert names.allocate("PC2") == "PC2"
+    assert names.allocate("PC{0}") == "PC1"
+    assert names.allocate("PC{0}") == "PC3"
+    names.release("PC2")
+    names.release("PC02")
+    assert names.allocate("PC{0}") == "PC2"
+
+
+def test_name_allocator_template():
+
+    names = NameAllocator()
+    assert names.allocate("{0}-R") == "1-R"
+    assert names.allocate("{0}-R") == "2-R"
+    assert names.allocate("R{id}-{0}") == "R1-1"
+    names.release("1-R")
+    assert names.allocate("{0}-R") == "1-R"
+    assert names.allocate("{name}-{0}") == "Node-1"
+
+    with pytest.raises(aiohttp.web.HTTPConflict):
+        names.allocate("R{0}{1}")
+    with pytest.raises(aiohttp.web.HTTPConflict):
+        names.allocate("R{0}{hello}")
+
+
+def test_application_id_allocator():
+
+    application_ids = ApplicationIdAllocator()
+    assert application_ids.get_next(["local"]) == 1
+    application_ids.add("project1", "node1", "local", 1)
+    application_ids.add("project1", "node2", "local", 2)
+    application_ids.add("project2", "node3", "remote", 3)
+    assert application_ids.get_next(["local"]) == 3
+    assert application_ids.get_next(["local", "remote"]) == 4
+
+    application_ids.remove("project1", "node1")
+    assert application_ids.get_next(["local"]) == 1
+    application_ids.remove_project("project1")
+    application_ids.remove_project("project2")
+    assert application_ids.get_next(["local", "remote"]) == 1
+
+    for application_id in range(1, 512):
+        application_ids.add("project1", "node{}".format(application_id), "local", application_id)
+    with pytest.raises(aiohttp.web.HTTPConflict):
+        application_ids.get_next(["local"])
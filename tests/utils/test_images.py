@@ -22,7 +22,7 @@ from unittest.mock import patch
 
 
 from gns3server.utils import force_unix_path
-from gns3server.utils.images import md5sum, remove_checksum, images_directories, list_images
+from gns3server.utils.images import md5sum, remove_checksum, images_directories, list_images, ImageCatalog
 
 
 def test_images_directories(tmpdir):
@@ -86,6 +86,21 @@ def test_md5sum_existing_digest(tmpdir):
     assert md5sum(fake_img) == 'aaaaa02abc4b2a76b9719d911017c592'
 
 
+def test_md5sum_outdated_digest(tmpdir):
+
+    fake_img = str(tmpdir / 'hello')
+
+    with open(fake_img, 'w+') as f:
+        f.write('hello')
+
+    with open(str(tmpdir / 'hello.md5sum'), 'w+') as f:
+        f.write('aaaaa02abc4b2a76b9719d911017c592')
+
+    # the image has been modified after its digest
+    os.utime(str(tmpdir / 'hello.md5sum'), (1, 1))
+    assert md5sum(fake_img) == '5d41402abc4b2a76b9719d911017c592'
+
+
 def test_md5sum_existing_digest_but_missing_image(tmpdir):
 
     fake_img = str(tmpdir / 'hello')
@@ -177,3 +192,70 @@ def test_list_images(tmpdir):
                 'path': 'test4.qcow2'
             }
         ]
+
+
+async def test_image_catalog(tmpdir):
+
+    path1 = tmpdir / "images" / "QEMU" / "test1.qcow2"
+    path1.write("1", ensure=True)
+    path2 = tmpdir / "images" / "QEMU" / "test2.qcow2"
+    path2.write("2", ensure=True)
+    (tmpdir / "images" / "QEMU" / "test3.bin").write("3")
+
+    catalog = ImageCatalog("qemu")
+    with patch("gns3server.config.Config.get_section_config", return_value={"images_path": str(tmpdir / "images")}):
+        assert sorted(await catalog.list_images(), key=lambda k: k['filename']) == [
+            {'filename': 'test1.qcow2', 'filesize': 1, 'md5sum': 'c4ca4238a0b923820dcc509a6f75849b', 'path': 'test1.qcow2'},
+            {'filename': 'test2.qcow2', 'filesize': 1, 'md5sum': 'c81e728d9d4c2f636f067f89cc14862c', 'path': 'test2.qcow2'}
+        ]
+        assert catalog.get_image("test1.qcow2")["md5sum"] == 'c4ca4238a0b923820dcc509a6f75849b'
+        assert catalog.get_image(str(tmpdir / "test2.qcow2"))["path"] == "test2.qcow2"
+        assert catalog.get_image_by_md5('c81e728d9d4c2f636f067f89cc14862c')["filename"] == "test2.qcow2"
+        assert catalog.get_image("test3.bin") is None
+
+        # only the modified image is hashed again
+        path2.write("22")
+        os.remove(str(path1))
+        with patch("gns3server.utils.images.md5sum", wraps=md5sum) as mock:
+            assert await catalog.list_images() == [
+                {'filename': 'test2.qcow2', 'filesize': 2, 'md5sum': 'b6d767d2f8ed5d21a44b0e5886680cb9', 'path': 'test2.qcow2'}
+            ]
+            mock.assert_called_once_with(str(path2))
+            assert await catalog.list_images() == [
+                {'filename': 'test2.qcow2', 'filesize': 2, 'md5sum': 'b6d767d2f8ed5d21a44b0e5886680cb9', 'path': 'test2.qcow2'}
+            ]
+            assert mock.call_count == 1
+        assert catalog.get_image("test1.qcow2") is None
+        assert catalog.get_image_by_md5('c81e728d9d4c2f636f067f89cc14862c') is None
+
+
+async def test_image_catalog_refresh_shared(tmpdir):
+
+    catalog = ImageCatalog("qemu")
+    with patch("gns3server.config.Config.get_section_config", return_value={"images_path": str(tmpdir / "images")}):
+        assert catalog.refresh() is catalog.refresh()
+        await catalog.refresh()
+
+
+def test_image_catalog_find_file(tmpdir):
+
+    path1 = tmpdir / "images" / "demo" / "test1.bin"
+    path1.write("1", ensure=True)
+    directory = str(tmpdir / "images")
+
+    catalog = ImageCatalog("qemu")
+    assert catalog.find_file(directory, "test1.bin") == str(path1)
+    assert catalog.find_file(directory, os.path.join("demo", "test1.bin")) == str(path1)
+    assert catalog.find_file(directory, "test2.bin") is None
+
+    # the directory is scanned again when a file is added or removed
+    path2 = tmpdir / "images" / "demo" / "test2.bin"
+    path2.write("2")
+    assert catalog.find_file(directory, "test2.bin") == str(path2)
+    os.remove(str(path1))
+    assert catalog.find_file(directory, "test1.bin") is None
+
+    with patch("os.walk") as mock:
+        assert catalog.find_file(directory, "test2.bin") == str(path2)
+        assert catalog.find_file(directory, "test3.bin") is None
+        assert not mock.called
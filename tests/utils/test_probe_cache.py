@@ -0,0 +1,126 @@
+#!/usr/bin/env python
+#
+# Copyright (C) 2020 GNS3 Technologies Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import pytest
+import asyncio
+
+from gns3server.utils.probe_cache import ProbeCache
+
+
+class FakeProbe:
+
+    def __init__(self, result):
+
+        self.result = result
+        self.calls = 0
+
+    async def __call__(self):
+
+        self.calls += 1
+        await asyncio.sleep(0.01)
+        if isinstance(self.result, Exception):
+            raise self.result
+        return self.result
+
+
+async def test_get(tmpdir):
+
+    path = str(tmpdir / "vpcs")
+    with open(path, "w+") as f:
+        f.write("1")
+
+    cache = ProbeCache()
+    probe = FakeProbe("version 0.8")
+    results = await asyncio.gather(*[cache.get(path, "-v", probe) for _ in range(5)])
+    assert results == ["version 0.8"] * 5
+    assert probe.calls == 1
+
+    # another probe of the same binary
+    assert await cache.get(path, "-h", FakeProbe("help")) == "help"
+    assert cache.statistics() == {"entries": 2, "hits": 4, "misses": 2}
+
+    # the binary has been replaced
+    with open(path, "a") as f:
+        f.write("2")
+    probe.result = "version 0.9"
+    assert await cache.get(path, "-v", probe) == "version 0.9"
+    assert probe.calls == 2
+
+
+async def test_get_not_kept(tmpdir):
+
+    path = str(tmpdir / "iou")
+    open(path, "w+").close()
+
+    cache = ProbeCache()
+    probe = FakeProbe(OSError("exec format error"))
+    with pytest.raises(OSError):
+        await cache.get(path, "-h", probe)
+    probe.result = "libssl.so => not found"
+    await cache.get(path, "ldd", probe, keep=lambda output: "not found" not in output)
+    await cache.get(path, "ldd", probe, keep=lambda output: "not found" not in output)
+    assert probe.calls == 3
+
+
+async def test_get_binary_not_found(tmpdir):
+
+    cache = ProbeCache()
+    probe = FakeProbe("version 0.8")
+    await cache.get(str(tmpdir / "missing"), "-v", probe)
+    await cache.get(None, "-v", probe)
+    assert probe.calls == 2
+    assert cache.statistics()["entries"] == 0
+
+
+async def test_get_files(tmpdir):
+
+    path = str(tmpdir / "hostid")
+    open(path, "w+").close()
+    hostid_file = str(tmpdir / "etc_hostid")
+
+    cache = ProbeCache()
+    probe = FakeProbe("007f0100")
+    await cache.get(path, "gns3vm", probe, files=[hostid_file])
+    await cache.get(path, "gns3vm", probe, files=[hostid_file])
+    assert probe.calls == 1
+
+    # the file read by the command has been created
+    with open(hostid_file, "w+") as f:
+        f.write("1234")
+    probe.result = "00001234"
+    assert await cache.get(path, "gns3vm", probe, files=[hostid_file]) == "00001234"
+    assert probe.calls == 2
+
+
+async def test_get_other_loop(tmpdir):
+
+    path = str(tmpdir / "vpcs")
+    open(path, "w+").close()
+
+    cache = ProbeCache()
+    probe = FakeProbe("version 0.8")
+    await cache.get(path, "-v", probe)
+
+    # a probe still running in another event loop is not awaited
+    other_loop = asyncio.new_event_loop()
+    try:
+        entry_key, entry = next(iter(cache._entries.items()))
+        cache._entries[entry_key] = (entry[0], other_loop.create_future(), other_loop)
+        assert await cache.get(path, "-v", probe) == "version 0.8"
+    finally:
+        other_loop.close()
+    assert probe.calls == 2
@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+#
+# Copyright (C) 2020 GNS3 Technologies Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import pytest
+import jsonschema
+
+from unittest.mock import patch
+
+from gns3server.utils.schema_registry import SchemaRegistry
+
+
+SCHEMA = {
+    "type": "object",
+    "properties": {
+        "name": {"type": "string"}
+    },
+    "required": ["name"]
+}
+
+
+def test_get_validator():
+
+    validator = SchemaRegistry.get_validator(SCHEMA)
+    assert SchemaRegistry.get_validator(SCHEMA) is validator
+    assert SchemaRegistry.get_validator(dict(SCHEMA)) is not validator
+
+
+def test_validate():
+
+    SchemaRegistry.clear_statistics()
+    SchemaRegistry.validate({"name": "test"}, SCHEMA, name="test")
+    with pytest.raises(jsonschema.ValidationError) as e:
+        SchemaRegistry.validate({"name": 42}, SCHEMA, name="test")
+    assert e.value.message == "42 is not of type 'string'"
+    assert SchemaRegistry.statistics()["test"]["count"] == 2
+
+
+def test_invalid_schema():
+
+    with pytest.raises(jsonschema.SchemaError):
+        SchemaRegistry.register({"type": 42})
+
+
+def test_output_validation_enabled(config):
+
+    assert SchemaRegistry.output_validation_enabled()
+    config.set("Server", "output_validation_rate", "0")
+    assert not SchemaRegistry.output_validation_enabled()
+    config.set("Server", "output_validation_rate", "0.5")
+    with patch("random.random", return_value=0.2):
+        assert SchemaRegistry.output_validation_enabled()
+    with patch("random.random", return_value=0.8):
+        assert not SchemaRegistry.output_validation_enabled()
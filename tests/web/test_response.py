@@ -44,3 +44,13 @@ async def test_response_file_not_found(loop, tmpdir, response):
     filename = str(tmpdir / 'hello-not-found')
     with pytest.raises(HTTPNotFound):
         await response.stream_file(filename)
+
+
+def test_response_connection_close(config):
+
+    assert Response(route="/v2/projects").headers["Connection"] == "close"
+    assert "Connection" not in Response(route="/v2/compute/projects").headers
+    config.set("Server", "keepalive", "True")
+    assert "Connection" not in Response(route="/v2/projects").headers
+    config.set("Server", "compute_keepalive", "False")
+    assert Response(route="/v2/compute/projects").headers["Connection"] == "close"